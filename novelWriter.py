@@ -5,6 +5,7 @@ novelWriter – Start Script
 """
 import os
 import sys
+import multiprocessing
 
 try:
     import PyQt5.QtWidgets  # noqa: F401
@@ -17,5 +18,6 @@ except Exception:
 os.curdir = os.path.abspath(os.path.dirname(__file__))
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     import novelwriter
     novelwriter.main(sys.argv[1:])
@@ -32,6 +32,7 @@ from PyQt5.QtWidgets import QApplication, QErrorMessage
 from novelwriter.error import exceptionHandler, logException
 from novelwriter.config import Config
 from novelwriter.shared import SharedData
+from novelwriter.profiler import NWMemory, NWProfiler, NWTimings
 
 # Package Meta
 # ============
@@ -58,6 +59,9 @@ logger = logging.getLogger(__name__)
 # Global config and data singletons
 CONFIG = Config()
 SHARED = SharedData()
+PROFILER = NWProfiler()
+TIMINGS = NWTimings()
+MEMORY = NWMemory()
 
 
 def main(sysArgs: list | None = None):
@@ -76,7 +80,9 @@ def main(sysArgs: list | None = None):
         "config=",
         "data=",
         "testmode",
-        "meminfo"
+        "meminfo",
+        "profile=",
+        "timings=",
     ]
 
     helpMsg = (
@@ -92,8 +98,14 @@ def main(sysArgs: list | None = None):
         " -h, --help     Print this message.\n"
         " -v, --version  Print program version and exit.\n"
         "     --info     Print additional runtime information.\n"
-        "     --debug    Print debug output. Includes --info.\n"
-        "     --meminfo  Show memory usage information in the status bar.\n"
+        "     --debug    Print debug output. Includes --info, and records\n"
+        "                timings of frequent operations.\n"
+        "     --meminfo  Show memory usage information in the status bar,\n"
+        "                and trace memory for the memory report.\n"
+        "     --profile= Write profiling data for start-up, project open,\n"
+        "                save, index rebuild and build to this folder.\n"
+        "     --timings= Record timings of frequent operations, and write\n"
+        "                them to this JSON file on exit.\n"
         "     --style=   Sets Qt5 style flag. Defaults to 'Fusion'.\n"
         "     --config=  Alternative config file.\n"
         "     --data=    Alternative user data path.\n"
@@ -107,6 +119,8 @@ def main(sysArgs: list | None = None):
     testMode = False
     qtStyle = "Fusion"
     cmdOpen = None
+    profilePath = None
+    timingsFile = None
 
     # Parse Options
     try:
@@ -130,6 +144,7 @@ def main(sysArgs: list | None = None):
             logLevel = logging.INFO
         elif inOpt == "--debug":
             CONFIG.isDebug = True
+            TIMINGS.enable()
             logLevel = logging.DEBUG
             logFormat  = "[{asctime:}]  {filename:>18}:{lineno:<4d}  {levelname:8}  {message:}"
         elif inOpt == "--style":
@@ -142,6 +157,11 @@ def main(sysArgs: list | None = None):
             testMode = True
         elif inOpt == "--meminfo":
             CONFIG.memInfo = True
+            MEMORY.start()
+        elif inOpt == "--profile":
+            profilePath = inArg
+        elif inOpt == "--timings":
+            timingsFile = inArg
 
     # Setup Logging
     pkgLogger = logging.getLogger(__package__)
@@ -212,10 +232,16 @@ def main(sysArgs: list | None = None):
             logger.error("Failed to set application name")
             logException()
 
+    if profilePath is not None:
+        PROFILER.enable(profilePath)
+    if timingsFile is not None:
+        TIMINGS.enable(timingsFile)
+
     # Import GUI (after dependency checks), and launch
-    from novelwriter.guimain import GuiMain
     if testMode:
-        nwGUI = GuiMain()
+        with PROFILER.profile("startup"):
+            from novelwriter.guimain import GuiMain
+            nwGUI = GuiMain()
         return nwGUI
 
     else:
@@ -234,7 +260,9 @@ def main(sysArgs: list | None = None):
         CONFIG.setTextFont(CONFIG.textFont, CONFIG.textSize)  # Makes sure these are valid
 
         # Launch main GUI
-        nwGUI = GuiMain()
+        with PROFILER.profile("startup"):
+            from novelwriter.guimain import GuiMain
+            nwGUI = GuiMain()
         nwGUI.postLaunchTasks(cmdOpen)
 
         sys.exit(nwApp.exec_())
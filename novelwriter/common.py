@@ -34,7 +34,6 @@ from pathlib import Path
 from datetime import datetime
 from configparser import ConfigParser
 from urllib.parse import urljoin
-from urllib.request import pathname2url
 
 from PyQt5.QtGui import QDesktopServices
 from PyQt5.QtCore import QCoreApplication, QUrl
@@ -511,6 +510,7 @@ def getFileSize(path: Path) -> int:
 def openExternalPath(path: Path) -> bool:
     """Open a path by passing it to the desktop environment."""
     if Path(path).exists():
+        from urllib.request import pathname2url  # Slow to import
         QDesktopServices.openUrl(
             QUrl(urljoin("file:", pathname2url(str(path))))
         )
@@ -120,6 +120,9 @@ class nwFiles:
     DICT_FILE   = "userdict.json"
     SESS_FILE   = "sessions.jsonl"
 
+    # Project Meta Folders
+    TOKEN_DIR   = "tokens"
+
 # END Class nwFiles
 
 
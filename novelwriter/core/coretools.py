@@ -289,7 +289,9 @@ class DocDuplicator:
                     return
                 hMap[tHandle] = newItem.itemHandle
                 if newItem.itemParent in hMap:
-                    newItem.setParent(hMap[newItem.itemParent])
+                    self._project.tree.setItemParent(
+                        newItem.itemHandle, hMap[newItem.itemParent]
+                    )
                     self._project.tree.updateItemData(newItem.itemHandle)
                 if newItem.isFileType():
                     oldDoc = self._project.storage.getDocument(tHandle)
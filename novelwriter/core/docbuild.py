@@ -24,13 +24,16 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import logging
+import multiprocessing
 
+from typing import Any, Callable, Tuple
 from pathlib import Path
 from collections.abc import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
 
 from PyQt5.QtGui import QFont, QFontInfo
 
-from novelwriter import CONFIG
+from novelwriter import CONFIG, TIMINGS
 from novelwriter.enum import nwBuildFmt
 from novelwriter.error import formatException, logException
 from novelwriter.constants import nwLabels
@@ -39,20 +42,36 @@ from novelwriter.core.tomd import ToMarkdown
 from novelwriter.core.toodt import ToOdt
 from novelwriter.core.tohtml import ToHtml
 from novelwriter.core.project import NWProject
-from novelwriter.core.tokenizer import Tokenizer
+from novelwriter.core.tokenizer import Tokenizer, runTokenizeTask
 from novelwriter.core.buildsettings import BuildSettings
 
 logger = logging.getLogger(__name__)
 
+# A build object, whether it converts the documents, and a function to
+# finish the build after the last document
+T_Build = Tuple[Tokenizer, bool, Callable[[], None]]
+
 
 class NWBuildDocument:
     """Core: Manuscript Document Build Class
 
     This is the core tool that assembles a project and outputs a
     manuscript, based on a build definition object (BuildSettings).
+
+    If more than one worker is set, the documents that are not in the
+    token cache are tokenized in a process pool. The documents are
+    still added to the build in order, as the headings and conversion
+    depend on the documents before them.
     """
 
-    __slots__ = ("_project", "_build", "_queue", "_error", "_cache")
+    __slots__ = (
+        "_project", "_build", "_queue", "_error", "_cache", "_workers", "_streaming",
+    )
+
+    # The minimum number of documents to tokenize to start a pool, and
+    # the number of documents read ahead of the build when using one
+    POOL_MIN_TASKS = 20
+    POOL_AHEAD = 40
 
     def __init__(self, project: NWProject, build: BuildSettings) -> None:
         self._project = project
@@ -60,6 +79,8 @@ class NWBuildDocument:
         self._queue = []
         self._error = None
         self._cache = None
+        self._workers = 1
+        self._streaming = False
         return
 
     ##
@@ -96,6 +117,22 @@ class NWBuildDocument:
         self._queue.append(tHandle)
         return
 
+    def setWorkers(self, count: int) -> None:
+        """Set the number of processes used to tokenize documents."""
+        self._workers = max(count, 1)
+        return
+
+    def setStreaming(self, state: bool) -> None:
+        """Write the output file as the documents are built, instead of
+        keeping the whole manuscript in memory. Only the peak memory is
+        affected, the files are the same. Flat Open Document files are
+        not streamed. Nothing is kept for the lastBuild object either,
+        and the cached tokens of each document are saved and released
+        once it is built.
+        """
+        self._streaming = state
+        return
+
     def queueAll(self) -> None:
         """Queue all document as defined by the build settings."""
         self._queue = []
@@ -107,145 +144,72 @@ class NWBuildDocument:
 
     def iterBuild(self, path: Path, bFormat: nwBuildFmt) -> Iterable[tuple[int, bool]]:
         """Wrapper for builders based on format."""
-        if bFormat in (nwBuildFmt.ODT, nwBuildFmt.FODT):
-            yield from self.iterBuildOpenDocument(path, bFormat == nwBuildFmt.FODT)
-        elif bFormat in (nwBuildFmt.HTML, nwBuildFmt.J_HTML):
-            yield from self.iterBuildHTML(path, asJson=bFormat == nwBuildFmt.J_HTML)
-        elif bFormat in (nwBuildFmt.STD_MD, nwBuildFmt.EXT_MD):
-            yield from self.iterBuildMarkdown(path, bFormat == nwBuildFmt.EXT_MD)
-        elif bFormat in (nwBuildFmt.NWD, nwBuildFmt.J_NWD):
-            yield from self.iterBuildNWD(path, asJson=bFormat == nwBuildFmt.J_NWD)
+        yield from self.iterBuildMulti([(path, bFormat)])
         return
 
-    def iterBuildOpenDocument(self, path: Path, isFlat: bool) -> Iterable[tuple[int, bool]]:
-        """Build an Open Document file."""
-        makeObj = ToOdt(self._project, isFlat=isFlat)
-        filtered = self._setupBuild(makeObj)
-        makeObj.initDocument()
-
-        for i, tHandle in enumerate(self._queue):
-            self._error = None
-            if filtered.get(tHandle, (False, 0))[0]:
-                yield i, self._doBuild(makeObj, tHandle)
+    def iterBuildMulti(
+        self, targets: list[tuple[Path, nwBuildFmt]]
+    ) -> Iterable[tuple[int, bool]]:
+        """Build several formats in one pass over the build queue. Each
+        document is read once and passed to the build objects of all the
+        formats. Formats with the same pre-processing share the tokens
+        through the token cache, so they are only tokenized once. The
+        build object of the last format is kept as the last build.
+        """
+        builds = []
+        for path, bFormat in targets:
+            if bFormat in (nwBuildFmt.ODT, nwBuildFmt.FODT):
+                build = self._prepareOpenDocument(path, bFormat == nwBuildFmt.FODT)
+            elif bFormat in (nwBuildFmt.HTML, nwBuildFmt.J_HTML):
+                build = self._prepareHTML(path, bFormat == nwBuildFmt.J_HTML)
+            elif bFormat in (nwBuildFmt.STD_MD, nwBuildFmt.EXT_MD):
+                build = self._prepareMarkdown(path, bFormat == nwBuildFmt.EXT_MD)
+            elif bFormat in (nwBuildFmt.NWD, nwBuildFmt.J_NWD):
+                build = self._prepareNWD(path, bFormat == nwBuildFmt.J_NWD)
             else:
-                yield i, False
-
-        makeObj.closeDocument()
+                continue
+            if build is None:
+                for makeObj, _, _ in builds:
+                    makeObj.discardStream()
+                return
+            builds.append(build)
 
-        self._error = None
-        self._cache = makeObj
+        if builds:
+            yield from self._iterBuilds(builds)
 
-        try:
-            if isFlat:
-                makeObj.saveFlatXML(path)
-            else:
-                makeObj.saveOpenDocText(path)
-        except Exception as exc:
-            logException()
-            self._error = formatException(exc)
+        return
 
+    def iterBuildOpenDocument(self, path: Path, isFlat: bool) -> Iterable[tuple[int, bool]]:
+        """Build an Open Document file."""
+        if build := self._prepareOpenDocument(path, isFlat):
+            yield from self._iterBuilds([build])
         return
 
     def iterBuildHTML(self, path: Path | None, asJson: bool = False) -> Iterable[tuple[int, bool]]:
         """Build an HTML file. If path is None, no file is saved. This
         is used for generating build previews.
         """
-        makeObj = ToHtml(self._project)
-        filtered = self._setupBuild(makeObj)
-
-        for i, tHandle in enumerate(self._queue):
-            self._error = None
-            if filtered.get(tHandle, (False, 0))[0]:
-                yield i, self._doBuild(makeObj, tHandle)
-            else:
-                yield i, False
-
-        if self._build.getBool("format.replaceTabs"):
-            makeObj.replaceTabs()
-
-        self._error = None
-        self._cache = makeObj
-
-        if isinstance(path, Path):
-            try:
-                if asJson:
-                    makeObj.saveHtmlJson(path)
-                else:
-                    makeObj.saveHtml5(path)
-            except Exception as exc:
-                logException()
-                self._error = formatException(exc)
-
+        if build := self._prepareHTML(path, asJson):
+            yield from self._iterBuilds([build])
         return
 
     def iterBuildMarkdown(self, path: Path, extendedMd: bool) -> Iterable[tuple[int, bool]]:
         """Build a Markdown file."""
-        makeObj = ToMarkdown(self._project)
-        filtered = self._setupBuild(makeObj)
-
-        if extendedMd:
-            makeObj.setExtendedMarkdown()
-        else:
-            makeObj.setStandardMarkdown()
-
-        if self._build.getBool("format.replaceTabs"):
-            makeObj.replaceTabs(nSpaces=4, spaceChar=" ")
-
-        for i, tHandle in enumerate(self._queue):
-            self._error = None
-            if filtered.get(tHandle, (False, 0))[0]:
-                yield i, self._doBuild(makeObj, tHandle)
-            else:
-                yield i, False
-
-        self._error = None
-        self._cache = makeObj
-
-        try:
-            makeObj.saveMarkdown(path)
-        except Exception as exc:
-            logException()
-            self._error = formatException(exc)
-
+        if build := self._prepareMarkdown(path, extendedMd):
+            yield from self._iterBuilds([build])
         return
 
     def iterBuildNWD(self, path: Path | None, asJson: bool = False) -> Iterable[tuple[int, bool]]:
         """Build a novelWriter Markdown file."""
-        makeObj = ToMarkdown(self._project)
-        filtered = self._setupBuild(makeObj)
-
-        makeObj.setKeepMarkdown(True)
-
-        for i, tHandle in enumerate(self._queue):
-            self._error = None
-            if filtered.get(tHandle, (False, 0))[0]:
-                yield i, self._doBuild(makeObj, tHandle, convert=False)
-            else:
-                yield i, False
-
-        if self._build.getBool("format.replaceTabs"):
-            makeObj.replaceTabs(nSpaces=4, spaceChar=" ")
-
-        self._error = None
-        self._cache = makeObj
-
-        if isinstance(path, Path):
-            try:
-                if asJson:
-                    makeObj.saveRawMarkdownJSON(path)
-                else:
-                    makeObj.saveRawMarkdown(path)
-            except Exception as exc:
-                logException()
-                self._error = formatException(exc)
-
+        if build := self._prepareNWD(path, asJson):
+            yield from self._iterBuilds([build])
         return
 
     ##
     #  Internal Functions
     ##
 
-    def _setupBuild(self, bldObj: Tokenizer) -> dict:
+    def _setupBuild(self, bldObj: Tokenizer) -> None:
         """Configure the build object."""
         # Get Settings
         textFont = self._build.getStr("format.textFont")
@@ -276,6 +240,7 @@ class NWBuildDocument:
         bldObj.setComments(self._build.getBool("text.includeComments"))
         bldObj.setKeywords(self._build.getBool("text.includeKeywords"))
         bldObj.setBodyText(self._build.getBool("text.includeBodyText"))
+        bldObj.setTokenCache(self._project.tokenCache)
 
         if isinstance(bldObj, ToHtml):
             bldObj.setStyles(self._build.getBool("html.addStyles"))
@@ -299,13 +264,194 @@ class NWBuildDocument:
                 scale*self._build.getFloat("format.rightMargin"),
             )
 
+        return
+
+    def _prepareOpenDocument(self, path: Path, isFlat: bool) -> T_Build | None:
+        """Set up an Open Document build."""
+        makeObj = ToOdt(self._project, isFlat=isFlat)
+        self._setupBuild(makeObj)
+        makeObj.initDocument()
+        if self._streaming and not self._tryWrite(makeObj.openOpenDocTextStream):
+            return None
+
+        def finish() -> None:
+            makeObj.closeDocument()
+            if isFlat:
+                self._tryWrite(makeObj.saveFlatXML, path)
+            else:
+                self._tryWrite(makeObj.saveOpenDocText, path)
+            return
+
+        return makeObj, True, finish
+
+    def _prepareHTML(self, path: Path | None, asJson: bool) -> T_Build | None:
+        """Set up an HTML build."""
+        makeObj = ToHtml(self._project)
+        self._setupBuild(makeObj)
+        replaceTabs = self._build.getBool("format.replaceTabs")
+
+        stream = self._streaming and isinstance(path, Path)
+        if stream:
+            openStream = makeObj.openHtmlJsonStream if asJson else makeObj.openHtml5Stream
+            if not self._tryWrite(openStream, path):
+                return None
+            if replaceTabs:
+                makeObj.replaceTabs()
+
+        def finish() -> None:
+            if stream:
+                self._tryWrite(makeObj.closeStream)
+                return
+            if replaceTabs:
+                makeObj.replaceTabs()
+            if isinstance(path, Path):
+                if asJson:
+                    self._tryWrite(makeObj.saveHtmlJson, path)
+                else:
+                    self._tryWrite(makeObj.saveHtml5, path)
+            return
+
+        return makeObj, True, finish
+
+    def _prepareMarkdown(self, path: Path, extendedMd: bool) -> T_Build | None:
+        """Set up a Markdown build."""
+        makeObj = ToMarkdown(self._project)
+        self._setupBuild(makeObj)
+
+        if extendedMd:
+            makeObj.setExtendedMarkdown()
+        else:
+            makeObj.setStandardMarkdown()
+
+        if self._build.getBool("format.replaceTabs"):
+            makeObj.replaceTabs(nSpaces=4, spaceChar=" ")
+
+        stream = self._streaming
+        if stream and not self._tryWrite(makeObj.openMarkdownStream, path):
+            return None
+
+        def finish() -> None:
+            if stream:
+                self._tryWrite(makeObj.closeStream)
+            else:
+                self._tryWrite(makeObj.saveMarkdown, path)
+            return
+
+        return makeObj, True, finish
+
+    def _prepareNWD(self, path: Path | None, asJson: bool) -> T_Build | None:
+        """Set up a novelWriter Markdown build."""
+        makeObj = ToMarkdown(self._project)
+        self._setupBuild(makeObj)
+        replaceTabs = self._build.getBool("format.replaceTabs")
+
+        makeObj.setKeepMarkdown(True)
+
+        stream = self._streaming and isinstance(path, Path)
+        if stream:
+            if asJson:
+                openStream = makeObj.openRawMarkdownJSONStream
+            else:
+                openStream = makeObj.openRawMarkdownStream
+            if not self._tryWrite(openStream, path):
+                return None
+            if replaceTabs:
+                makeObj.replaceTabs(nSpaces=4, spaceChar=" ")
+
+        def finish() -> None:
+            if stream:
+                self._tryWrite(makeObj.closeStream)
+                return
+            if replaceTabs:
+                makeObj.replaceTabs(nSpaces=4, spaceChar=" ")
+            if isinstance(path, Path):
+                if asJson:
+                    self._tryWrite(makeObj.saveRawMarkdownJSON, path)
+                else:
+                    self._tryWrite(makeObj.saveRawMarkdown, path)
+            return
+
+        return makeObj, False, finish
+
+    def _tryWrite(self, write: Callable, *args: Any) -> bool:
+        """Call a function that writes the output, and record the error
+        if it fails.
+        """
+        try:
+            write(*args)
+        except Exception as exc:
+            logException()
+            self._error = formatException(exc)
+            return False
+        return True
+
+    def _iterBuilds(self, builds: list[T_Build]) -> Iterable[tuple[int, bool]]:
+        """Build the queued documents in order, and finish the builds.
+        The builds that don't convert go first for each document, as
+        they keep the markdown, and their cached tokens can then be used
+        by the other builds. When tokenizing in a process pool, the
+        documents are read a window ahead of the build, and the tokens
+        of each document are added to the token cache as they are
+        needed. If the build is stopped early, the unfinished output
+        files are discarded.
+        """
         filtered = self._build.buildItemFilter(
             self._project, withRoots=self._build.getBool("text.addNoteHeadings")
         )
+        order = sorted(builds, key=lambda x: x[1])
+        pool = None
+        if self._workers > 1:
+            pool = _TokenizePool(
+                self._project, [x[0] for x in order], self._workers, self.POOL_MIN_TASKS
+            )
+            ahead = iter(
+                (tHandle, self._readText(tHandle)) for tHandle in self._queue
+                if filtered.get(tHandle, (False, 0))[0]
+            )
+        done = False
+        try:
+            for i, tHandle in enumerate(self._queue):
+                self._error = None
+                if filtered.get(tHandle, (False, 0))[0]:
+                    text = None
+                    if pool is not None:
+                        while pool.ahead < self.POOL_AHEAD and (entry := next(ahead, None)):
+                            pool.queue(*entry)
+                        text = pool.collect(tHandle)
+                    if text is None and len(order) > 1:
+                        text = self._readText(tHandle)
+                    result = [self._doBuild(b, tHandle, text, c) for b, c, _ in order]
+                    if self._streaming:
+                        self._project.tokenCache.release(tHandle)
+                    yield i, all(result)
+                else:
+                    yield i, False
+            done = True
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if not done:
+                for makeObj, _, _ in builds:
+                    makeObj.discardStream()
+
+        self._project.tokenCache.saveCache()
+        self._error = None
+        for makeObj, _, finish in builds:
+            self._cache = makeObj
+            finish()
 
-        return filtered
+        return
+
+    def _readText(self, tHandle: str) -> str | None:
+        """Read the text of a document, if the item is a file."""
+        tItem = self._project.tree[tHandle]
+        if tItem and tItem.isFileType():
+            return self._project.storage.getDocument(tHandle).readDocument() or ""
+        return None
 
-    def _doBuild(self, bldObj: Tokenizer, tHandle: str, convert: bool = True) -> bool:
+    def _doBuild(
+        self, bldObj: Tokenizer, tHandle: str, text: str | None = None, convert: bool = True
+    ) -> bool:
         """Build a single document and add it to the build object."""
         tItem = self._project.tree[tHandle]
         if isinstance(tItem, NWItem):
@@ -313,14 +459,17 @@ class NWBuildDocument:
                 if tItem.isRootType() and not tItem.isNovelLike():
                     bldObj.addRootHeading(tHandle)
                     if convert:
-                        bldObj.doConvert()
+                        with TIMINGS.timer("build.convert"):
+                            bldObj.doConvert()
                 elif tItem.isFileType():
-                    bldObj.setText(tHandle)
-                    bldObj.doPreProcessing()
-                    bldObj.tokenizeText()
-                    bldObj.doHeaders()
+                    with TIMINGS.timer("build.tokenize"):
+                        bldObj.setText(tHandle, text)
+                        bldObj.doPreProcessing()
+                        bldObj.tokenizeText()
+                        bldObj.doHeaders()
                     if convert:
-                        bldObj.doConvert()
+                        with TIMINGS.timer("build.convert"):
+                            bldObj.doConvert()
                 else:
                     logger.info(f"Build: Skipping '{tHandle}'")
 
@@ -332,3 +481,124 @@ class NWBuildDocument:
         return True
 
 # END Class NWBuildDocument
+
+
+class _TokenizePool:
+    """Core: Tokenize Pool Class
+
+    Tokenizes the documents queued ahead of a build in a process pool.
+    Only the documents not in the token cache are tokenized, and the
+    pool is started once enough of them are waiting. The queued texts
+    are dropped when the build collects the document.
+    """
+
+    def __init__(
+        self, project: NWProject, bldObjs: list[Tokenizer], workers: int, minTasks: int
+    ) -> None:
+        self._project = project
+        self._bldObjs = bldObjs
+        self._workers = workers
+        self._minTasks = minTasks
+        self._pool: ProcessPoolExecutor | None = None
+        self._failed = False
+        self._texts: dict[str, str | None] = {}
+        self._tasks: dict[str, list[tuple[str, str, dict | Future]]] = {}
+        self._waiting = 0
+        self._count = 0
+        return
+
+    @property
+    def ahead(self) -> int:
+        """Return the number of documents queued ahead of the build."""
+        return len(self._texts)
+
+    def queue(self, tHandle: str, text: str | None) -> None:
+        """Queue a document, and submit its tasks if the pool is
+        running, or start the pool if enough tasks are waiting.
+        """
+        self._texts[tHandle] = text
+        if text is None or self._failed:
+            return
+
+        cache = self._project.tokenCache
+        tasks = self._tasks.setdefault(tHandle, [])
+        for bldObj in self._bldObjs:
+            if (result := bldObj.tokenizeTask(tHandle, text)) is None:
+                continue
+            sKey, tHash, task = result
+            if any(x[0] == sKey and x[1] == tHash for x in tasks):
+                continue
+            if cache.get(tHandle, sKey, tHash, task["keepMarkdown"]) is None:
+                tasks.append((sKey, tHash, task))
+                self._waiting += 1
+
+        if self._pool is None and self._waiting >= self._minTasks:
+            self._startPool()
+        if self._pool is not None:
+            self._submitWaiting()
+
+        return
+
+    def collect(self, tHandle: str) -> str | None:
+        """Add the tokens of a document from the pool to the token
+        cache, and return its text, if it was queued. Tasks that failed
+        or were never submitted are left to the build.
+        """
+        for sKey, tHash, task in self._tasks.pop(tHandle, []):
+            if not isinstance(task, Future):
+                self._waiting -= 1
+                continue
+            try:
+                with TIMINGS.timer("build.wait"):
+                    tokens, markdown = task.result()
+                self._project.tokenCache.put(tHandle, sKey, tHash, tokens, markdown)
+                self._count += 1
+            except Exception:
+                logger.error(f"Build: Failed to tokenize '{tHandle}' in the process pool")
+                logException()
+        return self._texts.pop(tHandle, None)
+
+    def shutdown(self) -> None:
+        """Cancel the tasks that haven't started, and stop the pool."""
+        if self._pool is not None:
+            for tasks in self._tasks.values():
+                for _, _, task in tasks:
+                    if isinstance(task, Future):
+                        task.cancel()
+            self._pool.shutdown()
+            self._pool = None
+            logger.info(f"Build: Tokenized {self._count} documents in the process pool")
+        self._texts = {}
+        self._tasks = {}
+        return
+
+    ##
+    #  Internal Functions
+    ##
+
+    @TIMINGS.timed("build.pool")
+    def _startPool(self) -> None:
+        """Start the process pool."""
+        logger.info(f"Build: Starting a pool of {self._workers} processes")
+        try:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        except Exception:
+            logger.error("Build: Failed to start the process pool")
+            logException()
+            self._failed = True
+            self._tasks = {}
+            self._waiting = 0
+        return
+
+    def _submitWaiting(self) -> None:
+        """Submit the tasks that are waiting to the pool."""
+        for tasks in self._tasks.values():
+            for i, (sKey, tHash, task) in enumerate(tasks):
+                if not isinstance(task, Future):
+                    tasks[i] = (sKey, tHash, self._pool.submit(runTokenizeTask, task))
+        self._waiting = 0
+        return
+
+# END Class _TokenizePool
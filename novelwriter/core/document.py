@@ -30,6 +30,7 @@ from time import time
 from typing import TYPE_CHECKING
 from pathlib import Path
 
+from novelwriter import TIMINGS
 from novelwriter.enum import nwItemLayout, nwItemClass
 from novelwriter.error import formatException
 from novelwriter.common import formatTimeStamp, isHandle
@@ -121,6 +122,7 @@ class NWDocument:
 
         return (contentPath / f"{self._handle}.nwd").is_file()
 
+    @TIMINGS.timed("document.read")
     def readDocument(self, isOrphan: bool = False) -> str | None:
         """Read the document specified by the handle set in the
         constructor, capturing potential file system errors and parse
@@ -179,6 +181,7 @@ class NWDocument:
 
         return text
 
+    @TIMINGS.timed("document.write")
     def writeDocument(self, text: str, forceWrite: bool = False) -> bool:
         """Write the document specified by the handle attribute. Handle
         any IO errors in the process  Returns True if successful, False
@@ -247,6 +250,7 @@ class NWDocument:
 
         self._lastHash = writeHash
         self._hashError = False
+        self._project.storage.watcher.refreshRecord(self._handle)
 
         return True
 
@@ -274,6 +278,8 @@ class NWDocument:
             self._docError = formatException(exc)
             return False
 
+        self._project.storage.watcher.refreshRecord(self._handle)
+
         return True
 
     ##
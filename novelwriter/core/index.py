@@ -29,6 +29,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import json
+import hashlib
 import logging
 
 from time import time
@@ -36,11 +37,12 @@ from typing import TYPE_CHECKING
 from pathlib import Path
 from collections.abc import ItemsView, Iterable, Iterator
 
-from novelwriter import SHARED
+from novelwriter import SHARED, TIMINGS
 from novelwriter.enum import nwComment, nwItemClass, nwItemType, nwItemLayout
 from novelwriter.error import logException
 from novelwriter.common import checkInt, isHandle, isItemClass, isTitleTag, jsonEncode
 from novelwriter.constants import nwFiles, nwKeyWords, nwRegEx, nwUnicode, nwHeaders
+from novelwriter.core.watcher import fileStat
 
 if TYPE_CHECKING:  # pragma: no cover
     from novelwriter.core.item import NWItem
@@ -90,6 +92,12 @@ class NWIndex:
         # TimeStamps
         self._indexChange = 0.0
         self._rootChange = {}
+        self._rootLast = {}  # The last item changed per root, and the change before it
+        self._tagsChange = 0.0
+
+        # Saved State
+        self._savedDigest = None
+        self._savedStat = None
 
         return
 
@@ -114,6 +122,8 @@ class NWIndex:
         self._itemIndex.clear()
         self._indexChange = 0.0
         self._rootChange = {}
+        self._rootLast = {}
+        self._tagsChange = time()
         SHARED.indexSignalProxy({"event": "clearIndex"})
         return
 
@@ -135,6 +145,8 @@ class NWIndex:
         delTags = self._itemIndex.allItemTags(tHandle)
         for tTag in delTags:
             del self._tagsIndex[tTag]
+        if delTags:
+            self._tagsChange = time()
         del self._itemIndex[tHandle]
         SHARED.indexSignalProxy({
             "event": "updateTags",
@@ -158,25 +170,36 @@ class NWIndex:
         """Check if the index has changed since a given time."""
         return self._indexChange > float(checkTime)
 
-    def rootChangedSince(self, rootHandle: str | None, checkTime: int | float) -> bool:
+    def rootChangedSince(
+        self, rootHandle: str | None, checkTime: int | float, ignore: str | None = None
+    ) -> bool:
         """Check if the index has changed since a given time for a
-        given root item.
+        given root item. If a handle to ignore is given, and it was the
+        last item changed, only changes to other items are checked.
         """
         if isinstance(rootHandle, str):
+            if (last := self._rootLast.get(rootHandle)) and last[0] == ignore:
+                return last[1] > float(checkTime)
             return self._rootChange.get(rootHandle, self._indexChange) > float(checkTime)
         return False
 
+    def tagsChangedSince(self, checkTime: int | float) -> bool:
+        """Check if any tags have been added, updated or removed since a
+        given time.
+        """
+        return self._tagsChange > float(checkTime)
+
     ##
     #  Load and Save Index to/from File
     ##
 
+    @TIMINGS.timed("index.load")
     def loadIndex(self) -> bool:
         """Load index from last session from the project meta folder."""
         indexFile = self._project.storage.getMetaFile(nwFiles.INDEX_FILE)
         if not isinstance(indexFile, Path):
             return False
 
-        tStart = time()
         self._indexBroken = False
         if indexFile.exists():
             logger.debug("Loading index file")
@@ -209,10 +232,9 @@ class NWIndex:
         self._indexChange = time()
         SHARED.indexSignalProxy({"event": "buildIndex"})
 
-        logger.debug("Index loaded in %.3f ms", (time() - tStart)*1000)
-
         return True
 
+    @TIMINGS.timed("index.save")
     def saveIndex(self) -> bool:
         """Save the current index as a json file in the project meta
         data folder.
@@ -221,24 +243,32 @@ class NWIndex:
         if not isinstance(indexFile, Path):
             return False
 
-        logger.debug("Saving index file")
-        tStart = time()
+        tagsIndex = jsonEncode(self._tagsIndex.packData(), n=1, nmax=2)
+        itemIndex = jsonEncode(self._itemIndex.packData(), n=1, nmax=4)
+        text = (
+            "{\n"
+            f'  "novelWriter.tagsIndex": {tagsIndex},\n'
+            f'  "novelWriter.itemIndex": {itemIndex}\n'
+            "}\n"
+        )
 
+        # Skip writing if the file is identical to the last save
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        if digest == self._savedDigest and self._savedStat == fileStat(indexFile):
+            logger.debug("Index is unchanged")
+            return True
+
+        logger.debug("Saving index file")
         try:
-            tagsIndex = jsonEncode(self._tagsIndex.packData(), n=1, nmax=2)
-            itemIndex = jsonEncode(self._itemIndex.packData(), n=1, nmax=4)
             with open(indexFile, mode="w+", encoding="utf-8") as outFile:
-                outFile.write("{\n")
-                outFile.write(f'  "novelWriter.tagsIndex": {tagsIndex},\n')
-                outFile.write(f'  "novelWriter.itemIndex": {itemIndex}\n')
-                outFile.write("}\n")
-
+                outFile.write(text)
         except Exception:
             logger.error("Failed to save index file")
             logException()
             return False
 
-        logger.debug("Index saved in %.3f ms", (time() - tStart)*1000)
+        self._savedDigest = digest
+        self._savedStat = fileStat(indexFile)
 
         return True
 
@@ -246,6 +276,7 @@ class NWIndex:
     #  Index Building
     ##
 
+    @TIMINGS.timed("index.scan")
     def scanText(self, tHandle: str, text: str, blockSignal: bool = False) -> bool:
         """Scan a piece of text associated with a handle. This will
         update the indices accordingly. This function takes the handle
@@ -288,8 +319,12 @@ class NWIndex:
 
         # Update timestamps for index changes
         nowTime = time()
+        tRoot = tItem.itemRoot
+        last = self._rootLast.get(tRoot)
+        if not (last and last[0] == tHandle):
+            self._rootLast[tRoot] = (tHandle, self._rootChange.get(tRoot, self._indexChange))
         self._indexChange = nowTime
-        self._rootChange[tItem.itemRoot] = nowTime
+        self._rootChange[tRoot] = nowTime
         if not blockSignal:
             SHARED.indexSignalProxy({
                 "event": "scanText",
@@ -353,6 +388,8 @@ class NWIndex:
             self._indexWordCounts(tHandle, text, cTitle)
 
         # Prune no longer used tags
+        if tags:
+            self._tagsChange = time()
         for tTag, isActive in tags.items():
             updated = []
             deleted = []
@@ -534,6 +571,21 @@ class NWIndex:
             yield f"{tHandle}:{sTitle}", tHandle, sTitle, hItem
         return
 
+    def novelItemStructure(
+        self, tHandle: str, rootHandle: str | None = None, activeOnly: bool = True
+    ) -> Iterator[tuple[str, str, str, IndexHeading]]:
+        """Iterate over the titles of a single item, if it is part of
+        the novel structure. The values are the same as for the
+        novelStructure method.
+        """
+        if tItem := self._project.tree[tHandle]:
+            structure = self._itemIndex.iterItemStructure(
+                tItem, rHandle=rootHandle, activeOnly=activeOnly
+            )
+            for tHandle, sTitle, hItem in structure:
+                yield f"{tHandle}:{sTitle}", tHandle, sTitle, hItem
+        return
+
     def getNovelWordCount(self, rootHandle: str | None = None, activeOnly: bool = True) -> int:
         """Count the number of words in one or all novel roots."""
         return sum(hItem.wordCount for _, _, hItem in self._itemIndex.iterNovelStructure(
@@ -887,25 +939,30 @@ class ItemIndex:
         a given root handle, or for all if root handle is None.
         """
         for tItem in self._project.tree:
-            if tItem.isNoteLayout():
-                continue
-            if activeOnly and not tItem.isActive:
-                continue
+            yield from self.iterItemStructure(tItem, rHandle=rHandle, activeOnly=activeOnly)
+        return
 
-            tHandle = tItem.itemHandle
-            if tHandle is None or tHandle not in self._items:
-                continue
+    def iterItemStructure(
+        self, tItem: NWItem, rHandle: str | None = None, activeOnly: bool = False
+    ) -> Iterable[tuple[str, str, IndexHeading]]:
+        """Iterate over the headers of a single item if it is part of
+        the novel structure for a given root handle, or for any root if
+        root handle is None.
+        """
+        if tItem.isNoteLayout():
+            return
+        if activeOnly and not tItem.isActive:
+            return
+
+        tHandle = tItem.itemHandle
+        if tHandle is None or tHandle not in self._items:
+            return
 
-            if rHandle is None:
-                for sTitle in self._items[tHandle].headings():
-                    hItem = self._items[tHandle][sTitle]
-                    if hItem:
-                        yield tHandle, sTitle, hItem
-            elif tItem.itemRoot == rHandle:
-                for sTitle in self._items[tHandle].headings():
-                    hItem = self._items[tHandle][sTitle]
-                    if hItem:
-                        yield tHandle, sTitle, hItem
+        if rHandle is None or tItem.itemRoot == rHandle:
+            for sTitle in self._items[tHandle].headings():
+                hItem = self._items[tHandle][sTitle]
+                if hItem:
+                    yield tHandle, sTitle, hItem
 
         return
 
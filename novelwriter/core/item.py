@@ -25,6 +25,7 @@ from __future__ import annotations
 
 import logging
 
+from sys import intern
 from typing import TYPE_CHECKING, Any, Literal, overload
 
 from PyQt5.QtGui import QIcon
@@ -37,6 +38,7 @@ from novelwriter.constants import nwHeaders, nwLabels, trConst
 
 if TYPE_CHECKING:  # pragma: no cover
     from novelwriter.core.project import NWProject
+    from novelwriter.core.tree import NWTree
 
 logger = logging.getLogger(__name__)
 
@@ -48,13 +50,21 @@ class NWItem:
     Each item must be associated with a project and have a valid handle.
     Only the NWTree class should create instances of this class, and
     must ensure that the handle is valid for all items in the tree.
+
+    Handles, status and importance keys and heading levels are interned
+    strings, so the many items sharing a parent, root or flag also share
+    the same string object in memory.
+
+    When an item is added to a tree, the tree keeps running totals of
+    its word count and status flag. The setters for these values report
+    the change to the tree, so the values must not be changed directly.
     """
 
     __slots__ = (
         "_project", "_name", "_handle", "_parent", "_root", "_order",
         "_type", "_class", "_layout", "_status", "_import", "_active",
         "_expanded", "_heading", "_charCount", "_wordCount",
-        "_paraCount", "_cursorPos", "_initCount",
+        "_paraCount", "_cursorPos", "_initCount", "_tree",
     )
 
     def __init__(self, project: NWProject, handle: str) -> None:
@@ -81,6 +91,9 @@ class NWItem:
         self._cursorPos = 0     # Last cursor position
         self._initCount = 0     # Initial word count
 
+        # The tree keeping count of the item
+        self._tree: NWTree | None = None
+
         return
 
     def __repr__(self) -> str:
@@ -397,12 +410,12 @@ class NWItem:
         if self._layout == nwItemLayout.NO_LAYOUT:
             # If no layout is set, pick one
             if self.isNovelLike():
-                self._layout = nwItemLayout.DOCUMENT
+                self.setLayout(nwItemLayout.DOCUMENT)
             else:
-                self._layout = nwItemLayout.NOTE
+                self.setLayout(nwItemLayout.NOTE)
         elif not self.documentAllowed():
             # Change layout to note if it is not in an allowed folder
-            self._layout = nwItemLayout.NOTE
+            self.setLayout(nwItemLayout.NOTE)
 
         if self._status is None:
             self.setStatus("New")  # This forces a default value lookup
@@ -429,7 +442,7 @@ class NWItem:
         if handle is None:
             self._parent = None
         elif isHandle(handle):
-            self._parent = handle
+            self._parent = intern(handle)
         else:
             self._parent = None
         return
@@ -439,7 +452,7 @@ class NWItem:
         if handle is None:
             self._root = None
         elif isHandle(handle):
-            self._root = handle
+            self._root = intern(handle)
         else:
             self._root = None
         return
@@ -469,6 +482,8 @@ class NWItem:
         """Set the item class from either a proper nwItemClass, or set
         it from a string representing an nwItemClass.
         """
+        if self._tree is not None:
+            self._tree.countItem(self, -1)
         if isinstance(value, nwItemClass):
             self._class = value
         elif isItemClass(value):
@@ -476,12 +491,16 @@ class NWItem:
         else:
             logger.error("Unrecognised item class '%s'", value)
             self._class = nwItemClass.NO_CLASS
+        if self._tree is not None:
+            self._tree.countItem(self, 1)
         return
 
     def setLayout(self, value: Any) -> None:
         """Set the item layout from either a proper nwItemLayout, or set
         it from a string representing an nwItemLayout.
         """
+        if self._tree is not None:
+            self._tree.countItem(self, -1)
         if isinstance(value, nwItemLayout):
             self._layout = value
         elif isItemLayout(value):
@@ -489,20 +508,30 @@ class NWItem:
         else:
             logger.error("Unrecognised item layout '%s'", value)
             self._layout = nwItemLayout.NO_LAYOUT
+        if self._tree is not None:
+            self._tree.countItem(self, 1)
         return
 
     def setStatus(self, value: Any) -> None:
         """Set the item status by looking it up in the valid status
         items of the current project.
         """
-        self._status = self._project.data.itemStatus.check(value)
+        if self._tree is not None:
+            self._tree.countItem(self, -1)
+        self._status = intern(self._project.data.itemStatus.check(value))
+        if self._tree is not None:
+            self._tree.countItem(self, 1)
         return
 
     def setImport(self, value: Any) -> None:
         """Set the item importance by looking it up in the valid import
         items of the current project.
         """
-        self._import = self._project.data.itemImport.check(value)
+        if self._tree is not None:
+            self._tree.countItem(self, -1)
+        self._import = intern(self._project.data.itemImport.check(value))
+        if self._tree is not None:
+            self._tree.countItem(self, 1)
         return
 
     def setActive(self, state: Any) -> None:
@@ -528,7 +557,7 @@ class NWItem:
     def setMainHeading(self, value: str) -> None:
         """Set the main heading level."""
         if value in nwHeaders.H_LEVEL:
-            self._heading = value
+            self._heading = intern(value)
         return
 
     def setCharCount(self, count: Any) -> None:
@@ -541,10 +570,14 @@ class NWItem:
 
     def setWordCount(self, count: Any) -> None:
         """Set the word count, and ensure that it is an integer."""
+        if self._tree is not None:
+            self._tree.countItem(self, -1)
         if isinstance(count, int):
             self._wordCount = max(0, count)
         else:
             self._wordCount = 0
+        if self._tree is not None:
+            self._tree.countItem(self, 1)
         return
 
     def setParaCount(self, count: Any) -> None:
@@ -568,4 +601,11 @@ class NWItem:
         self._initCount = self._wordCount
         return
 
+    def setTree(self, tree: NWTree | None) -> None:
+        """Set the tree that keeps count of the item, or None if the
+        item is no longer in a tree.
+        """
+        self._tree = tree
+        return
+
 # END Class NWItem
@@ -87,6 +87,7 @@ class OptionState:
     def __init__(self, project: NWProject) -> None:
         self._project = project
         self._state = {}
+        self._saved = None  # The content of the file when last saved
         return
 
     ##
@@ -127,16 +128,22 @@ class OptionState:
         if not isinstance(stateFile, Path):
             return False
 
+        text = jsonEncode({"novelWriter.guiOptions": self._state}, nmax=4)
+        if text == self._saved and stateFile.exists():
+            logger.debug("GUI options are unchanged")
+            return True
+
         logger.debug("Saving GUI options file")
         try:
             with open(stateFile, mode="w+", encoding="utf-8") as fObj:
-                data = {"novelWriter.guiOptions": self._state}
-                fObj.write(jsonEncode(data, nmax=4))
+                fObj.write(text)
         except Exception:
             logger.error("Failed to save GUI options file")
             logException()
             return False
 
+        self._saved = text
+
         return True
 
     ##
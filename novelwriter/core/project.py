@@ -35,7 +35,7 @@ from collections.abc import Iterator
 
 from PyQt5.QtCore import QCoreApplication
 
-from novelwriter import CONFIG, SHARED, __version__, __hexversion__
+from novelwriter import CONFIG, PROFILER, SHARED, __version__, __hexversion__
 from novelwriter.enum import nwItemType, nwItemClass, nwItemLayout
 from novelwriter.error import logException
 from novelwriter.constants import trConst, nwLabels
@@ -44,6 +44,7 @@ from novelwriter.core.index import NWIndex
 from novelwriter.core.options import OptionState
 from novelwriter.core.storage import NWStorage, NWStorageOpen
 from novelwriter.core.sessions import NWSessionLog
+from novelwriter.core.tokencache import NWTokenCache
 from novelwriter.core.projectxml import ProjectXMLReader, ProjectXMLWriter, XMLReadState
 from novelwriter.core.projectdata import NWProjectData
 from novelwriter.common import (
@@ -78,12 +79,16 @@ class NWProject:
         self._tree    = NWTree(self)         # The project tree
         self._index   = NWIndex(self)        # The project index
         self._session = NWSessionLog(self)   # The session record
+        self._tokens  = NWTokenCache(self)   # The build token cache
 
         # Project Status
         self._langData = {}     # Localisation data
         self._changed  = False  # The project has unsaved changes
         self._valid    = False  # The project was successfully loaded
         self._state    = NWProjectState.UNKNOWN
+        self._pending  = False  # The project has open tasks not yet completed
+        self._legacy   = False  # The project was opened from a legacy format
+        self._stages   = []     # Timing of project open stages
 
         # Internal Mapping
         self.tr = partial(QCoreApplication.translate, "NWProject")
@@ -124,6 +129,10 @@ class NWProject:
     def session(self) -> NWSessionLog:
         return self._session
 
+    @property
+    def tokenCache(self) -> NWTokenCache:
+        return self._tokens
+
     @property
     def projOpened(self) -> float:
         return self._session.start
@@ -137,6 +146,11 @@ class NWProject:
         """Return True if a project is loaded."""
         return self._valid
 
+    @property
+    def openPending(self) -> bool:
+        """Return True if the project open has not been completed."""
+        return self._pending
+
     @property
     def state(self) -> NWProjectState:
         """Return the current project state."""
@@ -250,14 +264,21 @@ class NWProject:
     #  Project Methods
     ##
 
-    def openProject(self, projPath: str | Path, clearLock: bool = False) -> bool:
+    def openProject(self, projPath: str | Path, clearLock: bool = False,
+                    lazy: bool = False) -> bool:
         """Open the project file provided. If it doesn't exist, assume
         it is a folder and look for the file within it. If successful,
         parse the XML of the file and populate the project variables and
         build the tree of project items.
+
+        If lazy is True, the project is ready to use when this function
+        returns, but the orphaned files check and loading of the index
+        are left to completeOpenProject, which must be called after.
         """
         logger.info("Opening project: %s", projPath)
 
+        self._stages = []
+        tStart = time()
         status = self._storage.initProjectStorage(projPath, clearLock)
         if status != NWStorageOpen.READY:
             if status == NWStorageOpen.UNKOWN:
@@ -273,6 +294,7 @@ class NWProject:
         # Read Project XML
         # ================
 
+        tStart = self.recordOpenStage("Storage", tStart)
         xmlReader = self._storage.getXmlReader()
         if not isinstance(xmlReader, ProjectXMLReader):
             return False
@@ -280,6 +302,7 @@ class NWProject:
         self._data = NWProjectData(self)
         projContent = []
         xmlParsed = xmlReader.read(self._data, projContent)
+        tStart = self.recordOpenStage("Project XML", tStart)
         appVersion = xmlReader.appVersion or self.tr("Unknown")
         if not xmlParsed:
             if xmlReader.state == XMLReadState.NOT_NWX_FILE:
@@ -325,7 +348,11 @@ class NWProject:
         # Extract Data
         # ============
 
+        tStart = time()
         self._tree.unpack(projContent)
+        self._tree.checkItemData()
+        tStart = self.recordOpenStage("Project Tree", tStart)
+
         self._options.loadSettings()
         self._loadProjectLocalisation()
 
@@ -335,29 +362,71 @@ class NWProject:
                 storePath, self._data.name, sum(self._data.initCounts), time()
             )
 
+        self.updateWordCounts()
+        self._session.startSession()
+        self.setProjectChanged(False)
+        self._valid = True
+        self._pending = True
+        self._legacy = xmlReader.state == XMLReadState.WAS_LEGACY
+        self._state = NWProjectState.READY
+        self.recordOpenStage("Project Settings", tStart)
+
+        if not lazy:
+            self.completeOpenProject()
+            self.logOpenStages()
+
+        SHARED.newStatusMessage(self.tr("Opened Project: {0}").format(self._data.name))
+
+        return True
+
+    def completeOpenProject(self) -> None:
+        """Run the remaining open project tasks. This checks the
+        content folder for files not in the project tree, and loads the
+        project index.
+        """
+        if not self._pending:
+            return
+
         # Check the project tree consistency
         # This also handles any orphaned files found
-        orphans, recovered = self._tree.checkConsistency(self.tr("Recovered"))
+        tStart = time()
+        orphans, recovered = self._tree.recoverOrphans(self.tr("Recovered"))
         if orphans > 0:
             SHARED.warn(self.tr(
                 "Found {0} orphaned file(s) in the project. {1} file(s) were recovered."
             ).format(orphans, recovered))
+        tStart = self.recordOpenStage("Orphaned Files", tStart)
 
         self._index.loadIndex()
-        if xmlReader.state == XMLReadState.WAS_LEGACY:
+        if self._legacy:
             # Often, the index needs to be rebuilt when updating format
             self._index.rebuildIndex()
+        tStart = self.recordOpenStage("Project Index", tStart)
 
         self.updateWordCounts()
-        self._session.startSession()
         self.setProjectChanged(False)
-        self._valid = True
-        self._state = NWProjectState.READY
+        self._pending = False
+        self.recordOpenStage("Word Counts", tStart)
 
-        SHARED.newStatusMessage(self.tr("Opened Project: {0}").format(self._data.name))
+        return
 
-        return True
+    def recordOpenStage(self, stage: str, tStart: float) -> float:
+        """Record the time spent in a project open stage, and return
+        the current time as the start time of the next stage.
+        """
+        tEnd = time()
+        self._stages.append((stage, (tEnd - tStart)*1000.0))
+        return tEnd
+
+    def logOpenStages(self) -> None:
+        """Write the timing of the project open stages to the log."""
+        total = sum(t for _, t in self._stages)
+        logger.info("Project opened in %.3f ms", total)
+        for stage, duration in self._stages:
+            logger.info("Open stage '%s': %.3f ms", stage, duration)
+        return
 
+    @PROFILER.profiled("saveProject")
     def saveProject(self, autoSave: bool = False) -> bool:
         """Save the project main XML file. The saving command itself
         uses a temporary filename, and the file is replaced afterwards
@@ -368,28 +437,31 @@ class NWProject:
             SHARED.error(self.tr("There is no project open."))
             return False
 
-        saveTime = time()
+        # Make sure the index is loaded before it is saved
+        self.completeOpenProject()
 
         logger.info("Saving project: %s", self._storage.storagePath)
 
-        if autoSave:
-            self._data.incAutoCount()
-        else:
-            self._data.incSaveCount()
-
-        self.updateWordCounts()
-        self.countStatus()
-
         xmlWriter = self._storage.getXmlWriter()
         if not isinstance(xmlWriter, ProjectXMLWriter):
             return False
 
-        saveTime = time()
-        editTime = self._data.editTime + max(round(saveTime - self._session.start), 0)
+        self.updateWordCounts()
         content = self._tree.pack()
-        if not xmlWriter.write(self._data, content, saveTime, editTime):
-            SHARED.error(self.tr("Failed to save project."), exc=xmlWriter.error)
-            return False
+
+        # Autosaves are skipped if only the counters and counts would change
+        saveTime = time()
+        if autoSave and not xmlWriter.isModified(self._data, content):
+            logger.debug("Project content is unchanged")
+        else:
+            if autoSave:
+                self._data.incAutoCount()
+            else:
+                self._data.incSaveCount()
+            editTime = self._data.editTime + max(round(saveTime - self._session.start), 0)
+            if not xmlWriter.write(self._data, content, saveTime, editTime):
+                SHARED.error(self.tr("Failed to save project."), exc=xmlWriter.error)
+                return False
 
         # Save other project data
         self._options.saveSettings()
@@ -523,47 +595,87 @@ class NWProject:
         is, the parent item must be sent before its child. In principle,
         a proper XML file will already ensure that, but in the event the
         order has been altered, or a file is orphaned, this function is
-        capable of handling it.
+        capable of handling it. Items found before their parent are held
+        back until the parent has been sent, so each item is only
+        processed once.
         """
         sentItems = set()
-        iterItems = self._tree.handles()
-        n = 0
-        nMax = min(len(iterItems), 10000)
-        while n < nMax:
-            tHandle = iterItems[n]
+        waiting: dict[str, list[NWItem]] = {}
+
+        def sendItem(tItem: NWItem) -> Iterator[NWItem]:
+            # Send an item, followed by any items waiting for it
+            stack = [tItem]
+            while stack:
+                sItem = stack.pop()
+                sentItems.add(sItem.itemHandle)
+                yield sItem
+                stack.extend(reversed(waiting.pop(sItem.itemHandle, [])))
+            return
+
+        for tHandle in self._tree.handles():
             tItem = self._tree[tHandle]
-            n += 1
             if tItem is None:
                 # Technically a bug
                 continue
             elif tItem.itemParent is None:
                 # Item is a root, or already been identified as orphaned
-                sentItems.add(tHandle)
-                yield tItem
+                yield from sendItem(tItem)
             elif tItem.itemParent in sentItems:
                 # Item's parent has been sent, so all is fine
-                sentItems.add(tHandle)
-                yield tItem
-            elif tItem.itemParent in iterItems:
-                # Item's parent exists, but hasn't been sent yet, so add
-                # it again to the end, but make sure this doesn't get
-                # out hand, so we cap at 10000 items
+                yield from sendItem(tItem)
+            elif tItem.itemParent in self._tree:
+                # Item's parent exists, but hasn't been sent yet, so it
+                # is held back until the parent has been sent
                 logger.warning("Item '%s' found before its parent", tHandle)
-                iterItems.append(tHandle)
-                nMax = min(len(iterItems), 10000)
+                waiting.setdefault(tItem.itemParent, []).append(tItem)
             else:
                 # Item is orphaned
                 logger.error("Item '%s' has no parent in current tree", tHandle)
-                tItem.setParent(None)
-                yield tItem
+                self._tree.setItemParent(tHandle, None)
+                yield from sendItem(tItem)
+
+        # Items still waiting have parents that can never be sent, which
+        # only happens if the parent links form a loop
+        for pHandle in list(waiting):
+            for tItem in waiting.pop(pHandle, []):
+                logger.error("Item '%s' has no path to a root item", tItem.itemHandle)
+                self._tree.setItemParent(tItem.itemHandle, None)
+                yield from sendItem(tItem)
+
         return
 
     def updateWordCounts(self) -> None:
-        """Update the total word count values."""
+        """Update the total word count values from the running totals
+        of the project tree. In debug mode, the totals are also checked
+        against a full recount.
+        """
+        if CONFIG.isDebug:
+            self.checkCounts()
         novel, notes = self._tree.sumWords()
         self._data.setCurrCounts(novel=novel, notes=notes)
         return
 
+    def checkCounts(self) -> bool:
+        """Check the running word totals and status flag counts against
+        a full recount, and correct them if they differ. Returns True if
+        they were consistent.
+        """
+        words = self._tree.sumWords()
+        status = {k: v["count"] for k, v in self._data.itemStatus.items()}
+        imports = {k: v["count"] for k, v in self._data.itemImport.items()}
+        self._tree.recountWords()
+        self.countStatus()
+        if words != self._tree.sumWords():
+            logger.error("Running word totals %s should be %s", words, self._tree.sumWords())
+            return False
+        if status != {k: v["count"] for k, v in self._data.itemStatus.items()}:
+            logger.error("Running status counts do not match the project")
+            return False
+        if imports != {k: v["count"] for k, v in self._data.itemImport.items()}:
+            logger.error("Running importance counts do not match the project")
+            return False
+        return True
+
     def countStatus(self) -> None:
         """Count how many times the various status flags are used in the
         project tree. The counts themselves are kept in the NWStatus
@@ -25,6 +25,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import hashlib
 import logging
 import xml.etree.ElementTree as ET
 
@@ -38,6 +39,7 @@ from novelwriter.common import (
     checkBool, checkInt, checkString, checkStringNone, formatTimeStamp,
     hexToInt, simplified, xmlIndent, yesNo
 )
+from novelwriter.core.watcher import fileStat
 
 if TYPE_CHECKING:  # pragma: no cover
     from novelwriter.core.status import NWStatus
@@ -49,6 +51,9 @@ FILE_VERSION = "1.5"  # The current project file format version
 FILE_REVISION = "3"   # The current project file format revision
 HEX_VERSION = 0x0105
 
+_ITEMS_MARKER = "items"  # Placeholder for content items while packing
+_COUNT_META = ("charCount", "wordCount", "paraCount", "cursorPos")  # Updated by text edits
+
 NUM_VERSION = {
     "1.0": 0x0100,  # Up to 0.7
     "1.1": 0x0101,  # Up to 0.10
@@ -166,50 +171,61 @@ class ProjectXMLReader:
     ##
 
     def read(self, data: NWProjectData, content: list) -> bool:
-        """Read and parse the project XML file."""
+        """Read and parse the project XML file. The file is parsed as a
+        stream, and each section or content item is processed and then
+        cleared as soon as it has been read, so the full element tree
+        is never held in memory.
+        """
         tStart = time()
         logger.debug("Reading project XML")
+
+        depth = 0
+        xRoot = None
+        xContent = None
         try:
-            xml = ET.parse(str(self._path))
-            self._state = XMLReadState.NO_ERROR
+            for event, xNode in ET.iterparse(str(self._path), events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        xRoot = xNode
+                        if not self._parseRoot(xRoot):
+                            return False
+                    elif depth == 2 and xNode.tag == "content":
+                        xContent = xNode
+                        data.setInitCounts(novel=xNode.attrib.get("novelWords", None))  # 1.5
+                        data.setInitCounts(notes=xNode.attrib.get("notesWords", None))  # 1.5
+                    continue
+
+                depth -= 1
+                if depth == 2 and xContent is not None and self._version >= 0x0104:
+                    # Content items are processed one at a time
+                    if xNode.tag == "item":
+                        content.append(self._parseContentItem(xNode))
+                    else:
+                        logger.warning("Ignored item <root/content/%s> in XML", xNode.tag)
+                    xContent.remove(xNode)
+                elif depth == 1 and xRoot is not None:
+                    if xNode.tag == "project":
+                        self._parseProjectMeta(xNode, data)
+                    elif xNode.tag == "settings":
+                        self._parseProjectSettings(xNode, data)
+                    elif xNode.tag == "content":
+                        if self._version < 0x0104:
+                            self._parseProjectContentLegacy(xNode, data, content)
+                        xContent = None
+                    else:
+                        logger.warning("Ignored <root/%s> in XML", xNode.tag)
+                    xRoot.remove(xNode)
+
         except Exception as exc:
             logger.error("Failed to parse project XML", exc_info=exc)
             self._state = XMLReadState.CANNOT_PARSE
             return False
 
-        xRoot = xml.getroot()
-        self._root = str(xRoot.tag)
-        if self._root != "novelWriterXML":
-            self._state = XMLReadState.NOT_NWX_FILE
-            return False
-
-        fileVersion = str(xRoot.attrib.get("fileVersion", ""))
-        if fileVersion in NUM_VERSION:
-            self._version = NUM_VERSION[fileVersion]
-        else:
-            self._state = XMLReadState.UNKNOWN_VERSION
+        if xRoot is None:
+            self._state = XMLReadState.CANNOT_PARSE
             return False
 
-        logger.debug("XML is '%s' version '%s'", self._root, fileVersion)
-
-        self._revision = checkInt(xRoot.attrib.get("fileRevision"), 0)
-        self._appVersion = str(xRoot.attrib.get("appVersion", ""))
-        self._hexVersion = hexToInt(xRoot.attrib.get("hexVersion", ""))
-        self._timeStamp = str(xRoot.attrib.get("timeStamp", ""))
-
-        for xSection in xRoot:
-            if xSection.tag == "project":
-                self._parseProjectMeta(xSection, data)
-            elif xSection.tag == "settings":
-                self._parseProjectSettings(xSection, data)
-            elif xSection.tag == "content":
-                if self._version >= 0x0104:
-                    self._parseProjectContent(xSection, data, content)
-                else:
-                    self._parseProjectContentLegacy(xSection, data, content)
-            else:
-                logger.warning("Ignored <root/%s> in XML", xSection.tag)
-
         if self._version == HEX_VERSION:
             self._state = XMLReadState.PARSED_OK
         else:
@@ -292,62 +308,74 @@ class ProjectXMLReader:
 
         return
 
-    def _parseProjectContent(
-        self, xSection: ET.Element, data: NWProjectData, content: list
-    ) -> None:
-        """Parse the content section of the XML file."""
-        logger.debug("Parsing <content> section")
-
-        data.setInitCounts(novel=xSection.attrib.get("novelWords", None))  # Moved in 1.5
-        data.setInitCounts(notes=xSection.attrib.get("notesWords", None))  # Moved in 1.5
+    def _parseRoot(self, xRoot: ET.Element) -> bool:
+        """Parse the root node of the XML file, and check that the file
+        is a novelWriter project file of a known version.
+        """
+        self._state = XMLReadState.NO_ERROR
+        self._root = str(xRoot.tag)
+        if self._root != "novelWriterXML":
+            self._state = XMLReadState.NOT_NWX_FILE
+            return False
 
-        for xItem in xSection:
-            if xItem.tag != "item":
-                logger.warning("Ignored item <root/content/%s> in XML", xItem.tag)
-                continue
+        fileVersion = str(xRoot.attrib.get("fileVersion", ""))
+        if fileVersion in NUM_VERSION:
+            self._version = NUM_VERSION[fileVersion]
+        else:
+            self._state = XMLReadState.UNKNOWN_VERSION
+            return False
 
-            item = {}
-            meta = {}
-            name = {}
-            itemName = ""
+        logger.debug("XML is '%s' version '%s'", self._root, fileVersion)
 
-            item["handle"] = checkStringNone(xItem.attrib.get("handle"), None)
-            item["parent"] = checkStringNone(xItem.attrib.get("parent"), None)
-            item["root"]   = checkStringNone(xItem.attrib.get("root"), None)
-            item["order"]  = checkInt(xItem.attrib.get("order"), 0)
-            item["type"]   = checkString(xItem.attrib.get("type"), "NO_TYPE")
-            item["class"]  = checkString(xItem.attrib.get("class"), "NO_CLASS")
-            item["layout"] = checkString(xItem.attrib.get("layout"), "NO_LAYOUT")
-            for xVal in xItem:
-                if xVal.tag == "meta":
-                    meta["expanded"]  = checkBool(xVal.attrib.get("expanded"), False)
-                    meta["heading"]   = checkString(xVal.attrib.get("heading"), "H0")
-                    meta["charCount"] = checkInt(xVal.attrib.get("charCount"), 0)
-                    meta["wordCount"] = checkInt(xVal.attrib.get("wordCount"), 0)
-                    meta["paraCount"] = checkInt(xVal.attrib.get("paraCount"), 0)
-                    meta["cursorPos"] = checkInt(xVal.attrib.get("cursorPos"), 0)
-                elif xVal.tag == "name":
-                    itemName = simplified(checkString(xVal.text, ""))
-                    name["status"] = checkStringNone(xVal.attrib.get("status"), None)
-                    name["import"] = checkStringNone(xVal.attrib.get("import"), None)
-                    name["active"] = checkBool(xVal.attrib.get("active"), False)
-                else:
-                    logger.warning("Ignored <root/content/item/%s> in XML", xVal.tag)
+        self._revision = checkInt(xRoot.attrib.get("fileRevision"), 0)
+        self._appVersion = str(xRoot.attrib.get("appVersion", ""))
+        self._hexVersion = hexToInt(xRoot.attrib.get("hexVersion", ""))
+        self._timeStamp = str(xRoot.attrib.get("timeStamp", ""))
 
-            # Deprecated Nodes
-            if self._version < HEX_VERSION:
-                for xVal in xItem:
-                    if xVal.tag == "name" and "exported" in xVal.attrib:
-                        name["active"] = checkBool(xVal.attrib.get("exported"), False)
+        return True
 
-            content.append({
-                "name": itemName,
-                "itemAttr": item,
-                "metaAttr": meta,
-                "nameAttr": name,
-            })
+    def _parseContentItem(self, xItem: ET.Element) -> dict:
+        """Parse a single item of the content section of the XML file."""
+        item = {}
+        meta = {}
+        name = {}
+        itemName = ""
+
+        item["handle"] = checkStringNone(xItem.attrib.get("handle"), None)
+        item["parent"] = checkStringNone(xItem.attrib.get("parent"), None)
+        item["root"]   = checkStringNone(xItem.attrib.get("root"), None)
+        item["order"]  = checkInt(xItem.attrib.get("order"), 0)
+        item["type"]   = checkString(xItem.attrib.get("type"), "NO_TYPE")
+        item["class"]  = checkString(xItem.attrib.get("class"), "NO_CLASS")
+        item["layout"] = checkString(xItem.attrib.get("layout"), "NO_LAYOUT")
+        for xVal in xItem:
+            if xVal.tag == "meta":
+                meta["expanded"]  = checkBool(xVal.attrib.get("expanded"), False)
+                meta["heading"]   = checkString(xVal.attrib.get("heading"), "H0")
+                meta["charCount"] = checkInt(xVal.attrib.get("charCount"), 0)
+                meta["wordCount"] = checkInt(xVal.attrib.get("wordCount"), 0)
+                meta["paraCount"] = checkInt(xVal.attrib.get("paraCount"), 0)
+                meta["cursorPos"] = checkInt(xVal.attrib.get("cursorPos"), 0)
+            elif xVal.tag == "name":
+                itemName = simplified(checkString(xVal.text, ""))
+                name["status"] = checkStringNone(xVal.attrib.get("status"), None)
+                name["import"] = checkStringNone(xVal.attrib.get("import"), None)
+                name["active"] = checkBool(xVal.attrib.get("active"), False)
+            else:
+                logger.warning("Ignored <root/content/item/%s> in XML", xVal.tag)
 
-        return
+        # Deprecated Nodes
+        if self._version < HEX_VERSION:
+            for xVal in xItem:
+                if xVal.tag == "name" and "exported" in xVal.attrib:
+                    name["active"] = checkBool(xVal.attrib.get("exported"), False)
+
+        return {
+            "name": itemName,
+            "itemAttr": item,
+            "metaAttr": meta,
+            "nameAttr": name,
+        }
 
     def _parseProjectContentLegacy(
         self, xSection: ET.Element, data: NWProjectData, content: list
@@ -463,11 +491,26 @@ class ProjectXMLWriter:
 
     The project writer class will only write a file according to the
     very latest spec.
+
+    The writer keeps the serialised form of each content item from the
+    previous write, and only serialises items that have changed. It
+    also skips writing the file if it would be identical to the file
+    it last wrote. The same writer instance should therefore be reused
+    for repeated saves of the same project.
+
+    The check for changes ignores the counts and cursor positions, as
+    these change with every text edit. They are written with the next
+    save that has other changes, or a save that is not an autosave.
     """
 
     def __init__(self, path: str | Path) -> None:
         self._path = Path(path)
         self._error = None
+        self._items = {}        # Serialised content items from the last write
+        self._state = None      # The project data and content of the last write, minus counts
+        self._packed = None     # The content and packed body from the last change check
+        self._digest = None     # The SHA1 digest of the last written file
+        self._fileStat = None   # The file modification time and size after write
         return
 
     ##
@@ -483,6 +526,16 @@ class ProjectXMLWriter:
     #  Methods
     ##
 
+    def isModified(self, data: NWProjectData, content: list) -> bool:
+        """Check if the project data or content has changed since the
+        last write, ignoring the save counters, time stamps and counts.
+        The packed body is kept for a following write of the same
+        content.
+        """
+        body, state = self._packBody(data, content)
+        self._packed = (content, body, state)
+        return (data.uuid, data.name, data.author, state) != self._state
+
     def write(self, data: NWProjectData, content: list, saveTime: float, editTime: int) -> bool:
         """Write the project data and content to the XML files."""
         tStart = time()
@@ -507,9 +560,58 @@ class ProjectXMLWriter:
         xProject = ET.SubElement(xRoot, "project", attrib=projAttr)
         self._packSingleValue(xProject, "name", data.name)
         self._packSingleValue(xProject, "author", data.author)
+        xmlIndent(xRoot)
+
+        # Insert the settings and content after the project section
+        head, _, tail = ET.tostring(xRoot, encoding="unicode").rpartition("</project>")
+        if self._packed and self._packed[0] is content:
+            _, body, state = self._packed
+        else:
+            body, state = self._packBody(data, content)
+        self._packed = None
+        xmlData = (
+            f"<?xml version='1.0' encoding='utf-8'?>\n"
+            f"{head}</project>{body}{tail}\n"
+        ).encode("utf-8")
+
+        # Skip writing if the file on disk is already identical
+        digest = hashlib.sha1(xmlData).hexdigest()
+        if digest == self._digest and self._fileStat == fileStat(self._path):
+            logger.debug("Project XML is unchanged, skipping write")
+            return True
+
+        # Write the XML to file
+        tmp = self._path.with_suffix(".tmp")
+        try:
+            with open(tmp, mode="wb") as outFile:
+                outFile.write(xmlData)
+            tmp.replace(self._path)
+        except Exception as exc:
+            self._error = exc
+            return False
+
+        self._state = (data.uuid, data.name, data.author, state)
+        self._digest = digest
+        self._fileStat = fileStat(self._path)
+
+        logger.debug("Project XML saved in %.3f ms", (time() - tStart)*1000)
+
+        return True
+
+    ##
+    #  Internal Functions
+    ##
+
+    def _packBody(self, data: NWProjectData, content: list) -> tuple[str, tuple]:
+        """Pack the settings and content sections into an indented XML
+        string. Content items that have not changed since the last call
+        are reused from the previous call. Also returns the state of the
+        settings and content without the counts, for change checks.
+        """
+        xBody = ET.Element("body")
 
         # Save Project Settings
-        xSettings = ET.SubElement(xRoot, "settings")
+        xSettings = ET.SubElement(xBody, "settings")
         self._packSingleValue(xSettings, "doBackup", yesNo(data.doBackup))
         self._packSingleValue(xSettings, "language", data.language)
         self._packSingleValue(xSettings, "spellChecking", data.spellLang, attrib={
@@ -534,31 +636,50 @@ class ProjectXMLWriter:
             "notesWords": str(data.currCounts[1]),
         }
 
-        xContent = ET.SubElement(xRoot, "content", attrib=contAttr)
-        for item in content:
-            xItem = ET.SubElement(xContent, "item", attrib=item.get("itemAttr", {}))
-            ET.SubElement(xItem, "meta", attrib=item.get("metaAttr", {}))
-            xName = ET.SubElement(xItem, "name", attrib=item.get("nameAttr", {}))
-            xName.text = item["name"]
+        xContent = ET.SubElement(xBody, "content", attrib=contAttr)
+        if content:
+            xContent.append(ET.Comment(_ITEMS_MARKER))
 
-        # Write the XML tree to file
-        tmp = self._path.with_suffix(".tmp")
-        try:
-            xml = ET.ElementTree(xRoot)
-            xmlIndent(xml)
-            xml.write(tmp, encoding="utf-8", xml_declaration=True)
-            tmp.replace(self._path)
-        except Exception as exc:
-            self._error = exc
-            return False
+        xmlIndent(xBody)
+        body = ET.tostring(xBody, encoding="unicode")[6:-9]  # Strip <body> and </body>
+        settings = body.partition("<content ")[0]
+        if not content:
+            return body, (settings, ())
 
-        logger.debug("Project XML saved in %.3f ms", (time() - tStart)*1000)
-
-        return True
-
-    ##
-    #  Internal Functions
-    ##
+        # Pack the content items
+        items = {}
+        packed = []
+        state = []
+        for item in content:
+            itemAttr = item.get("itemAttr", {})
+            metaAttr = item.get("metaAttr", {})
+            nameAttr = item.get("nameAttr", {})
+            key = (
+                item["name"], tuple(itemAttr.items()),
+                tuple(metaAttr.items()), tuple(nameAttr.items()),
+            )
+            tHandle = itemAttr.get("handle")
+            if (cached := self._items.get(tHandle)) and cached[0] == key:
+                text = cached[1]
+            else:
+                xItem = ET.Element("item", attrib=itemAttr)
+                xItem.text = "\n      "
+                xMeta = ET.SubElement(xItem, "meta", attrib=metaAttr)
+                xMeta.tail = "\n      "
+                xName = ET.SubElement(xItem, "name", attrib=nameAttr)
+                xName.text = item["name"]
+                xName.tail = "\n    "
+                text = ET.tostring(xItem, encoding="unicode")
+            items[tHandle] = (key, text)
+            packed.append(text)
+            state.append((
+                key[0], key[1], tuple(x for x in key[2] if x[0] not in _COUNT_META), key[3]
+            ))
+
+        self._items = items
+        head, _, tail = body.rpartition(f"<!--{_ITEMS_MARKER}-->")
+
+        return "".join([head, "\n    ".join(packed), tail]), (settings, tuple(state))
 
     def _packSingleValue(
         self, xParent: ET.Element, name: str, value: str | None, attrib: dict | None = None
@@ -193,6 +193,12 @@ class NWStatus:
             self._store[key]["count"] += 1
         return
 
+    def decrement(self, key: str | None) -> None:
+        """Decrement the counter for a given entry."""
+        if key and key in self._store:
+            self._store[key]["count"] -= 1
+        return
+
     def pack(self) -> Iterator[tuple[str, dict]]:
         """Pack the status entries into a dictionary."""
         for key, data in self._store.items():
@@ -39,6 +39,7 @@ from novelwriter.constants import nwFiles
 from novelwriter.core.document import NWDocument
 from novelwriter.core.projectxml import ProjectXMLReader, ProjectXMLWriter
 from novelwriter.core.spellcheck import UserDictionary
+from novelwriter.core.watcher import NWContentWatcher
 
 if TYPE_CHECKING:  # pragma: no cover
     from novelwriter.core.project import NWProject
@@ -85,15 +86,19 @@ class NWStorage:
         self._openMode = self.MODE_INACTIVE
         self._ready = False
         self._exception = None
+        self._xmlWriter = None
+        self._watcher = NWContentWatcher()
         return
 
     def clear(self) -> None:
         """Reset internal variables."""
+        self._watcher.stop()
         self._storagePath = None
         self._runtimePath = None
         self._lockFilePath = None
         self._openMode = self.MODE_INACTIVE
         self._ready = False
+        self._xmlWriter = None
         return
 
     ##
@@ -122,6 +127,11 @@ class NWStorage:
         logger.error("Content path cannot be resolved")
         return None
 
+    @property
+    def watcher(self) -> NWContentWatcher:
+        """Return the content folder watcher."""
+        return self._watcher
+
     @property
     def lockStatus(self) -> list | None:
         """Return the project lock information."""
@@ -168,6 +178,7 @@ class NWStorage:
             return NWStorageCreate.OS_ERROR
 
         self._ready = True
+        self._watcher.start(contPath)
 
         return NWStorageCreate.READY
 
@@ -241,6 +252,7 @@ class NWStorage:
 
         self._writeLockFile()
         self._ready = True
+        self._watcher.start(contPath)
 
         return NWStorageOpen.READY
 
@@ -270,9 +282,14 @@ class NWStorage:
         return None
 
     def getXmlWriter(self) -> ProjectXMLWriter | None:
-        """Return a properly configured ProjectXMLWriter instance."""
+        """Return a properly configured ProjectXMLWriter instance. The
+        same instance is returned for the duration of the session so
+        that it can reuse data from previous writes.
+        """
         if isinstance(self._runtimePath, Path) and self._ready:
-            return ProjectXMLWriter(self._runtimePath / nwFiles.PROJ_FILE)
+            if self._xmlWriter is None:
+                self._xmlWriter = ProjectXMLWriter(self._runtimePath / nwFiles.PROJ_FILE)
+            return self._xmlWriter
         return None
 
     def getDocument(self, tHandle: str | None) -> NWDocument:
@@ -23,14 +23,14 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import re
 import json
 import logging
 
-from time import time
+from bisect import bisect_left
 from pathlib import Path
 
 from novelwriter import CONFIG
-from novelwriter.common import formatTimeStamp
 from novelwriter.constants import nwHeadFmt, nwKeyWords, nwLabels, nwHtmlUnicode
 from novelwriter.core.project import NWProject
 from novelwriter.core.tokenizer import Tokenizer, stripEscape
@@ -49,6 +49,8 @@ class ToHtml(Tokenizer):
     M_EXPORT  = 1  # Tweak output for saving to HTML or printing
     M_EBOOK   = 2  # Tweak output for converting to epub
 
+    PRE_TAB = "<span style='white-space: pre;'>\t</span>"
+
     def __init__(self, project: NWProject) -> None:
         super().__init__(project)
 
@@ -58,6 +60,8 @@ class ToHtml(Tokenizer):
 
         # Internals
         self._trMap = {}
+        self._rxBrackets = re.compile(r"[<>]")
+        self._trailing = ""  # Trailing whitespace held back from the stream
         self.setReplaceUnicode(False)
 
         return
@@ -174,26 +178,12 @@ class ToHtml(Tokenizer):
         for tType, nHead, tText, tFormat, tStyle in self._tokens:
 
             # Replace < and > with HTML entities
-            if tFormat:
-                # If we have formatting, we must recompute the locations
-                cText = []
-                i = 0
-                for c in tText:
-                    if c == "<":
-                        cText.append("&lt;")
-                        tFormat = [[p + 3 if p > i else p, f] for p, f in tFormat]
-                        i += 4
-                    elif c == ">":
-                        cText.append("&gt;")
-                        tFormat = [[p + 3 if p > i else p, f] for p, f in tFormat]
-                        i += 4
-                    else:
-                        cText.append(c)
-                        i += 1
-                tText = "".join(cText)
-            else:
-                # If we don't have formatting, we can do a plain replace
-                tText = tText.replace("<", "&lt;").replace(">", "&gt;")
+            if tFormat and ("<" in tText or ">" in tText):
+                # If we have formatting, each format is moved by the
+                # three extra characters of each entity before it
+                brackets = [m.start() for m in self._rxBrackets.finditer(tText)]
+                tFormat = [(p + 3*bisect_left(brackets, p), f) for p, f in tFormat]
+            tText = tText.replace("<", "&lt;").replace(">", "&gt;")
 
             # Styles
             aStyle = []
@@ -279,12 +269,16 @@ class ToHtml(Tokenizer):
                 lines.append(f"<p class='skip'{hStyle}>&nbsp;</p>\n")
 
             elif tType == self.T_TEXT:
-                tTemp = tText
                 if pStyle is None:
                     pStyle = hStyle
-                for pos, fmt in reversed(tFormat):
-                    tTemp = f"{tTemp[:pos]}{htmlTags[fmt]}{tTemp[pos:]}"
-                para.append(stripEscape(tTemp.rstrip()))
+                tTemp = []
+                last = 0
+                for pos, fmt in tFormat:
+                    tTemp.append(tText[last:pos])
+                    tTemp.append(htmlTags[fmt])
+                    last = pos
+                tTemp.append(tText[last:])
+                para.append(stripEscape("".join(tTemp).rstrip()))
 
             elif tType == self.T_SYNOPSIS and self._doSynopsis:
                 lines.append(self._formatSynopsis(tText, True))
@@ -300,48 +294,30 @@ class ToHtml(Tokenizer):
                 lines.append(tTemp)
 
         self._result = "".join(lines)
-        if self._genMode != self.M_PREVIEW:
+        if self._genMode == self.M_PREVIEW:
+            # Qt collapses tabs in HTML, except in pre-formatted text
+            self._result = self._result.replace("\t", self.PRE_TAB)
+        elif self._stream is not None and not self._streamRaw:
+            self._streamHtml(self._result)
+        else:
             self._fullHTML.append(self._result)
 
         return
 
     def saveHtml5(self, path: str | Path) -> None:
         """Save the data to an HTML file."""
+        head, tail = self._html5Frame()
         with open(path, mode="w", encoding="utf-8") as fObj:
-            fObj.write((
-                "<!DOCTYPE html>\n"
-                "<html>\n"
-                "<head>\n"
-                "<meta charset='utf-8'>\n"
-                "<title>{title:s}</title>\n"
-                "</head>\n"
-                "<style>\n"
-                "{style:s}\n"
-                "</style>\n"
-                "<body>\n"
-                "<article>\n"
-                "{body:s}\n"
-                "</article>\n"
-                "</body>\n"
-                "</html>\n"
-            ).format(
-                title=self._project.data.name,
-                style="\n".join(self.getStyleSheet()),
-                body=("".join(self._fullHTML)).replace("\t", "&#09;").rstrip(),
-            ))
+            fObj.write(head)
+            fObj.write(("".join(self._fullHTML)).replace("\t", "&#09;").rstrip())
+            fObj.write(tail)
         logger.info("Wrote file: %s", path)
         return
 
     def saveHtmlJson(self, path: str | Path) -> None:
         """Save the data to a JSON file."""
-        timeStamp = time()
         data = {
-            "meta": {
-                "projectName": self._project.data.name,
-                "novelAuthor": self._project.data.author,
-                "buildTime": int(timeStamp),
-                "buildTimeStr": formatTimeStamp(timeStamp),
-            },
+            "meta": self._jsonMeta(),
             "text": {
                 "css": self.getStyleSheet(),
                 "html": [t.replace("\t", "&#09;").rstrip().split("\n") for t in self.fullHTML],
@@ -352,14 +328,38 @@ class ToHtml(Tokenizer):
         logger.info("Wrote file: %s", path)
         return
 
+    def openHtml5Stream(self, path: str | Path) -> None:
+        """Write the HTML of each document to an HTML file as it is
+        converted, instead of keeping it in memory. The file is the same
+        as from saveHtml5 once closeStream is called.
+        """
+        self._openStream(path, *self._html5Frame())
+        self._trailing = ""
+        return
+
+    def openHtmlJsonStream(self, path: str | Path) -> None:
+        """Write the HTML of each document to a JSON file as it is
+        converted. The file is the same as from saveHtmlJson once
+        closeStream is called.
+        """
+        self._openJsonStream(path, {
+            "meta": self._jsonMeta(),
+            "text": {"css": self.getStyleSheet(), "html": []},
+        }, "html")
+        return
+
     def replaceTabs(self, nSpaces: int = 8, spaceChar: str = "&nbsp;") -> None:
-        """Replace tabs with spaces in the html."""
+        """Replace tabs with spaces in the html. When streaming, this
+        also applies to the documents converted after the call.
+        """
         htmlText = []
         tabSpace = spaceChar*nSpaces
         for aLine in self._fullHTML:
             htmlText.append(aLine.replace("\t", tabSpace))
 
         self._fullHTML = htmlText
+        if self._stream is not None:
+            self._streamTabs = tabSpace
         return
 
     def getStyleSheet(self) -> list[str]:
@@ -456,6 +456,49 @@ class ToHtml(Tokenizer):
     #  Internal Functions
     ##
 
+    def _html5Frame(self) -> tuple[str, str]:
+        """Return the HTML5 file text before and after the body."""
+        head = (
+            "<!DOCTYPE html>\n"
+            "<html>\n"
+            "<head>\n"
+            "<meta charset='utf-8'>\n"
+            "<title>{title:s}</title>\n"
+            "</head>\n"
+            "<style>\n"
+            "{style:s}\n"
+            "</style>\n"
+            "<body>\n"
+            "<article>\n"
+        ).format(
+            title=self._project.data.name,
+            style="\n".join(self.getStyleSheet()),
+        )
+        tail = (
+            "\n"
+            "</article>\n"
+            "</body>\n"
+            "</html>\n"
+        )
+        return head, tail
+
+    def _streamHtml(self, html: str) -> None:
+        """Write the HTML of a document to the output stream. Trailing
+        whitespace is held back, as it is stripped from the end of the
+        body.
+        """
+        if self._streamTabs:
+            html = html.replace("\t", self._streamTabs)
+        html = html.replace("\t", "&#09;")
+        if self._streamItems >= 0:
+            self._writeStream(html.rstrip().split("\n"))
+        elif text := html.rstrip():
+            self._writeStream(self._trailing + text)
+            self._trailing = html[len(text):]
+        else:
+            self._trailing += html
+        return
+
     def _formatSynopsis(self, text: str, synopsis: bool) -> str:
         """Apply HTML formatting to synopsis."""
         if synopsis:
@@ -0,0 +1,251 @@
+"""
+novelWriter – Token Cache Class
+===============================
+
+File History:
+Created: 2024-03-20 [2.4b1] NWTokenCache
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+from typing import TYPE_CHECKING, List, Tuple
+from pathlib import Path
+
+from novelwriter import TIMINGS
+from novelwriter.error import logException
+from novelwriter.constants import nwFiles
+
+if TYPE_CHECKING:  # pragma: no cover
+    from novelwriter.core.project import NWProject
+
+logger = logging.getLogger(__name__)
+
+T_Tokens = List[Tuple[int, int, str, List[Tuple[int, int]], int]]
+
+
+class NWTokenCache:
+    """Core: Token Cache Class
+
+    A cache of the tokens of each document from the last manuscript
+    build, saved as one JSON file per document in the project meta
+    folder. An entry is stored per document and tokenizer settings key,
+    and is only used if the hash of the pre-processed text is the same
+    as when it was tokenized. The file of a document is loaded the first
+    time it is needed. When a document is saved, its entries are limited
+    to the settings keys used since the last save.
+
+    The markdown of a document is only stored if the tokenizer kept it,
+    but the tokens are the same either way, so an entry with markdown
+    can be used by all build formats with the same pre-processing.
+
+    Streaming builds release each document once it is built, so that
+    the cache doesn't hold the tokens of the whole manuscript.
+    """
+
+    VERSION = 2
+
+    def __init__(self, project: NWProject) -> None:
+        self._project = project
+        self._entries: dict[str, dict[str, tuple[str, list, str | None]]] = {}
+        self._used: dict[str, set[str]] = {}
+        self._changed: set[str] = set()
+        return
+
+    def __len__(self) -> int:
+        """Return the number of cached entries, including those that
+        are only saved in the cache files.
+        """
+        handles = set(self._entries)
+        if (cachePath := self._cachePath()) and cachePath.is_dir():
+            handles.update(path.stem for path in cachePath.glob("*.json"))
+        return sum(len(self._loadEntries(tHandle)) for tHandle in handles)
+
+    ##
+    #  Methods
+    ##
+
+    def clear(self) -> None:
+        """Clear all entries, and remove the cache files."""
+        self._entries = {}
+        self._used = {}
+        self._changed = set()
+        if (cachePath := self._cachePath()) and cachePath.is_dir():
+            for path in cachePath.glob("*.json"):
+                self._removeFile(path)
+        return
+
+    def get(
+        self, tHandle: str, sKey: str, tHash: str, withMarkdown: bool = False
+    ) -> tuple[T_Tokens, str] | None:
+        """Return a copy of the cached tokens and markdown of a
+        document, if the entry matches the text hash, and has the
+        markdown if it is needed.
+        """
+        self._used.setdefault(tHandle, set()).add(sKey)
+        entry = self._loadEntries(tHandle).get(sKey)
+        if entry is None or entry[0] != tHash or (withMarkdown and entry[2] is None):
+            return None
+        return [
+            (t, n, s, [(p, f) for p, f in fmt], a) for t, n, s, fmt, a in entry[1]
+        ], entry[2] or ""
+
+    def put(
+        self, tHandle: str, sKey: str, tHash: str, tokens: T_Tokens, markdown: str | None
+    ) -> None:
+        """Add or replace the cached tokens of a document. The markdown
+        is None if it wasn't kept.
+        """
+        self._used.setdefault(tHandle, set()).add(sKey)
+        self._loadEntries(tHandle)[sKey] = (
+            tHash, [(t, n, s, [(p, f) for p, f in fmt], a) for t, n, s, fmt, a in tokens],
+            markdown,
+        )
+        self._changed.add(tHandle)
+        return
+
+    def release(self, tHandle: str) -> bool:
+        """Save the entries of a document, and drop them from memory."""
+        result = self._saveEntries(tHandle)
+        self._entries.pop(tHandle, None)
+        self._used.pop(tHandle, None)
+        self._changed.discard(tHandle)
+        return result
+
+    @TIMINGS.timed("tokens.save")
+    def saveCache(self) -> bool:
+        """Save the documents that have changed to the project meta
+        folder. The files of documents no longer in the project are
+        removed.
+        """
+        cachePath = self._cachePath()
+        if not isinstance(cachePath, Path):
+            return not self._changed
+
+        tree = self._project.tree
+        for tHandle in list(self._entries):
+            if tHandle not in tree:
+                del self._entries[tHandle]
+                self._changed.discard(tHandle)
+
+        result = all([self._saveEntries(tHandle) for tHandle in list(self._entries)])
+        self._used = {}
+
+        if cachePath.is_dir():
+            for path in cachePath.glob("*.json"):
+                if path.stem not in tree:
+                    self._removeFile(path)
+
+        return result
+
+    ##
+    #  Internal Functions
+    ##
+
+    def _cachePath(self) -> Path | None:
+        """Return the path to the cache folder, if there is one."""
+        return self._project.storage.getMetaFile(nwFiles.TOKEN_DIR)
+
+    def _removeFile(self, path: Path) -> None:
+        """Remove a cache file, and log if it fails."""
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            logger.error("Failed to remove token cache file")
+            logException()
+        return
+
+    def _saveEntries(self, tHandle: str) -> bool:
+        """Save the entries of a document if they have changed, after
+        dropping the settings keys not used since the last save.
+        """
+        entries = self._entries.get(tHandle)
+        if entries is None:
+            return True
+
+        if (keys := self._used.get(tHandle)) is not None and (unused := entries.keys() - keys):
+            for sKey in unused:
+                del entries[sKey]
+            self._changed.add(tHandle)
+
+        if tHandle not in self._changed:
+            return True
+
+        cachePath = self._cachePath()
+        if not isinstance(cachePath, Path):
+            return False
+
+        cacheFile = cachePath / f"{tHandle}.json"
+        if not entries:
+            self._removeFile(cacheFile)
+            self._changed.discard(tHandle)
+            return True
+
+        try:
+            cachePath.mkdir(exist_ok=True)
+            with open(cacheFile, mode="w", encoding="utf-8") as outFile:
+                json.dump({
+                    "novelWriter.tokenCache": {
+                        "version": self.VERSION,
+                        "entries": entries,
+                    }
+                }, outFile, separators=(",", ":"))
+        except Exception:
+            logger.error("Failed to save token cache file")
+            logException()
+            return False
+
+        self._changed.discard(tHandle)
+
+        return True
+
+    @TIMINGS.timed("tokens.load")
+    def _loadEntries(self, tHandle: str) -> dict[str, tuple[str, list, str | None]]:
+        """Return the entries of a document, and load them from its
+        cache file the first time.
+        """
+        if (entries := self._entries.get(tHandle)) is not None:
+            return entries
+
+        entries = {}
+        cachePath = self._cachePath()
+        cacheFile = cachePath / f"{tHandle}.json" if cachePath else None
+        if isinstance(cacheFile, Path) and cacheFile.exists():
+            try:
+                with open(cacheFile, mode="r", encoding="utf-8") as inFile:
+                    data = json.load(inFile)["novelWriter.tokenCache"]
+                if data["version"] == self.VERSION:
+                    entries = {
+                        str(sKey): (
+                            str(tHash), list(tokens), None if markdown is None else str(markdown)
+                        ) for sKey, (tHash, tokens, markdown) in data["entries"].items()
+                    }
+                else:
+                    logger.info("Discarding token cache from another version")
+            except Exception:
+                logger.error("Failed to load token cache file")
+                logException()
+                entries = {}
+
+        self._entries[tHandle] = entries
+
+        return entries
+
+# END Class NWTokenCache
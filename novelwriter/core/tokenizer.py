@@ -26,22 +26,26 @@ from __future__ import annotations
 
 import re
 import json
+import hashlib
 import logging
 
 from abc import ABC, abstractmethod
 from time import time
+from typing import TextIO
 from pathlib import Path
 from functools import partial
 
 from PyQt5.QtCore import QCoreApplication, QRegularExpression
 
 from novelwriter.enum import nwComment, nwItemLayout
+from novelwriter.error import logException
 from novelwriter.common import formatTimeStamp, numberToRoman, checkInt
 from novelwriter.constants import (
     nwHeadFmt, nwKeyWords, nwLabels, nwRegEx, nwShortcode, nwUnicode, trConst
 )
 from novelwriter.core.index import processComment
 from novelwriter.core.project import NWProject
+from novelwriter.core.tokencache import NWTokenCache
 
 logger = logging.getLogger(__name__)
 
@@ -156,6 +160,18 @@ class Tokenizer(ABC):
 
         self._linkHeaders = False  # Add an anchor before headers
 
+        # Token Cache
+        self._tokenCache: NWTokenCache | None = None
+
+        # Output Stream
+        self._stream: TextIO | None = None  # The output file of a streaming build
+        self._streamPath = Path()           # The path of the output file
+        self._streamRaw = False             # The stream is of the raw markdown
+        self._streamTabs = ""               # Replacement for tabs in the stream
+        self._streamTail = ""               # Text to write when closing the stream
+        self._streamIndent = ""             # The indentation of streamed JSON items
+        self._streamItems = -1              # The number of JSON items, or -1 if not JSON
+
         # Instance Variables
         self._hFormatter = HeadingFormatter(self._project)
         self._skipSeparator = False  # Flag to indicate that we skip the scene separator
@@ -173,23 +189,7 @@ class Tokenizer(ABC):
         self._localLookup = self._project.localLookup
         self.tr = partial(QCoreApplication.translate, "Tokenizer")
 
-        # Format RegEx
-        self._rxMarkdown = [
-            (QRegularExpression(nwRegEx.FMT_EI), [0, self.FMT_I_B, 0, self.FMT_I_E]),
-            (QRegularExpression(nwRegEx.FMT_EB), [0, self.FMT_B_B, 0, self.FMT_B_E]),
-            (QRegularExpression(nwRegEx.FMT_ST), [0, self.FMT_D_B, 0, self.FMT_D_E]),
-        ]
-        self._rxShortCodes = QRegularExpression(nwRegEx.FMT_SC)
-        self._rxShortCodeVals = QRegularExpression(nwRegEx.FMT_SV)
-
-        self._shortCodeFmt = {
-            nwShortcode.ITALIC_O: self.FMT_I_B,   nwShortcode.ITALIC_C: self.FMT_I_E,
-            nwShortcode.BOLD_O:   self.FMT_B_B,   nwShortcode.BOLD_C:   self.FMT_B_E,
-            nwShortcode.STRIKE_O: self.FMT_D_B,   nwShortcode.STRIKE_C: self.FMT_D_E,
-            nwShortcode.ULINE_O:  self.FMT_U_B,   nwShortcode.ULINE_C:  self.FMT_U_E,
-            nwShortcode.SUP_O:    self.FMT_SUP_B, nwShortcode.SUP_C:    self.FMT_SUP_E,
-            nwShortcode.SUB_O:    self.FMT_SUB_B, nwShortcode.SUB_C:    self.FMT_SUB_E,
-        }
+        self._initFormats()
 
         return
 
@@ -207,6 +207,11 @@ class Tokenizer(ABC):
         """The combined novelWriter Markdown text."""
         return self._allMarkdown
 
+    @property
+    def isStreaming(self) -> bool:
+        """The output is written to a file as it is built."""
+        return self._stream is not None
+
     @property
     def errData(self) -> list:
         """The error data."""
@@ -305,6 +310,11 @@ class Tokenizer(ABC):
         self._linkHeaders = state
         return
 
+    def setTokenCache(self, cache: NWTokenCache | None) -> None:
+        """Set a cache for re-using the tokens of unchanged documents."""
+        self._tokenCache = cache
+        return
+
     def setBodyText(self, state: bool) -> None:
         """Include body text in build."""
         self._doBodyText = state
@@ -357,7 +367,7 @@ class Tokenizer(ABC):
             self.T_TITLE, 0, title, [], textAlign
         ))
         if self._keepMarkdown:
-            self._allMarkdown.append(f"# {title}\n\n")
+            self._addMarkdown(f"# {title}\n\n")
 
         return True
 
@@ -411,6 +421,80 @@ class Tokenizer(ABC):
           3: The text content of the block, without leading tags
           4: The internal formatting map of the text, self.FMT_*
           5: The style of the block, self.A_*
+
+        If a token cache is set, the tokens are re-used if the text and
+        the tokenizer settings are the same as when they were cached.
+        """
+        tHandle = self._nwItem.itemHandle if self._nwItem else None
+        if self._tokenCache is not None and tHandle:
+            sKey, tHash = self.cacheKey()
+            if cached := self._tokenCache.get(tHandle, sKey, tHash, self._keepMarkdown):
+                self._tokens, markdown = cached
+            else:
+                markdown = self._tokenizeText()
+                self._tokenCache.put(
+                    tHandle, sKey, tHash, self._tokens, markdown if self._keepMarkdown else None
+                )
+        else:
+            markdown = self._tokenizeText()
+
+        # If we have content, turn off the first page flag
+        if self._isFirst and len(self._tokens) > 1:
+            self._isFirst = False
+
+            # Make sure the token array doesn't start with a page break
+            # on the very first page, adding a blank first page.
+            if self._tokens[0][4] & self.A_PBB:
+                token = self._tokens[0]
+                self._tokens[0] = (
+                    token[0], token[1], token[2], token[3], token[4] & ~self.A_PBB
+                )
+
+        if self._keepMarkdown:
+            self._addMarkdown(markdown)
+
+        return
+
+    def cacheKey(self) -> tuple[str, str]:
+        """Return the token cache key of the tokenizer settings, and the
+        hash of the current text. The text is hashed after the format
+        specific pre-processing, so build formats with the same
+        pre-processing share the cached tokens.
+        """
+        sKey = (
+            f"{self._isNovel:d}{self._isNote:d}{self._doBodyText:d}"
+            f"{self._doSynopsis:d}{self._doComments:d}{self._doKeywords:d}"
+        )
+        return sKey, hashlib.sha1(self._text.encode()).hexdigest()
+
+    def tokenizeTask(self, tHandle: str, text: str) -> tuple[str, str, dict] | None:
+        """Return the token cache key and text hash of a document, and
+        the pre-processed text and settings needed to tokenize it in
+        another process. See runTokenizeTask. The current text of the
+        tokenizer is not changed.
+        """
+        state = (self._nwItem, self._text, self._isNone, self._isNovel, self._isNote)
+        try:
+            if not self.setText(tHandle, text):
+                return None
+            self.doPreProcessing()
+            sKey, tHash = self.cacheKey()
+            return sKey, tHash, {
+                "text": self._text,
+                "isNovel": self._isNovel,
+                "bodyText": self._doBodyText,
+                "synopsis": self._doSynopsis,
+                "comments": self._doComments,
+                "keywords": self._doKeywords,
+                "keepMarkdown": self._keepMarkdown,
+            }
+        finally:
+            self._nwItem, self._text, self._isNone, self._isNovel, self._isNote = state
+
+    def _tokenizeText(self) -> str:
+        """Generate the tokens of the text, and return the markdown to
+        keep, if any. This is the part of the tokenizer that only
+        depends on the text and the tokenizer settings.
         """
         self._tokens = []
         tmpMarkdown = []
@@ -608,18 +692,6 @@ class Tokenizer(ABC):
                 if self._keepMarkdown:
                     tmpMarkdown.append("%s\n" % aLine)
 
-        # If we have content, turn off the first page flag
-        if self._isFirst and self._tokens:
-            self._isFirst = False
-
-            # Make sure the token array doesn't start with a page break
-            # on the very first page, adding a blank first page.
-            if self._tokens[0][4] & self.A_PBB:
-                token = self._tokens[0]
-                self._tokens[0] = (
-                    token[0], token[1], token[2], token[3], token[4] & ~self.A_PBB
-                )
-
         # Always add an empty line at the end of the file
         self._tokens.append((
             self.T_EMPTY, nHead, "", [], self.A_NONE
@@ -627,9 +699,6 @@ class Tokenizer(ABC):
         if self._keepMarkdown:
             tmpMarkdown.append("\n")
 
-        if self._keepMarkdown:
-            self._allMarkdown.append("".join(tmpMarkdown))
-
         # Second Pass
         # ===========
         # Some items need a second pass
@@ -652,7 +721,7 @@ class Tokenizer(ABC):
                     aStyle |= self.A_Z_BTMMRG
                 self._tokens[n] = (token[0], token[1], token[2], token[3], aStyle)
 
-        return
+        return "".join(tmpMarkdown)
 
     def doHeaders(self) -> bool:
         """Apply formatting to the text headers for novel files. This
@@ -757,14 +826,8 @@ class Tokenizer(ABC):
 
     def saveRawMarkdownJSON(self, path: str | Path) -> None:
         """Save the raw text to a JSON file."""
-        timeStamp = time()
         data = {
-            "meta": {
-                "projectName": self._project.data.name,
-                "novelAuthor": self._project.data.author,
-                "buildTime": int(timeStamp),
-                "buildTimeStr": formatTimeStamp(timeStamp),
-            },
+            "meta": self._jsonMeta(),
             "text": {
                 "nwd": [page.rstrip("\n").split("\n") for page in self._allMarkdown],
             }
@@ -773,48 +836,247 @@ class Tokenizer(ABC):
             json.dump(data, fObj, indent=2)
         return
 
+    def openRawMarkdownStream(self, path: str | Path) -> None:
+        """Write the raw text of each document to a plain text file as
+        it is processed, instead of keeping it in memory. The file is
+        the same as from saveRawMarkdown once closeStream is called.
+        """
+        self._openStream(path, "", "")
+        self._streamRaw = True
+        return
+
+    def openRawMarkdownJSONStream(self, path: str | Path) -> None:
+        """Write the raw text of each document to a JSON file as it is
+        processed. The file is the same as from saveRawMarkdownJSON once
+        closeStream is called.
+        """
+        self._openJsonStream(path, {"meta": self._jsonMeta(), "text": {"nwd": []}}, "nwd")
+        self._streamRaw = True
+        return
+
+    def closeStream(self) -> None:
+        """Finish and close the output file of a streaming build."""
+        if self._stream is None:
+            return
+        try:
+            if self._streamItems > 0:
+                self._stream.write(f"\n{self._streamIndent[:-2]}]{self._streamTail}")
+            elif self._streamItems == 0:
+                self._stream.write(f"]{self._streamTail}")
+            else:
+                self._stream.write(self._streamTail)
+        finally:
+            self._stream.close()
+            self._stream = None
+        logger.info("Wrote file: %s", self._streamPath)
+        return
+
+    def discardStream(self) -> None:
+        """Close and remove the output file of a streaming build that
+        was not finished.
+        """
+        if self._stream is None:
+            return
+        self._stream.close()
+        self._stream = None
+        try:
+            self._streamPath.unlink(missing_ok=True)
+            logger.info("Discarded file: %s", self._streamPath)
+        except OSError:
+            logger.error("Could not remove file: %s", self._streamPath)
+            logException()
+        return
+
     ##
     #  Internal Functions
     ##
 
+    def _jsonMeta(self) -> dict:
+        """Return the meta data of JSON files."""
+        timeStamp = time()
+        return {
+            "projectName": self._project.data.name,
+            "novelAuthor": self._project.data.author,
+            "buildTime": int(timeStamp),
+            "buildTimeStr": formatTimeStamp(timeStamp),
+        }
+
+    def _addMarkdown(self, text: str) -> None:
+        """Add the markdown of a document to the output."""
+        if self._stream is not None and self._streamRaw:
+            if self._streamTabs:
+                text = text.replace("\t", self._streamTabs)
+            if self._streamItems < 0:
+                self._writeStream(text)
+            else:
+                self._writeStream(text.rstrip("\n").split("\n"))
+        else:
+            self._allMarkdown.append(text)
+        return
+
+    def _openStream(self, path: str | Path, head: str, tail: str) -> None:
+        """Open the output file of a streaming build and write the text
+        before the documents. The tail is written by closeStream.
+        """
+        self.closeStream()
+        self._stream = open(path, mode="w", encoding="utf-8")
+        self._stream.write(head)
+        self._streamPath = Path(path)
+        self._streamRaw = False
+        self._streamTabs = ""
+        self._streamTail = tail
+        self._streamItems = -1
+        return
+
+    def _openJsonStream(self, path: str | Path, data: dict, key: str) -> None:
+        """Open a streaming JSON file. The documents are written as the
+        items of the empty list under key, which must be the last key of
+        the data.
+        """
+        head, tail = json.dumps(data, indent=2).rsplit(f'"{key}": []', 1)
+        self._openStream(path, f'{head}"{key}": [', tail)
+        self._streamIndent = head.rpartition("\n")[2] + "  "
+        self._streamItems = 0
+        return
+
+    def _writeStream(self, page: str | list[str]) -> None:
+        """Write a document to the output stream. For JSON streams, the
+        page is a list of lines, formatted as by json.dump.
+        """
+        if self._stream is None:
+            return
+        if isinstance(page, list):
+            item = json.dumps(page, indent=2).replace("\n", f"\n{self._streamIndent}")
+            sep = "," if self._streamItems > 0 else ""
+            self._stream.write(f"{sep}\n{self._streamIndent}{item}")
+            self._streamItems += 1
+        else:
+            self._stream.write(page)
+        return
+
+    def _initFormats(self) -> None:
+        """Set up the regular expressions and maps of the text formats."""
+        self._rxMarkdown = [
+            ("_", QRegularExpression(nwRegEx.FMT_EI), [0, self.FMT_I_B, 0, self.FMT_I_E]),
+            ("**", QRegularExpression(nwRegEx.FMT_EB), [0, self.FMT_B_B, 0, self.FMT_B_E]),
+            ("~~", QRegularExpression(nwRegEx.FMT_ST), [0, self.FMT_D_B, 0, self.FMT_D_E]),
+        ]
+        self._rxShortCodes = QRegularExpression(nwRegEx.FMT_SC)
+        self._rxShortCodeVals = QRegularExpression(nwRegEx.FMT_SV)
+
+        self._shortCodeFmt = {
+            nwShortcode.ITALIC_O: self.FMT_I_B,   nwShortcode.ITALIC_C: self.FMT_I_E,
+            nwShortcode.BOLD_O:   self.FMT_B_B,   nwShortcode.BOLD_C:   self.FMT_B_E,
+            nwShortcode.STRIKE_O: self.FMT_D_B,   nwShortcode.STRIKE_C: self.FMT_D_E,
+            nwShortcode.ULINE_O:  self.FMT_U_B,   nwShortcode.ULINE_C:  self.FMT_U_E,
+            nwShortcode.SUP_O:    self.FMT_SUP_B, nwShortcode.SUP_C:    self.FMT_SUP_E,
+            nwShortcode.SUB_O:    self.FMT_SUB_B, nwShortcode.SUB_C:    self.FMT_SUB_E,
+        }
+
+        return
+
     def _extractFormats(self, text: str) -> tuple[str, list[tuple[int, int]]]:
-        """Extract format markers from a text paragraph."""
+        """Extract format markers from a text paragraph. A pattern is
+        only matched if the text has its marker, and since the markers
+        of the different formats never overlap, the text and format
+        positions are assembled in a single pass over the sorted
+        markers.
+        """
         temp = []
 
         # Match Markdown
-        for regEx, fmts in self._rxMarkdown:
+        for marker, regEx, fmts in self._rxMarkdown:
+            if marker not in text:
+                continue
             rxItt = regEx.globalMatch(text, 0)
             while rxItt.hasNext():
                 rxMatch = rxItt.next()
                 temp.extend(
-                    [rxMatch.capturedStart(n), rxMatch.capturedLength(n), fmt]
+                    (rxMatch.capturedStart(n), rxMatch.capturedLength(n), fmt)
                     for n, fmt in enumerate(fmts) if fmt > 0
                 )
 
         # Match Shortcodes
-        rxItt = self._rxShortCodes.globalMatch(text, 0)
-        while rxItt.hasNext():
-            rxMatch = rxItt.next()
-            temp.append([
-                rxMatch.capturedStart(1),
-                rxMatch.capturedLength(1),
-                self._shortCodeFmt.get(rxMatch.captured(1).lower(), 0)
-            ])
+        if "[" in text:
+            rxItt = self._rxShortCodes.globalMatch(text, 0)
+            while rxItt.hasNext():
+                rxMatch = rxItt.next()
+                fmt = self._shortCodeFmt.get(rxMatch.captured(1).lower(), 0)
+                if fmt > 0:
+                    temp.append((rxMatch.capturedStart(1), rxMatch.capturedLength(1), fmt))
+
+        if not temp:
+            return text, []
 
         # Post-process text and format markers
-        result = text
+        temp.sort(key=lambda x: x[0])
+        chunks = []
         formats = []
-        for pos, n, fmt in reversed(sorted(temp, key=lambda x: x[0])):
-            if fmt > 0:
-                result = result[:pos] + result[pos+n:]
-                formats = [(p-n, f) for p, f in formats]
-                formats.insert(0, (pos, fmt))
+        last = 0
+        removed = 0
+        for pos, n, fmt in temp:
+            chunks.append(text[last:pos])
+            formats.append((pos - removed, fmt))
+            removed += n
+            last = pos + n
+        chunks.append(text[last:])
 
-        return result, formats
+        return "".join(chunks), formats
 
 # END Class Tokenizer
 
 
+class _TaskTokenizer(Tokenizer):
+    """A tokenizer for running tokenize tasks in a worker process. The
+    project can't be loaded there, so only the parts of the tokenizer
+    used by _tokenizeText are set up.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._tokens = []
+        self._isNovel = False
+        self._doBodyText = True
+        self._doSynopsis = False
+        self._doComments = False
+        self._doKeywords = False
+        self._keepMarkdown = False
+        self._initFormats()
+        return
+
+    def doConvert(self) -> None:
+        return
+
+# END Class _TaskTokenizer
+
+
+_taskTokenizer: _TaskTokenizer | None = None
+
+
+def runTokenizeTask(task: dict) -> tuple[list, str | None]:
+    """Tokenize a pre-processed text with the settings from
+    Tokenizer.tokenizeTask, and return the tokens and the markdown, or
+    None if it isn't kept. This is the worker function of parallel
+    builds, and it must not depend on the project, which only exists in
+    the main process.
+    """
+    global _taskTokenizer
+    if _taskTokenizer is None:
+        _taskTokenizer = _TaskTokenizer()
+
+    tokenizer = _taskTokenizer
+    tokenizer._text = task["text"]
+    tokenizer._isNovel = task["isNovel"]
+    tokenizer._doBodyText = task["bodyText"]
+    tokenizer._doSynopsis = task["synopsis"]
+    tokenizer._doComments = task["comments"]
+    tokenizer._doKeywords = task["keywords"]
+    tokenizer._keepMarkdown = task["keepMarkdown"]
+    markdown = tokenizer._tokenizeText()
+
+    return tokenizer._tokens, markdown if tokenizer._keepMarkdown else None
+
+
 class HeadingFormatter:
 
     def __init__(self, project: NWProject) -> None:
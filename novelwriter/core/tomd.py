@@ -182,7 +182,13 @@ class ToMarkdown(Tokenizer):
                 lines.append(self._formatKeywords(tText, tStyle))
 
         self._result = "".join(lines)
-        self._fullMD.append(self._result)
+        if self._stream is not None and not self._streamRaw:
+            if self._streamTabs:
+                self._writeStream(self._result.replace("\t", self._streamTabs))
+            else:
+                self._writeStream(self._result)
+        else:
+            self._fullMD.append(self._result)
 
         return
 
@@ -193,12 +199,24 @@ class ToMarkdown(Tokenizer):
         logger.info("Wrote file: %s", path)
         return
 
+    def openMarkdownStream(self, path: str | Path) -> None:
+        """Write the Markdown of each document to a plain text file as
+        it is converted, instead of keeping it in memory. The file is
+        the same as from saveMarkdown once closeStream is called.
+        """
+        self._openStream(path, "", "")
+        return
+
     def replaceTabs(self, nSpaces: int = 8, spaceChar: str = " ") -> None:
-        """Replace tabs with spaces."""
+        """Replace tabs with spaces. When streaming, this also applies
+        to the documents converted after the call.
+        """
         spaces = spaceChar*nSpaces
         self._fullMD = [p.replace("\t", spaces) for p in self._fullMD]
         if self._keepMarkdown:
             self._allMarkdown = [p.replace("\t", spaces) for p in self._allMarkdown]
+        if self._stream is not None:
+            self._streamTabs = spaces
         return
 
     ##
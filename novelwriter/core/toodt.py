@@ -26,9 +26,12 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import shutil
 import logging
+import tempfile
 import xml.etree.ElementTree as ET
 
+from typing import IO
 from hashlib import sha256
 from pathlib import Path
 from zipfile import ZipFile
@@ -71,6 +74,9 @@ def _mkTag(ns: str, tag: str) -> str:
 X_MIME = "application/vnd.oasis.opendocument.text"
 X_VERS = "1.3"
 
+# Placeholder for the text of streaming builds
+X_MARK = "novelWriter:spooled-text"
+
 # Text Formatting Tags
 TAG_BR   = _mkTag("text", "line-break")
 TAG_SPC  = _mkTag("text", "s")
@@ -129,6 +135,8 @@ class ToOdt(Tokenizer):
         self._autoPara = {}  # Auto-generated paragraph styles
         self._autoText = {}  # Auto-generated text styles
 
+        self._spool: IO[bytes] | None = None  # The text XML of a streaming build
+
         self._errData = []  # List of errors encountered
 
         # Properties
@@ -495,6 +503,9 @@ class ToOdt(Tokenizer):
                 tTemp, fTemp = self._formatKeywords(tText)
                 self._addTextPar("Text_20_Meta", oStyle, tTemp, tFmt=fTemp)
 
+        if self._spool is not None:
+            self._spoolText()
+
         return
 
     def closeDocument(self) -> None:
@@ -506,6 +517,25 @@ class ToOdt(Tokenizer):
             styleObj.packXML(self._xAuto, styleName)
         return
 
+    def openOpenDocTextStream(self) -> None:
+        """Move the text XML of each document to a temporary file as it
+        is converted, instead of keeping the whole XML tree in memory.
+        The text is copied into content.xml by saveOpenDocText, and the
+        file is the same as without streaming. The text of flat files
+        must be indented as a whole, so they can't be streamed.
+        """
+        if not self._isFlat:
+            self._spool = tempfile.TemporaryFile()
+        return
+
+    def discardStream(self) -> None:
+        """Close the temporary file of a streaming build."""
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        super().discardStream()
+        return
+
     def saveFlatXML(self, path: str | Path) -> None:
         """Save the data to an .fodt file."""
         with open(path, mode="wb") as fObj:
@@ -539,13 +569,21 @@ class ToOdt(Tokenizer):
                 xml = ET.ElementTree(xObj)
                 xml.write(fObj, encoding="utf-8", xml_declaration=True)
 
-        with ZipFile(path, mode="w") as outZip:
-            outZip.writestr("mimetype", X_MIME)
-            putInZip("META-INF/manifest.xml", xMani, outZip)
-            putInZip("settings.xml", xSett, outZip)
-            putInZip("content.xml", self._dCont, outZip)
-            putInZip("meta.xml", self._dMeta, outZip)
-            putInZip("styles.xml", self._dStyl, outZip)
+        try:
+            with ZipFile(path, mode="w") as outZip:
+                outZip.writestr("mimetype", X_MIME)
+                putInZip("META-INF/manifest.xml", xMani, outZip)
+                putInZip("settings.xml", xSett, outZip)
+                if self._spool is not None:
+                    self._putSpooledContent(outZip)
+                else:
+                    putInZip("content.xml", self._dCont, outZip)
+                putInZip("meta.xml", self._dMeta, outZip)
+                putInZip("styles.xml", self._dStyl, outZip)
+        finally:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
 
         logger.info("Wrote file: %s", path)
 
@@ -672,6 +710,43 @@ class ToOdt(Tokenizer):
 
         return
 
+    def _spoolText(self) -> None:
+        """Move the paragraphs of the text XML element to the spool
+        file. The text element is serialised with its paragraphs, and
+        its own tags are cut off, so that the paragraphs are written
+        exactly as they would be as part of the whole tree.
+        """
+        if self._spool is None or len(self._xText) == 0:
+            return
+        xml = ET.tostring(self._xText, encoding="unicode")
+        self._spool.write(xml[xml.index(">") + 1:xml.rindex("</")].encode("utf-8"))
+        self._xText.clear()
+        return
+
+    def _putSpooledContent(self, zipObj: ZipFile) -> None:
+        """Write content.xml to the zip file, with the text elements
+        copied from the spool file.
+        """
+        if self._spool is None:
+            return
+
+        # A placeholder paragraph makes the root declare the text namespace
+        xMark = ET.SubElement(self._xText, _mkTag("text", "p"))
+        xMark.text = X_MARK
+        xml = ET.tostring(self._dCont, encoding="utf-8", xml_declaration=True)
+        self._xText.remove(xMark)
+
+        head, _, tail = xml.partition(X_MARK.encode("utf-8"))
+        head = head[:head.rindex(b"<")]
+        tail = tail[tail.index(b">") + 1:]
+        with zipObj.open("content.xml", mode="w") as fObj:
+            fObj.write(head)
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, fObj)
+            fObj.write(tail)
+
+        return
+
     def _paraStyle(self, parName: str, oStyle: ODTParagraphStyle) -> str:
         """Return a name for a style object."""
         refStyle = self._mainPara.get(parName, None)
@@ -28,7 +28,7 @@ import logging
 
 from typing import TYPE_CHECKING, Literal, overload
 from pathlib import Path
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 
 from novelwriter.enum import nwItemClass, nwItemLayout, nwItemType
 from novelwriter.error import logException
@@ -51,30 +51,49 @@ class NWTree:
     This class holds all the project items of the project as instances
     of NWItem.
 
-    For historical reasons, the order of the items is saved in a
-    separate list from the items themselves, which are stored in a
-    dictionary. This is somewhat redundant with the newer versions of
-    Python, but is still practical as it's easier to update the item
-    order as a list.
+    The order of the items is saved separately from the items
+    themselves, which are stored in a dictionary. The order is kept in
+    an insertion ordered dictionary with no values, so that checking
+    for and removing a handle does not require scanning the full order.
+    The children of each item are indexed in the same way, in tree
+    order, so that a branch of the tree can be processed without
+    scanning the rest of the project. The parent of an item in the tree
+    must therefore be changed with the setItemParent method.
+
+    The tree also keeps running totals of the word counts, and of the
+    use of each status and importance flag. Items report changes to
+    these values to the tree, so the totals never require a full pass
+    over the project. The word counts of each branch of the tree are
+    computed when requested, and cached until an item below them
+    changes.
 
     Each item has a handle, which is a random hex string of length 13.
     The handle is the name of the item everywhere in novelWriter, and is
     also used for file names.
     """
 
-    __slots__ = ("_project", "_tree", "_order", "_roots", "_trash", "_changed")
+    __slots__ = (
+        "_project", "_tree", "_order", "_children", "_roots", "_trash", "_changed",
+        "_novelWords", "_noteWords", "_words",
+    )
 
     def __init__(self, project: NWProject) -> None:
 
         self._project = project
 
         self._tree: dict[str, NWItem] = {}   # Holds all the items of the project
-        self._order: list[str] = []          # The order of the tree items in the tree view
+        self._order: dict[str, None] = {}    # The order of the tree items in the tree view
+        self._children: dict[str | None, dict[str, None]] = {}  # The children of each item
         self._roots: dict[str, NWItem] = {}  # The root items of the tree
 
         self._trash = None     # The handle of the trash root folder
         self._changed = False  # True if tree structure has changed
 
+        self._novelWords = 0   # Running total of novel words
+        self._noteWords = 0    # Running total of note words
+
+        self._words: dict[str, int] = {}  # Cached word counts of each branch
+
         return
 
     ##
@@ -91,17 +110,27 @@ class NWTree:
     ##
 
     def clear(self) -> None:
-        """Clear the item tree entirely."""
-        self._tree    = {}
-        self._order   = []
-        self._roots   = {}
-        self._trash   = None
-        self._changed = False
+        """Clear the item tree entirely, including the counts of status
+        and importance flags in the project data.
+        """
+        for nwItem in self._tree.values():
+            nwItem.setTree(None)
+        self._project.data.itemStatus.resetCounts()
+        self._project.data.itemImport.resetCounts()
+        self._tree     = {}
+        self._order    = {}
+        self._children = {}
+        self._roots    = {}
+        self._trash    = None
+        self._changed  = False
+        self._novelWords = 0
+        self._noteWords  = 0
+        self._words    = {}
         return
 
     def handles(self) -> list[str]:
         """Returns a copy of the list of all the active handles."""
-        return self._order.copy()
+        return list(self._order)
 
     @overload  # pragma: no cover
     def create(self, label: str, parent: None, itemType: Literal[nwItemType.ROOT],
@@ -158,7 +187,10 @@ class NWTree:
                     return False
 
         self._tree[tHandle] = nwItem
-        self._order.append(tHandle)
+        self._order[tHandle] = None
+        self._children.setdefault(pHandle, {})[tHandle] = None
+        nwItem.setTree(self)
+        self.countItem(nwItem, 1)
         self._setTreeChanged(True)
 
         return True
@@ -175,7 +207,7 @@ class NWTree:
 
     def pack(self) -> list[dict]:
         """Pack the content of the tree into a list of dictionaries of
-        items. In the order defined by the _treeOrder list.
+        items. In the order defined by the _order dictionary.
         """
         tree = []
         for tHandle in self._order:
@@ -184,7 +216,7 @@ class NWTree:
                 tree.append(tItem.pack())
         return tree
 
-    def unpack(self, data: list[dict]) -> None:
+    def unpack(self, data: Iterable[dict]) -> None:
         """Iterate through all items of a list and add them to the
         project tree.
         """
@@ -204,15 +236,29 @@ class NWTree:
         the project returns. The functions requires a prefix string to
         mark recovered files.
         """
-        storage = self._project.storage
-        files = set(storage.scanContent())
-        for tHandle in self._order:
+        self.checkItemData()
+        return self.recoverOrphans(prefix)
+
+    def checkItemData(self) -> None:
+        """Update the root and class data of all items in the tree, and
+        remove items that cannot be connected to a root. This only
+        processes data in memory.
+        """
+        for tHandle in list(self._order):
             if self.updateItemData(tHandle):
                 logger.debug("Checking item '%s' ... OK", tHandle)
-                files.discard(tHandle)  # Remove it from the record
             else:
                 logger.error("Checking item '%s' ... ERROR", tHandle)
                 self.__delitem__(tHandle)  # The file will be re-added as orphaned
+        return
+
+    def recoverOrphans(self, prefix: str) -> tuple[int, int]:
+        """Check the content folder and add back files that were found,
+        but are not included in the tree. The function requires a
+        prefix string to mark recovered files.
+        """
+        storage = self._project.storage
+        files = set(storage.scanContent()).difference(self._tree)
 
         orphans = len(files)
         if orphans == 0:
@@ -304,7 +350,13 @@ class NWTree:
         return True
 
     def sumWords(self) -> tuple[int, int]:
-        """Loop over all entries and add up the word counts."""
+        """Return the running totals of novel and note words."""
+        return self._novelWords, self._noteWords
+
+    def recountWords(self) -> tuple[int, int]:
+        """Loop over all entries and add up the word counts. The running
+        totals are reset to the result.
+        """
         noteWords = 0
         novelWords = 0
         for tHandle in self._order:
@@ -317,8 +369,64 @@ class NWTree:
                 noteWords += tItem.wordCount
             else:
                 novelWords += tItem.wordCount
+        self._novelWords = novelWords
+        self._noteWords = noteWords
         return novelWords, noteWords
 
+    def subtreeWords(self, tHandle: str) -> int:
+        """Return the sum of the word counts of an item and all its
+        descendants. The sums are cached for each item they are computed
+        for, and dropped again when an item below them changes.
+        """
+        if tHandle in self._words:
+            return self._words[tHandle]
+        if tHandle not in self._tree:
+            return 0
+
+        # Sum up the branch bottom-up, reusing sums already cached
+        pending = []
+        stack = [tHandle]
+        while stack:
+            cHandle = stack.pop()
+            pending.append(cHandle)
+            for dHandle in self._children.get(cHandle, ()):
+                if dHandle not in self._words:
+                    stack.append(dHandle)
+
+        for cHandle in reversed(pending):
+            words = self._tree[cHandle].wordCount
+            for dHandle in self._children.get(cHandle, ()):
+                words += self._words[dHandle]
+            self._words[cHandle] = words
+
+        return self._words[tHandle]
+
+    def countItem(self, nwItem: NWItem, sign: int) -> None:
+        """Add an item's word count and status or importance flag to the
+        running totals, or remove them if the sign is negative.
+        """
+        self._dropWords(nwItem)
+
+        if nwItem.itemLayout == nwItemLayout.NO_LAYOUT:
+            pass
+        elif nwItem.itemLayout == nwItemLayout.NOTE:
+            self._noteWords += sign*nwItem.wordCount
+        else:
+            self._novelWords += sign*nwItem.wordCount
+
+        if nwItem.isNovelLike():
+            flags = self._project.data.itemStatus
+            key = nwItem.itemStatus
+        else:
+            flags = self._project.data.itemImport
+            key = nwItem.itemImport
+        if sign > 0:
+            flags.increment(key)
+        else:
+            flags.decrement(key)
+
+        return
+
     ##
     #  Tree Item Methods
     ##
@@ -351,6 +459,12 @@ class NWTree:
             return False
         return tItem.itemType == itemType
 
+    def childCount(self, tHandle: str | None) -> int:
+        """Return the number of direct children of an item. If the
+        handle is None, the number of top level items is returned.
+        """
+        return len(self._children.get(tHandle, ()))
+
     def getItemPath(self, tHandle: str) -> list[str]:
         """Iterate upwards in the tree until we find the item with
         parent None, the root item, and return the list of handles.
@@ -376,6 +490,39 @@ class NWTree:
 
         return tTree
 
+    def iterChildren(self, tHandle: str | None) -> Iterator[NWItem]:
+        """Iterate over the direct children of an item in tree order.
+        If the handle is None, the top level items are returned.
+        """
+        for cHandle in list(self._children.get(tHandle, ())):
+            yield self._tree[cHandle]
+        return
+
+    def iterSubtree(self, tHandle: str) -> Iterator[NWItem]:
+        """Iterate over an item and all its descendants in tree order,
+        with each item returned before its children.
+        """
+        if tHandle not in self._tree:
+            return
+        stack = [iter([tHandle])]
+        while stack:
+            for cHandle in stack[-1]:
+                yield self._tree[cHandle]
+                if cHandle in self._children:
+                    if len(stack) >= MAX_DEPTH:
+                        raise RecursionError("Critical internal error")
+                    stack.append(iter(list(self._children[cHandle])))
+                break
+            else:
+                stack.pop()
+        return
+
+    def subtreeHandles(self, tHandle: str) -> list[str]:
+        """Return the handles of an item and all its descendants in
+        tree order.
+        """
+        return [nwItem.itemHandle for nwItem in self.iterSubtree(tHandle)]
+
     ##
     #  Tree Root Methods
     ##
@@ -428,7 +575,7 @@ class NWTree:
 
     def setOrder(self, newOrder: list[str]) -> None:
         """Reorders the tree based on a list of items."""
-        tmpOrder = [tHandle for tHandle in newOrder if tHandle in self._tree]
+        tmpOrder = dict.fromkeys(tHandle for tHandle in newOrder if tHandle in self._tree)
         if not (len(tmpOrder) == len(newOrder) == len(self._order)):
             # Something is wrong, so let's debug it
             for tHandle in newOrder:
@@ -437,14 +584,43 @@ class NWTree:
             for tHandle in self._order:
                 if tHandle not in tmpOrder:
                     logger.warning("Handle '%s' in old tree order is not in new order", tHandle)
+            self._words = {}
 
-        # Save the temp list
+        # Save the temp list, and rebuild the children index
         self._order = tmpOrder
+        self._children = {}
+        for tHandle in tmpOrder:
+            pHandle = self._tree[tHandle].itemParent
+            self._children.setdefault(pHandle, {})[tHandle] = None
+
         self._setTreeChanged(True)
         logger.debug("Project tree order updated")
 
         return
 
+    def setItemParent(self, tHandle: str, pHandle: str | None, position: int = -1) -> bool:
+        """Move an item in the tree to a new parent. The item is placed
+        at the given position among the children of the new parent, or
+        after the existing children if the position is negative.
+        """
+        if not (nwItem := self._tree.get(tHandle)):
+            logger.error("No tree item with handle '%s'", str(tHandle))
+            return False
+        self._dropWords(nwItem)
+        self._children.get(nwItem.itemParent, {}).pop(tHandle, None)
+        nwItem.setParent(pHandle)
+        if tHandle in self._order:
+            children = self._children.setdefault(nwItem.itemParent, {})
+            if 0 <= position < len(children):
+                order = list(children)
+                order.insert(position, tHandle)
+                self._children[nwItem.itemParent] = dict.fromkeys(order)
+            else:
+                children[tHandle] = None
+        self._dropWords(nwItem)
+        self._setTreeChanged(True)
+        return True
+
     ##
     #  Special Methods
     ##
@@ -469,8 +645,11 @@ class NWTree:
     def __delitem__(self, tHandle: str) -> None:
         """Remove an item from the internal lists and dictionaries."""
         if tHandle in self._order and tHandle in self._tree:
-            self._order.remove(tHandle)
-            del self._tree[tHandle]
+            del self._order[tHandle]
+            nwItem = self._tree.pop(tHandle)
+            self._children.get(nwItem.itemParent, {}).pop(tHandle, None)
+            self.countItem(nwItem, -1)
+            nwItem.setTree(None)
         else:
             logger.warning("Failed to delete item '%s': item not found", tHandle)
             return
@@ -509,6 +688,19 @@ class NWTree:
             self._project.setProjectChanged(True)
         return
 
+    def _dropWords(self, nwItem: NWItem) -> None:
+        """Drop the cached word counts of an item and its parent items.
+        A branch is only cached if all items below it are, so the walk
+        stops at the first parent that isn't cached.
+        """
+        self._words.pop(nwItem.itemHandle, None)
+        pHandle = nwItem.itemParent
+        for _ in range(MAX_DEPTH):
+            if pHandle is None or self._words.pop(pHandle, None) is None:
+                break
+            pHandle = self._tree[pHandle].itemParent if pHandle in self._tree else None
+        return
+
     def _makeHandle(self) -> str:
         """Generate a unique item handle. In the event that the key
         already exists, generate a new one.
@@ -0,0 +1,218 @@
+"""
+novelWriter – Project Content Watcher
+=====================================
+
+File History:
+Created: 2024-03-20 [2.4b1] NWContentWatcher
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import os
+import logging
+
+from pathlib import Path
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSlot
+
+from novelwriter import SHARED
+from novelwriter.common import isHandle
+
+logger = logging.getLogger(__name__)
+
+
+def fileStat(path: Path) -> tuple[int, int] | None:
+    """Return the modification time and size of a file, or None if the
+    file cannot be accessed.
+    """
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class NWContentWatcher(QObject):
+    """Core: Project Content Watcher
+
+    Keeps a record of the modification time and size of all document
+    files in the project content folder, and reports documents that have
+    been changed by other applications. The folder and the currently
+    open document are monitored by a QFileSystemWatcher. Since not all
+    platforms or file systems send reliable notifications, the folder is
+    also polled at a slow interval.
+
+    Documents written or deleted by novelWriter itself must be reported
+    back through the refreshRecord method, otherwise they are treated as
+    external changes.
+    """
+
+    POLL_INTERVAL = 5000  # Polling interval in ms
+    DELAY_INTERVAL = 250  # Delay for collecting bursts of changes in ms
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self._path = None
+        self._docPath = None
+        self._records = None
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._queueCheck)
+        self._watcher.fileChanged.connect(self._queueCheck)
+
+        self._delayTimer = QTimer(self)
+        self._delayTimer.setSingleShot(True)
+        self._delayTimer.setInterval(self.DELAY_INTERVAL)
+        self._delayTimer.timeout.connect(self.checkContent)
+
+        self._pollTimer = QTimer(self)
+        self._pollTimer.setInterval(self.POLL_INTERVAL)
+        self._pollTimer.timeout.connect(self.checkContent)
+
+        return
+
+    ##
+    #  Properties
+    ##
+
+    @property
+    def isActive(self) -> bool:
+        """Check if the watcher is monitoring a content folder."""
+        return self._path is not None
+
+    ##
+    #  Methods
+    ##
+
+    def start(self, path: Path) -> None:
+        """Start monitoring a content folder. The initial record of the
+        folder is taken on the first check, which is queued here.
+        """
+        self.stop()
+        self._path = path
+        self._records = None
+        if not self._watcher.addPath(str(path)):
+            logger.warning("Cannot watch content folder, relying on polling")
+        self._pollTimer.start()
+        self._delayTimer.start()
+        logger.debug("Watching content folder: %s", path)
+        return
+
+    def stop(self) -> None:
+        """Stop monitoring and clear all records."""
+        self._delayTimer.stop()
+        self._pollTimer.stop()
+        watched = self._watcher.directories() + self._watcher.files()
+        if watched:
+            self._watcher.removePaths(watched)
+        self._path = None
+        self._docPath = None
+        self._records = None
+        return
+
+    def watchDocument(self, tHandle: str | None) -> None:
+        """Set the document that is currently open in the editor. Its
+        file is monitored directly so in-place edits are also picked up
+        without waiting for the next poll.
+        """
+        if self._docPath and str(self._docPath) in self._watcher.files():
+            self._watcher.removePath(str(self._docPath))
+        self._docPath = None
+        if self._path and isHandle(tHandle):
+            self._docPath = self._path / f"{tHandle}.nwd"
+            if self._docPath.is_file():
+                self._watcher.addPath(str(self._docPath))
+        return
+
+    def refreshRecord(self, tHandle: str) -> None:
+        """Update the record of a document that was written or deleted
+        by novelWriter itself.
+        """
+        if self._path and self._records is not None:
+            stat = fileStat(self._path / f"{tHandle}.nwd")
+            if stat is None:
+                self._records.pop(tHandle, None)
+            else:
+                self._records[tHandle] = stat
+        return
+
+    @pyqtSlot()
+    def checkContent(self) -> list[str]:
+        """Compare the content folder against the recorded state, and
+        report the handles of documents that were added, changed or
+        removed since the last check.
+        """
+        if self._path is None:
+            return []
+
+        records = self._scanContent()
+        if self._records is None:
+            logger.debug("Recorded state of %d documents", len(records))
+            self._records = records
+            return []
+
+        changed = sorted(
+            tHandle for tHandle in self._records.keys() | records.keys()
+            if self._records.get(tHandle) != records.get(tHandle)
+        )
+        self._records = records
+
+        # Replacing a file removes it from the file watcher on some
+        # platforms, so it must be added back
+        if self._docPath and str(self._docPath) not in self._watcher.files():
+            if self._docPath.is_file():
+                self._watcher.addPath(str(self._docPath))
+
+        if changed:
+            logger.info("Detected %d document(s) changed on disk", len(changed))
+            SHARED.notifyChangedDocuments(changed)
+
+        return changed
+
+    ##
+    #  Private Slots
+    ##
+
+    @pyqtSlot(str)
+    def _queueCheck(self, path: str) -> None:
+        """Collect file system notifications into a single check."""
+        self._delayTimer.start()
+        return
+
+    ##
+    #  Internal Functions
+    ##
+
+    def _scanContent(self) -> dict[str, tuple[int, int]]:
+        """Record the modification time and size of all documents in
+        the content folder.
+        """
+        records = {}
+        try:
+            with os.scandir(self._path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if len(name) == 17 and name.endswith(".nwd") and isHandle(name[:13]):
+                        stat = entry.stat()
+                        records[name[:13]] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            logger.error("Could not scan content folder")
+        return records
+
+# END Class NWContentWatcher
@@ -0,0 +1,165 @@
+"""
+novelWriter – GUI Performance Dialog
+====================================
+
+File History:
+Created: 2024-03-20 [2.4b1] GuiPerformance
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import logging
+
+from PyQt5.QtGui import QCloseEvent
+from PyQt5.QtCore import Qt, pyqtSlot
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QDialog, QDialogButtonBox, QLabel, QTreeWidget,
+    QTreeWidgetItem, QVBoxLayout, QWidget
+)
+
+from novelwriter import CONFIG, TIMINGS
+
+logger = logging.getLogger(__name__)
+
+
+class GuiPerformance(QDialog):
+    """GUI: Performance Dialog
+
+    A hidden dialog listing the timing statistics of frequent
+    operations. The timings are only recorded when novelWriter is
+    started with --debug or --timings.
+    """
+
+    C_NAME  = 0
+    C_COUNT = 1
+    C_TOTAL = 2
+    C_MEAN  = 3
+    C_P50   = 4
+    C_P90   = 5
+    C_P99   = 6
+    C_MAX   = 7
+
+    def __init__(self, parent: QWidget) -> None:
+        super().__init__(parent=parent)
+
+        logger.debug("Create: GuiPerformance")
+        self.setObjectName("GuiPerformance")
+
+        self.setWindowTitle("Performance")
+        self.resize(CONFIG.pxInt(700), CONFIG.pxInt(400))
+
+        # Info
+        self.infoLabel = QLabel(self)
+        self.infoLabel.setWordWrap(True)
+
+        # Timings
+        self.listBox = QTreeWidget(self)
+        self.listBox.setHeaderLabels([
+            "Operation", "Count", "Total [ms]", "Mean [ms]",
+            "p50 [ms]", "p90 [ms]", "p99 [ms]", "Max [ms]",
+        ])
+        self.listBox.setIndentation(0)
+        self.listBox.setRootIsDecorated(False)
+        self.listBox.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.listBox.setColumnWidth(self.C_NAME, CONFIG.pxInt(160))
+
+        # Buttons
+        self.btnBox = QDialogButtonBox(
+            QDialogButtonBox.Reset | QDialogButtonBox.Close, self
+        )
+        self.btnBox.rejected.connect(self.close)
+        self.btnReset = self.btnBox.button(QDialogButtonBox.Reset)
+        self.btnReset.clicked.connect(self._resetTimings)
+        self.btnRefresh = self.btnBox.addButton("Refresh", QDialogButtonBox.ActionRole)
+        self.btnRefresh.clicked.connect(self.populateGUI)
+
+        # Assemble
+        self.outerBox = QVBoxLayout()
+        self.outerBox.addWidget(self.infoLabel)
+        self.outerBox.addWidget(self.listBox, 1)
+        self.outerBox.addWidget(self.btnBox)
+
+        self.setLayout(self.outerBox)
+        self.setSizeGripEnabled(True)
+
+        logger.debug("Ready: GuiPerformance")
+
+        return
+
+    def __del__(self) -> None:  # pragma: no cover
+        logger.debug("Delete: GuiPerformance")
+        return
+
+    ##
+    #  Methods
+    ##
+
+    @pyqtSlot()
+    def populateGUI(self) -> None:
+        """Fill the list with the current timings."""
+        if not TIMINGS.isEnabled:
+            self.infoLabel.setText(
+                "Timings are not recorded. Start novelWriter with --debug "
+                "or --timings to record them."
+            )
+        elif reportFile := TIMINGS.reportFile:
+            self.infoLabel.setText(f"Timings are written to {reportFile} on exit.")
+        else:
+            self.infoLabel.setText("Timings are recorded for this session.")
+
+        right = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+        self.listBox.clear()
+        for name, data in TIMINGS.summary().items():
+            trItem = QTreeWidgetItem()
+            trItem.setText(self.C_NAME, name)
+            trItem.setText(self.C_COUNT, f"{data['count']:n}")
+            trItem.setText(self.C_TOTAL, f"{data['total']:.1f}")
+            trItem.setText(self.C_MEAN, f"{data['mean']:.3f}")
+            trItem.setText(self.C_P50, f"{data['p50']:.3f}")
+            trItem.setText(self.C_P90, f"{data['p90']:.3f}")
+            trItem.setText(self.C_P99, f"{data['p99']:.3f}")
+            trItem.setText(self.C_MAX, f"{data['max']:.3f}")
+            for i in range(self.C_COUNT, self.C_MAX + 1):
+                trItem.setTextAlignment(i, right)
+            self.listBox.addTopLevelItem(trItem)
+
+        return
+
+    ##
+    #  Events
+    ##
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """Capture the close event and perform cleanup."""
+        event.accept()
+        self.deleteLater()
+        return
+
+    ##
+    #  Private Slots
+    ##
+
+    @pyqtSlot()
+    def _resetTimings(self) -> None:
+        """Clear the recorded timings."""
+        TIMINGS.reset()
+        self.populateGUI()
+        return
+
+# END Class GuiPerformance
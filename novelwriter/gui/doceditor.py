@@ -52,12 +52,11 @@ from PyQt5.QtWidgets import (
     QWidget, qApp
 )
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, SHARED, TIMINGS
 from novelwriter.enum import nwDocAction, nwDocInsert, nwDocMode, nwItemClass, nwTrinary
 from novelwriter.common import minmax, transferCase
 from novelwriter.constants import nwKeyWords, nwLabels, nwShortcode, nwUnicode, trConst
 from novelwriter.core.index import countWords
-from novelwriter.tools.lipsum import GuiLipsum
 from novelwriter.core.document import NWDocument
 from novelwriter.gui.dochighlight import GuiDocHighlighter
 from novelwriter.gui.editordocument import GuiTextDocument
@@ -92,7 +91,7 @@ class GuiDocEditor(QPlainTextEdit):
     docCountsChanged = pyqtSignal(str, int, int, int)
     editedStatusChanged = pyqtSignal(bool)
     loadDocumentTagRequest = pyqtSignal(str, Enum)
-    novelStructureChanged = pyqtSignal()
+    novelStructureChanged = pyqtSignal(str)
     novelItemMetaChanged = pyqtSignal(str)
     spellCheckStateChanged = pyqtSignal(bool)
     closeDocumentRequest = pyqtSignal()
@@ -113,6 +112,7 @@ class GuiDocEditor(QPlainTextEdit):
 
         self._docChanged = False  # Flag for changed status of document
         self._docHandle  = None   # The handle of the open document
+        self._editLock   = False  # Flag for blocking edits while the project opens
         self._vpMargin   = 0      # The editor viewport margin, set during init
 
         # Document Variables
@@ -248,6 +248,7 @@ class GuiDocEditor(QPlainTextEdit):
         self._nwDocument = None
         self.setReadOnly(True)
         self.clear()
+        SHARED.project.storage.watcher.watchDocument(None)
         self.wcTimerDoc.stop()
         self.wcTimerSel.stop()
 
@@ -264,6 +265,15 @@ class GuiDocEditor(QPlainTextEdit):
 
         return
 
+    def lockEditing(self, state: bool) -> None:
+        """Block or allow editing of the open document. Editing is
+        blocked while the project is still being opened, as the
+        changed status and index are reset when the open completes.
+        """
+        self._editLock = state
+        self.setReadOnly(state or self._docHandle is None)
+        return
+
     def updateTheme(self) -> None:
         """Update theme elements."""
         self.docSearch.updateTheme()
@@ -388,6 +398,7 @@ class GuiDocEditor(QPlainTextEdit):
 
         qApp.setOverrideCursor(QCursor(Qt.CursorShape.WaitCursor))
         self._docHandle = tHandle
+        SHARED.project.storage.watcher.watchDocument(tHandle)
 
         self._allowAutoReplace(False)
         self._qDocument.setTextContent(docText, tHandle)
@@ -399,7 +410,7 @@ class GuiDocEditor(QPlainTextEdit):
         self._runDocCounter()
         self.wcTimerDoc.start()
 
-        self.setReadOnly(False)
+        self.setReadOnly(self._editLock)
         self.docHeader.setTitleFromHandle(self._docHandle)
         self.docFooter.setHandle(self._docHandle)
         self.updateDocMargins()
@@ -430,6 +441,15 @@ class GuiDocEditor(QPlainTextEdit):
 
         return True
 
+    def reloadText(self) -> bool:
+        """Reload the current document from disk, keeping the cursor
+        position. Any unsaved changes in the editor are discarded.
+        """
+        if self._docHandle:
+            self.saveCursorPosition()
+            return self.loadText(self._docHandle)
+        return False
+
     def updateTagHighLighting(self) -> None:
         """Rerun the syntax highlighter on all meta data lines."""
         self._qDocument.syntaxHighlighter.rehighlightByType(GuiDocHighlighter.BLOCK_META)
@@ -496,7 +516,7 @@ class GuiDocEditor(QPlainTextEdit):
             if oldCount == newCount:
                 self.novelItemMetaChanged.emit(tHandle)
             else:
-                self.novelStructureChanged.emit()
+                self.novelStructureChanged.emit(tHandle)
 
         if oldHeader != newHeader:
             self.docFooter.updateInfo()
@@ -673,11 +693,10 @@ class GuiDocEditor(QPlainTextEdit):
         the undo stack, so we only do it for big documents.
         """
         logger.debug("Running spell checker")
-        start = time()
         qApp.setOverrideCursor(QCursor(Qt.CursorShape.WaitCursor))
-        self._qDocument.syntaxHighlighter.rehighlight()
+        with TIMINGS.timer("highlight.spelling"):
+            self._qDocument.syntaxHighlighter.rehighlight()
         qApp.restoreOverrideCursor()
-        logger.debug("Document highlighted in %.3f ms", 1000*(time() - start))
         self.statusMessage.emit(self.tr("Spell check complete"))
         return
 
@@ -813,6 +832,9 @@ class GuiDocEditor(QPlainTextEdit):
         if self._docHandle is None:
             logger.error("No document open")
             return False
+        if self._editLock:
+            logger.warning("Editing is blocked")
+            return False
 
         newBlock = False
         goAfter = False
@@ -849,6 +871,7 @@ class GuiDocEditor(QPlainTextEdit):
                 newBlock = True
                 goAfter = False
             elif insert == nwDocInsert.LIPSUM:
+                from novelwriter.tools.lipsum import GuiLipsum
                 text = GuiLipsum.getLipsum(self)
                 newBlock = True
                 goAfter = False
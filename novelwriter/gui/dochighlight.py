@@ -26,15 +26,13 @@ from __future__ import annotations
 
 import logging
 
-from time import time
-
 from PyQt5.QtCore import Qt, QRegularExpression
 from PyQt5.QtGui import (
     QBrush, QColor, QFont, QSyntaxHighlighter, QTextBlockUserData,
     QTextCharFormat, QTextDocument
 )
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, SHARED, TIMINGS
 from novelwriter.enum import nwComment
 from novelwriter.common import checkInt
 from novelwriter.constants import nwRegEx, nwUnicode
@@ -254,18 +252,18 @@ class GuiDocHighlighter(QSyntaxHighlighter):
         """
         qDoc = self.document()
         nBlocks = qDoc.blockCount()
-        tStart = time()
-        for i in range(nBlocks):
-            block = qDoc.findBlockByNumber(i)
-            if block.userState() & cType > 0:
-                self.rehighlightBlock(block)
-        logger.debug("Document highlighted in %.3f ms" % (1000*(time() - tStart)))
+        with TIMINGS.timer("highlight.type"):
+            for i in range(nBlocks):
+                block = qDoc.findBlockByNumber(i)
+                if block.userState() & cType > 0:
+                    self.rehighlightBlock(block)
         return
 
     ##
     #  Highlight Block
     ##
 
+    @TIMINGS.timed("highlight.block")
     def highlightBlock(self, text: str) -> None:
         """Highlight a single block. Prefer to check first character for
         all formats that are defined by their initial characters. This
@@ -7,6 +7,7 @@ Created: 2019-05-10 [0.0.1] GuiDocViewer
 Created: 2020-04-25 [0.4.5] GuiDocViewHeader
 Created: 2020-06-09 [0.8]   GuiDocViewFooter
 Created: 2020-09-08 [1.0b1] GuiDocViewHistory
+Created: 2024-03-20 [2.4b1] GuiDocViewCache
 
 This file is a part of novelWriter
 Copyright 2018–2024, Veronica Berglyd Olsen
@@ -26,12 +27,15 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import hashlib
 import logging
 
+from collections import OrderedDict
 from enum import Enum
+from time import time
 from typing import TYPE_CHECKING
 
-from PyQt5.QtCore import pyqtSignal, pyqtSlot, QPoint, QSize, Qt, QUrl
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QPoint, QSize, Qt, QTimer, QUrl
 from PyQt5.QtGui import (
     QCursor, QFont, QMouseEvent, QPalette, QResizeEvent, QTextCursor,
     QTextOption
@@ -45,7 +49,6 @@ from novelwriter import CONFIG, SHARED
 from novelwriter.enum import nwItemType, nwDocAction, nwDocMode
 from novelwriter.error import logException
 from novelwriter.constants import nwUnicode
-from novelwriter.core.tohtml import ToHtml
 from novelwriter.extensions.eventfilters import WheelEventFilter
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -71,6 +74,7 @@ class GuiDocViewer(QTextBrowser):
 
         # Internal Variables
         self._docHandle = None
+        self._prefetch: list[str] = []
 
         # Settings
         self.setMinimumWidth(CONFIG.pxInt(300))
@@ -83,8 +87,14 @@ class GuiDocViewer(QTextBrowser):
         self.docHeader  = GuiDocViewHeader(self)
         self.docFooter  = GuiDocViewFooter(self)
         self.docHistory = GuiDocViewHistory(self)
+        self.docCache   = GuiDocViewCache()
         self.stickyRef  = False
 
+        # Prefetch Timer
+        self.prefetchTimer = QTimer(self)
+        self.prefetchTimer.setInterval(50)
+        self.prefetchTimer.timeout.connect(self._processPrefetch)
+
         # Signals
         self.anchorClicked.connect(self._linkClicked)
 
@@ -200,18 +210,12 @@ class GuiDocViewer(QTextBrowser):
         qApp.setOverrideCursor(QCursor(Qt.CursorShape.WaitCursor))
 
         sPos = self.verticalScrollBar().value()
-        aDoc = ToHtml(SHARED.project)
-        aDoc.setPreview(CONFIG.viewComments, CONFIG.viewSynopsis)
-        aDoc.setLinkHeaders(True)
 
         # Be extra careful here to prevent crashes when first opening a
         # project as a crash here leaves no way of recovering.
         # See issue #298
         try:
-            aDoc.setText(tHandle)
-            aDoc.doPreProcessing()
-            aDoc.tokenizeText()
-            aDoc.doConvert()
+            html = self._renderDocument(tHandle)
         except Exception:
             logger.error("Failed to generate preview for document with handle '%s'", tHandle)
             logException()
@@ -228,10 +232,7 @@ class GuiDocViewer(QTextBrowser):
 
         self.setDocumentTitle(tHandle)
 
-        # Replace tabs before setting the HTML, and then put them back in
-        self.setHtml(aDoc.result.replace("\t", "!!tab!!"))
-        while self.find("!!tab!!"):
-            self.textCursor().insertText("\t")
+        self.setHtml(html)
 
         if self._docHandle == tHandle:
             # This is a refresh, so we set the scrollbar back to where it was
@@ -247,6 +248,7 @@ class GuiDocViewer(QTextBrowser):
         self.redrawText()
         qApp.restoreOverrideCursor()
         self.documentLoaded.emit(tHandle)
+        self._queuePrefetch(tHandle)
 
         return True
 
@@ -289,8 +291,11 @@ class GuiDocViewer(QTextBrowser):
         return
 
     def clearNavHistory(self) -> None:
-        """Clear the navigation history."""
+        """Clear the navigation history and the preview cache."""
         self.docHistory.clear()
+        self.docCache.clear()
+        self._prefetch = []
+        self.prefetchTimer.stop()
         return
 
     def updateDocMargins(self) -> None:
@@ -372,6 +377,21 @@ class GuiDocViewer(QTextBrowser):
                 self.loadDocumentTagRequest.emit(bits[1], nwDocMode.VIEW)
         return
 
+    @pyqtSlot()
+    def _processPrefetch(self) -> None:
+        """Render one queued document per timer event into the preview
+        cache, so that the GUI remains responsive.
+        """
+        if self._prefetch and SHARED.hasProject:
+            tHandle = self._prefetch.pop(0)
+            try:
+                self._renderDocument(tHandle)
+            except Exception:
+                logger.warning("Failed to prefetch preview for item '%s'", tHandle)
+        if not self._prefetch:
+            self.prefetchTimer.stop()
+        return
+
     @pyqtSlot("QPoint")
     def _openContextMenu(self, point: QPoint) -> None:
         """Open context menu at location."""
@@ -433,6 +453,55 @@ class GuiDocViewer(QTextBrowser):
     #  Internal Functions
     ##
 
+    def _renderDocument(self, tHandle: str) -> str:
+        """Return the preview HTML of a document, from the cache if the
+        document and the preview settings are unchanged.
+        """
+        text = SHARED.project.storage.getDocument(tHandle).readDocument() or ""
+        nwItem = SHARED.project.tree[tHandle]
+        key = (
+            hashlib.sha1(text.encode()).hexdigest(),
+            nwItem.itemLayout if nwItem else None,
+            CONFIG.viewComments, CONFIG.viewSynopsis, CONFIG.tabWidth,
+        )
+        if (html := self.docCache.get(tHandle, key)) is not None:
+            logger.debug("Using cached preview for item '%s'", tHandle)
+            return html
+
+        from novelwriter.core.tohtml import ToHtml
+        aDoc = ToHtml(SHARED.project)
+        aDoc.setPreview(CONFIG.viewComments, CONFIG.viewSynopsis)
+        aDoc.setLinkHeaders(True)
+        aDoc.setText(tHandle, text)
+        aDoc.doPreProcessing()
+        aDoc.tokenizeText()
+        aDoc.doConvert()
+        self.docCache.put(tHandle, key, aDoc.result)
+
+        return aDoc.result
+
+    def _queuePrefetch(self, tHandle: str) -> None:
+        """Queue the documents before and after a document in the
+        project tree for rendering into the preview cache.
+        """
+        tree = SHARED.project.tree
+        nwItem = tree[tHandle]
+        if nwItem is None:
+            return
+
+        siblings = [
+            cItem.itemHandle for cItem in tree.iterChildren(nwItem.itemParent)
+            if cItem.isFileType()
+        ]
+        self._prefetch = []
+        if tHandle in siblings:
+            idx = siblings.index(tHandle)
+            self._prefetch = siblings[idx+1:idx+2] + siblings[max(idx-1, 0):idx]
+        if self._prefetch:
+            self.prefetchTimer.start()
+
+        return
+
     def _makeSelection(self, selType: QTextCursor.SelectionType) -> None:
         """Handle selection of text based on a selection mode."""
         cursor = self.textCursor()
@@ -631,6 +700,57 @@ class GuiDocViewHistory:
 # END Class GuiDocViewHistory
 
 
+class GuiDocViewCache:
+    """GUI: Document Viewer Cache
+
+    Holds the rendered preview of the most recently viewed documents.
+    An entry is only used if the document text, layout and preview
+    settings are the same as when it was rendered, and no tags have
+    changed in the project index since then.
+    """
+
+    MAX_ENTRIES = 20
+
+    def __init__(self) -> None:
+        self._cache: OrderedDict[str, tuple[tuple, float, str]] = OrderedDict()
+        return
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, tHandle: str) -> bool:
+        return tHandle in self._cache
+
+    def clear(self) -> None:
+        """Clear the cache."""
+        self._cache.clear()
+        return
+
+    def get(self, tHandle: str, key: tuple) -> str | None:
+        """Return the cached preview of a document if it is still
+        valid, otherwise drop it.
+        """
+        if entry := self._cache.get(tHandle):
+            eKey, eTime, html = entry
+            if eKey == key and not SHARED.project.index.tagsChangedSince(eTime):
+                self._cache.move_to_end(tHandle)
+                return html
+            del self._cache[tHandle]
+        return None
+
+    def put(self, tHandle: str, key: tuple, html: str) -> None:
+        """Add the preview of a document to the cache, and drop the
+        least recently used entries if the cache is full.
+        """
+        self._cache[tHandle] = (key, time(), html)
+        self._cache.move_to_end(tHandle)
+        while len(self._cache) > self.MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return
+
+# END Class GuiDocViewCache
+
+
 # =============================================================================================== #
 #  The Embedded Document Header
 #  Only used by DocViewer, and is at a fixed position in the QTextBrowser's viewport
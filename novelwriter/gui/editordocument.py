@@ -25,12 +25,10 @@ from __future__ import annotations
 
 import logging
 
-from time import time
-
 from PyQt5.QtGui import QTextCursor, QTextDocument
 from PyQt5.QtCore import QObject, pyqtSlot
 from PyQt5.QtWidgets import QPlainTextDocumentLayout, qApp
-from novelwriter import SHARED
+from novelwriter import SHARED, TIMINGS
 
 from novelwriter.gui.dochighlight import GuiDocHighlighter, TextBlockData
 
@@ -75,22 +73,14 @@ class GuiTextDocument(QTextDocument):
         self.setUndoRedoEnabled(False)
         self.clear()
 
-        tStart = time()
-
-        self.setPlainText(text)
-        count = self.lineCount()
-
-        tMid = time()
+        with TIMINGS.timer("editor.load"):
+            self.setPlainText(text)
 
         self.setUndoRedoEnabled(True)
         self.blockSignals(False)
-        self._syntax.rehighlight()
-        qApp.processEvents()
-
-        tEnd = time()
-
-        logger.debug("Loaded %d text blocks in %.3f ms", count, 1000*(tMid - tStart))
-        logger.debug("Highlighted document in %.3f ms", 1000*(tEnd - tMid))
+        with TIMINGS.timer("editor.highlight"):
+            self._syntax.rehighlight()
+            qApp.processEvents()
 
         return
 
@@ -177,6 +177,14 @@ class GuiNovelView(QWidget):
         self.novelBar.buildNovelRootMenu()
         return
 
+    @pyqtSlot(str)
+    def updateNovelStructure(self, tHandle: str) -> None:
+        """The headings of a novel item have changed, and the rows of
+        the item need to be replaced.
+        """
+        self.novelTree.refreshStructure(tHandle)
+        return
+
     @pyqtSlot(str)
     def updateNovelItemMeta(self, tHandle: str) -> None:
         """The meta data of a novel item has changed, and the tree item
@@ -525,10 +533,70 @@ class GuiNovelTree(QTreeWidget):
                     self._updateTreeItemValues(trItem, tHeading, tHandle, sTitle)
                 else:
                     logger.debug("Heading '%s' not in novel tree", sKey)
-                    self.refreshTree()
+                    self.refreshStructure(tHandle)
                     return
         return
 
+    def refreshStructure(self, tHandle: str) -> None:
+        """Replace the rows of a given handle after its headings have
+        changed, without rebuilding the rest of the tree. A full rebuild
+        is only done if the project tree has changed since the last
+        build, as the order of the items may then have changed too, or
+        if other documents in the root have changed since the last build.
+        """
+        rootHandle = SHARED.project.data.getLastHandle("novelTree")
+        if rootHandle is None:
+            rootHandle = SHARED.project.tree.findRoot(nwItemClass.NOVEL)
+        if (
+            self.mainGui.projView.changedSince(self._lastBuild)
+            or SHARED.project.index.rootChangedSince(rootHandle, self._lastBuild, ignore=tHandle)
+        ):
+            self.refreshTree(rootHandle=rootHandle, overRide=True)
+            return
+
+        logger.debug("Refreshing structure of item '%s'", tHandle)
+        tStart = time()
+
+        selItem = self.selectedItems()
+        titleKey = selItem[0].data(self.C_DATA, self.D_KEY) if selItem else None
+        vScroll = self.verticalScrollBar().value()
+
+        # Remove the old rows, and find the position of the new ones
+        index = SHARED.project.index
+        oldKeys = [k for k in self._treeMap if k.partition(":")[0] == tHandle]
+        if oldKeys:
+            pos = self.indexOfTopLevelItem(self._treeMap[oldKeys[0]])
+        else:
+            pos = 0
+            for tKey, sHandle, _, _ in index.novelStructure(rootHandle=rootHandle):
+                if sHandle == tHandle:
+                    break
+                if tKey in self._treeMap:
+                    pos = self.indexOfTopLevelItem(self._treeMap[tKey]) + 1
+
+        for tKey in oldKeys:
+            self.takeTopLevelItem(self.indexOfTopLevelItem(self._treeMap.pop(tKey)))
+
+        # Insert the new rows
+        newItems = []
+        for tKey, _, sTitle, novIdx in index.novelItemStructure(
+            tHandle, rootHandle=rootHandle, activeOnly=True
+        ):
+            if novIdx.level != "H0":
+                newItem = self._createTreeItem(tKey, tHandle, sTitle, novIdx)
+                self._setTreeItemActive(newItem, tHandle == self._actHandle)
+                newItems.append(newItem)
+        self.insertTopLevelItems(pos, newItems)
+
+        if titleKey is not None and titleKey in self._treeMap:
+            self._treeMap[titleKey].setSelected(True)
+        self.verticalScrollBar().setValue(vScroll)
+
+        logger.debug("Novel Tree updated in %.3f ms", (time() - tStart)*1000)
+        self._lastBuild = time()
+
+        return
+
     def getSelectedHandle(self) -> tuple[str | None, str | None]:
         """Get the currently selected or active handle. If multiple
         items are selected, return the first.
@@ -563,19 +631,11 @@ class GuiNovelTree(QTreeWidget):
         self._actHandle = tHandle
         for i in range(self.topLevelItemCount()):
             if tItem := self.topLevelItem(i):
-                if tItem.data(self.C_DATA, self.D_HANDLE) == tHandle:
-                    tItem.setBackground(self.C_TITLE, self.palette().alternateBase())
-                    tItem.setBackground(self.C_WORDS, self.palette().alternateBase())
-                    tItem.setBackground(self.C_EXTRA, self.palette().alternateBase())
-                    tItem.setBackground(self.C_MORE, self.palette().alternateBase())
-                    if doScroll and not didScroll:
-                        self.scrollToItem(tItem, QAbstractItemView.ScrollHint.PositionAtCenter)
-                        didScroll = True
-                else:
-                    tItem.setBackground(self.C_TITLE, self.palette().base())
-                    tItem.setBackground(self.C_WORDS, self.palette().base())
-                    tItem.setBackground(self.C_EXTRA, self.palette().base())
-                    tItem.setBackground(self.C_MORE, self.palette().base())
+                isActive = tItem.data(self.C_DATA, self.D_HANDLE) == tHandle
+                self._setTreeItemActive(tItem, isActive)
+                if isActive and doScroll and not didScroll:
+                    self.scrollToItem(tItem, QAbstractItemView.ScrollHint.PositionAtCenter)
+                    didScroll = True
         return
 
     ##
@@ -679,16 +739,7 @@ class GuiNovelTree(QTreeWidget):
         for tKey, tHandle, sTitle, novIdx in novStruct:
             if novIdx.level == "H0":
                 continue
-
-            newItem = QTreeWidgetItem()
-            newItem.setData(self.C_DATA, self.D_HANDLE, tHandle)
-            newItem.setData(self.C_DATA, self.D_TITLE, sTitle)
-            newItem.setData(self.C_DATA, self.D_KEY, tKey)
-            newItem.setTextAlignment(self.C_WORDS, Qt.AlignmentFlag.AlignRight)
-
-            self._updateTreeItemValues(newItem, novIdx, tHandle, sTitle)
-            self._treeMap[tKey] = newItem
-            self.addTopLevelItem(newItem)
+            self.addTopLevelItem(self._createTreeItem(tKey, tHandle, sTitle, novIdx))
 
         self.setActiveHandle(self._actHandle)
 
@@ -697,6 +748,29 @@ class GuiNovelTree(QTreeWidget):
 
         return
 
+    def _createTreeItem(self, tKey: str, tHandle: str, sTitle: str,
+                        novIdx: IndexHeading) -> QTreeWidgetItem:
+        """Create a tree item for a heading, and add it to the map."""
+        newItem = QTreeWidgetItem()
+        newItem.setData(self.C_DATA, self.D_HANDLE, tHandle)
+        newItem.setData(self.C_DATA, self.D_TITLE, sTitle)
+        newItem.setData(self.C_DATA, self.D_KEY, tKey)
+        newItem.setTextAlignment(self.C_WORDS, Qt.AlignmentFlag.AlignRight)
+
+        self._updateTreeItemValues(newItem, novIdx, tHandle, sTitle)
+        self._treeMap[tKey] = newItem
+
+        return newItem
+
+    def _setTreeItemActive(self, trItem: QTreeWidgetItem, isActive: bool) -> None:
+        """Set the background of a tree item for the active state."""
+        bgCol = self.palette().alternateBase() if isActive else self.palette().base()
+        trItem.setBackground(self.C_TITLE, bgCol)
+        trItem.setBackground(self.C_WORDS, bgCol)
+        trItem.setBackground(self.C_EXTRA, bgCol)
+        trItem.setBackground(self.C_MORE, bgCol)
+        return
+
     def _updateTreeItemValues(self, trItem: QTreeWidgetItem, idxItem: IndexHeading,
                               tHandle: str, sTitle: str) -> None:
         """Set the tree item values from the index entry."""
@@ -8,6 +8,7 @@ Created: 2022-05-22 [2.0rc1] GuiOutlineToolBar
 Created: 2019-11-16 [0.4.1]  GuiOutlineTree
 Created: 2019-11-16 [0.4.1]  GuiOutlineHeaderMenu
 Created: 2020-06-02 [0.7]    GuiOutlineDetails
+Rewritten: 2024-03-20 [2.4b1] GuiOutlineTree
 
 This file is a part of novelWriter
 Copyright 2018–2024, Veronica Berglyd Olsen
@@ -33,20 +34,21 @@ import logging
 from time import time
 from enum import Enum
 
-from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QSize, QT_TRANSLATE_NOOP
+from PyQt5.QtCore import (
+    QModelIndex, QSize, QSortFilterProxyModel, Qt, pyqtSignal, pyqtSlot, QT_TRANSLATE_NOOP
+)
 from PyQt5.QtWidgets import (
     QAbstractItemView, QAction, QFileDialog, QFrame, QGridLayout, QGroupBox,
-    QHBoxLayout, QLabel, QMenu, QScrollArea, QSizePolicy, QSplitter, QToolBar,
-    QToolButton, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget
+    QHBoxLayout, QLabel, QLineEdit, QMenu, QScrollArea, QSizePolicy, QSplitter,
+    QToolBar, QToolButton, QTreeView, QVBoxLayout, QWidget
 )
 
 from novelwriter import CONFIG, SHARED
-from novelwriter.enum import (
-    nwDocMode, nwItemClass, nwItemLayout, nwItemType, nwOutline
-)
+from novelwriter.enum import nwDocMode, nwItemClass, nwOutline
 from novelwriter.error import logException
 from novelwriter.common import checkInt, formatFileFilter, makeFileNameSafe
-from novelwriter.constants import nwHeaders, trConst, nwKeyWords, nwLabels
+from novelwriter.constants import trConst, nwKeyWords, nwLabels
+from novelwriter.gui.outlinemodel import GuiOutlineModel
 from novelwriter.extensions.novelselector import NovelSelector
 
 
@@ -88,6 +90,7 @@ class GuiOutlineView(QWidget):
         self.outlineBar.loadNovelRootRequest.connect(self._rootItemChanged)
         self.outlineBar.viewColumnToggled.connect(self.outlineTree.menuColumnToggled)
         self.outlineBar.outlineExportRequest.connect(self.outlineTree.exportOutline)
+        self.outlineBar.filterTextChanged.connect(self.outlineTree.setFilterText)
 
         # Function Mappings
         self.getSelectedHandle = self.outlineTree.getSelectedHandle
@@ -166,6 +169,24 @@ class GuiOutlineView(QWidget):
         self.outlineData.updateClasses()
         return
 
+    @pyqtSlot(str)
+    def updateItemValues(self, tHandle: str) -> None:
+        """Update the outline rows of a re-indexed document."""
+        self.outlineTree.updateItem(tHandle)
+        return
+
+    @pyqtSlot()
+    def indexWasCleared(self) -> None:
+        """Mark the outline for a rebuild when the index is cleared."""
+        self.outlineTree.setStale()
+        return
+
+    @pyqtSlot()
+    def indexHasAppeared(self) -> None:
+        """Mark the outline for a rebuild when the index is rebuilt."""
+        self.outlineTree.setStale()
+        return
+
     ##
     #  Private Slots
     ##
@@ -200,6 +221,7 @@ class GuiOutlineToolBar(QToolBar):
     loadNovelRootRequest = pyqtSignal(str)
     outlineExportRequest = pyqtSignal()
     viewColumnToggled = pyqtSignal(bool, Enum)
+    filterTextChanged = pyqtSignal(str)
 
     def __init__(self, outlineView: GuiOutlineView) -> None:
         super().__init__(parent=outlineView)
@@ -242,6 +264,15 @@ class GuiOutlineToolBar(QToolBar):
         self.tbColumns.setMenu(self.mColumns)
         self.tbColumns.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
 
+        # Filter
+        self.filterValue = QLineEdit(self)
+        self.filterValue.setPlaceholderText(self.tr("Filter"))
+        self.filterValue.setClearButtonEnabled(True)
+        self.filterValue.setMaximumWidth(CONFIG.pxInt(200))
+        self.filterValue.textChanged.connect(
+            lambda text: self.filterTextChanged.emit(text)
+        )
+
         # Assemble
         self.addWidget(self.novelLabel)
         self.addWidget(self.novelValue)
@@ -250,6 +281,7 @@ class GuiOutlineToolBar(QToolBar):
         self.addAction(self.aExport)
         self.addWidget(self.tbColumns)
         self.addWidget(stretch)
+        self.addWidget(self.filterValue)
 
         self.updateTheme()
 
@@ -311,7 +343,7 @@ class GuiOutlineToolBar(QToolBar):
 # END Class GuiOutlineToolBar
 
 
-class GuiOutlineTree(QTreeWidget):
+class GuiOutlineTree(QTreeView):
 
     DEF_WIDTH = {
         nwOutline.TITLE:  200,
@@ -353,8 +385,8 @@ class GuiOutlineTree(QTreeWidget):
         nwOutline.SYNOP:  False,
     }
 
-    D_HANDLE = Qt.ItemDataRole.UserRole
-    D_TITLE  = Qt.ItemDataRole.UserRole + 1
+    D_HANDLE = GuiOutlineModel.D_HANDLE
+    D_TITLE  = GuiOutlineModel.D_TITLE
 
     hiddenStateChanged = pyqtSignal()
     activeItemChanged = pyqtSignal(str, str)
@@ -366,42 +398,36 @@ class GuiOutlineTree(QTreeWidget):
 
         self.outlineView = outlineView
 
+        # Models
+        self._model = GuiOutlineModel(self)
+        self._proxy = QSortFilterProxyModel(self)
+        self._proxy.setSourceModel(self._model)
+        self._proxy.setSortRole(GuiOutlineModel.D_SORT)
+        self._proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self._proxy.setFilterKeyColumn(-1)
+
+        self.setModel(self._proxy)
         self.setUniformRowHeights(True)
         self.setFrameStyle(QFrame.Shape.NoFrame)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.setExpandsOnDoubleClick(False)
         self.setDragEnabled(False)
-        self.itemDoubleClicked.connect(self._treeDoubleClick)
-        self.itemSelectionChanged.connect(self._itemSelected)
+        self.setRootIsDecorated(False)
+        self.doubleClicked.connect(self._treeDoubleClick)
+        self.selectionModel().selectionChanged.connect(self._itemSelected)
 
         iPx = SHARED.theme.baseIconSize
         self.setIconSize(QSize(iPx, iPx))
         self.setIndentation(0)
 
+        # Sorting starts in novel order, and the sort cycle slot must
+        # be connected after sorting is enabled to run last
         self.treeHead = self.header()
+        self.treeHead.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
         self.treeHead.sectionMoved.connect(self._columnMoved)
-
-        # Pre-Generate Tree Formatting
-        fH1 = self.font()
-        fH1.setBold(True)
-        fH1.setUnderline(True)
-
-        fH2 = self.font()
-        fH2.setBold(True)
-
-        iType = nwItemType.FILE
-        iClass = nwItemClass.NO_CLASS
-        iLayout = nwItemLayout.DOCUMENT
-
-        self._hFonts = [self.font(), fH1, fH2, self.font(), self.font()]
-        self._dIcon = {
-            "H0": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H0"),
-            "H1": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H1"),
-            "H2": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H2"),
-            "H3": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H3"),
-            "H4": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H4"),
-        }
+        self.setSortingEnabled(True)
+        self.treeHead.sortIndicatorChanged.connect(self._sortChanged)
 
         # Internals
         self._treeOrder = []
@@ -411,6 +437,8 @@ class GuiOutlineTree(QTreeWidget):
         self._treeNCols = 0
         self._firstView = True
         self._lastBuild = 0
+        self._stale     = False
+        self._sortState = (-1, Qt.SortOrder.AscendingOrder)
 
         self.initSettings()
         self.clearContent()
@@ -429,6 +457,10 @@ class GuiOutlineTree(QTreeWidget):
     def hiddenColumns(self):
         return self._colHidden
 
+    @property
+    def outlineModel(self) -> GuiOutlineModel:
+        return self._model
+
     ##
     #  Methods
     ##
@@ -449,9 +481,7 @@ class GuiOutlineTree(QTreeWidget):
         """Clear the tree and header and set the default values for the
         columns arrays.
         """
-        self.clear()
-        self.setColumnCount(1)
-        self.setHeaderLabel(trConst(nwLabels.OUTLINE_COLS[nwOutline.TITLE]))
+        self._model.clear()
 
         self._treeOrder: list[nwOutline] = []
         self._colWidth:  dict[nwOutline, int] = {}
@@ -483,8 +513,10 @@ class GuiOutlineTree(QTreeWidget):
 
         # If the novel index or novel tree has changed since the tree
         # was last built, we rebuild the tree from the updated index.
+        # Documents re-indexed after the build have already been
+        # updated in the model.
         indexChanged = SHARED.project.index.rootChangedSince(rootHandle, self._lastBuild)
-        if not (novelChanged or indexChanged or overRide):
+        if not (novelChanged or indexChanged or overRide or self._stale):
             logger.debug("No changes have been made to the novel index")
             return
 
@@ -504,12 +536,37 @@ class GuiOutlineTree(QTreeWidget):
         """Get the currently selected handle. If multiple items are
         selected, return the first.
         """
-        if item := self.selectedItems():
-            tHandle = item[0].data(self._colIdx[nwOutline.TITLE], self.D_HANDLE)
-            sTitle = item[0].data(self._colIdx[nwOutline.TITLE], self.D_TITLE)
-            return tHandle, sTitle
+        if indexes := self.selectionModel().selectedRows():
+            return indexes[0].data(self.D_HANDLE), indexes[0].data(self.D_TITLE)
         return None, None
 
+    def updateItem(self, tHandle: str) -> None:
+        """Update the rows of a document that has been re-indexed. The
+        build time is only moved forward if no other documents in the
+        root have changed since the last build.
+        """
+        if self._firstView:
+            return
+        pending = SHARED.project.index.rootChangedSince(
+            self._model.rootHandle, self._lastBuild, ignore=tHandle
+        )
+        self._model.updateHandle(tHandle)
+        if not (self._stale or pending):
+            self._lastBuild = time()
+        return
+
+    def setStale(self) -> None:
+        """Make sure the tree is rebuilt the next time it is refreshed,
+        as the index has changed in ways not reported per document.
+        """
+        self._stale = True
+        return
+
+    def setFilterText(self, text: str) -> None:
+        """Only show rows where a column contains a given text."""
+        self._proxy.setFilterFixedString(text)
+        return
+
     ##
     #  Public Slots
     ##
@@ -539,17 +596,16 @@ class GuiOutlineTree(QTreeWidget):
             with open(path, mode="w", newline="") as csvFile:
                 writer = csv.writer(csvFile, dialect="excel", quoting=csv.QUOTE_ALL)
                 writer.writerow([trConst(nwLabels.OUTLINE_COLS[col]) for col in cols])
-                for i in range(self.topLevelItemCount()):
-                    if item := self.topLevelItem(i):
-                        writer.writerow(item.text(i) for i in order)
+                for i in range(self._proxy.rowCount()):
+                    writer.writerow(self._proxy.index(i, c).data() for c in order)
         return
 
     ##
     #  Private Slots
     ##
 
-    @pyqtSlot("QTreeWidgetItem*", int)
-    def _treeDoubleClick(self, tItem: QTreeWidgetItem, tCol: int) -> None:
+    @pyqtSlot(QModelIndex)
+    def _treeDoubleClick(self, index: QModelIndex) -> None:
         """Extract the handle and line number of the title double-
         clicked, and send it to the main gui class for opening in the
         document editor.
@@ -564,10 +620,8 @@ class GuiOutlineTree(QTreeWidget):
         """Extract the handle and line number of the currently selected
         title, and send it to the details panel.
         """
-        selItems = self.selectedItems()
-        if selItems:
-            tHandle = selItems[0].data(self._colIdx[nwOutline.TITLE], self.D_HANDLE)
-            sTitle = selItems[0].data(self._colIdx[nwOutline.TITLE], self.D_TITLE)
+        tHandle, sTitle = self.getSelectedHandle()
+        if tHandle:
             self.activeItemChanged.emit(tHandle, sTitle)
         return
 
@@ -580,6 +634,17 @@ class GuiOutlineTree(QTreeWidget):
         self._saveHeaderState()
         return
 
+    @pyqtSlot(int, Qt.SortOrder)
+    def _sortChanged(self, logIdx: int, order: Qt.SortOrder) -> None:
+        """Cycle the sorting of a column from ascending to descending,
+        and then back to the novel order.
+        """
+        column, previous = self._sortState
+        self._sortState = (logIdx, order)
+        if logIdx >= 0 and logIdx == column and previous == Qt.SortOrder.DescendingOrder:
+            self.treeHead.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        return
+
     ##
     #  Internal Functions
     ##
@@ -631,7 +696,7 @@ class GuiOutlineTree(QTreeWidget):
             return
 
         colState = {}
-        for iCol in range(self.columnCount()):
+        for iCol in range(self.treeHead.count()):
             hItem = self._treeOrder[iCol]
             iLog = self.treeHead.logicalIndex(iCol)
             logHidden = self.isColumnHidden(iLog)
@@ -651,20 +716,17 @@ class GuiOutlineTree(QTreeWidget):
     def _populateTree(self, rootHandle: str | None) -> None:
         """Build the tree based on the project index, and the header
         based on the defined constants, default values and user selected
-        width, order and hidden state. All columns are populated, even
-        if they are hidden. This ensures that showing and hiding columns
-        is fast and doesn't require a rebuild of the tree.
+        width, order and hidden state. All columns are available, even
+        if they are hidden, but the text of each cell is only formatted
+        by the model when it is shown.
         """
         logger.debug("Rebuilding Outline tree")
-        self.clear()
 
         if self._firstView:
-            labels = []
             for i, hItem in enumerate(self._treeOrder):
-                labels.append(trConst(nwLabels.OUTLINE_COLS[hItem]))
                 self._colIdx[hItem] = i
 
-            self.setHeaderLabels(labels)
+            self._model.setColumns(self._treeOrder)
             for hItem in self._treeOrder:
                 self.setColumnWidth(self._colIdx[hItem], self._colWidth[hItem])
                 self.setColumnHidden(self._colIdx[hItem], self._colHidden[hItem])
@@ -672,55 +734,8 @@ class GuiOutlineTree(QTreeWidget):
             # Make sure title column is always visible
             self.setColumnHidden(self._colIdx[nwOutline.TITLE], False)
 
-            headItem = self.headerItem()
-            if isinstance(headItem, QTreeWidgetItem):
-                headItem.setTextAlignment(
-                    self._colIdx[nwOutline.CCOUNT], Qt.AlignmentFlag.AlignRight)
-                headItem.setTextAlignment(
-                    self._colIdx[nwOutline.WCOUNT], Qt.AlignmentFlag.AlignRight)
-                headItem.setTextAlignment(
-                    self._colIdx[nwOutline.PCOUNT], Qt.AlignmentFlag.AlignRight)
-
-        novStruct = SHARED.project.index.novelStructure(rootHandle=rootHandle, activeOnly=True)
-        for _, tHandle, sTitle, novIdx in novStruct:
-
-            iLevel = nwHeaders.H_LEVEL.get(novIdx.level, 0)
-            nwItem = SHARED.project.tree[tHandle]
-            if iLevel == 0 or nwItem is None:
-                continue
-
-            trItem = QTreeWidgetItem()
-            hDec = SHARED.theme.getHeaderDecoration(iLevel)
-
-            trItem.setData(self._colIdx[nwOutline.TITLE], Qt.ItemDataRole.DecorationRole, hDec)
-            trItem.setText(self._colIdx[nwOutline.TITLE], novIdx.title)
-            trItem.setData(self._colIdx[nwOutline.TITLE], self.D_HANDLE, tHandle)
-            trItem.setData(self._colIdx[nwOutline.TITLE], self.D_TITLE, sTitle)
-            trItem.setFont(self._colIdx[nwOutline.TITLE], self._hFonts[iLevel])
-            trItem.setText(self._colIdx[nwOutline.LEVEL], novIdx.level)
-            trItem.setIcon(self._colIdx[nwOutline.LABEL], self._dIcon[nwItem.mainHeading])
-            trItem.setText(self._colIdx[nwOutline.LABEL], nwItem.itemName)
-            trItem.setText(self._colIdx[nwOutline.LINE], f"{novIdx.line:n}")
-            trItem.setText(self._colIdx[nwOutline.SYNOP], novIdx.synopsis)
-            trItem.setText(self._colIdx[nwOutline.CCOUNT], f"{novIdx.charCount:n}")
-            trItem.setText(self._colIdx[nwOutline.WCOUNT], f"{novIdx.wordCount:n}")
-            trItem.setText(self._colIdx[nwOutline.PCOUNT], f"{novIdx.paraCount:n}")
-            trItem.setTextAlignment(self._colIdx[nwOutline.CCOUNT], Qt.AlignmentFlag.AlignRight)
-            trItem.setTextAlignment(self._colIdx[nwOutline.WCOUNT], Qt.AlignmentFlag.AlignRight)
-            trItem.setTextAlignment(self._colIdx[nwOutline.PCOUNT], Qt.AlignmentFlag.AlignRight)
-
-            refs = SHARED.project.index.getReferences(tHandle, sTitle)
-            trItem.setText(self._colIdx[nwOutline.POV],    ", ".join(refs[nwKeyWords.POV_KEY]))
-            trItem.setText(self._colIdx[nwOutline.FOCUS],  ", ".join(refs[nwKeyWords.FOCUS_KEY]))
-            trItem.setText(self._colIdx[nwOutline.CHAR],   ", ".join(refs[nwKeyWords.CHAR_KEY]))
-            trItem.setText(self._colIdx[nwOutline.PLOT],   ", ".join(refs[nwKeyWords.PLOT_KEY]))
-            trItem.setText(self._colIdx[nwOutline.TIME],   ", ".join(refs[nwKeyWords.TIME_KEY]))
-            trItem.setText(self._colIdx[nwOutline.WORLD],  ", ".join(refs[nwKeyWords.WORLD_KEY]))
-            trItem.setText(self._colIdx[nwOutline.OBJECT], ", ".join(refs[nwKeyWords.OBJECT_KEY]))
-            trItem.setText(self._colIdx[nwOutline.ENTITY], ", ".join(refs[nwKeyWords.ENTITY_KEY]))
-            trItem.setText(self._colIdx[nwOutline.CUSTOM], ", ".join(refs[nwKeyWords.CUSTOM_KEY]))
-
-            self.addTopLevelItem(trItem)
+        self._model.reload(rootHandle)
+        self._stale = False
 
         self._lastBuild = time()
 
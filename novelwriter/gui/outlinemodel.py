@@ -0,0 +1,327 @@
+"""
+novelWriter – GUI Outline Model
+===============================
+
+File History:
+Created: 2024-03-20 [2.4b1] GuiOutlineModel
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import logging
+
+from typing import TYPE_CHECKING, Any
+
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+
+from novelwriter import SHARED
+from novelwriter.enum import nwItemClass, nwItemLayout, nwItemType, nwOutline
+from novelwriter.constants import nwHeaders, nwKeyWords, nwLabels, trConst
+
+if TYPE_CHECKING:  # pragma: no cover
+    from novelwriter.core.item import NWItem
+    from novelwriter.core.index import IndexHeading
+
+logger = logging.getLogger(__name__)
+
+
+class GuiOutlineModel(QAbstractTableModel):
+    """GUI: Outline Model
+
+    A table model of the headings of the novel structure. The model
+    only holds the handle and title key of each row, and the text of
+    each column is formatted from the project index when the view asks
+    for it. When a document is re-indexed, only the rows of that
+    document are updated.
+    """
+
+    D_HANDLE = Qt.ItemDataRole.UserRole
+    D_TITLE  = Qt.ItemDataRole.UserRole + 1
+    D_SORT   = Qt.ItemDataRole.UserRole + 2
+
+    REF_KEYS = {
+        nwOutline.POV:    nwKeyWords.POV_KEY,
+        nwOutline.FOCUS:  nwKeyWords.FOCUS_KEY,
+        nwOutline.CHAR:   nwKeyWords.CHAR_KEY,
+        nwOutline.PLOT:   nwKeyWords.PLOT_KEY,
+        nwOutline.TIME:   nwKeyWords.TIME_KEY,
+        nwOutline.WORLD:  nwKeyWords.WORLD_KEY,
+        nwOutline.OBJECT: nwKeyWords.OBJECT_KEY,
+        nwOutline.ENTITY: nwKeyWords.ENTITY_KEY,
+        nwOutline.CUSTOM: nwKeyWords.CUSTOM_KEY,
+    }
+
+    COUNTS = (nwOutline.LINE, nwOutline.CCOUNT, nwOutline.WCOUNT, nwOutline.PCOUNT)
+
+    def __init__(self, parent: QObject) -> None:
+        super().__init__(parent=parent)
+
+        self._root: str | None = None
+        self._rows: list[tuple[str, str]] = []  # The handle and title key of each row
+        self._first: dict[str, int] = {}        # The first row of each handle
+        self._count: dict[str, int] = {}        # The number of rows of each handle
+        self._refs: dict[tuple[str, str], dict[str, list[str]]] = {}
+        self._columns: list[nwOutline] = [nwOutline.TITLE]
+
+        # Pre-Generate Formatting
+        fH1 = QFont()
+        fH1.setBold(True)
+        fH1.setUnderline(True)
+
+        fH2 = QFont()
+        fH2.setBold(True)
+
+        iType = nwItemType.FILE
+        iClass = nwItemClass.NO_CLASS
+        iLayout = nwItemLayout.DOCUMENT
+
+        self._hFonts = [QFont(), fH1, fH2, QFont(), QFont()]
+        self._dIcon = {
+            "H0": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H0"),
+            "H1": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H1"),
+            "H2": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H2"),
+            "H3": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H3"),
+            "H4": SHARED.theme.getItemIcon(iType, iClass, iLayout, "H4"),
+        }
+
+        return
+
+    ##
+    #  Properties
+    ##
+
+    @property
+    def rootHandle(self) -> str | None:
+        """The root handle of the current rows."""
+        return self._root
+
+    ##
+    #  Methods
+    ##
+
+    def clear(self) -> None:
+        """Clear all rows, and reset the columns to only the title."""
+        self.beginResetModel()
+        self._root = None
+        self._rows = []
+        self._first = {}
+        self._count = {}
+        self._refs = {}
+        self._columns = [nwOutline.TITLE]
+        self.endResetModel()
+        return
+
+    def setColumns(self, columns: list[nwOutline]) -> None:
+        """Set the order of the columns of the model."""
+        self.beginResetModel()
+        self._columns = list(columns)
+        self.endResetModel()
+        return
+
+    def reload(self, rootHandle: str | None) -> None:
+        """Reload all rows from the project index. The rows are removed
+        and inserted rather than reset, so that the view keeps the state
+        of its columns.
+        """
+        if self._rows:
+            self.beginRemoveRows(QModelIndex(), 0, len(self._rows) - 1)
+            self._rows = []
+            self._updateRows()
+            self.endRemoveRows()
+
+        self._root = rootHandle
+        self._refs = {}
+        rows = [
+            (tHandle, sTitle)
+            for _, tHandle, sTitle, hItem in SHARED.project.index.novelStructure(
+                rootHandle=rootHandle, activeOnly=True
+            ) if self._isShown(tHandle, hItem.level)
+        ]
+        if rows:
+            self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+            self._rows = rows
+            self._updateRows()
+            self.endInsertRows()
+
+        return
+
+    def updateHandle(self, tHandle: str) -> None:
+        """Update the rows of a document that has been re-indexed. If
+        the headings are the same as before, only the data is updated.
+        A document that wasn't in the outline before requires a reload
+        of all rows, as its position is not known.
+        """
+        titles = [
+            sTitle
+            for _, _, sTitle, hItem in SHARED.project.index.novelItemStructure(
+                tHandle, rootHandle=self._root, activeOnly=True
+            ) if self._isShown(tHandle, hItem.level)
+        ]
+
+        for key in [key for key in self._refs if key[0] == tHandle]:
+            del self._refs[key]
+
+        if tHandle not in self._first:
+            if titles:
+                logger.debug("Item '%s' is new to the outline", tHandle)
+                self.reload(self._root)
+            return
+
+        first = self._first[tHandle]
+        last = first + self._count[tHandle] - 1
+        if titles == [sTitle for _, sTitle in self._rows[first:last+1]]:
+            self.dataChanged.emit(
+                self.index(first, 0), self.index(last, len(self._columns) - 1)
+            )
+            return
+
+        self.beginRemoveRows(QModelIndex(), first, last)
+        del self._rows[first:last+1]
+        self._updateRows()
+        self.endRemoveRows()
+
+        if titles:
+            self.beginInsertRows(QModelIndex(), first, first + len(titles) - 1)
+            self._rows[first:first] = [(tHandle, sTitle) for sTitle in titles]
+            self._updateRows()
+            self.endInsertRows()
+
+        return
+
+    def column(self, hItem: nwOutline) -> int:
+        """Return the model column of an outline column."""
+        return self._columns.index(hItem) if hItem in self._columns else -1
+
+    ##
+    #  Model Interface
+    ##
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Return the number of rows."""
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Return the number of columns."""
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        """Return the column labels and alignment."""
+        if orientation == Qt.Orientation.Horizontal and 0 <= section < len(self._columns):
+            hItem = self._columns[section]
+            if role == Qt.ItemDataRole.DisplayRole:
+                return trConst(nwLabels.OUTLINE_COLS[hItem])
+            elif role == Qt.ItemDataRole.TextAlignmentRole and hItem in self.COUNTS[1:]:
+                return Qt.AlignmentFlag.AlignRight
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """Return the data of a cell. The text is formatted on request
+        from the project index.
+        """
+        row = index.row()
+        col = index.column()
+        if not (index.isValid() and 0 <= row < len(self._rows) and 0 <= col < len(self._columns)):
+            return None
+
+        tHandle, sTitle = self._rows[row]
+        if role == self.D_HANDLE:
+            return tHandle
+        elif role == self.D_TITLE:
+            return sTitle
+
+        hItem = self._columns[col]
+        novIdx = SHARED.project.index.getItemHeader(tHandle, sTitle)
+        nwItem = SHARED.project.tree[tHandle]
+        if novIdx is None or nwItem is None:
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._text(hItem, novIdx, nwItem)
+        elif role == self.D_SORT:
+            if hItem == nwOutline.LINE:
+                return novIdx.line
+            elif hItem == nwOutline.CCOUNT:
+                return novIdx.charCount
+            elif hItem == nwOutline.WCOUNT:
+                return novIdx.wordCount
+            elif hItem == nwOutline.PCOUNT:
+                return novIdx.paraCount
+            return self._text(hItem, novIdx, nwItem)
+        elif role == Qt.ItemDataRole.DecorationRole:
+            if hItem == nwOutline.TITLE:
+                return SHARED.theme.getHeaderDecoration(nwHeaders.H_LEVEL.get(novIdx.level, 0))
+            elif hItem == nwOutline.LABEL:
+                return self._dIcon.get(nwItem.mainHeading)
+        elif role == Qt.ItemDataRole.FontRole:
+            if hItem == nwOutline.TITLE:
+                return self._hFonts[nwHeaders.H_LEVEL.get(novIdx.level, 0)]
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if hItem in self.COUNTS[1:]:
+                return Qt.AlignmentFlag.AlignRight
+
+        return None
+
+    ##
+    #  Internal Functions
+    ##
+
+    def _text(self, hItem: nwOutline, novIdx: IndexHeading, nwItem: NWItem) -> str:
+        """Format the text of a cell."""
+        if hItem == nwOutline.TITLE:
+            return novIdx.title
+        elif hItem == nwOutline.LEVEL:
+            return novIdx.level
+        elif hItem == nwOutline.LABEL:
+            return nwItem.itemName
+        elif hItem == nwOutline.LINE:
+            return f"{novIdx.line:n}"
+        elif hItem == nwOutline.CCOUNT:
+            return f"{novIdx.charCount:n}"
+        elif hItem == nwOutline.WCOUNT:
+            return f"{novIdx.wordCount:n}"
+        elif hItem == nwOutline.PCOUNT:
+            return f"{novIdx.paraCount:n}"
+        elif hItem == nwOutline.SYNOP:
+            return novIdx.synopsis
+        elif hItem in self.REF_KEYS:
+            key = (nwItem.itemHandle, novIdx.key)
+            if key not in self._refs:
+                self._refs[key] = SHARED.project.index.getReferences(*key)
+            return ", ".join(self._refs[key][self.REF_KEYS[hItem]])
+
+        return ""
+
+    def _isShown(self, tHandle: str, level: str) -> bool:
+        """Check if a heading should be shown in the outline."""
+        return nwHeaders.H_LEVEL.get(level, 0) > 0 and tHandle in SHARED.project.tree
+
+    def _updateRows(self) -> None:
+        """Rebuild the lookup of the rows of each handle."""
+        self._first = {}
+        self._count = {}
+        for i, (tHandle, _) in enumerate(self._rows):
+            if tHandle not in self._first:
+                self._first[tHandle] = i
+            self._count[tHandle] = self._count.get(tHandle, 0) + 1
+        return
+
+# END Class GuiOutlineModel
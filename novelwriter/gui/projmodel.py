@@ -0,0 +1,469 @@
+"""
+novelWriter – GUI Project Tree Model
+====================================
+
+File History:
+Created: 2024-03-20 [2.4b1] GuiProjectModel
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import logging
+
+from typing import Any
+
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import (
+    QAbstractItemModel, QCoreApplication, QMimeData, QModelIndex, QObject, Qt
+)
+
+from novelwriter import CONFIG, SHARED
+from novelwriter.core.tree import NWTree
+
+logger = logging.getLogger(__name__)
+
+
+class GuiProjectModel(QAbstractItemModel):
+    """GUI: Project Tree Model
+
+    A model exposing the project tree to the project tree view. The
+    item data is read directly from the NWTree class, while the model
+    only keeps track of which rows have been fetched by the view. The
+    children of an item are fetched the first time the item is
+    expanded, so the size of the project has little effect on the time
+    it takes to populate the view. The word count shown for each item
+    is the cached sum of its branch, as provided by the NWTree class.
+
+    The model only picks up changes to the structure of the project
+    tree made through its own methods, so any such changes made by the
+    GUI must go through the model.
+    """
+
+    C_NAME   = 0
+    C_COUNT  = 1
+    C_ACTIVE = 2
+    C_STATUS = 3
+
+    D_HANDLE = Qt.ItemDataRole.UserRole
+    D_WORDS  = Qt.ItemDataRole.UserRole + 1
+
+    MIME_TYPE = "application/x-novelwriter-handles"
+
+    def __init__(self, parent: QObject) -> None:
+        super().__init__(parent=parent)
+
+        self._rows: dict[str | None, list[str]] = {}  # The fetched children of each item
+        self._pos: dict[str, int] = {}                # The row of each fetched item
+        self._parents: dict[str, str | None] = {}     # The parent of each fetched item
+        self._keys: dict[str, int] = {}               # The index ID of each handle
+        self._handles: list[str] = []                 # The handle of each index ID
+
+        self._fontH1 = QFont()
+        self._fontH2 = QFont()
+
+        # Cached Translations
+        self.trActive = QCoreApplication.translate("GuiProjectTree", "Active")
+        self.trInactive = QCoreApplication.translate("GuiProjectTree", "Inactive")
+
+        return
+
+    ##
+    #  Properties
+    ##
+
+    @property
+    def tree(self) -> NWTree:
+        """The project tree of the current project."""
+        return SHARED.project.tree
+
+    ##
+    #  Methods
+    ##
+
+    def clear(self) -> None:
+        """Clear all content from the model."""
+        self.beginResetModel()
+        self._clearRows()
+        self.endResetModel()
+        return
+
+    def reload(self) -> None:
+        """Reset the model to show the current project tree. Only the
+        root items are fetched.
+        """
+        self.beginResetModel()
+        self._clearRows()
+        self._setRows(None, [
+            nwItem.itemHandle for nwItem in self.tree.iterChildren(None) if nwItem.isRootType()
+        ])
+        self._fontH1 = QFont()
+        self._fontH1.setBold(True)
+        self._fontH1.setUnderline(True)
+        self._fontH2 = QFont()
+        self._fontH2.setBold(True)
+        self.endResetModel()
+        return
+
+    def handle(self, index: QModelIndex) -> str | None:
+        """Return the handle of the item of a model index."""
+        if index.isValid():
+            return self._handles[index.internalId()]
+        return None
+
+    def indexFromHandle(self, tHandle: str | None, column: int = 0) -> QModelIndex:
+        """Return the model index of an item. The rows of the parent
+        items are fetched if they have not been already.
+        """
+        if not tHandle or tHandle not in self.tree:
+            return QModelIndex()
+        for pHandle in reversed(self.tree.getItemPath(tHandle)[1:]):
+            if pHandle not in self._rows:
+                if not (pIndex := self._index(pHandle)).isValid():
+                    return QModelIndex()
+                self.fetchMore(pIndex)
+        return self._index(tHandle, column)
+
+    def isFetched(self, tHandle: str) -> bool:
+        """Check if the rows of an item have been fetched."""
+        return tHandle in self._rows
+
+    def rowHandles(self, tHandle: str | None) -> list[str]:
+        """Return the handles of the fetched rows of an item."""
+        return list(self._rows.get(tHandle, []))
+
+    def insertItem(self, tHandle: str, nHandle: str | None = None) -> bool:
+        """Insert an item that has been added to the project tree. The
+        item is placed after the item nHandle if they have the same
+        parent, otherwise after the existing children of the parent.
+        Returns False if the item cannot be shown in the tree.
+        """
+        nwItem = self.tree[tHandle]
+        if nwItem is None:
+            return False
+
+        pHandle = nwItem.itemParent
+        if pHandle is None and not nwItem.isRootType():
+            return False
+        if pHandle is not None and pHandle not in self.tree:
+            return False
+
+        rows = self._rows.get(pHandle)
+        if rows is not None and tHandle in rows:
+            # The item is already shown, so it only needs to be moved
+            if nHandle in rows:
+                self.moveItem(tHandle, pHandle, rows.index(nHandle) + 1)
+            return True
+
+        siblings = [h for h in self._childHandles(pHandle) if h != tHandle]
+        position = siblings.index(nHandle) + 1 if nHandle in siblings else -1
+        if rows is None:
+            # The parent has not been fetched, so fetching it after the
+            # item has been positioned will include the item
+            self.tree.setItemParent(tHandle, pHandle, position)
+            if pHandle is not None and (pIndex := self._index(pHandle)).isValid():
+                self.fetchMore(pIndex)
+            return True
+
+        row = rows.index(nHandle) + 1 if nHandle in rows else len(rows)
+        self.beginInsertRows(self._index(pHandle), row, row)
+        self.tree.setItemParent(tHandle, pHandle, position)
+        rows.insert(row, tHandle)
+        self._parents[tHandle] = pHandle
+        self._updatePos(pHandle)
+        self.endInsertRows()
+
+        return True
+
+    def moveItem(self, tHandle: str, pHandle: str | None, row: int = -1) -> bool:
+        """Move an item to a new parent, or to a new position within the
+        same parent. The row is the position among the current rows of
+        the new parent where the item should be inserted, or after all
+        of them if negative. The project tree is updated accordingly.
+        """
+        nwItem = self.tree[tHandle]
+        if nwItem is None:
+            return False
+        if pHandle and tHandle in self.tree.getItemPath(pHandle):
+            logger.error("Cannot move item '%s' into itself", tHandle)
+            return False
+
+        sHandle = self._parents.get(tHandle, nwItem.itemParent)
+        sRows = self._rows.get(sHandle) if tHandle in self._pos else None
+        dRows = self._rows.get(pHandle)
+
+        # Find the new position of the item in the project tree
+        if dRows is not None and 0 <= row < len(dRows):
+            before = dRows[row]
+        else:
+            before = None
+            row = len(dRows) if dRows is not None else 0
+        siblings = [h for h in self._childHandles(pHandle) if h != tHandle]
+        position = siblings.index(before) if before in siblings else -1
+
+        if sRows is not None and dRows is not None:
+            sRow = self._pos[tHandle]
+            if sHandle == pHandle and row in (sRow, sRow + 1):
+                # The item is already in place
+                self.tree.setItemParent(tHandle, pHandle, position)
+                return True
+            self.beginMoveRows(self._index(sHandle), sRow, sRow, self._index(pHandle), row)
+            self.tree.setItemParent(tHandle, pHandle, position)
+            sRows.pop(sRow)
+            dRows.insert(row - 1 if sHandle == pHandle and row > sRow else row, tHandle)
+            self._parents[tHandle] = pHandle
+            self._updatePos(sHandle)
+            self._updatePos(pHandle)
+            self.endMoveRows()
+        elif sRows is not None:
+            sRow = self._pos[tHandle]
+            self.beginRemoveRows(self._index(sHandle), sRow, sRow)
+            self.tree.setItemParent(tHandle, pHandle, position)
+            sRows.pop(sRow)
+            self._forget(tHandle)
+            self._updatePos(sHandle)
+            self.endRemoveRows()
+        elif dRows is not None:
+            self.beginInsertRows(self._index(pHandle), row, row)
+            self.tree.setItemParent(tHandle, pHandle, position)
+            dRows.insert(row, tHandle)
+            self._parents[tHandle] = pHandle
+            self._updatePos(pHandle)
+            self.endInsertRows()
+        else:
+            self.tree.setItemParent(tHandle, pHandle, position)
+
+        return True
+
+    def removeItem(self, tHandle: str) -> None:
+        """Remove an item and its children from the model. This must be
+        called before the item is deleted from the project tree.
+        """
+        if tHandle in self._pos:
+            pHandle = self._parents.get(tHandle)
+            row = self._pos[tHandle]
+            self.beginRemoveRows(self._index(pHandle), row, row)
+            self._rows[pHandle].pop(row)
+            self._forget(tHandle)
+            self._updatePos(pHandle)
+            self.endRemoveRows()
+        return
+
+    def refreshItem(self, tHandle: str) -> None:
+        """Notify the view that the data of an item has changed."""
+        if (index := self._index(tHandle)).isValid():
+            self.dataChanged.emit(index, index.siblingAtColumn(self.C_STATUS))
+        return
+
+    def refreshCounts(self, tHandle: str | None) -> None:
+        """Notify the view that the word counts of an item and its
+        parent items have changed.
+        """
+        for pHandle in self.tree.getItemPath(tHandle) if tHandle else []:
+            if (index := self._index(pHandle, self.C_COUNT)).isValid():
+                self.dataChanged.emit(index, index)
+        return
+
+    ##
+    #  Model Interface
+    ##
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        """Return the model index of a row of a parent."""
+        rows = self._rows.get(self.handle(parent))
+        if rows and 0 <= row < len(rows) and 0 <= column <= self.C_STATUS:
+            return self.createIndex(row, column, self._key(rows[row]))
+        return QModelIndex()
+
+    def parent(self, index: QModelIndex) -> QModelIndex:  # type: ignore
+        """Return the model index of the parent of an item."""
+        if pHandle := self._parents.get(self.handle(index)):  # type: ignore
+            return self._index(pHandle)
+        return QModelIndex()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Return the number of fetched rows of a parent."""
+        if parent.column() > 0:
+            return 0
+        return len(self._rows.get(self.handle(parent), []))
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Return the number of columns."""
+        return 4
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """Check if an item has children, fetched or not."""
+        if not parent.isValid():
+            return bool(self._rows.get(None))
+        if parent.column() > 0:
+            return False
+        return self.tree.childCount(self.handle(parent)) > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """Check if the rows of an item can be fetched."""
+        tHandle = self.handle(parent)
+        return tHandle is not None and tHandle not in self._rows and parent.column() <= 0
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        """Fetch the rows of an item from the project tree."""
+        tHandle = self.handle(parent)
+        if tHandle is None or tHandle in self._rows:
+            return
+        rows = self._childHandles(tHandle)
+        if rows:
+            self.beginInsertRows(parent.siblingAtColumn(self.C_NAME), 0, len(rows) - 1)
+            self._setRows(tHandle, rows)
+            self.endInsertRows()
+        else:
+            self._setRows(tHandle, rows)
+        return
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """Return the data of an item for a given column and role."""
+        tHandle = self.handle(index)
+        if tHandle is None or not (nwItem := self.tree[tHandle]):
+            return None
+
+        column = index.column()
+        if role == self.D_HANDLE:
+            return tHandle
+        elif role == self.D_WORDS:
+            return self.tree.subtreeWords(tHandle)
+
+        if column == self.C_NAME:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return nwItem.itemName
+            elif role == Qt.ItemDataRole.DecorationRole:
+                return SHARED.theme.getItemIcon(
+                    nwItem.itemType, nwItem.itemClass, nwItem.itemLayout, nwItem.mainHeading
+                )
+            elif role == Qt.ItemDataRole.FontRole:
+                if CONFIG.emphLabels and nwItem.isDocumentLayout():
+                    if nwItem.mainHeading == "H1":
+                        return self._fontH1
+                    elif nwItem.mainHeading == "H2":
+                        return self._fontH2
+        elif column == self.C_COUNT:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return f"{self.tree.subtreeWords(tHandle):n}"
+            elif role == Qt.ItemDataRole.TextAlignmentRole:
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        elif column == self.C_ACTIVE:
+            if role == Qt.ItemDataRole.DecorationRole:
+                if nwItem.isFileType():
+                    return SHARED.theme.getIcon("checked" if nwItem.isActive else "unchecked")
+                return SHARED.theme.getIcon("noncheckable")
+            elif role == Qt.ItemDataRole.ToolTipRole and nwItem.isFileType():
+                return self.trActive if nwItem.isActive else self.trInactive
+        elif column == self.C_STATUS:
+            if role == Qt.ItemDataRole.DecorationRole:
+                return nwItem.getImportStatus(incIcon=True)[1]
+            elif role == Qt.ItemDataRole.ToolTipRole:
+                return nwItem.getImportStatus(incIcon=False)[0]
+
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        """Return the item flags. Only items can be dropped on, not the
+        top level of the tree.
+        """
+        if index.isValid():
+            return (
+                Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+                | Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsDropEnabled
+            )
+        return Qt.ItemFlag.ItemIsEnabled
+
+    def supportedDragActions(self) -> Qt.DropActions:
+        """Items can only be moved."""
+        return Qt.DropAction.MoveAction
+
+    def supportedDropActions(self) -> Qt.DropActions:
+        """Items can only be moved."""
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self) -> list[str]:
+        """Return the mime types used for drag and drop."""
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes: list[QModelIndex]) -> QMimeData:
+        """Pack the handles of the dragged items. The drop itself is
+        handled by the view.
+        """
+        handles = dict.fromkeys(self.handle(index) for index in indexes)
+        mime = QMimeData()
+        mime.setData(self.MIME_TYPE, " ".join(h for h in handles if h).encode("ascii"))
+        return mime
+
+    ##
+    #  Internal Functions
+    ##
+
+    def _clearRows(self) -> None:
+        """Clear the fetched rows and index IDs."""
+        self._rows = {}
+        self._pos = {}
+        self._parents = {}
+        self._keys = {}
+        self._handles = []
+        return
+
+    def _childHandles(self, tHandle: str | None) -> list[str]:
+        """Return the handles of the children of an item in the project
+        tree, including those not fetched.
+        """
+        return [nwItem.itemHandle for nwItem in self.tree.iterChildren(tHandle)]
+
+    def _key(self, tHandle: str) -> int:
+        """Return the index ID of a handle."""
+        if (key := self._keys.get(tHandle)) is None:
+            key = len(self._handles)
+            self._keys[tHandle] = key
+            self._handles.append(tHandle)
+        return key
+
+    def _index(self, tHandle: str | None, column: int = 0) -> QModelIndex:
+        """Return the model index of a fetched item."""
+        if tHandle is not None and (row := self._pos.get(tHandle)) is not None:
+            return self.createIndex(row, column, self._key(tHandle))
+        return QModelIndex()
+
+    def _setRows(self, tHandle: str | None, rows: list[str]) -> None:
+        """Record the fetched rows of an item."""
+        self._rows[tHandle] = rows
+        for row, cHandle in enumerate(rows):
+            self._pos[cHandle] = row
+            self._parents[cHandle] = tHandle
+        return
+
+    def _updatePos(self, tHandle: str | None) -> None:
+        """Update the row numbers of the children of an item."""
+        for row, cHandle in enumerate(self._rows.get(tHandle, [])):
+            self._pos[cHandle] = row
+        return
+
+    def _forget(self, tHandle: str) -> None:
+        """Drop an item and its fetched children from the model."""
+        stack = [tHandle]
+        while stack:
+            cHandle = stack.pop()
+            self._pos.pop(cHandle, None)
+            self._parents.pop(cHandle, None)
+            stack.extend(self._rows.pop(cHandle, []))
+        return
+
+# END Class GuiProjectModel
@@ -35,23 +35,23 @@ from typing import TYPE_CHECKING
 from PyQt5.QtGui import (
     QDragEnterEvent, QDragMoveEvent, QDropEvent, QIcon, QMouseEvent, QPalette
 )
-from PyQt5.QtCore import QPoint, QTimer, Qt, QSize, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import (
+    QItemSelectionModel, QModelIndex, QPoint, QTimer, Qt, QSize, pyqtSignal,
+    pyqtSlot
+)
 from PyQt5.QtWidgets import (
     QAbstractItemView, QAction, QDialog, QFrame, QHBoxLayout, QHeaderView,
-    QLabel, QMenu, QShortcut, QSizePolicy, QToolButton, QTreeWidget,
-    QTreeWidgetItem, QVBoxLayout, QWidget
+    QLabel, QMenu, QShortcut, QSizePolicy, QToolButton, QTreeView,
+    QVBoxLayout, QWidget
 )
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, SHARED, TIMINGS
 from novelwriter.enum import nwDocMode, nwItemType, nwItemClass, nwItemLayout
 from novelwriter.common import minmax
 from novelwriter.constants import nwHeaders, nwUnicode, trConst, nwLabels
 from novelwriter.core.item import NWItem
 from novelwriter.core.coretools import DocDuplicator, DocMerger, DocSplitter
-from novelwriter.dialogs.docmerge import GuiDocMerge
-from novelwriter.dialogs.docsplit import GuiDocSplit
-from novelwriter.dialogs.editlabel import GuiEditLabel
-from novelwriter.dialogs.projectsettings import GuiProjectSettings
+from novelwriter.gui.projmodel import GuiProjectModel
 
 if TYPE_CHECKING:  # pragma: no cover
     from novelwriter.guimain import GuiMain
@@ -230,7 +230,7 @@ class GuiProjectView(QWidget):
     @pyqtSlot(str, int, int, int)
     def updateCounts(self, tHandle: str, cCount: int, wCount: int, pCount: int) -> None:
         """Slot for updating the word count of a specific item."""
-        self.projTree.propagateCount(tHandle, wCount, countChildren=True)
+        self.projTree.propagateCount(tHandle)
         self.wordCountsChanged.emit()
         return
 
@@ -483,16 +483,16 @@ class GuiProjectToolBar(QWidget):
 # END Class GuiProjectToolBar
 
 
-class GuiProjectTree(QTreeWidget):
+class GuiProjectTree(QTreeView):
 
-    C_DATA   = 0
-    C_NAME   = 0
-    C_COUNT  = 1
-    C_ACTIVE = 2
-    C_STATUS = 3
+    C_DATA   = GuiProjectModel.C_NAME
+    C_NAME   = GuiProjectModel.C_NAME
+    C_COUNT  = GuiProjectModel.C_COUNT
+    C_ACTIVE = GuiProjectModel.C_ACTIVE
+    C_STATUS = GuiProjectModel.C_STATUS
 
-    D_HANDLE = Qt.ItemDataRole.UserRole
-    D_WORDS  = Qt.ItemDataRole.UserRole + 1
+    D_HANDLE = GuiProjectModel.D_HANDLE
+    D_WORDS  = GuiProjectModel.D_WORDS
 
     itemRefreshed = pyqtSignal(str, NWItem, QIcon)
 
@@ -505,7 +505,6 @@ class GuiProjectTree(QTreeWidget):
         self.mainGui  = projView.mainGui
 
         # Internal Variables
-        self._treeMap: dict[str, QTreeWidgetItem] = {}
         self._timeChanged = 0.0
         self._popAlert = None
 
@@ -517,6 +516,10 @@ class GuiProjectTree(QTreeWidget):
         # Build GUI
         # =========
 
+        # Model
+        self._model = GuiProjectModel(self)
+        self.setModel(self._model)
+
         # Context Menu
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self._openContextMenu)
@@ -533,7 +536,6 @@ class GuiProjectTree(QTreeWidget):
         self.setAutoExpandDelay(1000)
         self.setHeaderHidden(True)
         self.setIndentation(iPx)
-        self.setColumnCount(4)
 
         # Lock the column sizes
         treeHeader = self.header()
@@ -547,6 +549,8 @@ class GuiProjectTree(QTreeWidget):
         treeHeader.resizeSection(self.C_STATUS, iPx + cMg)
 
         # Allow Move by Drag & Drop
+        # The model doesn't allow drop on root level, and the drop
+        # itself is handled in dropEvent
         self.setDragEnabled(True)
         self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
 
@@ -554,19 +558,15 @@ class GuiProjectTree(QTreeWidget):
         # releases (see #1561) and instead use our own implementation
         self.setAutoScroll(False)
 
-        # But don't allow drop on root level
-        # Due to a bug, this stops working somewhere between Qt 5.15.3
-        # and 5.15.8, so this is also blocked in dropEvent (see #1569)
-        trRoot = self.invisibleRootItem()
-        trRoot.setFlags(trRoot.flags() ^ Qt.ItemFlag.ItemIsDropEnabled)
-
         # Set selection options
         self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
 
         # Connect signals
-        self.itemDoubleClicked.connect(self._treeDoubleClick)
-        self.itemSelectionChanged.connect(self._treeSelectionChange)
+        self.doubleClicked.connect(self._treeDoubleClick)
+        self.expanded.connect(self._treeItemExpanded)
+        self.collapsed.connect(self._treeItemCollapsed)
+        self.selectionModel().selectionChanged.connect(self._treeSelectionChange)
 
         # Auto Scroll
         self._scrollMargin = SHARED.theme.baseIconSize
@@ -595,14 +595,22 @@ class GuiProjectTree(QTreeWidget):
             self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         return
 
+    ##
+    #  Properties
+    ##
+
+    @property
+    def projModel(self) -> GuiProjectModel:
+        """The model of the project tree."""
+        return self._model
+
     ##
     #  Class Methods
     ##
 
     def clearTree(self) -> None:
-        """Clear the GUI content and the related map."""
-        self.clear()
-        self._treeMap = {}
+        """Clear the GUI content."""
+        self._model.clear()
         self._timeChanged = 0.0
         return
 
@@ -649,9 +657,8 @@ class GuiProjectTree(QTreeWidget):
                 return False
 
             # Collect some information about the selected item
-            qItem = self._getTreeItem(sHandle)
             sLevel = nwHeaders.H_LEVEL.get(pItem.mainHeading, 0)
-            sIsParent = False if qItem is None else qItem.childCount() > 0
+            sIsParent = SHARED.project.tree.childCount(sHandle) > 0
 
             if SHARED.project.tree.isTrash(sHandle):
                 SHARED.error(self.tr("Cannot add new files or folders to the Trash folder."))
@@ -690,6 +697,7 @@ class GuiProjectTree(QTreeWidget):
                     return False
 
             # Ask for label
+            from novelwriter.dialogs.editlabel import GuiEditLabel
             newLabel, dlgOk = GuiEditLabel.getLabel(self, text=newLabel)
             if not dlgOk:
                 logger.info("New item creation cancelled by user")
@@ -729,86 +737,73 @@ class GuiProjectTree(QTreeWidget):
         if tHandle is None or nwItem is None:
             return False
 
-        trItem = self._addTreeItem(nwItem, nHandle)
-        if trItem is None:
+        if not self._addTreeItem(nwItem, nHandle):
             return False
 
         if nwItem.isFileType() and wordCount:
-            wC = SHARED.project.index.getCounts(tHandle)[1]
-            self.propagateCount(tHandle, wC)
             self.projView.wordCountsChanged.emit()
 
-        pHandle = nwItem.itemParent
-        if pHandle is not None and pHandle in self._treeMap:
-            self._treeMap[pHandle].setExpanded(True)
+        if (pHandle := nwItem.itemParent) is not None:
+            self.setExpanded(self._getTreeIndex(pHandle), True)
 
         self._alertTreeChange(tHandle, flush=True)
-        self.setCurrentItem(trItem)
+        self.setCurrentIndex(self._getTreeIndex(tHandle))
 
         return True
 
     def moveTreeItem(self, step: int) -> bool:
         """Move an item up or down in the tree."""
         tHandle = self.getSelectedHandle()
-        tItem = self._getTreeItem(tHandle)
-        if tItem is None:
+        nwItem = SHARED.project.tree[tHandle] if tHandle else None
+        if tHandle is None or nwItem is None:
             logger.debug("No item selected")
             return False
 
-        pItem = tItem.parent()
-        isExp = tItem.isExpanded()
-        if pItem is None:
-            tIndex = self.indexOfTopLevelItem(tItem)
-            nChild = self.topLevelItemCount()
-
-            nIndex = tIndex + step
-            if nIndex < 0 or nIndex >= nChild:
-                return False
-
-            cItem = self.takeTopLevelItem(tIndex)
-            self.insertTopLevelItem(nIndex, cItem)
-
-        else:
-            tIndex = pItem.indexOfChild(tItem)
-            nChild = pItem.childCount()
+        pHandle = nwItem.itemParent
+        rows = self._model.rowHandles(pHandle)
+        if tHandle not in rows:
+            return False
 
-            nIndex = tIndex + step
-            if nIndex < 0 or nIndex >= nChild:
-                return False
+        tIndex = rows.index(tHandle)
+        nIndex = tIndex + step
+        if nIndex < 0 or nIndex >= len(rows):
+            return False
 
-            cItem = pItem.takeChild(tIndex)
-            pItem.insertChild(nIndex, cItem)
+        # The row is counted before the item is removed from its place
+        self._model.moveItem(tHandle, pHandle, nIndex + 1 if step > 0 else nIndex)
 
         self._alertTreeChange(tHandle, flush=True)
-        self.setCurrentItem(tItem)
-        tItem.setExpanded(isExp)
+        self.setCurrentIndex(self._getTreeIndex(tHandle))
 
         return True
 
     def moveToNextItem(self, step: int) -> None:
         """Move to the next item of the same tree level."""
         tHandle = self.getSelectedHandle()
-        tItem = self._getTreeItem(tHandle) if tHandle else None
-        if tItem:
-            pItem = tItem.parent() or self.invisibleRootItem()
-            next = minmax(pItem.indexOfChild(tItem) + step, 0, pItem.childCount() - 1)
-            self.setCurrentItem(pItem.child(next))
+        index = self._getTreeIndex(tHandle)
+        if index.isValid():
+            pIndex = index.parent()
+            next = minmax(index.row() + step, 0, self._model.rowCount(pIndex) - 1)
+            self.setCurrentIndex(self._model.index(next, 0, pIndex))
         return
 
     def moveToLevel(self, step: int) -> None:
         """Move to the next item in the parent/child chain."""
         tHandle = self.getSelectedHandle()
-        tItem = self._getTreeItem(tHandle) if tHandle else None
-        if tItem:
-            if step < 0 and tItem.parent():
-                self.setCurrentItem(tItem.parent())
-            elif step > 0 and tItem.childCount() > 0:
-                self.setCurrentItem(tItem.child(0))
+        index = self._getTreeIndex(tHandle)
+        if index.isValid():
+            if step < 0 and index.parent().isValid():
+                self.setCurrentIndex(index.parent())
+            elif step > 0 and self._model.hasChildren(index):
+                if self._model.canFetchMore(index):
+                    self._model.fetchMore(index)
+                self.setCurrentIndex(self._model.index(0, 0, index))
         return
 
     def renameTreeItem(self, tHandle: str, name: str = "") -> None:
         """Open a dialog to edit the label of an item."""
         if tItem := SHARED.project.tree[tHandle]:
+            from novelwriter.dialogs.editlabel import GuiEditLabel
             newLabel, dlgOk = GuiEditLabel.getLabel(self, text=name or tItem.itemName)
             if dlgOk:
                 tItem.setName(newLabel)
@@ -818,28 +813,30 @@ class GuiProjectTree(QTreeWidget):
 
     def saveTreeOrder(self) -> None:
         """Build a list of the items in the project tree and send them
-        to the project class. This syncs up the two versions of the
-        project structure, and must be called before any code that
-        depends on this order to be up to date.
+        to the project class. The order of the children of each item is
+        already kept by the project tree, but the flattened order and
+        the order and expanded state of each item are updated here, and
+        this must be called before any code that depends on these.
         """
+        tree = SHARED.project.tree
+        roots = [nwItem for nwItem in tree.iterChildren(None) if nwItem.isRootType()]
         items = []
-        for i in range(self.topLevelItemCount()):
-            item = self.topLevelItem(i)
-            if isinstance(item, QTreeWidgetItem):
-                items = self._scanChildren(items, item, i)
+        for i, rItem in enumerate(roots):
+            rItem.setOrder(i)
+            for nwItem in tree.iterSubtree(rItem.itemHandle):
+                items.append(nwItem.itemHandle)
+                nwItem.setExpanded(nwItem.isExpanded and tree.childCount(nwItem.itemHandle) > 0)
+                for j, cItem in enumerate(tree.iterChildren(nwItem.itemHandle)):
+                    cItem.setOrder(j)
         logger.debug("Saving project tree item order")
         SHARED.project.setTreeOrder(items)
         return
 
     def getTreeFromHandle(self, tHandle: str) -> list[str]:
-        """Recursively return all the child items starting from a given
-        item handle.
+        """Return all the child items starting from a given item handle.
+        The lookup uses the project tree's own index of children.
         """
-        result = []
-        tIten = self._getTreeItem(tHandle)
-        if tIten is not None:
-            result = self._scanChildren(result, tIten, 0)
-        return result
+        return SHARED.project.tree.subtreeHandles(tHandle)
 
     def requestDeleteItem(self, tHandle: str | None = None) -> bool:
         """Request an item deleted from the project tree. This function
@@ -922,10 +919,8 @@ class GuiProjectTree(QTreeWidget):
         """Move an item to Trash. Root folders cannot be moved to Trash,
         so such a request is cancelled.
         """
-        trItemS = self._getTreeItem(tHandle)
         nwItemS = SHARED.project.tree[tHandle]
-
-        if trItemS is None or nwItemS is None:
+        if nwItemS is None or not self._getTreeIndex(tHandle).isValid():
             logger.error("Could not find tree item for deletion")
             return False
 
@@ -939,9 +934,9 @@ class GuiProjectTree(QTreeWidget):
 
         logger.debug("User requested file or folder '%s' move to Trash", tHandle)
 
-        trItemP = trItemS.parent()
-        trItemT = self._addTrashRoot()
-        if trItemP is None or trItemT is None:
+        pHandle = nwItemS.itemParent
+        trashHandle = self._addTrashRoot()
+        if pHandle is None or trashHandle is None:
             logger.error("Could not delete item")
             return False
 
@@ -953,11 +948,8 @@ class GuiProjectTree(QTreeWidget):
                 logger.info("Action cancelled by user")
                 return False
 
-        self.propagateCount(tHandle, 0)
-
-        tIndex = trItemP.indexOfChild(trItemS)
-        trItemC = trItemP.takeChild(tIndex)
-        trItemT.addChild(trItemC)
+        self._model.moveItem(tHandle, trashHandle)
+        self._model.refreshCounts(pHandle)
 
         self._postItemMove(tHandle)
         self._alertTreeChange(tHandle, flush=flush)
@@ -970,24 +962,21 @@ class GuiProjectTree(QTreeWidget):
         """Permanently delete a tree item from the project and the map.
         Root items are handled a little different than other items.
         """
-        trItemS = self._getTreeItem(tHandle)
         nwItemS = SHARED.project.tree[tHandle]
-        if trItemS is None or nwItemS is None:
+        if nwItemS is None or not self._getTreeIndex(tHandle).isValid():
             logger.error("Could not find tree item for deletion")
             return False
 
         if nwItemS.isRootType():
             # Only an empty ROOT folder can be deleted
-            if trItemS.childCount() > 0:
+            if SHARED.project.tree.childCount(tHandle) > 0:
                 SHARED.error(self.tr("Root folders can only be deleted when they are empty."))
                 return False
 
             logger.debug("Permanently deleting root folder '%s'", tHandle)
 
-            tIndex = self.indexOfTopLevelItem(trItemS)
-            self.takeTopLevelItem(tIndex)
+            self._model.removeItem(tHandle)
             SHARED.project.removeItem(tHandle)
-            self._treeMap.pop(tHandle, None)
             self._alertTreeChange(tHandle, flush=True)
 
             # These are not emitted by the alert function because the
@@ -1006,18 +995,15 @@ class GuiProjectTree(QTreeWidget):
 
             logger.debug("Permanently deleting item '%s'", tHandle)
 
-            self.propagateCount(tHandle, 0)
-
-            trItemP = trItemS.parent()
-            tIndex = trItemP.indexOfChild(trItemS)
-            trItemP.takeChild(tIndex)
+            pHandle = nwItemS.itemParent
+            self._model.removeItem(tHandle)
 
             for dHandle in reversed(self.getTreeFromHandle(tHandle)):
                 if self.mainGui.docEditor.docHandle == dHandle:
                     self.mainGui.closeDocument()
                 SHARED.project.removeItem(dHandle)
-                self._treeMap.pop(dHandle, None)
 
+            self._model.refreshCounts(pHandle)
             self._alertTreeChange(tHandle, flush=flush)
             self.projView.wordCountsChanged.emit()
 
@@ -1028,136 +1014,106 @@ class GuiProjectTree(QTreeWidget):
         return True
 
     def setTreeItemValues(self, tHandle: str) -> None:
-        """Set the name and flag values for a tree item from a handle in
-        the project tree. Does not trigger a tree change as the data is
-        already coming from the project tree.
+        """Refresh the name and flag values of a tree item from a handle
+        in the project tree. Does not trigger a tree change as the data
+        is already coming from the project tree.
         """
-        trItem = self._getTreeItem(tHandle)
         nwItem = SHARED.project.tree[tHandle]
-        if trItem is None or nwItem is None:
+        if nwItem is None:
             return
 
-        itemStatus, statusIcon = nwItem.getImportStatus(incIcon=True)
-        hLevel = nwItem.mainHeading
-        itemIcon = SHARED.theme.getItemIcon(
-            nwItem.itemType, nwItem.itemClass, nwItem.itemLayout, hLevel
-        )
-
-        trItem.setIcon(self.C_NAME, itemIcon)
-        trItem.setText(self.C_NAME, nwItem.itemName)
-        trItem.setIcon(self.C_STATUS, statusIcon)
-        trItem.setToolTip(self.C_STATUS, itemStatus)
-
-        if nwItem.isFileType():
-            iconName = "checked" if nwItem.isActive else "unchecked"
-            toolTip = self.trActive if nwItem.isActive else self.trInactive
-            trItem.setToolTip(self.C_ACTIVE, toolTip)
-        else:
-            iconName = "noncheckable"
-
-        trItem.setIcon(self.C_ACTIVE, SHARED.theme.getIcon(iconName))
-
-        if CONFIG.emphLabels and nwItem.isDocumentLayout():
-            trFont = trItem.font(self.C_NAME)
-            trFont.setBold(hLevel == "H1" or hLevel == "H2")
-            trFont.setUnderline(hLevel == "H1")
-            trItem.setFont(self.C_NAME, trFont)
+        self._model.refreshItem(tHandle)
 
         # Emit Refresh Signal
+        itemIcon = SHARED.theme.getItemIcon(
+            nwItem.itemType, nwItem.itemClass, nwItem.itemLayout, nwItem.mainHeading
+        )
         self.itemRefreshed.emit(tHandle, nwItem, itemIcon)
 
         return
 
-    def propagateCount(self, tHandle: str, newCount: int, countChildren: bool = False) -> None:
-        """Recursive function setting the word count for a given item,
-        and propagating that count upwards in the tree until reaching a
-        root item. This function is more efficient than recalculating
-        everything each time the word count is updated, but is also
-        prone to diverging from the true values if the counts are not
-        properly reported to the function.
+    def propagateCount(self, tHandle: str) -> None:
+        """Refresh the word count shown for a given item and its parent
+        items. The counts themselves are summed up by the project tree,
+        which caches the sum for each item until it changes.
         """
-        tItem = self._getTreeItem(tHandle)
-        if tItem is None:
-            return
-
-        if countChildren:
-            for i in range(tItem.childCount()):
-                newCount += int(tItem.child(i).data(self.C_DATA, self.D_WORDS))
-
-        tItem.setText(self.C_COUNT, f"{newCount:n}")
-        tItem.setData(self.C_DATA, self.D_WORDS, int(newCount))
-
-        pItem = tItem.parent()
-        if pItem is None:
-            return
-
-        pCount = 0
-        pHandle = None
-        for i in range(pItem.childCount()):
-            pCount += int(pItem.child(i).data(self.C_DATA, self.D_WORDS))
-            pHandle = pItem.data(self.C_DATA, self.D_HANDLE)
-
-        if pHandle:
-            if SHARED.project.tree.checkType(pHandle, nwItemType.FILE):
-                # A file has an internal word count we need to account
-                # for, but a folder always has 0 words on its own.
-                pCount += SHARED.project.index.getCounts(pHandle)[1]
-
-            self.propagateCount(pHandle, pCount, countChildren=False)
-
+        self._model.refreshCounts(tHandle)
         return
 
+    @TIMINGS.timed("tree.build")
     def buildTree(self) -> None:
-        """Build the entire project tree from scratch. This depends on
-        the save project item iterator in the project class which will
-        always make sure items with a parent have had their parent item
-        sent first.
+        """Build the project tree from scratch. Only the root items are
+        added up front, and the rest of the items are fetched from the
+        project tree when their parent item is expanded.
         """
         logger.debug("Building the project tree ...")
-        self.clearTree()
+        self._timeChanged = 0.0
+        self._model.reload()
+        for row in range(self._model.rowCount()):
+            index = self._model.index(row, 0)
+            if (nwItem := SHARED.project.tree[self._model.handle(index)]) and nwItem.isExpanded:
+                self.setExpanded(index, True)
+
         count = 0
-        for nwItem in SHARED.project.iterProjectItems():
+        for nwItem in SHARED.project.tree:
             count += 1
-            self._addTreeItem(nwItem)
+            if nwItem.isTemplateFile():
+                self.setTreeItemValues(nwItem.itemHandle)
         if count > 0:
             logger.info("%d item(s) added to the project tree", count)
+
         return
 
     def getSelectedHandle(self) -> str | None:
         """Get the currently selected handle. If multiple items are
         selected, return the first.
         """
-        if items := self.selectedItems():
-            return items[0].data(self.C_DATA, self.D_HANDLE)
+        if indexes := self.selectionModel().selectedRows():
+            return self._model.handle(indexes[0])
         return None
 
     def setSelectedHandle(self, tHandle: str | None, doScroll: bool = False) -> bool:
         """Set a specific handle as the selected item."""
-        tItem = self._getTreeItem(tHandle)
-        if tItem is None:
+        index = self._getTreeIndex(tHandle)
+        if not index.isValid():
             return False
 
-        if tHandle in self._treeMap:
-            self.setCurrentItem(self._treeMap[tHandle])
-
-        if (indexes := self.selectedIndexes()) and doScroll:
-            self.scrollTo(indexes[0], QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.setCurrentIndex(index)
+        if doScroll:
+            self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
 
         return True
 
     def setExpandedFromHandle(self, tHandle: str | None, isExpanded: bool) -> None:
         """Iterate through items below tHandle and change expanded
         status for all child items. If tHandle is None, it affects the
-        entire tree.
+        entire tree. Collapsing items does not fetch any rows.
         """
-        trItem = self._getTreeItem(tHandle) or self.invisibleRootItem()
-        self._recursiveSetExpanded(trItem, isExpanded)
+        tree = SHARED.project.tree
+        if tHandle is None:
+            handles = []
+            for nwItem in tree.iterChildren(None):
+                if nwItem.isRootType():
+                    handles.extend(tree.subtreeHandles(nwItem.itemHandle))
+        else:
+            handles = tree.subtreeHandles(tHandle)[1:]
+
+        for cHandle in handles:
+            if tree.childCount(cHandle) == 0 or not (nwItem := tree[cHandle]):
+                continue
+            if isExpanded:
+                self.setExpanded(self._getTreeIndex(cHandle), True)
+            else:
+                nwItem.setExpanded(False)
+                if nwItem.itemParent is None or self._model.isFetched(nwItem.itemParent):
+                    self.setExpanded(self._getTreeIndex(cHandle), False)
+
         return
 
     def openContextOnSelected(self) -> bool:
         """Open the context menu on the current selected item."""
-        if items := self.selectedItems():
-            return self._openContextMenu(self.visualItemRect(items[0]).center())
+        if indexes := self.selectionModel().selectedRows():
+            return self._openContextMenu(self.visualRect(indexes[0]).center())
         return False
 
     def changedSince(self, checkTime: float) -> bool:
@@ -1177,16 +1133,19 @@ class GuiProjectTree(QTreeWidget):
 
         # When selecting multiple items, don't allow including root
         # items in the selection and instead deselect them
-        items = self.selectedItems()
-        if items and len(items) > 1:
-            for item in items:
-                if item.parent() is None:
-                    item.setSelected(False)
+        indexes = self.selectionModel().selectedRows()
+        if indexes and len(indexes) > 1:
+            for index in indexes:
+                if not index.parent().isValid():
+                    self.selectionModel().select(
+                        index, QItemSelectionModel.SelectionFlag.Deselect
+                        | QItemSelectionModel.SelectionFlag.Rows
+                    )
 
         return
 
-    @pyqtSlot("QTreeWidgetItem*", int)
-    def _treeDoubleClick(self, trItem: QTreeWidgetItem, colNo: int) -> None:
+    @pyqtSlot(QModelIndex)
+    def _treeDoubleClick(self, index: QModelIndex) -> None:
         """Capture a double-click event and either request the document
         for editing if it is a file, or expand/close the node it is not.
         """
@@ -1201,8 +1160,32 @@ class GuiProjectTree(QTreeWidget):
         if tItem.isFileType():
             self.projView.openDocumentRequest.emit(tHandle, nwDocMode.EDIT, "", True)
         else:
-            trItem.setExpanded(not trItem.isExpanded())
+            index = index.siblingAtColumn(self.C_NAME)
+            self.setExpanded(index, not self.isExpanded(index))
+
+        return
+
+    @pyqtSlot(QModelIndex)
+    def _treeItemExpanded(self, index: QModelIndex) -> None:
+        """Record the expanded state of an item, and fetch its children
+        so that those that were expanded can be expanded again.
+        """
+        if (tHandle := self._model.handle(index)) and (nwItem := SHARED.project.tree[tHandle]):
+            nwItem.setExpanded(True)
+            if self._model.canFetchMore(index):
+                self._model.fetchMore(index)
+            for row in range(self._model.rowCount(index)):
+                cIndex = self._model.index(row, 0, index)
+                cItem = SHARED.project.tree[self._model.handle(cIndex)]
+                if cItem and cItem.isExpanded and not self.isExpanded(cIndex):
+                    self.setExpanded(cIndex, True)
+        return
 
+    @pyqtSlot(QModelIndex)
+    def _treeItemCollapsed(self, index: QModelIndex) -> None:
+        """Record the collapsed state of an item."""
+        if (tHandle := self._model.handle(index)) and (nwItem := SHARED.project.tree[tHandle]):
+            nwItem.setExpanded(False)
         return
 
     @pyqtSlot("QPoint")
@@ -1211,25 +1194,23 @@ class GuiProjectTree(QTreeWidget):
         open a context menu in-place.
         """
         tItem = None
-        tHandle = None
-        hasChild = False
-        sItem = self.itemAt(clickPos)
-        sItems = self.selectedItems()
-        if isinstance(sItem, QTreeWidgetItem):
-            tHandle = sItem.data(self.C_DATA, self.D_HANDLE)
+        tHandle = self._model.handle(self.indexAt(clickPos))
+        if tHandle is not None:
             tItem = SHARED.project.tree[tHandle]
-            hasChild = sItem.childCount() > 0
 
         if tItem is None or tHandle is None:
             logger.debug("No item found")
             return False
 
+        hasChild = SHARED.project.tree.childCount(tHandle) > 0
+        sIndexes = self.selectionModel().selectedRows()
+
         ctxMenu = _TreeContextMenu(self, tItem)
         trashHandle = SHARED.project.tree.trashRoot
         if trashHandle and tHandle == trashHandle:
             ctxMenu.buildTrashMenu()
-        elif len(sItems) > 1:
-            handles = [str(x.data(self.C_DATA, self.D_HANDLE)) for x in sItems]
+        elif len(sIndexes) > 1:
+            handles = [str(self._model.handle(x)) for x in sIndexes]
             ctxMenu.buildMultiSelectMenu(handles)
         else:
             ctxMenu.buildSingleSelectMenu(hasChild)
@@ -1243,9 +1224,9 @@ class GuiProjectTree(QTreeWidget):
     def _doAutoScroll(self) -> None:
         """Scroll one item up or down based on direction value."""
         if self._scrollDirection == -1:
-            self.scrollToItem(self.itemAbove(self.itemAt(1, 1)))
+            self.scrollTo(self.indexAbove(self.indexAt(QPoint(1, 1))))
         elif self._scrollDirection == 1:
-            self.scrollToItem(self.itemBelow(self.itemAt(1, self.height() - 1)))
+            self.scrollTo(self.indexBelow(self.indexAt(QPoint(1, self.height() - 1))))
         self._scrollDirection = 0
         self._scrollTimer.stop()
         return
@@ -1265,9 +1246,7 @@ class GuiProjectTree(QTreeWidget):
             if not selItem.isValid():
                 self.clearSelection()
         elif event.button() == Qt.MouseButton.MiddleButton:
-            selItem = self.itemAt(event.pos())
-            if selItem:
-                tHandle = selItem.data(self.C_DATA, self.D_HANDLE)
+            if tHandle := self._model.handle(self.indexAt(event.pos())):
                 if (tItem := SHARED.project.tree[tHandle]) and tItem.isFileType():
                     self.projView.openDocumentRequest.emit(tHandle, nwDocMode.VIEW, "", False)
         return
@@ -1284,8 +1263,7 @@ class GuiProjectTree(QTreeWidget):
         """Check that we're only dragging items that are siblings, and
         not a root level item.
         """
-        items = self.selectedItems()
-        if items and (parent := items[0].parent()) and all(x.parent() is parent for x in items):
+        if self._movableSelection():
             super().dragEnterEvent(event)
         else:
             logger.warning("Drag action is not allowed and has been cancelled")
@@ -1313,32 +1291,57 @@ class GuiProjectTree(QTreeWidget):
 
     def dropEvent(self, event: QDropEvent) -> None:
         """Overload the drop item event to ensure the drag and drop
-        action is allowed, and update relevant data.
+        action is allowed, and move the items through the model.
         """
-        tItem = self.itemAt(event.pos())
-        dropOn = self.dropIndicatorPosition() == QAbstractItemView.DropIndicatorPosition.OnItem
+        index = self.indexAt(event.pos())
+        position = self.dropIndicatorPosition()
+        dropOn = position == QAbstractItemView.DropIndicatorPosition.OnItem
+        onViewport = position == QAbstractItemView.DropIndicatorPosition.OnViewport
         # Make sure nothing can be dropped on invisible root (see #1569)
-        if not tItem or tItem.parent() is None and not dropOn:
+        if not index.isValid() or onViewport or not (index.parent().isValid() or dropOn):
             logger.error("Invalid drop location")
             event.ignore()
             return
 
-        mItems: dict[str, tuple[QTreeWidgetItem, bool]] = {}
-        sItems = self.selectedItems()
-        if sItems and (parent := sItems[0].parent()) and all(x.parent() is parent for x in sItems):
-            for sItem in sItems:
-                mHandle = str(sItem.data(self.C_DATA, self.D_HANDLE))
-                mItems[mHandle] = (sItem, sItem.isExpanded())
-                self.propagateCount(mHandle, 0)
-
-            super().dropEvent(event)
-
-            for mHandle, (sItem, isExpanded) in mItems.items():
+        tHandle = self._model.handle(index)
+        if dropOn:
+            pHandle = tHandle
+            row = -1
+        elif position == QAbstractItemView.DropIndicatorPosition.AboveItem:
+            pHandle = self._model.handle(index.parent())
+            row = index.row()
+        else:
+            pHandle = self._model.handle(index.parent())
+            row = index.row() + 1
+
+        if indexes := self._movableSelection():
+            tree = SHARED.project.tree
+            sHandle = self._model.handle(indexes[0].parent())
+            mHandles = [str(self._model.handle(x)) for x in sorted(indexes, key=lambda x: x.row())]
+            if pHandle is None or any(h in tree.getItemPath(pHandle) for h in mHandles):
+                logger.error("Cannot move an item into itself")
+                event.ignore()
+                return
+
+            for mHandle in mHandles:
+                self._model.moveItem(mHandle, pHandle, row)
+                if row >= 0:
+                    # Keep the moved items together in the same order
+                    rows = self._model.rowHandles(pHandle)
+                    row = rows.index(mHandle) + 1 if mHandle in rows else -1
+
+            self._model.refreshCounts(sHandle)
+            for mHandle in mHandles:
                 self._postItemMove(mHandle)
-                sItem.setExpanded(isExpanded)
                 self._alertTreeChange(mHandle, flush=False)
 
             self.saveTreeOrder()
+            event.accept()
+        else:
+            event.ignore()
+
+        self.setState(QAbstractItemView.State.NoState)
+        self.viewport().update()
 
         return
 
@@ -1346,19 +1349,26 @@ class GuiProjectTree(QTreeWidget):
     #  Internal Functions
     ##
 
+    def _movableSelection(self) -> list[QModelIndex]:
+        """Return the selected rows if they can be moved, that is, if
+        they are non-root items with the same parent.
+        """
+        indexes = self.selectionModel().selectedRows()
+        if indexes and (parent := indexes[0].parent()).isValid():
+            if all(x.parent() == parent for x in indexes):
+                return indexes
+        return []
+
     def _postItemMove(self, tHandle: str) -> None:
         """Run various maintenance tasks for a moved item."""
-        trItemS = self._getTreeItem(tHandle)
         nwItemS = SHARED.project.tree[tHandle]
-        trItemP = trItemS.parent() if trItemS else None
-        if trItemP is None or nwItemS is None:
+        pHandle = nwItemS.itemParent if nwItemS else None
+        if nwItemS is None or pHandle is None:
             logger.error("Failed to find new parent item of '%s'", tHandle)
             return
 
-        # Update item parent handle in the project
-        pHandle = trItemP.data(self.C_DATA, self.D_HANDLE)
-        nwItemS.setParent(pHandle)
-        trItemP.setExpanded(True)
+        # The project tree already holds the new parent
+        self.setExpanded(self._getTreeIndex(pHandle), True)
         logger.debug("The parent of item '%s' has been changed to '%s'", tHandle, pHandle)
 
         mHandles = self.getTreeFromHandle(tHandle)
@@ -1373,29 +1383,17 @@ class GuiProjectTree(QTreeWidget):
             self.setTreeItemValues(mHandle)
 
         # Update word count
-        self.propagateCount(tHandle, nwItemS.wordCount, countChildren=True)
+        self._model.refreshCounts(tHandle)
 
         return
 
     def _getItemWordCount(self, tHandle: str) -> int:
         """Return the word count of a given item handle."""
-        tItem = self._getTreeItem(tHandle)
-        return int(tItem.data(self.C_DATA, self.D_WORDS)) if tItem else 0
+        return SHARED.project.tree.subtreeWords(tHandle)
 
-    def _getTreeItem(self, tHandle: str | None) -> QTreeWidgetItem | None:
-        """Return the QTreeWidgetItem of a given item handle."""
-        return self._treeMap.get(tHandle, None) if tHandle else None
-
-    def _recursiveSetExpanded(self, trItem: QTreeWidgetItem, isExpanded: bool) -> None:
-        """Recursive function to set expanded status starting from (and
-        not including) a given item.
-        """
-        if isinstance(trItem, QTreeWidgetItem):
-            for i in range(trItem.childCount()):
-                chItem = trItem.child(i)
-                chItem.setExpanded(isExpanded)
-                self._recursiveSetExpanded(chItem, isExpanded)
-        return
+    def _getTreeIndex(self, tHandle: str | None) -> QModelIndex:
+        """Return the model index of a given item handle."""
+        return self._model.indexFromHandle(tHandle)
 
     def _mergeDocuments(self, tHandle: str, newFile: bool) -> bool:
         """Merge an item's child documents into a single document."""
@@ -1413,6 +1411,7 @@ class GuiProjectTree(QTreeWidget):
         if not newFile:
             itemList.remove(tHandle)
 
+        from novelwriter.dialogs.docmerge import GuiDocMerge
         dlgMerge = GuiDocMerge(self.mainGui, tHandle, itemList)
         dlgMerge.exec_()
 
@@ -1457,9 +1456,9 @@ class GuiProjectTree(QTreeWidget):
             self.mainGui.openDocument(mHandle, doScroll=True)
 
             if mrgData.get("moveToTrash", False):
+                tree = SHARED.project.tree
                 for sHandle in reversed(mrgData.get("finalItems", [])):
-                    trItem = self._getTreeItem(sHandle)
-                    if isinstance(trItem, QTreeWidgetItem) and trItem.childCount() == 0:
+                    if sHandle in tree and tree.childCount(sHandle) == 0:
                         self.moveItemToTrash(sHandle, askFirst=False, flush=False)
 
             self._alertTreeChange(mHandle, flush=True)
@@ -1483,6 +1482,7 @@ class GuiProjectTree(QTreeWidget):
             logger.error("Only valid document items can be split")
             return False
 
+        from novelwriter.dialogs.docsplit import GuiDocSplit
         dlgSplit = GuiDocSplit(self.mainGui, tHandle)
         dlgSplit.exec_()
 
@@ -1538,108 +1538,66 @@ class GuiProjectTree(QTreeWidget):
         if not SHARED.question(question):
             return False
 
+        tree = SHARED.project.tree
+        known = set(tree.handles())
         docDup = DocDuplicator(SHARED.project)
         dupCount = 0
         for dHandle, nHandle in docDup.duplicate(itemTree):
             SHARED.project.index.reIndexHandle(dHandle)
             self.revealNewTreeItem(dHandle, nHandle=nHandle, wordCount=True)
             self._alertTreeChange(dHandle, flush=False)
+            known.add(dHandle)
             dupCount += 1
 
         if dupCount != nItems:
+            # Drop the item the duplicator stopped at, as it was never
+            # added to the project tree view
+            for tHandle in tree.handles():
+                if tHandle not in known:
+                    del tree[tHandle]
             SHARED.warn(self.tr("Could not duplicate all items."))
 
         self.saveTreeOrder()
 
         return True
 
-    def _scanChildren(self, itemList: list, tItem: QTreeWidgetItem, tIndex: int) -> list[str]:
-        """This is a recursive function returning all items in a tree
-        starting at a given QTreeWidgetItem.
-        """
-        tHandle = tItem.data(self.C_DATA, self.D_HANDLE)
-        cCount = tItem.childCount()
-
-        # Update tree-related meta data
-        nwItem = SHARED.project.tree[tHandle]
-        if nwItem is not None:
-            nwItem.setExpanded(tItem.isExpanded() and cCount > 0)
-            nwItem.setOrder(tIndex)
-
-        itemList.append(tHandle)
-        for i in range(cCount):
-            self._scanChildren(itemList, tItem.child(i), i)
-
-        return itemList
-
-    def _addTreeItem(self, nwItem: NWItem | None,
-                     nHandle: str | None = None) -> QTreeWidgetItem | None:
-        """Create a QTreeWidgetItem from an NWItem and add it to the
-        project tree. Returns the widget if the item is valid, otherwise
-        a None is returned.
+    def _addTreeItem(self, nwItem: NWItem | None, nHandle: str | None = None) -> bool:
+        """Add an NWItem to the project tree model. Returns True if the
+        item is valid and could be added, otherwise False.
         """
         if not nwItem:
             logger.error("Invalid item cannot be added to project tree")
-            return None
+            return False
 
         tHandle = nwItem.itemHandle
-        pHandle = nwItem.itemParent
-        newItem = QTreeWidgetItem()
-
-        newItem.setText(self.C_NAME, "")
-        newItem.setText(self.C_COUNT, "0")
-        newItem.setText(self.C_ACTIVE, "")
-        newItem.setText(self.C_STATUS, "")
-
-        newItem.setTextAlignment(self.C_NAME, Qt.AlignmentFlag.AlignLeft)
-        newItem.setTextAlignment(self.C_COUNT, Qt.AlignmentFlag.AlignRight)
-        newItem.setTextAlignment(self.C_ACTIVE, Qt.AlignmentFlag.AlignLeft)
-        newItem.setTextAlignment(self.C_STATUS, Qt.AlignmentFlag.AlignLeft)
-
-        newItem.setData(self.C_DATA, self.D_HANDLE, tHandle)
-        newItem.setData(self.C_DATA, self.D_WORDS, 0)
-
-        if pHandle is None and nwItem.isRootType():
-            pItem = self.invisibleRootItem()
-        elif pHandle and pHandle in self._treeMap:
-            pItem = self._treeMap[pHandle]
-        else:
+        if not self._model.insertItem(tHandle, nHandle):
             SHARED.error(self.tr(
                 "There is nowhere to add item with name '{0}'."
             ).format(nwItem.itemName))
-            return None
-
-        byIndex = -1
-        if nHandle is not None and nHandle in self._treeMap:
-            byIndex = pItem.indexOfChild(self._treeMap[nHandle])
-        if byIndex >= 0:
-            pItem.insertChild(byIndex + 1, newItem)
-        else:
-            pItem.addChild(newItem)
+            return False
 
-        self._treeMap[tHandle] = newItem
-        self.propagateCount(tHandle, nwItem.wordCount, countChildren=True)
+        self._model.refreshCounts(nwItem.itemParent)
         self.setTreeItemValues(tHandle)
-        newItem.setExpanded(nwItem.isExpanded)
+        if nwItem.isExpanded:
+            self.setExpanded(self._getTreeIndex(tHandle), True)
 
-        return newItem
+        return True
 
-    def _addTrashRoot(self) -> QTreeWidgetItem | None:
+    def _addTrashRoot(self) -> str | None:
         """Adds the trash root folder if it doesn't already exist in the
-        project tree.
+        project tree, and returns its handle.
         """
         trashHandle = SHARED.project.trashFolder()
         if trashHandle is None:
             return None
 
-        trItem = self._getTreeItem(trashHandle)
-        if trItem is None:
-            trItem = self._addTreeItem(SHARED.project.tree[trashHandle])
-            if trItem is not None:
-                trItem.setExpanded(True)
-                self._alertTreeChange(trashHandle, flush=True)
+        if not self._getTreeIndex(trashHandle).isValid():
+            if not self._addTreeItem(SHARED.project.tree[trashHandle]):
+                return None
+            self.setExpanded(self._getTreeIndex(trashHandle), True)
+            self._alertTreeChange(trashHandle, flush=True)
 
-        return trItem
+        return trashHandle
 
     def _alertTreeChange(self, tHandle: str | None, flush: bool = False) -> None:
         """Update information on tree change state, and emit necessary
@@ -1856,6 +1814,7 @@ class _TreeContextMenu(QMenu):
 
     def _itemStatusImport(self, multi: bool) -> None:
         """Add actions for changing status or importance."""
+        from novelwriter.dialogs.projectsettings import GuiProjectSettings
         if self._item.isNovelLike():
             menu = self.addMenu(self.tr("Set Status to ..."))
             current = self._item.itemStatus
@@ -32,7 +32,7 @@ from datetime import datetime
 from PyQt5.QtCore import pyqtSlot, QLocale
 from PyQt5.QtWidgets import qApp, QStatusBar, QLabel
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, MEMORY, SHARED
 from novelwriter.common import formatTime
 from novelwriter.constants import nwConst
 from novelwriter.extensions.statusled import StatusLED
@@ -242,11 +242,7 @@ class GuiMainStatus(QStatusBar):
 
         widgets = qApp.allWidgets()
         if not self._debugInfo:
-            if tracemalloc.is_tracing():
-                self._traceMallocRef = "Total"
-            else:
-                self._traceMallocRef = "Relative"
-                tracemalloc.start()
+            MEMORY.start()
             self._debugInfo = True
             self._wCounts = Counter([type(x).__name__ for x in widgets])
 
@@ -260,7 +256,7 @@ class GuiMainStatus(QStatusBar):
         self.showMessage((
             f"Debug [{stamp}]"
             f" \u2013 Widgets: {len(widgets)}"
-            f" \u2013 {self._traceMallocRef} Memory: {mem[0]:n}"
+            f" \u2013 {MEMORY.tracingMode} Memory: {mem[0]:n}"
             f" \u2013 Peak: {mem[1]:n}"
         ), 6000)
         return
@@ -5,6 +5,7 @@ novelWriter – Theme and Icons Classes
 File History:
 Created: 2019-05-18 [0.1.3] GuiTheme
 Created: 2019-11-08 [0.4]   GuiIcons
+Created: 2024-03-20 [2.4b1] _IconEngine
 
 This file is a part of novelWriter
 Copyright 2018–2024, Veronica Berglyd Olsen
@@ -24,18 +25,22 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import shutil
+import hashlib
 import logging
 
 from math import ceil
 from pathlib import Path
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import qApp
+from PyQt5.QtSvg import QSvgRenderer
+from PyQt5.QtCore import QRect, QRectF, QSize, Qt
+from PyQt5.QtWidgets import QStyleOption, qApp
 from PyQt5.QtGui import (
-    QPalette, QColor, QIcon, QFont, QFontMetrics, QFontDatabase, QPixmap
+    QPalette, QColor, QIcon, QIconEngine, QImage, QFont, QFontMetrics,
+    QFontDatabase, QPainter, QPixmap
 )
 
-from novelwriter import CONFIG
+from novelwriter import CONFIG, __hexversion__
 from novelwriter.enum import nwItemClass, nwItemLayout, nwItemType
 from novelwriter.error import logException
 from novelwriter.common import NWConfigParser, minmax
@@ -429,6 +434,15 @@ class GuiIcons:
 
     When an icon is requested, the icon is loaded and cached. If it is
     missing, a blank icon is returned and a warning issued.
+
+    The SVG icons and decorations are rasterised once per pixel size,
+    and the pixmaps are saved to the icons folder of the user's cache
+    folder. The files are named by a hash of the SVG file content, so a
+    changed or different icon never uses an old pixmap. This means the
+    SVG files only need to be parsed the first time an icon is drawn at
+    a new size or pixel ratio. The pixmaps are kept in a sub folder per
+    icon theme and novelWriter version, and the folders of other themes
+    and versions are removed when a theme is loaded.
     """
 
     ICON_KEYS: set[str] = {
@@ -484,6 +498,8 @@ class GuiIcons:
         # Storage
         self._qIcons: dict[str, QIcon] = {}
         self._themeMap: dict[str, Path] = {}
+        self._digests: dict[Path, str] = {}
+        self._cachePath: Path | None = None
         self._headerDec: list[QPixmap] = []
         self._headerDecNarrow: list[QPixmap] = []
 
@@ -567,6 +583,9 @@ class GuiIcons:
                 logger.error("No icon file specified for '%s'", iconKey)
 
         # Refresh icons
+        self._digests = {}
+        self._cachePath = CONFIG.dataPath("cache") / "icons" / f"{iconTheme}-{__hexversion__}"
+        self._pruneCache()
         for iconKey in self._qIcons:
             logger.debug("Reloading icon: '%s'", iconKey)
             qIcon = self._loadIcon(iconKey)
@@ -577,6 +596,21 @@ class GuiIcons:
 
         return True
 
+    def preloadIcons(self) -> None:
+        """Load all theme icons, and their pixmaps at the base icon
+        size. This is meant to be called when the GUI is idle, so that
+        the first population of the project tree doesn't have to load
+        them.
+        """
+        iPx = self.mainTheme.baseIconSize
+        ratio = qApp.devicePixelRatio()
+        size = QSize(ceil(iPx*ratio), ceil(iPx*ratio))
+        for iconKey in self._themeMap:
+            icon = self.getIcon(iconKey)
+            icon.pixmap(size, QIcon.Mode.Normal, QIcon.State.Off)
+        logger.debug("Preloaded %d icons", len(self._themeMap))
+        return
+
     ##
     #  Access Functions
     ##
@@ -598,14 +632,23 @@ class GuiIcons:
             logger.error("Asset not found: %s", imgPath)
             return QPixmap()
 
+        cacheFile = None
+        if self._cachePath and imgPath.suffix == ".svg" and (digest := self._fileDigest(imgPath)):
+            cacheFile = self._cachePath / f"{digest}-deco-{w or 0}x{h or 0}.png"
+            if cacheFile.is_file() and not (cached := QPixmap(str(cacheFile))).isNull():
+                return cached
+
         pixmap = QPixmap(str(imgPath))
         tMode = Qt.TransformationMode.SmoothTransformation
         if w is not None and h is not None:
-            return pixmap.scaled(w, h, Qt.AspectRatioMode.IgnoreAspectRatio, tMode)
+            pixmap = pixmap.scaled(w, h, Qt.AspectRatioMode.IgnoreAspectRatio, tMode)
         elif w is None and h is not None:
-            return pixmap.scaledToHeight(h, tMode)
+            pixmap = pixmap.scaledToHeight(h, tMode)
         elif w is not None and h is None:
-            return pixmap.scaledToWidth(w, tMode)
+            pixmap = pixmap.scaledToWidth(w, tMode)
+
+        if cacheFile:
+            _saveCachedPixmap(pixmap, cacheFile)
 
         return pixmap
 
@@ -704,28 +747,162 @@ class GuiIcons:
 
         # If we just want the app icons, return right away
         if name == "novelwriter":
-            return QIcon(str(self._iconPath / "novelwriter.svg"))
+            return self._svgIcon(self._iconPath / "novelwriter.svg")
         elif name == "proj_nwx":
-            return QIcon(str(self._iconPath / "x-novelwriter-project.svg"))
+            return self._svgIcon(self._iconPath / "x-novelwriter-project.svg")
 
         # Otherwise, we load from the theme folder
         if name in self._themeMap:
             logger.debug("Loading: %s", self._themeMap[name].name)
-            return QIcon(str(self._themeMap[name]))
+            return self._svgIcon(self._themeMap[name])
 
         # If we didn't find one, give up and return an empty icon
         logger.warning("Did not load an icon for '%s'", name)
 
         return QIcon()
 
+    def _svgIcon(self, path: Path) -> QIcon:
+        """Create an icon for an SVG file, using the pixmap cache.
+        Other file types are loaded directly.
+        """
+        if self._cachePath and path.suffix == ".svg" and (digest := self._fileDigest(path)):
+            return QIcon(_IconEngine(path, self._cachePath / digest))
+        return QIcon(str(path))
+
+    def _fileDigest(self, path: Path) -> str | None:
+        """Return the hash of a file's content, which is used to name
+        its cached pixmaps.
+        """
+        if (digest := self._digests.get(path)) is None:
+            try:
+                digest = hashlib.sha1(path.read_bytes()).hexdigest()
+            except Exception:
+                logger.error("Could not read icon file: %s", path)
+                return None
+            self._digests[path] = digest
+        return digest
+
+    def _pruneCache(self) -> None:
+        """Remove the cached pixmaps of other icon themes and versions.
+        Failing to do so is not an error.
+        """
+        if self._cachePath is None or not self._cachePath.parent.is_dir():
+            return
+        try:
+            for path in self._cachePath.parent.iterdir():
+                if path == self._cachePath:
+                    continue
+                logger.debug("Removing icon cache: %s", path.name)
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+        except Exception:
+            logger.debug("Could not prune icon cache")
+        return
+
 # END Class GuiIcons
 
 
+class _IconEngine(QIconEngine):
+    """Icon engine for SVG icons, which rasterises each size once and
+    keeps the pixmaps in memory and in the cache folder.
+    """
+
+    def __init__(self, path: Path, cacheBase: Path) -> None:
+        super().__init__()
+        self._path = path
+        self._cacheBase = cacheBase  # The cache folder and the hash of the file
+        self._renderer: QSvgRenderer | None = None
+        self._pixmaps: dict[tuple[int, int, int], QPixmap] = {}
+        return
+
+    def pixmap(self, size: QSize, mode: QIcon.Mode, state: QIcon.State) -> QPixmap:
+        """Return the pixmap for a given size and mode."""
+        key = (size.width(), size.height(), mode)
+        if (pixmap := self._pixmaps.get(key)) is not None:
+            return pixmap
+
+        if mode == QIcon.Mode.Normal:
+            pixmap = self._loadPixmap(size)
+        else:
+            option = QStyleOption()
+            option.palette = qApp.palette()
+            pixmap = qApp.style().generatedIconPixmap(
+                mode, self.pixmap(size, QIcon.Mode.Normal, state), option
+            )
+
+        self._pixmaps[key] = pixmap
+        return pixmap
+
+    def paint(self, painter: QPainter, rect: QRect, mode: QIcon.Mode, state: QIcon.State) -> None:
+        """Paint the icon centred in a rectangle."""
+        ratio = painter.device().devicePixelRatioF()
+        pixmap = self.pixmap(rect.size()*ratio, mode, state)
+        target = QRectF(0.0, 0.0, pixmap.width()/ratio, pixmap.height()/ratio)
+        target.moveCenter(QRectF(rect).center())
+        painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+        return
+
+    def availableSizes(self, mode: QIcon.Mode, state: QIcon.State) -> list[QSize]:
+        """Return the sizes of the pixmaps already rasterised."""
+        return [QSize(w, h) for w, h, m in self._pixmaps if m == mode]
+
+    def clone(self) -> _IconEngine:
+        """Return a copy of the engine."""
+        engine = _IconEngine(self._path, self._cacheBase)
+        engine._pixmaps = self._pixmaps.copy()
+        return engine
+
+    def _loadPixmap(self, size: QSize) -> QPixmap:
+        """Load a pixmap from the cache folder, or rasterise it."""
+        cacheFile = Path(f"{self._cacheBase}-{size.width()}x{size.height()}.png")
+        if cacheFile.is_file() and not (pixmap := QPixmap(str(cacheFile))).isNull():
+            return pixmap
+
+        if self._renderer is None:
+            self._renderer = QSvgRenderer(str(self._path))
+        if not self._renderer.isValid():
+            return QPixmap()
+
+        pxSize = self._renderer.defaultSize()
+        if pxSize.isEmpty():
+            pxSize = size
+        else:
+            pxSize.scale(size, Qt.AspectRatioMode.KeepAspectRatio)
+
+        image = QImage(pxSize, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        self._renderer.render(painter)
+        painter.end()
+
+        pixmap = QPixmap.fromImage(image)
+        _saveCachedPixmap(pixmap, cacheFile)
+
+        return pixmap
+
+# END Class _IconEngine
+
+
 # =============================================================================================== #
 #  Module Functions
 # =============================================================================================== #
 
 
+def _saveCachedPixmap(pixmap: QPixmap, cacheFile: Path) -> None:
+    """Save a pixmap to the cache folder. Failing to do so is not an
+    error, as it can just be rasterised again.
+    """
+    try:
+        cacheFile.parent.mkdir(parents=True, exist_ok=True)
+        if not pixmap.isNull() and not pixmap.save(str(cacheFile), "PNG"):
+            logger.debug("Could not cache pixmap: %s", cacheFile.name)
+    except Exception:
+        logger.debug("Could not cache pixmap: %s", cacheFile.name)
+    return
+
+
 def _sortTheme(data: tuple[str, str]) -> str:
     """Key function for theme sorting."""
     key, name = data
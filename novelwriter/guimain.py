@@ -37,7 +37,9 @@ from PyQt5.QtWidgets import (
     QStackedWidget, QVBoxLayout, QWidget, qApp
 )
 
-from novelwriter import CONFIG, SHARED, __hexversion__, __version__
+from novelwriter import (
+    CONFIG, MEMORY, PROFILER, SHARED, TIMINGS, __hexversion__, __version__
+)
 from novelwriter.constants import nwConst
 from novelwriter.gui.theme import GuiTheme
 from novelwriter.gui.sidebar import GuiSideBar
@@ -50,20 +52,12 @@ from novelwriter.gui.noveltree import GuiNovelView
 from novelwriter.gui.statusbar import GuiMainStatus
 from novelwriter.gui.itemdetails import GuiItemDetails
 from novelwriter.gui.docviewerpanel import GuiDocViewerPanel
-from novelwriter.dialogs.about import GuiAbout
-from novelwriter.dialogs.wordlist import GuiWordList
-from novelwriter.dialogs.preferences import GuiPreferences
-from novelwriter.dialogs.projectsettings import GuiProjectSettings
-from novelwriter.tools.welcome import GuiWelcome
-from novelwriter.tools.manuscript import GuiManuscript
-from novelwriter.tools.dictionaries import GuiDictionaries
-from novelwriter.tools.noveldetails import GuiNovelDetails
-from novelwriter.tools.writingstats import GuiWritingStats
 
 from novelwriter.enum import (
     nwDocAction, nwDocInsert, nwDocMode, nwItemType, nwWidget, nwView
 )
 from novelwriter.common import formatFileFilter, formatVersion, hexToInt
+from novelwriter.profiler import estimateSize
 
 logger = logging.getLogger(__name__)
 
@@ -237,8 +231,12 @@ class GuiMain(QMainWindow):
         SHARED.indexScannedText.connect(self.docViewerPanel.projectItemChanged)
         SHARED.indexScannedText.connect(self.projView.updateItemValues)
         SHARED.indexScannedText.connect(self.itemDetails.updateViewBox)
+        SHARED.indexScannedText.connect(self.outlineView.updateItemValues)
         SHARED.indexCleared.connect(self.docViewerPanel.indexWasCleared)
+        SHARED.indexCleared.connect(self.outlineView.indexWasCleared)
         SHARED.indexAvailable.connect(self.docViewerPanel.indexHasAppeared)
+        SHARED.indexAvailable.connect(self.outlineView.indexHasAppeared)
+        SHARED.documentsChangedOnDisk.connect(self._documentsChangedOnDisk)
 
         self.mainMenu.requestDocAction.connect(self._passDocumentAction)
         self.mainMenu.requestDocInsert.connect(self._passDocumentInsert)
@@ -267,7 +265,7 @@ class GuiMain(QMainWindow):
         self.docEditor.docCountsChanged.connect(self.itemDetails.updateCounts)
         self.docEditor.docCountsChanged.connect(self.projView.updateCounts)
         self.docEditor.loadDocumentTagRequest.connect(self._followTag)
-        self.docEditor.novelStructureChanged.connect(self.novelView.refreshTree)
+        self.docEditor.novelStructureChanged.connect(self.novelView.updateNovelStructure)
         self.docEditor.novelItemMetaChanged.connect(self.novelView.updateNovelItemMeta)
         self.docEditor.statusMessage.connect(self.mainStatus.setStatusMessage)
         self.docEditor.spellCheckStateChanged.connect(self.mainMenu.setSpellCheckState)
@@ -298,6 +296,12 @@ class GuiMain(QMainWindow):
         self.asDocTimer = QTimer(self)
         self.asDocTimer.timeout.connect(self._autoSaveDocument)
 
+        # Set Up Re-Index Queue Timer
+        self._reindexQueue: list[str] = []
+        self.reindexTimer = QTimer(self)
+        self.reindexTimer.setInterval(0)
+        self.reindexTimer.timeout.connect(self._processReindexQueue)
+
         # Main Clock
         self.mainTimer = QTimer(self)
         self.mainTimer.setInterval(1000)
@@ -319,6 +323,37 @@ class GuiMain(QMainWindow):
         self.keyEscape.setKey(Qt.Key.Key_Escape)
         self.keyEscape.activated.connect(self._keyPressEscape)
 
+        self.keyPerformance = QShortcut(self)
+        self.keyPerformance.setKey("Ctrl+Alt+Shift+T")
+        self.keyPerformance.activated.connect(self.showPerformanceDialog)
+
+        self.keyMemory = QShortcut(self)
+        self.keyMemory.setKey("Ctrl+Alt+Shift+M")
+        self.keyMemory.activated.connect(self.dumpMemoryReport)
+
+        # Memory Accounting
+        MEMORY.addSource("project.tree", lambda: estimateSize(
+            SHARED.project.tree, exclude=(SHARED.project,)
+        ))
+        MEMORY.addSource("project.index", lambda: estimateSize(
+            SHARED.project.index, exclude=(SHARED.project,)
+        ))
+        MEMORY.addSource("project.storage", lambda: estimateSize(
+            SHARED.project.storage, exclude=(SHARED.project,)
+        ))
+        MEMORY.addSource("editor.document", lambda: estimateSize(
+            SHARED.mainGui.docEditor.document()
+        ))
+        MEMORY.addSource("viewer.document", lambda: estimateSize(
+            SHARED.mainGui.docViewer.document()
+        ))
+        MEMORY.addSource("viewer.cache", lambda: estimateSize(
+            SHARED.mainGui.docViewer.docCache
+        ))
+        MEMORY.addSource("cache.icons", lambda: estimateSize(
+            SHARED.theme.iconCache, exclude=(SHARED.theme,)
+        ))
+
         # Check that config loaded fine
         self.reportConfErr()
 
@@ -343,6 +378,8 @@ class GuiMain(QMainWindow):
 
     def postLaunchTasks(self, cmdOpen: str | None) -> None:
         """Process tasks after the main window has been created."""
+        QTimer.singleShot(0, SHARED.theme.iconCache.preloadIcons)
+
         if cmdOpen:
             qApp.processEvents()
             logger.info("Command line path: %s", cmdOpen)
@@ -412,11 +449,14 @@ class GuiMain(QMainWindow):
 
             SHARED.closeProject()
 
+            self._reindexQueue.clear()
+            self.reindexTimer.stop()
             self._updateWindowTitle()
             self._changeView(nwView.PROJECT)
 
         return saveOK
 
+    @PROFILER.profiled("openProject")
     def openProject(self, projFile: str | Path | None) -> bool:
         """Open a project from a projFile path."""
         if projFile is None:
@@ -430,8 +470,7 @@ class GuiMain(QMainWindow):
         self._changeView(nwView.PROJECT)
 
         # Try to open the project
-        tStart = time()
-        if not SHARED.openProject(projFile):
+        if not SHARED.openProject(projFile, lazy=True):
             # The project open failed.
             lockStatus = SHARED.projectLock
             if lockStatus is None:
@@ -463,51 +502,84 @@ class GuiMain(QMainWindow):
                 lockDetails = ""
 
             if SHARED.question(lockText, info=lockInfo, details=lockDetails, warn=True):
-                if not SHARED.openProject(projFile, clearLock=True):
+                if not SHARED.openProject(projFile, clearLock=True, lazy=True):
                     return False
             else:
                 return False
 
+        # The project is opened in stages. The project tree and the
+        # last edited document are made available first, while the
+        # remaining tasks are run after, processing GUI events between
+        # each stage.
+        project = SHARED.project
+        tStart = time()
+
         # Update GUI
-        self._updateWindowTitle(SHARED.project.data.name)
+        self._updateWindowTitle(project.data.name)
         self.rebuildTrees()
-        self.docEditor.toggleSpellCheck(SHARED.project.data.spellCheck)
-        self.mainStatus.setRefTime(SHARED.project.projOpened)
+        self.docEditor.toggleSpellCheck(project.data.spellCheck)
+        self.mainStatus.setRefTime(project.projOpened)
         self.projView.openProjectTasks()
-        self.novelView.openProjectTasks()
-        self.outlineView.openProjectTasks()
         self.docViewerPanel.openProjectTasks()
         self._updateStatusWordCount()
+        tStart = project.recordOpenStage("Project Tree GUI", tStart)
 
         # Restore previously open documents, if any
         # If none was recorded, open the first document found
-        lastEdited = SHARED.project.data.getLastHandle("editor")
+        lastEdited = project.data.getLastHandle("editor")
         if lastEdited is None:
-            for nwItem in SHARED.project.tree:
+            for nwItem in project.tree:
                 if nwItem and nwItem.isFileType():
                     lastEdited = nwItem.itemHandle
                     break
 
+        # Editing is blocked until the open is complete, as the index
+        # and the changed flags are reset at the end
+        self.docEditor.lockEditing(True)
         if lastEdited is not None:
             qApp.processEvents()
             self.openDocument(lastEdited, doScroll=True)
 
-        lastViewed = SHARED.project.data.getLastHandle("viewer")
+        lastViewed = project.data.getLastHandle("viewer")
         if lastViewed is not None:
             qApp.processEvents()
             self.viewDocument(lastViewed)
 
+        tStart = project.recordOpenStage("Documents GUI", tStart)
+
+        # Complete the project open, and rebuild the project tree if
+        # orphaned files were recovered
+        qApp.processEvents()
+        if not SHARED.hasProject or project is not SHARED.project:
+            logger.warning("Project was closed while opening")
+            self.docEditor.lockEditing(False)
+            return False
+
+        nItems = len(project.tree)
+        project.completeOpenProject()
+        if len(project.tree) != nItems:
+            self.rebuildTrees()
+        self._updateStatusWordCount()
+
+        # Populate the views that depend on the index
+        qApp.processEvents()
+        tStart = time()
+        self.docEditor.updateTagHighLighting()
+        self.novelView.openProjectTasks()
+        self.outlineView.openProjectTasks()
+        project.recordOpenStage("Novel Views GUI", tStart)
+
         # Check if we need to rebuild the index
-        if SHARED.project.index.indexBroken:
+        if project.index.indexBroken:
             SHARED.info(self.tr("The project index is outdated or broken. Rebuilding index."))
             self.rebuildIndex()
 
         # Make sure the changed status is set to false on things opened
         qApp.processEvents()
         self.docEditor.setDocumentChanged(False)
-        SHARED.project.setProjectChanged(False)
-
-        logger.debug("Project loaded in %.3f ms", (time() - tStart)*1000)
+        project.setProjectChanged(False)
+        self.docEditor.lockEditing(False)
+        project.logOpenStages()
 
         return True
 
@@ -760,6 +832,7 @@ class GuiMain(QMainWindow):
         self.projView.populateTree()
         return
 
+    @PROFILER.profiled("rebuildIndex")
     def rebuildIndex(self, beQuiet: bool = False) -> bool:
         """Rebuild the entire index."""
         if not SHARED.hasProject:
@@ -792,9 +865,13 @@ class GuiMain(QMainWindow):
     #  Main Dialogs
     ##
 
+    # The dialogs and tools are imported when first opened, as they are
+    # not needed to show the main window and slow down the start-up
+
     @pyqtSlot()
     def showWelcomeDialog(self) -> None:
         """Open the welcome dialog."""
+        from novelwriter.tools.welcome import GuiWelcome
         dialog = GuiWelcome(self)
         dialog.openProjectRequest.connect(self._openProjectFromWelcome)
         dialog.exec_()
@@ -803,6 +880,7 @@ class GuiMain(QMainWindow):
     @pyqtSlot()
     def showPreferencesDialog(self) -> None:
         """Open the preferences dialog."""
+        from novelwriter.dialogs.preferences import GuiPreferences
         dialog = GuiPreferences(self)
         dialog.newPreferencesReady.connect(self._processConfigChanges)
         dialog.exec_()
@@ -810,9 +888,12 @@ class GuiMain(QMainWindow):
 
     @pyqtSlot()
     @pyqtSlot(int)
-    def showProjectSettingsDialog(self, focusTab: int = GuiProjectSettings.PAGE_SETTINGS) -> None:
+    def showProjectSettingsDialog(self, focusTab: int | None = None) -> None:
         """Open the project settings dialog."""
         if SHARED.hasProject:
+            from novelwriter.dialogs.projectsettings import GuiProjectSettings
+            if focusTab is None:
+                focusTab = GuiProjectSettings.PAGE_SETTINGS
             dialog = GuiProjectSettings(self, gotoPage=focusTab)
             dialog.newProjectSettingsReady.connect(self._processProjectSettingsChanges)
             dialog.exec_()
@@ -822,6 +903,7 @@ class GuiMain(QMainWindow):
     def showNovelDetailsDialog(self) -> None:
         """Open the novel details dialog."""
         if SHARED.hasProject:
+            from novelwriter.tools.noveldetails import GuiNovelDetails
             dialog = GuiNovelDetails(self)
             dialog.setModal(True)
             dialog.show()
@@ -834,6 +916,7 @@ class GuiMain(QMainWindow):
     def showBuildManuscriptDialog(self) -> None:
         """Open the build manuscript dialog."""
         if SHARED.hasProject:
+            from novelwriter.tools.manuscript import GuiManuscript
             if (dialog := SHARED.findTopLevelWidget(GuiManuscript)) is None:
                 dialog = GuiManuscript(self)
             dialog.setModal(False)
@@ -847,6 +930,7 @@ class GuiMain(QMainWindow):
     def showProjectWordListDialog(self) -> None:
         """Open the project word list dialog."""
         if SHARED.hasProject:
+            from novelwriter.dialogs.wordlist import GuiWordList
             dialog = GuiWordList(self)
             dialog.newWordListReady.connect(self._processWordListChanges)
             dialog.exec_()
@@ -856,6 +940,7 @@ class GuiMain(QMainWindow):
     def showWritingStatsDialog(self) -> None:
         """Open the session stats dialog."""
         if SHARED.hasProject:
+            from novelwriter.tools.writingstats import GuiWritingStats
             if (dialog := SHARED.findTopLevelWidget(GuiWritingStats)) is None:
                 dialog = GuiWritingStats(self)
             dialog.setModal(False)
@@ -868,6 +953,7 @@ class GuiMain(QMainWindow):
     @pyqtSlot()
     def showAboutNWDialog(self) -> None:
         """Show the novelWriter about dialog."""
+        from novelwriter.dialogs.about import GuiAbout
         dialog = GuiAbout(self)
         dialog.setModal(True)
         dialog.show()
@@ -876,6 +962,25 @@ class GuiMain(QMainWindow):
         dialog.populateGUI()
         return
 
+    @pyqtSlot()
+    def showPerformanceDialog(self) -> None:
+        """Show the hidden performance dialog."""
+        from novelwriter.dialogs.performance import GuiPerformance
+        dialog = GuiPerformance(self)
+        dialog.populateGUI()
+        dialog.show()
+        dialog.raise_()
+        return
+
+    @pyqtSlot()
+    def dumpMemoryReport(self) -> None:
+        """Write the memory report to the user data folder."""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        reportFile = CONFIG.dataPath() / f"memory_{stamp}.json"
+        if MEMORY.writeReport(reportFile):
+            SHARED.newStatusMessage(f"Memory report written to: {reportFile}")
+        return
+
     @pyqtSlot()
     def showAboutQtDialog(self) -> None:
         """Show the Qt about dialog."""
@@ -886,6 +991,7 @@ class GuiMain(QMainWindow):
     @pyqtSlot()
     def showDictionariesDialog(self) -> None:
         """Show the download dictionaries dialog."""
+        from novelwriter.tools.dictionaries import GuiDictionaries
         dialog = GuiDictionaries(self)
         dialog.setModal(True)
         dialog.show()
@@ -938,6 +1044,7 @@ class GuiMain(QMainWindow):
 
         CONFIG.saveConfig()
         self.reportConfErr()
+        TIMINGS.writeReport()
 
         qApp.quit()
 
@@ -1253,6 +1360,58 @@ class GuiMain(QMainWindow):
 
         return
 
+    @pyqtSlot(list)
+    def _documentsChangedOnDisk(self, handles: list[str]) -> None:
+        """Process documents that were changed outside of novelWriter.
+        Project documents are queued for re-indexing, and if the open
+        document is among them, the user is asked to reload it.
+        """
+        if not SHARED.hasProject:
+            return
+
+        for tHandle in handles:
+            if tHandle not in SHARED.project.tree:
+                logger.warning("Ignoring unknown file changed on disk: %s.nwd", tHandle)
+            elif tHandle not in self._reindexQueue:
+                self._reindexQueue.append(tHandle)
+
+        if self._reindexQueue:
+            self.reindexTimer.start()
+
+        if self.docEditor.docHandle in handles:
+            docChanged = self.docEditor.docChanged
+            if SHARED.question(
+                self.tr(
+                    "The document open in the editor has been changed outside of "
+                    "novelWriter. Do you want to reload it?"
+                ),
+                info=self.tr("Unsaved changes in the editor will be lost.") if docChanged else "",
+                warn=docChanged
+            ):
+                self.docEditor.reloadText()
+
+        return
+
+    @pyqtSlot()
+    def _processReindexQueue(self) -> None:
+        """Re-index one queued document per timer event, so that the
+        GUI remains responsive when many documents have changed.
+        """
+        if self._reindexQueue and SHARED.hasProject:
+            tHandle = self._reindexQueue.pop(0)
+            SHARED.project.index.reIndexHandle(tHandle)
+            if not self._reindexQueue:
+                self.novelView.refreshTree()
+                self._updateStatusWordCount()
+                self.docEditor.updateTagHighLighting()
+        else:
+            self._reindexQueue.clear()
+
+        if not self._reindexQueue:
+            self.reindexTimer.stop()
+
+        return
+
     @pyqtSlot()
     def _keyPressReturn(self) -> None:
         """Forward the return/enter keypress to the function that opens
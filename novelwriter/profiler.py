@@ -0,0 +1,576 @@
+"""
+novelWriter – Performance Profiler
+==================================
+
+File History:
+Created: 2024-03-20 [2.4b1] NWProfiler
+Created: 2024-03-20 [2.4b1] NWTimings
+Created: 2024-03-20 [2.4b1] NWMemory
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import sys
+import json
+import logging
+import tracemalloc
+
+from enum import Enum
+from time import perf_counter
+from types import FunctionType, MethodType, ModuleType
+from typing import Any, Callable, TypeVar
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+
+from PyQt5.QtGui import QIcon, QImage, QPixmap, QTextDocument
+from PyQt5.QtCore import QObject
+from PyQt5.QtWidgets import QApplication
+
+from novelwriter.error import logException
+
+logger = logging.getLogger(__name__)
+
+_Func = TypeVar("_Func", bound=Callable[..., Any])
+
+
+class NWProfiler:
+    """Performance Profiler
+
+    Records a profile of selected operations when novelWriter is started
+    with the --profile option. Each operation is written to its own
+    .pstats file in the profile folder, and a summary of all operations
+    in the session is written to a JSON file in the same folder. The
+    summary is updated after each operation, so it is complete even if
+    the application does not exit cleanly.
+
+    Only one operation is profiled at a time. An operation started while
+    another is being profiled is included in the outer one.
+    """
+
+    def __init__(self) -> None:
+        self._path: Path | None = None
+        self._session = ""
+        self._active = False
+        self._operations: list[dict] = []
+        return
+
+    ##
+    #  Properties
+    ##
+
+    @property
+    def isEnabled(self) -> bool:
+        """Check if profiling is enabled."""
+        return self._path is not None
+
+    @property
+    def summaryFile(self) -> Path | None:
+        """Return the path to the summary file, if profiling."""
+        if self._path is None:
+            return None
+        return self._path / f"{self._session}_summary.json"
+
+    ##
+    #  Methods
+    ##
+
+    def enable(self, path: str | Path) -> bool:
+        """Enable profiling, and write the results to a given folder.
+        The folder is created if it doesn't exist.
+        """
+        try:
+            profPath = Path(path).expanduser().resolve()
+            profPath.mkdir(parents=True, exist_ok=True)
+        except Exception:
+            logger.error("Could not create profile folder: %s", path)
+            logException()
+            return False
+
+        self._path = profPath
+        self._session = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._operations = []
+        logger.info("Writing profiling data to: %s", profPath)
+
+        return True
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        """Profile the code inside a with statement as a named
+        operation. Does nothing if profiling is not enabled.
+        """
+        if self._path is None or self._active:
+            yield
+            return
+
+        import cProfile
+
+        profile = cProfile.Profile()
+        self._active = True
+        tStart = perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = False
+            self._record(name, profile, perf_counter() - tStart)
+
+        return
+
+    def profiled(self, name: str) -> Callable[[_Func], _Func]:
+        """Decorator for profiling every call to a function or method
+        as a named operation.
+        """
+        def decorator(func: _Func) -> _Func:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.profile(name):
+                    return func(*args, **kwargs)
+            return wrapper  # type: ignore
+        return decorator
+
+    ##
+    #  Internal Functions
+    ##
+
+    def _record(self, name: str, profile: object, elapsed: float) -> None:
+        """Write the profile of an operation, and update the summary."""
+        import pstats
+
+        from novelwriter import __version__
+
+        if self._path is None:
+            return
+
+        number = len(self._operations) + 1
+        statsFile = self._path / f"{self._session}_{number:03d}_{name}.pstats"
+        try:
+            stats = pstats.Stats(profile)  # type: ignore
+            stats.dump_stats(statsFile)
+            self._operations.append({
+                "operation": name,
+                "file": statsFile.name,
+                "seconds": round(elapsed, 6),
+                "calls": stats.total_calls,  # type: ignore
+            })
+            with open(self.summaryFile, mode="w", encoding="utf-8") as fObj:  # type: ignore
+                json.dump({
+                    "novelWriter": __version__,
+                    "python": sys.version.split()[0],
+                    "platform": sys.platform,
+                    "session": self._session,
+                    "operations": self._operations,
+                }, fObj, indent=2)
+        except Exception:
+            logger.error("Could not write profiling data for '%s'", name)
+            logException()
+            return
+
+        logger.info("Profiled '%s' in %.3f s", name, elapsed)
+
+        return
+
+# END Class NWProfiler
+
+
+class NWTimings:
+    """Timing Registry
+
+    Records the number of calls, the total time and the distribution
+    of call times for named hot-path operations, like "index.scan" or
+    "highlight.block". Operations are timed with the timer context
+    manager or the timed decorator. Both do no timing when recording is
+    disabled, which is the default.
+
+    The percentiles are computed from the most recent calls only, as
+    some operations are called for every text block and keeping all
+    samples would grow without bounds. The count, total, min and max
+    values cover all calls.
+    """
+
+    MAX_SAMPLES = 10000
+
+    def __init__(self) -> None:
+        self._enabled = False
+        self._reportFile: Path | None = None
+        self._data: dict[str, _TimingData] = {}
+        return
+
+    ##
+    #  Properties
+    ##
+
+    @property
+    def isEnabled(self) -> bool:
+        """Check if timing is enabled."""
+        return self._enabled
+
+    @property
+    def reportFile(self) -> Path | None:
+        """Return the path to the JSON report written on exit, if any."""
+        return self._reportFile
+
+    ##
+    #  Methods
+    ##
+
+    def enable(self, reportFile: str | Path | None = None) -> None:
+        """Enable timing. If a report file is given, the timings are
+        written to it by writeReport.
+        """
+        self._enabled = True
+        if reportFile:
+            self._reportFile = Path(reportFile).expanduser().resolve()
+            logger.info("Writing timing data to: %s", self._reportFile)
+        return
+
+    def reset(self) -> None:
+        """Clear all recorded timings."""
+        self._data = {}
+        return
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a single call of a named operation."""
+        if data := self._data.get(name):
+            data.add(seconds)
+        else:
+            self._data[name] = _TimingData(seconds, self.MAX_SAMPLES)
+        return
+
+    def timer(self, name: str) -> _Timer | nullcontext:
+        """Return a context manager that times the code inside a with
+        statement as a named operation.
+        """
+        if self._enabled:
+            return _Timer(self, name)
+        return _NULL_TIMER
+
+    def timed(self, name: str) -> Callable[[_Func], _Func]:
+        """Decorator for timing every call to a function or method as
+        a named operation.
+        """
+        def decorator(func: _Func) -> _Func:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self._enabled:
+                    return func(*args, **kwargs)
+                tStart = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add(name, perf_counter() - tStart)
+            return wrapper  # type: ignore
+        return decorator
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return the timing statistics of all operations, sorted by
+        name. All times are in milliseconds.
+        """
+        return {name: self._data[name].summary() for name in sorted(self._data)}
+
+    def writeReport(self) -> bool:
+        """Write the timing statistics to the report file as JSON."""
+        if self._reportFile is None:
+            return False
+
+        from novelwriter import __version__
+
+        try:
+            with open(self._reportFile, mode="w", encoding="utf-8") as fObj:
+                json.dump({
+                    "novelWriter": __version__,
+                    "python": sys.version.split()[0],
+                    "platform": sys.platform,
+                    "unit": "ms",
+                    "operations": self.summary(),
+                }, fObj, indent=2)
+        except Exception:
+            logger.error("Could not write timing data: %s", self._reportFile)
+            logException()
+            return False
+
+        logger.info("Wrote timing data for %d operations", len(self._data))
+
+        return True
+
+# END Class NWTimings
+
+
+class _TimingData:
+
+    __slots__ = ("count", "total", "min", "max", "samples")
+
+    def __init__(self, seconds: float, maxSamples: int) -> None:
+        self.count = 1
+        self.total = seconds
+        self.min = seconds
+        self.max = seconds
+        self.samples: deque[float] = deque([seconds], maxlen=maxSamples)
+        return
+
+    def add(self, seconds: float) -> None:
+        """Add a call to the statistics."""
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+        return
+
+    def summary(self) -> dict[str, float]:
+        """Return the statistics in milliseconds."""
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            "count": self.count,
+            "total": 1000.0*self.total,
+            "mean": 1000.0*self.total/self.count,
+            "min": 1000.0*self.min,
+            "p50": 1000.0*ordered[round(0.50*last)],
+            "p90": 1000.0*ordered[round(0.90*last)],
+            "p99": 1000.0*ordered[round(0.99*last)],
+            "max": 1000.0*self.max,
+        }
+
+# END Class _TimingData
+
+
+class _Timer:
+
+    __slots__ = ("_timings", "_name", "_start")
+
+    def __init__(self, timings: NWTimings, name: str) -> None:
+        self._timings = timings
+        self._name = name
+        self._start = 0.0
+        return
+
+    def __enter__(self) -> None:
+        self._start = perf_counter()
+        return
+
+    def __exit__(self, *args: Any) -> None:
+        self._timings.add(self._name, perf_counter() - self._start)
+        return
+
+# END Class _Timer
+
+
+_NULL_TIMER = nullcontext()
+
+
+class NWMemory:
+    """Memory Accounting
+
+    Attributes memory usage to the parts of novelWriter. The report
+    combines two sources of information. Tracemalloc snapshots give
+    the memory allocated by Python code, grouped by module, and the
+    growth since tracing started, which is useful for finding leaks.
+    Size estimators, added with addSource, give the memory held by
+    named subsystems like the project tree or the index, including the
+    text held by Qt documents.
+
+    Tracing is started by the --meminfo command line option. Without
+    it, the report only contains the estimates.
+    """
+
+    MAX_MODULES = 25
+    MAX_GROWTH = 25
+
+    def __init__(self) -> None:
+        self._sources: dict[str, Callable[[], int]] = {}
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._mode = "Off"
+        return
+
+    ##
+    #  Properties
+    ##
+
+    @property
+    def tracingMode(self) -> str:
+        """Return the tracing mode. It is "Total" if tracing was on
+        when novelWriter started, "Relative" if it was started later,
+        and "Off" if not tracing.
+        """
+        return self._mode if tracemalloc.is_tracing() else "Off"
+
+    ##
+    #  Methods
+    ##
+
+    def start(self) -> None:
+        """Start tracing memory allocations, unless already tracing."""
+        if self._baseline is not None and tracemalloc.is_tracing():
+            return
+        if tracemalloc.is_tracing():
+            self._mode = "Total"
+        else:
+            self._mode = "Relative"
+            tracemalloc.start()
+        self._baseline = tracemalloc.take_snapshot()
+        logger.info("Tracing memory allocations (%s)", self._mode)
+        return
+
+    def addSource(self, name: str, func: Callable[[], int]) -> None:
+        """Add a named size estimator to the report."""
+        self._sources[name] = func
+        return
+
+    def removeSource(self, name: str) -> None:
+        """Remove a named size estimator from the report."""
+        self._sources.pop(name, None)
+        return
+
+    def report(self) -> dict:
+        """Build the memory report. Sizes are in bytes."""
+        from novelwriter import __version__
+
+        subsystems = {}
+        for name in sorted(self._sources):
+            try:
+                subsystems[name] = self._sources[name]()
+            except Exception:
+                logger.error("Could not estimate memory of '%s'", name)
+                logException()
+
+        traced = {}
+        modules = {}
+        growth = []
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            traced = {"current": current, "peak": peak}
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(True, str(_PKG_DIR / "*")),
+            ])
+            sizes: Counter[str] = Counter()
+            for stat in snapshot.statistics("filename"):
+                sizes[_moduleName(stat.traceback[0].filename)] += stat.size
+            modules = dict(sizes.most_common(self.MAX_MODULES))
+            if self._baseline is not None:
+                for diff in snapshot.compare_to(self._baseline, "lineno"):
+                    if len(growth) >= self.MAX_GROWTH or diff.size_diff <= 0:
+                        break
+                    frame = diff.traceback[0]
+                    growth.append({
+                        "location": f"{_moduleName(frame.filename)}:{frame.lineno}",
+                        "size": diff.size_diff,
+                        "count": diff.count_diff,
+                    })
+
+        widgets = {}
+        if QApplication.instance():
+            counts = Counter(type(w).__name__ for w in QApplication.allWidgets())
+            widgets = dict(sorted(counts.items()))
+
+        return {
+            "novelWriter": __version__,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "tracing": self.tracingMode,
+            "traced": traced,
+            "subsystems": subsystems,
+            "modules": modules,
+            "growth": growth,
+            "widgets": widgets,
+        }
+
+    def writeReport(self, path: str | Path) -> bool:
+        """Write the memory report to a JSON file."""
+        try:
+            with open(path, mode="w", encoding="utf-8") as fObj:
+                json.dump(self.report(), fObj, indent=2)
+        except Exception:
+            logger.error("Could not write memory report: %s", path)
+            logException()
+            return False
+
+        logger.info("Wrote memory report: %s", path)
+
+        return True
+
+# END Class NWMemory
+
+
+def estimateSize(obj: object, exclude: Iterable[object] = ()) -> int:
+    """Estimate the memory held by an object and everything it
+    references, in bytes. Objects in exclude are not followed, which
+    is used to cut references back to a parent object. Classes,
+    functions, modules and enums are shared, and are not counted. For
+    Qt objects, only the data of documents and images is counted.
+    """
+    seen = {id(x) for x in exclude}
+    stack = [obj]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, _SHARED_TYPES):
+            continue
+        if isinstance(item, QObject):
+            if isinstance(item, QTextDocument):
+                size += 2*item.characterCount()
+            continue
+        if isinstance(item, (QPixmap, QImage)):
+            size += item.width()*item.height()*item.depth()//8
+            continue
+        if isinstance(item, QIcon):
+            size += sum(4*s.width()*s.height() for s in item.availableSizes())
+            continue
+
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif not isinstance(item, (str, bytes, int, float)):
+            if hasattr(item, "__dict__"):
+                stack.append(item.__dict__)
+            for cls in type(item).__mro__:
+                slots = cls.__dict__.get("__slots__", ())
+                for slot in (slots,) if isinstance(slots, str) else slots:
+                    if hasattr(item, slot):
+                        stack.append(getattr(item, slot))
+
+    return size
+
+
+def _moduleName(filename: str) -> str:
+    """Convert a source file path to a module name, if it is in the
+    novelwriter package.
+    """
+    path = Path(filename)
+    try:
+        relPath = path.with_suffix("").relative_to(_PKG_DIR.parent)
+    except ValueError:
+        return filename
+    return ".".join(relPath.parts)
+
+
+_PKG_DIR = Path(__file__).parent
+_SHARED_TYPES = (type, FunctionType, MethodType, ModuleType, Enum)
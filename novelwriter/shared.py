@@ -61,6 +61,7 @@ class SharedData(QObject):
     indexChangedTags = pyqtSignal(list, list)
     indexCleared = pyqtSignal()
     indexAvailable = pyqtSignal()
+    documentsChangedOnDisk = pyqtSignal(list)
 
     def __init__(self) -> None:
         super().__init__()
@@ -147,14 +148,15 @@ class SharedData(QObject):
         logger.debug("Thread Pool Max Count: %d", QThreadPool.globalInstance().maxThreadCount())
         return
 
-    def openProject(self, path: str | Path, clearLock: bool = False) -> bool:
+    def openProject(self, path: str | Path, clearLock: bool = False,
+                    lazy: bool = False) -> bool:
         """Open a project."""
         if self.project.isValid:
             logger.error("A project is already open")
             return False
 
         self._lockedBy = None
-        status = self.project.openProject(path, clearLock=clearLock)
+        status = self.project.openProject(path, clearLock=clearLock, lazy=lazy)
         if status is False:
             # We must cache the lock status before resetting the project
             self._lockedBy = self.project.lockStatus
@@ -214,6 +216,14 @@ class SharedData(QObject):
         self.projectStatusChanged.emit(state)
         return
 
+    def notifyChangedDocuments(self, handles: list[str]) -> None:
+        """Report documents that have changed on disk outside of
+        novelWriter. This is a callable function for core classes that
+        cannot emit signals on their own.
+        """
+        self.documentsChangedOnDisk.emit(handles)
+        return
+
     def runInThreadPool(self, runnable: QRunnable, priority: int = 0) -> None:
         """Queue a runnable in the application thread pool."""
         QThreadPool.globalInstance().start(runnable, priority=priority)
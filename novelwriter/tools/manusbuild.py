@@ -23,6 +23,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import os
 import logging
 
 from pathlib import Path
@@ -35,7 +36,7 @@ from PyQt5.QtWidgets import (
     QPushButton, QSplitter, QVBoxLayout, QWidget
 )
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, PROFILER, SHARED
 from novelwriter.enum import nwBuildFmt
 from novelwriter.common import makeFileNameSafe, openExternalPath
 from novelwriter.constants import nwLabels
@@ -321,11 +322,14 @@ class GuiManuscriptBuild(QDialog):
                 return False
 
         docBuild = NWBuildDocument(SHARED.project, self._build)
+        docBuild.setWorkers(os.cpu_count() or 1)
+        docBuild.setStreaming(True)
         docBuild.queueAll()
 
         self.buildProgress.setMaximum(len(docBuild))
-        for i, _ in docBuild.iterBuild(buildPath, bFormat):
-            self.buildProgress.setValue(i+1)
+        with PROFILER.profile("buildManuscript"):
+            for i, _ in docBuild.iterBuild(buildPath, bFormat):
+                self.buildProgress.setValue(i+1)
 
         self._build.setLastPath(bPath)
         self._build.setLastBuildName(bName)
@@ -23,6 +23,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import os
 import json
 import logging
 
@@ -39,9 +40,10 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtPrintSupport import QPrintPreviewDialog, QPrinter
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, MEMORY, PROFILER, SHARED
 from novelwriter.error import logException
 from novelwriter.common import checkInt, fuzzyTime
+from novelwriter.profiler import estimateSize
 from novelwriter.core.tohtml import ToHtml
 from novelwriter.core.docbuild import NWBuildDocument
 from novelwriter.core.tokenizer import HeadingFormatter
@@ -185,6 +187,7 @@ class GuiManuscript(QDialog):
         # ============
 
         self.docPreview = _PreviewWidget(self)
+        MEMORY.addSource("build.preview", self._previewMemory)
 
         self.controlBox = QVBoxLayout()
         self.controlBox.addLayout(self.listToolBox, 0)
@@ -261,6 +264,7 @@ class GuiManuscript(QDialog):
         dialog open.
         """
         self._saveSettings()
+        MEMORY.removeSource("build.preview")
         for obj in self.mainGui.children():
             # Make sure we don't have any settings windows open
             if isinstance(obj, GuiBuildSettings) and obj.isVisible():
@@ -328,12 +332,14 @@ class GuiManuscript(QDialog):
             return
 
         docBuild = NWBuildDocument(SHARED.project, build)
+        docBuild.setWorkers(os.cpu_count() or 1)
         docBuild.queueAll()
 
         self.docPreview.beginNewBuild(len(docBuild))
-        for step, _ in docBuild.iterBuildHTML(None):
-            self.docPreview.buildStep(step + 1)
-            qApp.processEvents()
+        with PROFILER.profile("buildPreview"):
+            for step, _ in docBuild.iterBuildHTML(None):
+                self.docPreview.buildStep(step + 1)
+                qApp.processEvents()
 
         buildObj = docBuild.lastBuild
         assert isinstance(buildObj, ToHtml)
@@ -409,6 +415,10 @@ class GuiManuscript(QDialog):
                 return build
         return None
 
+    def _previewMemory(self) -> int:
+        """Estimate the memory used by the preview document."""
+        return estimateSize(self.docPreview.document())
+
     def _saveSettings(self) -> None:
         """Save the user GUI settings."""
         buildOrder = []
@@ -765,14 +775,11 @@ class _PreviewWidget(QTextBrowser):
         self.document().setDefaultStyleSheet(styles)
 
         html = "".join(data.get("html", []))
-        html = html.replace("\t", "!!tab!!")
+        html = html.replace("\t", ToHtml.PRE_TAB)
         html = html.replace("<del>", "<span style='text-decoration: line-through;'>")
         html = html.replace("</del>", "</span>")
         self.setHtml(html)
         qApp.processEvents()
-        while self.find("!!tab!!"):
-            cursor = self.textCursor()
-            cursor.insertText("\t")
 
         self.verticalScrollBar().setValue(sPos)
         self._docTime = checkInt(data.get("time"), 0)
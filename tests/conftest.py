@@ -69,6 +69,8 @@ def sessionFixture():
         shutil.rmtree(_TMP_ROOT)
     _TMP_ROOT.mkdir()
     _TMP_CONF.mkdir()
+    yield
+    shutil.rmtree(_TMP_CONF / "cache", ignore_errors=True)
     return
 
 
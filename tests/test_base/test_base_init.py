@@ -20,9 +20,13 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import os
 import sys
 import pytest
 import logging
+import subprocess
+
+from textwrap import dedent
 
 from mocked import MockGuiMain
 
@@ -170,3 +174,67 @@ def testBaseInit_Imports(caplog, monkeypatch, fncPath):
     assert "At least PyQt5" in caplog.messages[2]
 
 # END Test testBaseInit_Imports
+
+
+@pytest.mark.base
+def testBaseInit_StartupTime(record_property, fncPath):
+    """Benchmark the start-up of the main GUI in a fresh process, and
+    check that the dialogs, tools and document exporters are not
+    imported before the main window is first painted.
+    """
+    script = dedent(f"""
+        import sys, time
+        tStart = time.perf_counter()
+        from PyQt5.QtCore import QEvent, QObject
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication([])
+        from novelwriter import main
+        nwGUI = main(["--testmode", "--config={fncPath}", "--data={fncPath}"])
+
+        class PaintFilter(QObject):
+            tPaint = 0.0
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Type.Paint and not self.tPaint:
+                    self.tPaint = time.perf_counter()
+                return False
+
+        paintFilter = PaintFilter()
+        app.installEventFilter(paintFilter)
+        nwGUI.show()
+        while not paintFilter.tPaint and time.perf_counter() - tStart < 30.0:
+            app.processEvents()
+        print("PAINT", paintFilter.tPaint - tStart)
+        print("MODULES", " ".join(sys.modules))
+    """)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True, text=True, env=env, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    output = dict(line.split(" ", 1) for line in result.stdout.splitlines() if " " in line)
+    tPaint = float(output["PAINT"])
+    modules = set(output["MODULES"].split())
+
+    # The cumulative import time in microseconds
+    tImport = 0
+    for line in result.stderr.splitlines():
+        if line.endswith("| novelwriter.guimain"):
+            tImport = int(line.split("|")[1])
+
+    record_property("importTime", tImport/1e6)
+    record_property("paintTime", tPaint)
+    assert 0 < tImport < 5000000
+    assert 0.0 < tPaint < 10.0
+    assert "novelwriter.guimain" in modules
+    for module in [
+        "novelwriter.core.docbuild", "novelwriter.core.tohtml", "novelwriter.core.toodt",
+        "novelwriter.core.tomd", "novelwriter.core.tokenizer", "novelwriter.dialogs.about",
+        "novelwriter.dialogs.preferences", "novelwriter.dialogs.projectsettings",
+        "novelwriter.tools.manuscript", "novelwriter.tools.welcome", "novelwriter.tools.lipsum",
+        "enchant", "urllib.request",
+    ]:
+        assert module not in modules
+
+# END Test testBaseInit_StartupTime
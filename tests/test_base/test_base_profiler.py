@@ -0,0 +1,303 @@
+"""
+novelWriter – Profiler Tester
+=============================
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import sys
+import json
+import pstats
+import pytest
+import tracemalloc
+
+from PyQt5.QtGui import QPixmap, QTextDocument
+
+from mocked import MockGuiMain, causeOSError
+
+from novelwriter import main
+from novelwriter.profiler import NWMemory, NWProfiler, NWTimings, estimateSize
+
+
+@pytest.mark.base
+def testBaseProfiler_Profile(monkeypatch, caplog, fncPath):
+    """Test profiling operations."""
+    profiler = NWProfiler()
+    profPath = fncPath / "profile"
+
+    # Nothing is recorded when disabled
+    assert profiler.isEnabled is False
+    assert profiler.summaryFile is None
+    with profiler.profile("nothing"):
+        sum(range(10))
+    assert not profPath.exists()
+
+    # Failing to create the folder
+    with monkeypatch.context() as mp:
+        mp.setattr("pathlib.Path.mkdir", causeOSError)
+        assert profiler.enable(profPath) is False
+        assert profiler.isEnabled is False
+
+    assert profiler.enable(profPath) is True
+    assert profiler.isEnabled is True
+    assert profPath.is_dir()
+
+    # Operations and decorated functions are profiled, while nested
+    # operations are included in the outer operation
+    @profiler.profiled("decorated")
+    def work(n: int) -> int:
+        with profiler.profile("nested"):
+            return sum(range(n))
+
+    with profiler.profile("first"):
+        sum(range(1000))
+    assert work(1000) == 499500
+
+    summaryFile = profiler.summaryFile
+    assert summaryFile is not None
+    summary = json.loads(summaryFile.read_text(encoding="utf-8"))
+    operations = summary["operations"]
+    assert [op["operation"] for op in operations] == ["first", "decorated"]
+    assert operations[0]["file"].endswith("_001_first.pstats")
+    assert operations[1]["file"].endswith("_002_decorated.pstats")
+    assert operations[1]["calls"] > 0
+
+    stats = pstats.Stats(str(profPath / operations[1]["file"]))
+    assert any(func[2] == "work" for func in stats.stats)  # type: ignore
+
+    # Exceptions are passed on after recording
+    with pytest.raises(ValueError):
+        with profiler.profile("failed"):
+            raise ValueError("Oops")
+    summary = json.loads(summaryFile.read_text(encoding="utf-8"))
+    assert summary["operations"][-1]["operation"] == "failed"
+
+    # Failing to write the data
+    caplog.clear()
+    with monkeypatch.context() as mp:
+        mp.setattr("pstats.Stats.dump_stats", causeOSError)
+        with profiler.profile("broken"):
+            pass
+    assert "Could not write profiling data for 'broken'" in caplog.text
+    assert len(json.loads(summaryFile.read_text(encoding="utf-8"))["operations"]) == 3
+
+# END Test testBaseProfiler_Profile
+
+
+@pytest.mark.base
+def testBaseProfiler_Launch(monkeypatch, fncPath):
+    """Test enabling profiling from the command line."""
+    profiler = NWProfiler()
+    profPath = fncPath / "profile"
+    monkeypatch.setattr("novelwriter.PROFILER", profiler)
+    monkeypatch.setattr("novelwriter.guimain.GuiMain", MockGuiMain)
+
+    nwGUI = main([
+        "--testmode", f"--config={fncPath}", f"--data={fncPath}", f"--profile={profPath}"
+    ])
+    assert isinstance(nwGUI, MockGuiMain)
+    assert profiler.isEnabled is True
+    assert profiler.summaryFile is not None
+
+    summary = json.loads(profiler.summaryFile.read_text(encoding="utf-8"))
+    assert summary["operations"][0]["operation"] == "startup"
+    assert (profPath / summary["operations"][0]["file"]).is_file()
+
+# END Test testBaseProfiler_Launch
+
+
+@pytest.mark.base
+def testBaseProfiler_Timings(monkeypatch, caplog, fncPath):
+    """Test the timings registry."""
+    timings = NWTimings()
+    reportFile = fncPath / "timings.json"
+
+    @timings.timed("func")
+    def work(n: int) -> int:
+        return sum(range(n))
+
+    # Nothing is recorded when disabled
+    assert timings.isEnabled is False
+    assert work(10) == 45
+    with timings.timer("block"):
+        work(10)
+    assert timings.summary() == {}
+    assert timings.writeReport() is False
+
+    # Record timings
+    timings.enable(reportFile)
+    assert timings.isEnabled is True
+    assert timings.reportFile == reportFile
+    for i in range(100):
+        assert work(i) == i*(i - 1)//2
+    with timings.timer("block"):
+        sum(range(10))
+
+    summary = timings.summary()
+    assert list(summary.keys()) == ["block", "func"]
+    assert summary["block"]["count"] == 1
+    assert summary["func"]["count"] == 100
+    func = summary["func"]
+    assert func["min"] <= func["p50"] <= func["p90"] <= func["p99"] <= func["max"]
+    assert func["mean"] == pytest.approx(func["total"]/100)
+
+    # Percentiles are computed from the most recent calls
+    timings.reset()
+    assert timings.summary() == {}
+    for i in range(timings.MAX_SAMPLES):
+        timings.add("many", 1.0)
+    for i in range(timings.MAX_SAMPLES):
+        timings.add("many", 2.0)
+    timings.add("many", 3.0)
+    many = timings.summary()["many"]
+    assert many["count"] == 2*timings.MAX_SAMPLES + 1
+    assert many["min"] == 1000.0
+    assert many["p50"] == 2000.0
+    assert many["max"] == 3000.0
+
+    # Write report
+    assert timings.writeReport() is True
+    report = json.loads(reportFile.read_text(encoding="utf-8"))
+    assert report["unit"] == "ms"
+    assert report["operations"]["many"]["count"] == 2*timings.MAX_SAMPLES + 1
+
+    caplog.clear()
+    with monkeypatch.context() as mp:
+        mp.setattr("builtins.open", causeOSError)
+        assert timings.writeReport() is False
+    assert "Could not write timing data" in caplog.text
+
+    # Enable from the command line
+    timings = NWTimings()
+    monkeypatch.setattr("novelwriter.TIMINGS", timings)
+    monkeypatch.setattr("novelwriter.guimain.GuiMain", MockGuiMain)
+    main([
+        "--testmode", f"--config={fncPath}", f"--data={fncPath}", f"--timings={reportFile}"
+    ])
+    assert timings.isEnabled is True
+    assert timings.reportFile == reportFile
+
+# END Test testBaseProfiler_Timings
+
+
+@pytest.mark.base
+def testBaseProfiler_EstimateSize(qtbot):
+    """Test the memory size estimator."""
+    class Slotted:
+        __slots__ = ("a", "b")
+
+    class Parent:
+        def __init__(self) -> None:
+            self.child = Child(self)
+
+    class Child:
+        def __init__(self, parent: Parent) -> None:
+            self.parent = parent
+            self.data = "x"*10000
+
+    # Containers
+    assert estimateSize([]) < estimateSize(["a"*100]) < estimateSize(["a"*100, "b"*100])
+    assert estimateSize({"a": "x"*1000}) > 1000
+    shared = "y"*1000
+    assert estimateSize([shared, shared]) < estimateSize([shared, "z"*1000])
+
+    # Slots and objects
+    obj = Slotted()
+    obj.a = "x"*1000
+    assert estimateSize(obj) > 1000
+    parent = Parent()
+    assert estimateSize(parent) > 10000
+    assert estimateSize(parent.child, exclude=(parent,)) > 10000
+    assert estimateSize(parent, exclude=(parent.child,)) < 1000
+
+    # Shared objects are not counted
+    shared = [Slotted, estimateSize, pytest]
+    assert estimateSize(shared) == sys.getsizeof(shared)
+
+    # Qt objects
+    doc = QTextDocument()
+    doc.setPlainText("x"*1000)
+    assert estimateSize(doc) == 2*doc.characterCount()
+    assert estimateSize(QPixmap(10, 10)) == 100*QPixmap(10, 10).depth()//8
+
+# END Test testBaseProfiler_EstimateSize
+
+
+@pytest.mark.base
+def testBaseProfiler_Memory(monkeypatch, caplog, fncPath):
+    """Test the memory report."""
+    wasTracing = tracemalloc.is_tracing()
+    if wasTracing:
+        tracemalloc.stop()
+
+    memory = NWMemory()
+    data = {"a": "x"*10000}
+    memory.addSource("data", lambda: estimateSize(data))
+    memory.addSource("broken", lambda: 1//0)
+    memory.addSource("removed", lambda: 0)
+    memory.removeSource("removed")
+
+    # Not tracing
+    caplog.clear()
+    report = memory.report()
+    assert report["tracing"] == "Off"
+    assert report["traced"] == {}
+    assert report["modules"] == {}
+    assert report["subsystems"]["data"] > 10000
+    assert "broken" not in report["subsystems"]
+    assert "removed" not in report["subsystems"]
+    assert "Could not estimate memory of 'broken'" in caplog.text
+
+    # Tracing
+    memory.start()
+    assert memory.tracingMode == "Relative"
+    timings = NWTimings()
+    for i in range(1000):
+        timings.add(f"operation{i}", 1.0)
+
+    report = memory.report()
+    assert report["tracing"] == "Relative"
+    assert report["traced"]["current"] > 0
+    assert report["modules"]["novelwriter.profiler"] > 0
+    assert report["growth"][0]["location"].startswith("novelwriter.profiler:")
+    assert report["growth"][0]["size"] > 0
+    tracemalloc.stop()
+    assert memory.tracingMode == "Off"
+
+    # Already tracing
+    tracemalloc.start()
+    memory = NWMemory()
+    memory.start()
+    assert memory.tracingMode == "Total"
+    tracemalloc.stop()
+
+    # Write report
+    reportFile = fncPath / "memory.json"
+    assert memory.writeReport(reportFile) is True
+    report = json.loads(reportFile.read_text(encoding="utf-8"))
+    assert report["tracing"] == "Off"
+
+    with monkeypatch.context() as mp:
+        mp.setattr("builtins.open", causeOSError)
+        assert memory.writeReport(reportFile) is False
+    assert "Could not write memory report" in caplog.text
+
+    if wasTracing:
+        tracemalloc.start()
+
+# END Test testBaseProfiler_Memory
@@ -292,7 +292,7 @@ def testCoreTools_DocDuplicator(mockGUI, fncPath, tstPaths, mockRnd):
     assert list(dup.duplicate([C.hSceneDoc])) == [
         ("0000000000010", C.hSceneDoc),  # The Scene
     ]
-    assert project.tree._order == [
+    assert project.tree.handles() == [
         C.hNovelRoot, C.hPlotRoot, C.hCharRoot, C.hWorldRoot,
         C.hTitlePage, C.hChapterDir, C.hChapterDoc, C.hSceneDoc,
         "0000000000010",
@@ -313,7 +313,7 @@ def testCoreTools_DocDuplicator(mockGUI, fncPath, tstPaths, mockRnd):
         ("0000000000012", None),           # The Chapter
         ("0000000000013", None),           # The Scene
     ]
-    assert project.tree._order == [
+    assert project.tree.handles() == [
         C.hNovelRoot, C.hPlotRoot, C.hCharRoot, C.hWorldRoot,
         C.hTitlePage, C.hChapterDir, C.hChapterDoc, C.hSceneDoc,
         "0000000000010",
@@ -344,7 +344,7 @@ def testCoreTools_DocDuplicator(mockGUI, fncPath, tstPaths, mockRnd):
         ("0000000000017", None),          # The Chapter
         ("0000000000018", None),          # The Scene
     ]
-    assert project.tree._order == [
+    assert project.tree.handles() == [
         C.hNovelRoot, C.hPlotRoot, C.hCharRoot, C.hWorldRoot,
         C.hTitlePage, C.hChapterDir, C.hChapterDoc, C.hSceneDoc,
         "0000000000010",
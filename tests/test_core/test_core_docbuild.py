@@ -22,8 +22,11 @@ from __future__ import annotations
 
 import json
 import pytest
+import tempfile
+import tracemalloc
 
 from shutil import copyfile
+from zipfile import ZipFile
 from pathlib import Path
 
 from tools import C, ODT_IGNORE, buildTestProject, cmpFiles
@@ -34,7 +37,8 @@ from novelwriter.core.tomd import ToMarkdown
 from novelwriter.core.toodt import ToOdt
 from novelwriter.core.tohtml import ToHtml
 from novelwriter.core.project import NWProject
-from novelwriter.core.docbuild import NWBuildDocument
+from novelwriter.core.tokenizer import Tokenizer
+from novelwriter.core.docbuild import NWBuildDocument, _TokenizePool
 from novelwriter.core.buildsettings import BuildSettings
 
 BUILD_CONF = {
@@ -422,7 +426,7 @@ def testCoreDocBuild_Custom(mockGUI, fncPath: Path):
 
     # Add an invalid item to the project
     nHandle = "0123456789def"
-    project.tree._order.append(nHandle)
+    project.tree._order[nHandle] = None
     project.tree._tree[nHandle] = None  # type: ignore
 
     docBuild.queueAll()
@@ -595,3 +599,345 @@ def testCoreDocBuild_IterBuild(mockGUI, fncPath: Path, mockRnd):
     docFile.unlink()
 
 # END Test testCoreDocBuild_IterBuild
+
+
+@pytest.mark.core
+def testCoreDocBuild_Parallel(monkeypatch, caplog, mockGUI, prjLipsum, fncPath):
+    """Test building with a process pool."""
+    project = NWProject()
+    project.openProject(prjLipsum)
+
+    build = BuildSettings()
+    build.unpack(BUILD_CONF)
+
+    def buildFile(workers: int, bFormat: nwBuildFmt, name: str) -> tuple[list, str]:
+        project.tokenCache.clear()
+        docBuild = NWBuildDocument(project, build)
+        docBuild.setWorkers(workers)
+        docBuild.queueAll()
+        docFile = fncPath / name
+        steps = list(docBuild.iterBuild(docFile, bFormat))
+        assert docBuild.error is None
+        return steps, docFile.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(NWBuildDocument, "POOL_MIN_TASKS", 1)
+
+    # The pool gives the same result as a serial build
+    for bFormat, name in [
+        (nwBuildFmt.FODT, "Lorem Ipsum.fodt"),
+        (nwBuildFmt.HTML, "Lorem Ipsum.htm"),
+        (nwBuildFmt.EXT_MD, "Lorem Ipsum.md"),
+        (nwBuildFmt.NWD, "Lorem Ipsum.txt"),
+    ]:
+        caplog.clear()
+        serial = buildFile(1, bFormat, name)
+        assert "processes" not in caplog.text
+        assert buildFile(4, bFormat, name) == serial
+        assert "Tokenized 15 documents in the process pool" in caplog.text
+
+    # Formats that share tokens only submit each document once
+    caplog.clear()
+    project.tokenCache.clear()
+    docBuild = NWBuildDocument(project, build)
+    docBuild.setWorkers(4)
+    docBuild.queueAll()
+    list(docBuild.iterBuildMulti([
+        (fncPath / "Multi.md", nwBuildFmt.STD_MD), (fncPath / "Multi.txt", nwBuildFmt.NWD)
+    ]))
+    assert "Tokenized 15 documents in the process pool" in caplog.text
+    assert (fncPath / "Multi.txt").read_text(encoding="utf-8") == serial[1]
+
+    # The documents are read a window ahead of the build
+    caplog.clear()
+    serial = buildFile(1, nwBuildFmt.HTML, "Lorem Ipsum.htm")
+    ahead = []
+    origQueue = _TokenizePool.queue
+
+    def queue(self, tHandle, text):
+        origQueue(self, tHandle, text)
+        ahead.append(self.ahead)
+
+    with monkeypatch.context() as mp:
+        mp.setattr(NWBuildDocument, "POOL_AHEAD", 3)
+        mp.setattr(_TokenizePool, "queue", queue)
+        assert buildFile(4, nwBuildFmt.HTML, "Lorem Ipsum.htm") == serial
+    assert max(ahead) == 3
+    assert "Tokenized 15 documents in the process pool" in caplog.text
+
+    # No pool is started if all documents are cached
+    caplog.clear()
+    docBuild = NWBuildDocument(project, build)
+    docBuild.setWorkers(4)
+    docBuild.queueAll()
+    list(docBuild.iterBuild(fncPath / "Lorem Ipsum.htm", nwBuildFmt.HTML))
+    assert (fncPath / "Lorem Ipsum.htm").read_text(encoding="utf-8") == serial[1]
+    assert "processes" not in caplog.text
+
+    # Too few documents to start a pool
+    caplog.clear()
+    serial = buildFile(1, nwBuildFmt.HTML, "Lorem Ipsum.htm")
+    monkeypatch.setattr(NWBuildDocument, "POOL_MIN_TASKS", 50)
+    assert buildFile(4, nwBuildFmt.HTML, "Lorem Ipsum.htm") == serial
+    assert "processes" not in caplog.text
+    monkeypatch.setattr(NWBuildDocument, "POOL_MIN_TASKS", 1)
+
+    # Failed tasks are tokenized in the build
+    caplog.clear()
+    with monkeypatch.context() as mp:
+        mp.setattr("novelwriter.core.docbuild.runTokenizeTask", causeException)
+        assert buildFile(2, nwBuildFmt.HTML, "Lorem Ipsum.htm") == serial
+    assert "Failed to tokenize" in caplog.text
+
+    # Failing to start the pool
+    caplog.clear()
+    with monkeypatch.context() as mp:
+        mp.setattr("novelwriter.core.docbuild.ProcessPoolExecutor", causeOSError)
+        assert buildFile(2, nwBuildFmt.HTML, "Lorem Ipsum.htm") == serial
+    assert "Failed to start the process pool" in caplog.text
+
+# END Test testCoreDocBuild_Parallel
+
+
+@pytest.mark.core
+def testCoreDocBuild_Streaming(monkeypatch, mockGUI, prjLipsum, fncPath):
+    """Test that streaming builds write the same files."""
+    project = NWProject()
+    project.openProject(prjLipsum)
+
+    build = BuildSettings()
+    build.unpack(BUILD_CONF)
+
+    monkeypatch.setattr("novelwriter.core.tokenizer.time", lambda: 1700000000.0)
+
+    def buildFile(streaming: bool, bFormat: nwBuildFmt, name: str) -> tuple[list, bytes]:
+        docBuild = NWBuildDocument(project, build)
+        docBuild.setStreaming(streaming)
+        docBuild.queueAll()
+        docFile = fncPath / name
+        steps = list(docBuild.iterBuild(docFile, bFormat))
+        assert docBuild.error is None
+        if bFormat == nwBuildFmt.ODT:
+            with ZipFile(docFile) as zipObj:
+                return steps, zipObj.read("content.xml") + zipObj.read("styles.xml")
+        elif bFormat == nwBuildFmt.FODT:
+            return steps, b"\n".join(
+                x for x in docFile.read_bytes().split(b"\n")
+                if not x.strip().decode().startswith(ODT_IGNORE)
+            )
+        return steps, docFile.read_bytes()
+
+    for replaceTabs in (True, False):
+        build.setValue("format.replaceTabs", replaceTabs)
+        for bFormat, name in [
+            (nwBuildFmt.ODT, "Lorem Ipsum.odt"),
+            (nwBuildFmt.FODT, "Lorem Ipsum.fodt"),
+            (nwBuildFmt.HTML, "Lorem Ipsum.htm"),
+            (nwBuildFmt.J_HTML, "Lorem Ipsum.json"),
+            (nwBuildFmt.STD_MD, "Lorem Ipsum.md"),
+            (nwBuildFmt.NWD, "Lorem Ipsum.txt"),
+            (nwBuildFmt.J_NWD, "Lorem Ipsum.json"),
+        ]:
+            assert buildFile(True, bFormat, name) == buildFile(False, bFormat, name)
+
+    # Nothing is kept in memory
+    docBuild = NWBuildDocument(project, build)
+    docBuild.setStreaming(True)
+    docBuild.queueAll()
+    for _ in docBuild.iterBuildHTML(fncPath / "Lorem Ipsum.htm"):
+        pass
+    assert isinstance(docBuild.lastBuild, ToHtml)
+    assert docBuild.lastBuild.fullHTML == []
+    assert docBuild.lastBuild.isStreaming is False
+    assert project.tokenCache._entries == {}
+
+    for _ in docBuild.iterBuildNWD(fncPath / "Lorem Ipsum.txt"):
+        pass
+    assert isinstance(docBuild.lastBuild, ToMarkdown)
+    assert docBuild.lastBuild.allMarkdown == []
+
+    for _ in docBuild.iterBuildOpenDocument(fncPath / "Lorem Ipsum.odt", False):
+        pass
+    assert isinstance(docBuild.lastBuild, ToOdt)
+    assert len(docBuild.lastBuild._xText) == 0
+
+    # Failing to open the file
+    with monkeypatch.context() as mp:
+        mp.setattr("builtins.open", causeOSError)
+        docFile = fncPath / "Lorem Ipsum Err.md"
+        assert list(docBuild.iterBuildMarkdown(docFile, False)) == []
+        assert docBuild.error == "OSError: Mock OSError"
+        assert not docFile.is_file()
+
+# END Test testCoreDocBuild_Streaming
+
+
+@pytest.mark.core
+@pytest.mark.slow
+def testCoreDocBuild_StreamingMemory(record_property, mockGUI, fncPath, mockRnd):
+    """Benchmark the memory used by streaming builds, which should
+    follow the size of the largest document, and not the number of
+    documents.
+    """
+    project = NWProject()
+    buildTestProject(project, fncPath)
+
+    build = BuildSettings()
+    build.unpack(BUILD_CONF)
+
+    para = " ".join(["Lorem ipsum **dolor** sit amet, _consectetur_ adipiscing elit."]*20)
+    text = "\n\n".join([para]*20)
+
+    def addDocuments(count: int) -> None:
+        for i in range(count):
+            tHandle = project.newFile(f"Scene {i}", C.hChapterDir)
+            assert tHandle is not None
+            project.storage.getDocument(tHandle).writeDocument(f"### Scene {i}\n\n{text}\n")
+
+    def buildMemory(docFile: Path) -> tuple[int, int]:
+        docBuild = NWBuildDocument(project, build)
+        docBuild.setStreaming(True)
+        docBuild.queueAll()
+        tracemalloc.start()
+        for _ in docBuild.iterBuildHTML(docFile):
+            assert docBuild.error is None
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return retained, peak
+
+    # Warm up, so that caches and imports don't count
+    addDocuments(10)
+    buildMemory(fncPath / "Warm.htm")
+    project.tokenCache.clear()
+
+    # Build with 10 and then 50 documents, with an empty token cache
+    retainedA, peakA = buildMemory(fncPath / "Small.htm")
+    addDocuments(40)
+    project.tokenCache.clear()
+    retainedB, peakB = buildMemory(fncPath / "Large.htm")
+    sizeB = (fncPath / "Large.htm").stat().st_size
+
+    record_property("peakSmall", peakA)
+    record_property("peakLarge", peakB)
+    record_property("retainedLarge", retainedB)
+    record_property("outputLarge", sizeB)
+
+    # The large build writes five times as much, but neither the peak
+    # nor the retained memory grows with it
+    assert sizeB > 4*(fncPath / "Small.htm").stat().st_size
+    assert peakB < 1.5*peakA
+    assert retainedB < 1.5*retainedA + 10000
+    assert project.tokenCache._entries == {}
+
+
+@pytest.mark.core
+def testCoreDocBuild_Multi(monkeypatch, mockGUI, prjLipsum, fncPath):
+    """Test building several formats in one pass."""
+    project = NWProject()
+    project.openProject(prjLipsum)
+
+    build = BuildSettings()
+    build.unpack(BUILD_CONF)
+
+    monkeypatch.setattr("novelwriter.core.tokenizer.time", lambda: 1700000000.0)
+
+    tokenized = []
+    tokenizeText = Tokenizer._tokenizeText
+
+    def countTokenize(self):
+        tokenized.append(self._nwItem.itemHandle)
+        return tokenizeText(self)
+
+    monkeypatch.setattr(Tokenizer, "_tokenizeText", countTokenize)
+
+    def readFile(path: Path) -> list[str]:
+        return [
+            x for x in path.read_text(encoding="utf-8").split("\n")
+            if not x.strip().startswith(ODT_IGNORE)
+        ]
+
+    targets = [
+        (fncPath / "Single.fodt", nwBuildFmt.FODT),
+        (fncPath / "Single.htm", nwBuildFmt.HTML),
+        (fncPath / "Single.md", nwBuildFmt.EXT_MD),
+        (fncPath / "Single.json", nwBuildFmt.J_NWD),
+    ]
+
+    # Build each format on its own
+    single = []
+    for path, bFormat in targets:
+        docBuild = NWBuildDocument(project, build)
+        docBuild.queueAll()
+        single.append(list(docBuild.iterBuild(path, bFormat)))
+        assert docBuild.error is None
+
+    # Build all formats in one pass, with no tokens cached
+    project.tokenCache.clear()
+    tokenized.clear()
+    multi = [(path.with_name(f"Multi{path.suffix}"), bFormat) for path, bFormat in targets]
+    docBuild = NWBuildDocument(project, build)
+    docBuild.queueAll()
+    steps = list(docBuild.iterBuildMulti(multi))
+    assert docBuild.error is None
+    assert isinstance(docBuild.lastBuild, ToMarkdown)
+
+    # One step per document, succeeding if all formats succeeded
+    assert steps == single[0]
+    assert len(steps) == len(docBuild)
+
+    # The files are the same as when built one by one
+    for (sPath, _), (mPath, _) in zip(targets, multi):
+        assert readFile(mPath) == readFile(sPath)
+
+    # Each document is tokenized once, as the HTML pre-processing
+    # doesn't change these texts
+    assert len(tokenized) == len(set(tokenized)) == 15
+
+    # Unknown formats are skipped, and failing to open a stream stops
+    # the build before it starts
+    assert list(docBuild.iterBuildMulti([(fncPath / "X", None)])) == []  # type: ignore
+    docBuild.setStreaming(True)
+    with monkeypatch.context() as mp:
+        mp.setattr("builtins.open", causeOSError)
+        assert list(docBuild.iterBuildMulti(multi)) == []
+        assert docBuild.error == "OSError: Mock OSError"
+
+    # Failing to open a later stream discards the earlier ones
+    failed = [
+        (fncPath / "Failed.md", nwBuildFmt.STD_MD), (fncPath / "Failed.htm", nwBuildFmt.HTML)
+    ]
+    with monkeypatch.context() as mp:
+        mp.setattr(ToHtml, "openHtml5Stream", causeOSError)
+        assert list(docBuild.iterBuildMulti(failed)) == []
+    assert not (fncPath / "Failed.md").exists()
+
+    # Stopping the build early discards the streams and the spool file
+    spools = []
+    origTemporaryFile = tempfile.TemporaryFile
+
+    def temporaryFile():
+        spools.append(origTemporaryFile())
+        return spools[-1]
+
+    stopped = [
+        (fncPath / "Stopped.md", nwBuildFmt.STD_MD), (fncPath / "Stopped.odt", nwBuildFmt.ODT)
+    ]
+    with monkeypatch.context() as mp:
+        mp.setattr("novelwriter.core.toodt.tempfile.TemporaryFile", temporaryFile)
+        steps = docBuild.iterBuildMulti(stopped)
+        next(steps)
+        assert (fncPath / "Stopped.md").exists()
+        steps.close()
+    assert not (fncPath / "Stopped.md").exists()
+    assert not (fncPath / "Stopped.odt").exists()
+    assert len(spools) == 1 and spools[0].closed
+
+    # Failing to save the Open Document file closes the spool file
+    spools.clear()
+    with monkeypatch.context() as mp:
+        mp.setattr("novelwriter.core.toodt.tempfile.TemporaryFile", temporaryFile)
+        mp.setattr("novelwriter.core.toodt.ZipFile", causeOSError)
+        list(docBuild.iterBuildOpenDocument(fncPath / "Stopped.odt", False))
+    assert docBuild.error == "OSError: Mock OSError"
+    assert len(spools) == 1 and spools[0].closed
+
+# END Test testCoreDocBuild_Multi
@@ -237,18 +237,24 @@ def testCoreIndex_CheckThese(mockGUI, fncPath, mockRnd):
     assert index.rootChangedSince(C.hNovelRoot, 0) is False
     assert index.rootChangedSince(None, 0) is False
     assert index.indexChangedSince(0) is False
+    assert index.tagsChangedSince(0) is True
 
+    tagsTime = index._tagsChange
     assert index.scanText(cHandle, (
         "# Jane Smith\n"
         "@tag: Jane\n"
         "@tag:\n"
         "@:\n"
     ))
+    assert index.tagsChangedSince(tagsTime) is True
+
+    tagsTime = index._tagsChange
     assert index.scanText(nHandle, (
         "# Hello World!\n"
         "@pov: Jane\n"
         "@invalid: John\n"  # Checks for issue #688
     ))
+    assert index.tagsChangedSince(tagsTime) is False
     assert index._tagsIndex.tagHandle("Jane") == cHandle
     assert index._tagsIndex.tagHeading("Jane") == "T0001"
     assert index._tagsIndex.tagClass("Jane") == "CHARACTER"
@@ -306,6 +312,47 @@ def testCoreIndex_CheckThese(mockGUI, fncPath, mockRnd):
 # END Test testCoreIndex_CheckThese
 
 
+@pytest.mark.core
+def testCoreIndex_RootChanges(monkeypatch, mockGUI, fncPath, mockRnd):
+    """Test checking root changes while ignoring the last item."""
+    project = NWProject()
+    mockRnd.reset()
+    buildTestProject(project, fncPath)
+    index = project.index
+    index.clearIndex()
+
+    aHandle = project.newFile("Scene A", C.hNovelRoot)
+    bHandle = project.newFile("Scene B", C.hNovelRoot)
+    assert isinstance(aHandle, str)
+    assert isinstance(bHandle, str)
+
+    monkeypatch.setattr("novelwriter.core.index.time", lambda: 10.0)
+    index.scanText(aHandle, "### Scene A\n")
+    monkeypatch.setattr("novelwriter.core.index.time", lambda: 20.0)
+    index.scanText(bHandle, "### Scene B\n")
+    monkeypatch.setattr("novelwriter.core.index.time", lambda: 30.0)
+    index.scanText(bHandle, "### Scene B\n\nText\n")
+
+    # Only changes to other items than the last are counted
+    assert index.rootChangedSince(C.hNovelRoot, 15.0) is True
+    assert index.rootChangedSince(C.hNovelRoot, 15.0, ignore=bHandle) is False
+    assert index.rootChangedSince(C.hNovelRoot, 5.0, ignore=bHandle) is True
+    assert index.rootChangedSince(C.hNovelRoot, 15.0, ignore=aHandle) is True
+
+    monkeypatch.setattr("novelwriter.core.index.time", lambda: 40.0)
+    index.scanText(aHandle, "### Scene A\n\nText\n")
+    assert index.rootChangedSince(C.hNovelRoot, 35.0, ignore=aHandle) is False
+    assert index.rootChangedSince(C.hNovelRoot, 25.0, ignore=aHandle) is True
+
+    # Clearing the index resets the changes
+    index.clearIndex()
+    assert index.rootChangedSince(C.hNovelRoot, 0.0, ignore=aHandle) is False
+
+    project.closeProject()
+
+# END Test testCoreIndex_RootChanges
+
+
 @pytest.mark.core
 def testCoreIndex_ScanText(mockGUI, fncPath, mockRnd):
     """Check the index text scanner."""
@@ -812,7 +859,7 @@ def testCoreIndex_ExtractData(mockGUI, fncPath, mockRnd):
     ]
 
     # Add a fake handle to the tree and check that it's ignored
-    project.tree._order.append("0000000000000")
+    project.tree._order["0000000000000"] = None
     assert [(h, t) for h, t, _ in index._itemIndex.iterNovelStructure(activeOnly=False)] == [
         (C.hTitlePage, "T0001"),
         (C.hChapterDoc, "T0001"),
@@ -823,7 +870,7 @@ def testCoreIndex_ExtractData(mockGUI, fncPath, mockRnd):
         (sHandle, "T0001"),
         (tHandle, "T0001"),
     ]
-    project.tree._order.remove("0000000000000")
+    del project.tree._order["0000000000000"]
 
     # Extract stats
     assert index.getNovelWordCount(activeOnly=False) == 43
@@ -1195,7 +1242,7 @@ def testCoreIndex_ItemIndex(mockGUI, fncPath, mockRnd):
     assert nStruct[0][0] == uHandle
 
     # Inject garbage into tree
-    project.tree._order.append("stuff")
+    project.tree._order["stuff"] = None
     nStruct = list(itemIndex.iterNovelStructure())
     assert len(nStruct) == 4
     assert nStruct[0][0] == nHandle
@@ -22,6 +22,7 @@ from __future__ import annotations
 
 import copy
 import pytest
+import tracemalloc
 
 from PyQt5.QtGui import QIcon
 
@@ -763,3 +764,67 @@ def testCoreItem_PackUnpack(mockGUI, caplog, mockRnd):
     }
 
 # END Test testCoreItem_PackUnpack
+
+
+@pytest.mark.core
+@pytest.mark.slow
+def testCoreItem_Memory(record_property, mockGUI):
+    """Benchmark the memory used by a synthetic project of 50k items,
+    and check that repeated values are shared between items.
+    """
+    nItems = 50000
+    project = NWProject()
+    project.setDefaultStatusImport()
+    sKey = project.data.itemStatus.check("")
+    iKey = project.data.itemImport.check("")
+
+    tracemalloc.start()
+
+    # Every value is a new string object, as when read from a file
+    content = [{
+        "name": f"Scene {i}",
+        "itemAttr": {
+            "handle": f"{i+1:013x}",
+            "parent": "None" if i == 0 else f"{1:013x}",
+            "root": f"{1:013x}",
+            "order": str(i),
+            "type": "ROOT" if i == 0 else "FILE",
+            "class": "NOVEL",
+            "layout": "DOCUMENT",
+        },
+        "metaAttr": {
+            "expanded": "no",
+            "heading": "".join(["H", "3"]),
+            "charCount": "1000",
+            "wordCount": "200",
+            "paraCount": "10",
+            "cursorPos": "0",
+        },
+        "nameAttr": {
+            "status": "".join(sKey),
+            "import": "".join(iKey),
+            "active": "yes",
+        },
+    } for i in range(nItems)]
+    project.tree.unpack(content)
+    del content
+
+    treeSize, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    itemA = project.tree[f"{2:013x}"]
+    itemB = project.tree[f"{3:013x}"]
+    assert isinstance(itemA, NWItem)
+    assert isinstance(itemB, NWItem)
+    assert not hasattr(itemA, "__dict__")
+    assert itemA.itemParent is itemB.itemParent
+    assert itemA.itemRoot is itemB.itemRoot
+    assert itemA.itemStatus is itemB.itemStatus
+    assert itemA.itemImport is itemB.itemImport
+    assert itemA.mainHeading is itemB.mainHeading
+
+    bytesPerItem = treeSize/nItems
+    record_property("bytesPerItem", bytesPerItem)
+    assert bytesPerItem < 1000
+
+# END Test testCoreItem_Memory
@@ -21,6 +21,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import pytest
+import random
 
 from shutil import copyfile
 from zipfile import ZipFile
@@ -31,7 +32,7 @@ from tools import C, cmpFiles, buildTestProject, XML_IGNORE
 from PyQt5.QtWidgets import QMessageBox
 
 from novelwriter import CONFIG, SHARED
-from novelwriter.enum import nwItemClass
+from novelwriter.enum import nwItemClass, nwItemLayout, nwItemType
 from novelwriter.constants import nwFiles
 from novelwriter.core.item import NWItem
 from novelwriter.core.tree import NWTree
@@ -305,6 +306,56 @@ def testCoreProject_Open(monkeypatch, caplog, mockGUI, fncPath, mockRnd):
 # END Test testCoreProject_Open
 
 
+@pytest.mark.core
+def testCoreProject_LazyOpen(caplog, mockGUI, fncPath, mockRnd):
+    """Test opening a project in stages."""
+    project = NWProject()
+    mockRnd.reset()
+    buildTestProject(project, fncPath)
+    project.closeProject()
+
+    # Add an orphaned file
+    (fncPath / "content" / "0123456789abc.nwd").write_text("# Orphan\n")
+
+    # Open without completing
+    project = NWProject()
+    assert project.openProject(fncPath, lazy=True) is True
+    assert project.isValid is True
+    assert project.openPending is True
+    assert len(project.tree) == 8
+    assert project.index.getItemHeader(C.hSceneDoc, "T0001") is None
+    assert [s for s, _ in project._stages] == [
+        "Storage", "Project XML", "Project Tree", "Project Settings",
+    ]
+
+    # Complete the open
+    project.completeOpenProject()
+    assert project.openPending is False
+    assert len(project.tree) == 9
+    assert project.index.getItemHeader(C.hSceneDoc, "T0001") is not None
+    assert [s for s, _ in project._stages][4:] == [
+        "Orphaned Files", "Project Index", "Word Counts",
+    ]
+
+    # Log the timing report
+    caplog.clear()
+    project.logOpenStages()
+    assert "Project opened in" in caplog.text
+    assert "Open stage 'Project Index'" in caplog.text
+    project.closeProject()
+
+    # Saving completes the open
+    project = NWProject()
+    assert project.openProject(fncPath, lazy=True) is True
+    assert project.openPending is True
+    assert project.saveProject() is True
+    assert project.openPending is False
+    assert project.index.getItemHeader(C.hSceneDoc, "T0001") is not None
+    project.closeProject()
+
+# END Test testCoreProject_LazyOpen
+
+
 @pytest.mark.core
 def testCoreProject_Save(monkeypatch, mockGUI, mockRnd, fncPath):
     """Test saving a project."""
@@ -329,6 +380,46 @@ def testCoreProject_Save(monkeypatch, mockGUI, mockRnd, fncPath):
     # Save with and without autosave
     assert project.saveProject(autoSave=False) is True
     assert project.saveProject(autoSave=True) is True
+
+    # Unchanged content is not written again on autosave
+    storage = project.storage
+    nwxFile = fncPath / nwFiles.PROJ_FILE
+    optsFile = storage.getMetaFile(nwFiles.OPTS_FILE)
+    indexFile = storage.getMetaFile(nwFiles.INDEX_FILE)
+    stamps = [f.stat().st_mtime_ns for f in (nwxFile, optsFile, indexFile)]
+    autoCount = project.data.autoCount
+    assert project.saveProject(autoSave=True) is True
+    assert project.data.autoCount == autoCount
+    assert [f.stat().st_mtime_ns for f in (nwxFile, optsFile, indexFile)] == stamps
+
+    # A change to the cursor position is not written on autosave
+    project.tree[C.hSceneDoc].setCursorPos(42)  # type: ignore
+    assert project.saveProject(autoSave=True) is True
+    assert project.data.autoCount == autoCount
+    assert nwxFile.stat().st_mtime_ns == stamps[0]
+
+    # A change to an item is written, and the body is only packed once
+    packed = []
+    packBody = ProjectXMLWriter._packBody
+
+    def countPack(self, *args):
+        packed.append(1)
+        return packBody(self, *args)
+
+    project.tree[C.hSceneDoc].setName("Changed Scene")  # type: ignore
+    with monkeypatch.context() as mp:
+        mp.setattr(ProjectXMLWriter, "_packBody", countPack)
+        assert project.saveProject(autoSave=True) is True
+    assert len(packed) == 1
+    assert project.data.autoCount == autoCount + 1
+    assert "Changed Scene" in nwxFile.read_text(encoding="utf-8")
+    assert 'cursorPos="42"' in nwxFile.read_text(encoding="utf-8")
+
+    # A manual save is always written
+    saveCount = project.data.saveCount
+    assert project.saveProject(autoSave=False) is True
+    assert project.data.saveCount == saveCount + 1
+
     project.closeProject()
 
 # END Test testCoreProject_Save
@@ -371,7 +462,7 @@ def testCoreProject_AccessItems(mockGUI, fncPath, mockRnd):
     assert project.tree.handles() == newOrder
 
     # Add a non-existing item
-    project.tree._order.append(C.hInvalid)
+    project.tree._order[C.hInvalid] = None
 
     # Add an item with a non-existent parent
     nHandle = project.newFile("Test File", C.hChapterDir)
@@ -386,20 +477,55 @@ def testCoreProject_AccessItems(mockGUI, fncPath, mockRnd):
 
     assert retOrder == [
         C.hNovelRoot,
-        C.hPlotRoot,
-        C.hCharRoot,
-        C.hWorldRoot,
-        nHandle,
         C.hTitlePage,
         C.hChapterDir,
         C.hChapterDoc,
         C.hSceneDoc,
+        C.hPlotRoot,
+        C.hCharRoot,
+        C.hWorldRoot,
+        nHandle,
     ]
     assert nItem.itemParent is None
 
 # END Test testCoreProject_AccessItems
 
 
+@pytest.mark.core
+@pytest.mark.slow
+def testCoreProject_IterLargeTree(mockGUI):
+    """Test iterating over a shuffled tree of 50k items, which must be
+    returned with every parent before its children.
+    """
+    nItems = 50000
+    rnd = random.Random(42)
+    project = NWProject()
+    handles = [f"{i+1:013x}" for i in range(nItems)]
+    for i, tHandle in enumerate(handles):
+        nwItem = NWItem(project, tHandle)
+        if i < 10:
+            nwItem.setType(nwItemType.ROOT)
+            nwItem.setClass(nwItemClass.NOVEL)
+        else:
+            nwItem.setParent(handles[rnd.randrange(i)])
+            nwItem.setType(nwItemType.FOLDER)
+            nwItem.setClass(nwItemClass.NOVEL)
+        project.tree.append(nwItem)
+
+    rnd.shuffle(handles)
+    project.tree.setOrder(handles)
+    assert project.tree.handles() == handles
+
+    sentItems = set()
+    for nwItem in project.iterProjectItems():
+        assert nwItem.itemParent is None or nwItem.itemParent in sentItems
+        sentItems.add(nwItem.itemHandle)
+
+    assert len(sentItems) == nItems
+
+# END Test testCoreProject_IterLargeTree
+
+
 @pytest.mark.core
 def testCoreProject_StatusImport(mockGUI, fncPath, mockRnd):
     """Test the status and importance flag handling."""
@@ -509,6 +635,56 @@ def testCoreProject_StatusImport(mockGUI, fncPath, mockRnd):
 # END Test testCoreProject_StatusImport
 
 
+@pytest.mark.core
+def testCoreProject_RunningCounts(monkeypatch, caplog, mockGUI, fncPath, mockRnd):
+    """Test the running word totals and status flag counts."""
+    project = NWProject()
+    mockRnd.reset()
+    buildTestProject(project, fncPath)
+    tree = project.tree
+    status = project.data.itemStatus
+    imports = project.data.itemImport
+    assert project.checkCounts() is True
+
+    # Word counts
+    tree[C.hTitlePage].setWordCount(0)  # type: ignore
+    tree[C.hSceneDoc].setWordCount(100)  # type: ignore
+    tree[C.hChapterDoc].setWordCount(50)  # type: ignore
+    assert tree.sumWords() == (150, 0)
+    tree[C.hChapterDoc].setLayout(nwItemLayout.NOTE)  # type: ignore
+    assert tree.sumWords() == (100, 50)
+
+    # Status and importance flags
+    assert status.count(C.sNew) == 5
+    assert status.count(C.sDraft) == 0
+    tree[C.hSceneDoc].setStatus(C.sDraft)  # type: ignore
+    assert status.count(C.sNew) == 4
+    assert status.count(C.sDraft) == 1
+    assert imports.count(C.iNew) == 3
+    tree[C.hSceneDoc].setClass(nwItemClass.CHARACTER)  # type: ignore
+    assert status.count(C.sDraft) == 0
+    assert imports.count(C.iNew) == 4
+
+    # Deleting an item removes its counts
+    del tree[C.hSceneDoc]
+    assert tree.sumWords() == (0, 50)
+    assert imports.count(C.iNew) == 3
+    assert project.checkCounts() is True
+
+    # Counts changed behind the tree's back are corrected in debug mode
+    tree[C.hChapterDoc]._wordCount = 10  # type: ignore
+    monkeypatch.setattr(CONFIG, "isDebug", True)
+    caplog.clear()
+    project.updateWordCounts()
+    assert "Running word totals (0, 50) should be (0, 10)" in caplog.text
+    assert project.data.currCounts == (0, 10)
+    assert project.checkCounts() is True
+
+    project.closeProject()
+
+# END Test testCoreProject_RunningCounts
+
+
 @pytest.mark.core
 def testCoreProject_Methods(monkeypatch, mockGUI, fncPath, mockRnd):
     """Test other project class methods and functions."""
@@ -22,7 +22,10 @@ from __future__ import annotations
 
 import json
 import pytest
+import tracemalloc
+import xml.etree.ElementTree as ET
 
+from time import time
 from shutil import copyfile
 from datetime import datetime
 from novelwriter.constants import nwFiles
@@ -214,7 +217,7 @@ def testCoreProjectXML_ReadCurrent(monkeypatch, tstPaths, fncPath):
 
     # Fail saving
     with monkeypatch.context() as mp:
-        mp.setattr("xml.etree.ElementTree.ElementTree.write", causeOSError)
+        mp.setattr("builtins.open", causeOSError)
         assert xmlWriter.write(data, packedContent, timeStamp, 1000) is False
         assert str(xmlWriter.error) == "Mock OSError"
 
@@ -911,3 +914,75 @@ def testCoreProjectXML_ReadLegacy14(tstPaths, fncPath, mockRnd):
     assert cmpFiles(testFile, compFile)
 
 # END Test testCoreProjectXML_ReadLegacy14
+
+
+@pytest.mark.core
+@pytest.mark.slow
+def testCoreProjectXML_ReadLarge(record_property, fncPath):
+    """Benchmark reading a synthetic project file with 50k items, and
+    check that the streaming reader uses less memory than building the
+    full element tree, and isn't much slower.
+    """
+    nItems = 50000
+    xmlFile = fncPath / nwFiles.PROJ_FILE
+    items = [
+        "<item handle='0000000000001' parent='None' root='0000000000001' order='0' "
+        "type='ROOT' class='NOVEL'><meta expanded='yes'/><name status='s000000' "
+        "import='i000004' active='yes'>Novel</name></item>"
+    ]
+    for i in range(1, nItems):
+        items.append(
+            f"<item handle='{i+1:013x}' parent='0000000000001' root='0000000000001' "
+            f"order='{i}' type='FILE' class='NOVEL' layout='DOCUMENT'><meta expanded='no' "
+            f"heading='H3' charCount='1000' wordCount='200' paraCount='10' cursorPos='0'/>"
+            f"<name status='s000000' import='i000004' active='yes'>Scene {i}</name></item>"
+        )
+    writeFile(xmlFile, (
+        "<?xml version='1.0' encoding='utf-8'?>\n"
+        "<novelWriterXML appVersion='2.3' hexVersion='0x020300f0' fileVersion='1.5' "
+        "fileRevision='3' timeStamp='2024-01-01 12:00:00'>"
+        "<project id='d0f3fe10-c6e6-4310-8bfd-181eb4224eed' saveCount='1' autoCount='1' "
+        "editTime='100'><name>Large Project</name><author>Jane Doe</author></project>"
+        "<settings><doBackup>no</doBackup><language>en_GB</language></settings>"
+        f"<content items='{nItems}' novelWords='0' notesWords='0'>{''.join(items)}</content>"
+        "</novelWriterXML>\n"
+    ))
+
+    # Memory used by the full element tree
+    tracemalloc.start()
+    ET.parse(str(xmlFile))
+    _, treePeak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Memory used by the streaming reader, excluding the result
+    data = NWProjectData(MockProject())  # type: ignore
+    content = []
+    xmlReader = ProjectXMLReader(xmlFile)
+    tracemalloc.start()
+    assert xmlReader.read(data, content) is True
+    contentSize, readPeak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert xmlReader.state == XMLReadState.PARSED_OK
+    assert data.name == "Large Project"
+    assert len(content) == nItems
+    assert content[-1]["name"] == f"Scene {nItems - 1}"
+    assert content[-1]["metaAttr"]["wordCount"] == 200
+    assert readPeak - contentSize < treePeak
+
+    # Time both, without tracing memory
+    tStart = time()
+    ET.parse(str(xmlFile))
+    tTree = time() - tStart
+
+    tStart = time()
+    assert ProjectXMLReader(xmlFile).read(NWProjectData(MockProject()), []) is True  # type: ignore
+    tRead = time() - tStart
+
+    record_property("readTime", tRead)
+    record_property("treeTime", tTree)
+    record_property("readPeak", readPeak - contentSize)
+    record_property("treePeak", treePeak)
+    assert tRead < 10.0*tTree
+
+# END Test testCoreProjectXML_ReadLarge
@@ -20,6 +20,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import time
 import pytest
 
 from tools import readFile
@@ -234,6 +235,14 @@ def testCoreToHtml_ConvertFormat(mockGUI):
         "text</b> here</p>\n"
     )
 
+    # Tabs (Pre-formatted for Qt)
+    html._text = "One\tTwo\n"
+    html.tokenizeText()
+    html.doConvert()
+    assert html.result == (
+        "<p>One<span style='white-space: pre;'>\t</span>Two</p>\n"
+    )
+
 # END Test testCoreToHtml_ConvertFormat
 
 
@@ -456,6 +465,33 @@ def testCoreToHtml_SpecialCases(mockGUI):
 # END Test testCoreToHtml_SpecialCases
 
 
+@pytest.mark.core
+def testCoreToHtml_Benchmark(mockGUI):
+    """Benchmark converting paragraphs with many angle brackets and
+    formats, which should be done in linear time.
+    """
+    project = NWProject()
+    html = ToHtml(project)
+    html._isNovel = True
+
+    line = "<<_Hello_,>> she said. <<**Hi** <there>, [u]friend[/u]!>> "
+    html._text = "\n\n".join([line*50]*200) + "\n"
+    html.tokenizeText()
+
+    tStart = time.perf_counter()
+    html.doConvert()
+    tConvert = time.perf_counter() - tStart
+
+    para = (
+        "&lt;&lt;<em>Hello</em>,&gt;&gt; she said. &lt;&lt;<strong>Hi</strong> "
+        "&lt;there&gt;, <span style='text-decoration: underline;'>friend</span>!&gt;&gt; "
+    )*50
+    assert html.result == f"<p>{para.rstrip()}</p>\n"*200
+    assert tConvert < 5.0
+
+# END Test testCoreToHtml_Benchmark
+
+
 @pytest.mark.core
 def testCoreToHtml_Complex(mockGUI, fncPath):
     """Test the save method of the ToHtml class."""
@@ -0,0 +1,246 @@
+"""
+novelWriter – Token Cache Class Tester
+======================================
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import json
+import pytest
+
+from mocked import causeException, causeOSError
+
+from novelwriter.constants import nwFiles
+from novelwriter.core.project import NWProject
+from novelwriter.core.docbuild import NWBuildDocument
+from novelwriter.core.tokenizer import Tokenizer
+from novelwriter.core.tokencache import NWTokenCache
+from novelwriter.core.buildsettings import BuildSettings
+
+BUILD_CONF = {
+    "name": "Test Build",
+    "uuid": "f8796eee-e234-4e8a-8355-b2709177e53c",
+    "settings": {
+        "filter.includeNovel": True,
+        "filter.includeNotes": True,
+        "headings.fmtChapter": "Chapter {Chapter}: {Title}",
+        "headings.fmtScene": "Scene {Scene}: {Title}",
+        "text.includeSynopsis": True,
+        "text.includeComments": True,
+        "text.includeKeywords": True,
+    },
+}
+
+
+@pytest.mark.core
+def testCoreTokenCache_Entries(monkeypatch, caplog, mockGUI, prjLipsum):
+    """Test adding, saving and loading token cache entries."""
+    project = NWProject()
+    project.openProject(prjLipsum)
+    cachePath = project.storage.getMetaFile(nwFiles.TOKEN_DIR)
+    assert cachePath is not None
+    assert not cachePath.exists()
+
+    tHandle = "88243afbe5ed8"
+    cacheFile = cachePath / f"{tHandle}.json"
+    tokens = [(Tokenizer.T_TEXT, 0, "Text", [(0, Tokenizer.FMT_B_B)], Tokenizer.A_NONE)]
+
+    cache = project.tokenCache
+    assert isinstance(cache, NWTokenCache)
+    assert len(cache) == 0
+    assert cache.saveCache() is True
+    assert not cachePath.exists()
+
+    # Entries match on the text hash
+    cache.put(tHandle, "key", "hash", tokens, "Text\n")
+    cache.put("0000000000000", "key", "hash", tokens, "")
+    assert len(cache) == 2
+    assert cache.get(tHandle, "key", "hash") == (tokens, "Text\n")
+    assert cache.get(tHandle, "key", "other") is None
+    assert cache.get(tHandle, "other", "hash") is None
+
+    # Entries without markdown can't be used when it is needed
+    cache.put("0000000000001", "key", "hash", tokens, None)
+    assert cache.get("0000000000001", "key", "hash") == (tokens, "")
+    assert cache.get("0000000000001", "key", "hash", withMarkdown=True) is None
+    assert cache.get(tHandle, "key", "hash", withMarkdown=True) == (tokens, "Text\n")
+
+    # Returned tokens are copies
+    cached = cache.get(tHandle, "key", "hash")
+    assert cached is not None
+    cached[0].append(tokens[0])
+    assert cache.get(tHandle, "key", "hash") == (tokens, "Text\n")
+
+    # Failing to save
+    with monkeypatch.context() as mp:
+        mp.setattr("builtins.open", causeOSError)
+        assert cache.saveCache() is False
+    assert "Failed to save token cache file" in caplog.text
+
+    # Save, and drop unknown handles
+    assert cache.saveCache() is True
+    assert cacheFile.exists()
+    assert len(cache) == 1
+    assert [x.name for x in cachePath.iterdir()] == [cacheFile.name]
+
+    # Files of documents no longer in the project are removed
+    (cachePath / "0000000000000.json").write_text("{}", encoding="utf-8")
+    assert cache.saveCache() is True
+    assert [x.name for x in cachePath.iterdir()] == [cacheFile.name]
+
+    # Released documents are saved and dropped from memory
+    cache.put(tHandle, "key", "hash", tokens, "Other\n")
+    assert cache.release(tHandle) is True
+    assert cache._entries == {}
+    data = json.loads(cacheFile.read_text(encoding="utf-8"))
+    assert data["novelWriter.tokenCache"]["entries"]["key"][2] == "Other\n"
+    assert cache.get(tHandle, "key", "hash") == (tokens, "Other\n")
+    cache.put(tHandle, "key", "hash", tokens, "Text\n")
+    assert cache.saveCache() is True
+
+    # Load in a new project instance
+    project.closeProject()
+    project = NWProject()
+    project.openProject(prjLipsum)
+    assert len(project.tokenCache) == 1
+    assert project.tokenCache.get(tHandle, "key", "hash") == (tokens, "Text\n")
+
+    # Settings keys not used since the last save are dropped
+    project.tokenCache.put(tHandle, "other", "hash", tokens, None)
+    assert project.tokenCache.saveCache() is True
+    assert len(project.tokenCache) == 2
+    assert project.tokenCache.get(tHandle, "other", "hash") == (tokens, "")
+    assert project.tokenCache.saveCache() is True
+    assert len(project.tokenCache) == 1
+    assert project.tokenCache.get(tHandle, "key", "hash") is None
+    assert project.tokenCache.get(tHandle, "other", "hash") == (tokens, "")
+    data = json.loads(cacheFile.read_text(encoding="utf-8"))
+    assert list(data["novelWriter.tokenCache"]["entries"]) == ["other"]
+
+    # Discard a cache from another version
+    data = json.loads(cacheFile.read_text(encoding="utf-8"))
+    data["novelWriter.tokenCache"]["version"] = 0
+    cacheFile.write_text(json.dumps(data), encoding="utf-8")
+    project.closeProject()
+    project = NWProject()
+    project.openProject(prjLipsum)
+    assert len(project.tokenCache) == 0
+
+    # Broken file
+    caplog.clear()
+    cacheFile.write_text("{stuff", encoding="utf-8")
+    project.closeProject()
+    project = NWProject()
+    project.openProject(prjLipsum)
+    assert len(project.tokenCache) == 0
+    assert "Failed to load token cache file" in caplog.text
+
+    # Clear, which removes the files
+    project.tokenCache.put(tHandle, "key", "hash", tokens, "")
+    assert project.tokenCache.saveCache() is True
+    assert cacheFile.exists()
+    project.tokenCache.clear()
+    assert len(project.tokenCache) == 0
+    assert not cacheFile.exists()
+
+    # Failing to remove a file
+    caplog.clear()
+    project.tokenCache.put(tHandle, "key", "hash", tokens, "")
+    assert project.tokenCache.saveCache() is True
+    with monkeypatch.context() as mp:
+        mp.setattr("pathlib.Path.unlink", causeOSError)
+        project.tokenCache.clear()
+    assert "Failed to remove token cache file" in caplog.text
+
+    # No project
+    project.closeProject()
+    project = NWProject()
+    project.tokenCache.put(tHandle, "key", "hash", tokens, "")
+    assert project.tokenCache.saveCache() is False
+
+# END Test testCoreTokenCache_Entries
+
+
+@pytest.mark.core
+def testCoreTokenCache_Build(monkeypatch, mockGUI, prjLipsum, fncPath):
+    """Test that builds only tokenize changed documents."""
+    project = NWProject()
+    project.openProject(prjLipsum)
+
+    build = BuildSettings()
+    build.unpack(BUILD_CONF)
+
+    tokenized = []
+    tokenizeText = Tokenizer._tokenizeText
+
+    def countTokenize(self):
+        tokenized.append(self._nwItem.itemHandle)
+        return tokenizeText(self)
+
+    monkeypatch.setattr(Tokenizer, "_tokenizeText", countTokenize)
+
+    def buildHTML(project: NWProject) -> str:
+        docBuild = NWBuildDocument(project, build)
+        docBuild.queueAll()
+        docFile = fncPath / "Lorem Ipsum.htm"
+        for _ in docBuild.iterBuildHTML(docFile):
+            assert docBuild.error is None
+        return docFile.read_text(encoding="utf-8")
+
+    # First build tokenizes all documents
+    first = buildHTML(project)
+    nDocs = len(tokenized)
+    assert nDocs > 10
+
+    # Second build tokenizes none, and gives the same result
+    tokenized.clear()
+    assert buildHTML(project) == first
+    assert tokenized == []
+
+    # Changing one document only tokenizes that document, and headings
+    # after it are still numbered
+    sHandle = "88243afbe5ed8"
+    doc = project.storage.getDocument(sHandle)
+    text = doc.readDocument() or ""
+    doc.writeDocument(text.replace("### Scene One", "### Scene Uno"))
+    result = buildHTML(project)
+    assert tokenized == [sHandle]
+    assert "Scene 1: Scene Uno" in result
+    assert result.replace("Scene Uno", "Scene One") == first
+
+    # Changing the build settings tokenizes everything
+    tokenized.clear()
+    build.setValue("text.includeComments", False)
+    buildHTML(project)
+    assert len(tokenized) == nDocs
+    build.setValue("text.includeComments", True)
+
+    # Entries with the old settings were dropped on save
+    tokenized.clear()
+    buildHTML(project)
+    assert len(tokenized) == nDocs
+
+    # The cache is used in the next session
+    project.closeProject()
+    project = NWProject()
+    project.openProject(prjLipsum)
+    with monkeypatch.context() as mp:
+        mp.setattr(Tokenizer, "_tokenizeText", causeException)
+        assert buildHTML(project).replace("Scene Uno", "Scene One") == first
+
+# END Test testCoreTokenCache_Build
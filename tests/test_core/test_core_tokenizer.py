@@ -21,6 +21,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import json
+import time
 import pytest
 
 from tools import C, buildTestProject, readFile
@@ -668,6 +669,45 @@ def testCoreToken_ExtractFormats(mockGUI):
 # END Test testCoreToken_ExtractFormats
 
 
+@pytest.mark.core
+def testCoreToken_FormatsBenchmark(record_property, mockGUI):
+    """Benchmark the tokenizer throughput on text with many formats,
+    which should be processed in linear time.
+    """
+    project = NWProject()
+    tokens = BareTokenizer(project)
+
+    line = (
+        "Text with **bold**, _italics_, ~~strike~~ and [u]underline[/u], "
+        "and **bold with _italics_** and x[sup]2[/sup] in it."
+    )
+    para = " ".join([line]*20)
+    text, fmt = tokens._extractFormats(para)
+    assert text == " ".join([
+        "Text with bold, italics, strike and underline, "
+        "and bold with italics and x2 in it."
+    ]*20)
+    assert len(fmt) == 280
+    assert fmt[:4] == [
+        (10, tokens.FMT_B_B), (14, tokens.FMT_B_E), (16, tokens.FMT_I_B), (23, tokens.FMT_I_E)
+    ]
+
+    tokens._text = "\n\n".join([para]*200)
+    size = len(tokens._text.encode("utf-8"))/1.0e6
+    tStart = time.perf_counter()
+    tokens.tokenizeText()
+    tTokenize = time.perf_counter() - tStart
+
+    assert len(tokens._tokens) == 400
+    assert sum(len(t[3]) for t in tokens._tokens) == 56000
+
+    throughput = size/tTokenize
+    record_property("throughputMBps", throughput)
+    assert throughput > 0.5
+
+# END Test testCoreToken_FormatsBenchmark
+
+
 @pytest.mark.core
 def testCoreToken_TextFormat(mockGUI):
     """Test the tokenization of text formats in the Tokenizer class."""
@@ -23,6 +23,7 @@ from __future__ import annotations
 import pytest
 import random
 
+from time import time
 from pathlib import Path
 
 from tools import C, buildTestProject
@@ -481,7 +482,7 @@ def testCoreTree_Stats(mockGUI, mockItems):
         tree.append(nwItem)
 
     assert len(tree) == len(mockItems)
-    tree._order.append("stuff")
+    tree._order["stuff"] = None
 
     # Count Words
     novelWords, noteWords = tree.sumWords()
@@ -518,7 +519,7 @@ def testCoreTree_Reorder(caplog, mockGUI, mockItems):
     assert "Handle 'stuff' in new tree order is not in old order" in caplog.text
 
     caplog.clear()
-    tree._order.append("stuff")
+    tree._order["stuff"] = None
     tree.setOrder(bHandle)
     assert tree.handles() == bHandle
     assert "Handle 'stuff' in old tree order is not in new order" in caplog.text
@@ -526,6 +527,109 @@ def testCoreTree_Reorder(caplog, mockGUI, mockItems):
 # END Test testCoreTree_Reorder
 
 
+@pytest.mark.core
+def testCoreTree_Children(mockGUI, mockItems):
+    """Test the index of child items."""
+    project = NWProject()
+    tree = NWTree(project)
+    for nwItem in mockItems:
+        tree.append(nwItem)
+
+    def children(tHandle):
+        return [nwItem.itemHandle for nwItem in tree.iterChildren(tHandle)]
+
+    # Direct children
+    assert children(None) == ["a000000000001", "a000000000002", "a000000000003", "a000000000004"]
+    assert children("a000000000001") == ["b000000000001"]
+    assert children("b000000000001") == ["c000000000001", "c000000000002"]
+    assert children("c000000000001") == []
+    assert children("0000000000000") == []
+
+    # Subtrees
+    assert tree.subtreeHandles("a000000000001") == [
+        "a000000000001", "b000000000001", "c000000000001", "c000000000002",
+    ]
+    assert tree.subtreeHandles("c000000000002") == ["c000000000002"]
+    assert tree.subtreeHandles("0000000000000") == []
+
+    # Move an item
+    assert tree.setItemParent("0000000000000", None) is False
+    assert tree.setItemParent("b000000000001", "a000000000003") is True
+    assert tree["b000000000001"].itemParent == "a000000000003"  # type: ignore
+    assert children("a000000000001") == []
+    assert tree.subtreeHandles("a000000000003") == [
+        "a000000000003", "b000000000001", "c000000000001", "c000000000002",
+    ]
+
+    # Move an item to a given position
+    assert tree.childCount("a000000000004") == 1
+    assert tree.setItemParent("c000000000002", "a000000000004", 0) is True
+    assert children("a000000000004") == ["c000000000002", "b000000000002"]
+    assert tree.setItemParent("c000000000002", "b000000000001", 5) is True
+    assert children("b000000000001") == ["c000000000001", "c000000000002"]
+    assert tree.childCount("a000000000004") == 1
+    assert tree.childCount("c000000000001") == 0
+    assert tree.childCount(None) == 4
+
+    # Reordering also reorders the children
+    tree.setOrder([
+        "a000000000001", "a000000000002", "a000000000003", "b000000000001",
+        "c000000000002", "c000000000001", "a000000000004", "b000000000002",
+    ])
+    assert children("b000000000001") == ["c000000000002", "c000000000001"]
+
+    # Deleted items are removed
+    del tree["c000000000002"]
+    assert children("b000000000001") == ["c000000000001"]
+    del tree["b000000000001"]
+    assert tree.subtreeHandles("a000000000003") == ["a000000000003"]
+
+    # Clearing the tree clears the index
+    tree.clear()
+    assert children(None) == []
+
+# END Test testCoreTree_Children
+
+
+@pytest.mark.core
+def testCoreTree_SubtreeWords(mockGUI, mockItems):
+    """Test the cached word counts of each branch."""
+    project = NWProject()
+    tree = NWTree(project)
+    for nwItem in mockItems:
+        tree.append(nwItem)
+
+    # Branch sums
+    assert tree.subtreeWords("c000000000001") == 50
+    assert tree.subtreeWords("a000000000001") == 550
+    assert tree.subtreeWords("a000000000004") == 400
+    assert tree.subtreeWords("a000000000003") == 0
+    assert tree.subtreeWords("0000000000000") == 0
+    assert tree._words["b000000000001"] == 550
+
+    # Changing a word count drops the cache along the path
+    tree["c000000000002"].setWordCount(100)  # type: ignore
+    assert "b000000000001" not in tree._words
+    assert "a000000000001" not in tree._words
+    assert "a000000000004" in tree._words
+    assert tree.subtreeWords("a000000000001") == 150
+
+    # Moving an item updates both branches
+    tree.setItemParent("c000000000002", "a000000000004")
+    assert tree.subtreeWords("a000000000001") == 50
+    assert tree.subtreeWords("a000000000004") == 500
+
+    # Deleting an item updates the branch
+    del tree["c000000000001"]
+    assert tree.subtreeWords("a000000000001") == 0
+
+    # Clearing the tree clears the cache
+    tree.clear()
+    assert tree._words == {}
+
+# END Test testCoreTree_SubtreeWords
+
+
 @pytest.mark.core
 def testCoreTree_ToCFile(monkeypatch, fncPath, mockGUI, mockItems):
     """Test writing the ToC.txt file."""
@@ -537,7 +641,7 @@ def testCoreTree_ToCFile(monkeypatch, fncPath, mockGUI, mockItems):
         tree.updateItemData(nwItem.itemHandle)
 
     assert len(tree) == len(mockItems)
-    tree._order.append("stuff")
+    tree._order["stuff"] = None
 
     def mockIsFile(fileName):
         """Return True for items that are files in novelWriter and
@@ -581,3 +685,42 @@ def testCoreTree_ToCFile(monkeypatch, fncPath, mockGUI, mockItems):
     )
 
 # END Test testCoreTree_ToCFile
+
+
+@pytest.mark.core
+@pytest.mark.slow
+def testCoreTree_Scaling(record_property, mockGUI):
+    """Benchmark whole-tree operations from 1k to 100k items, and check
+    that the time per item does not grow with the size of the tree.
+    """
+    project = NWProject()
+
+    def runOps(nItems: int) -> float:
+        tree = NWTree(project)
+        handles = [f"{i+1:013x}" for i in range(nItems)]
+        for tHandle in handles:
+            nwItem = NWItem(project, tHandle)
+            nwItem.setParent(None if tHandle == handles[0] else handles[0])
+            tree.append(nwItem)
+
+        tStart = time()
+        assert all(tHandle in tree for tHandle in handles)
+        tree.setOrder(handles[::-1])
+        assert tree.handles()[0] == handles[-1]
+        for tHandle in handles[1::2]:
+            del tree[tHandle]
+        assert len(tree) == nItems // 2
+        assert tree.handles() == handles[-2::-2]
+        return time() - tStart
+
+    # Use the best of three runs to reduce noise
+    perItem = {}
+    for nItems in (1000, 10000, 100000):
+        perItem[nItems] = min(runOps(nItems) for _ in range(3)) / nItems
+        record_property(f"perItem{nItems}", perItem[nItems])
+
+    # A linear scan per operation would make this about 100 times slower
+    assert perItem[10000] < 10*perItem[1000]
+    assert perItem[100000] < 10*perItem[1000]
+
+# END Test testCoreTree_Scaling
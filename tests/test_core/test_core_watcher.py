@@ -0,0 +1,81 @@
+"""
+novelWriter – NWContentWatcher Class Tester
+===========================================
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import pytest
+
+from tools import C, buildTestProject, writeFile
+
+from novelwriter import SHARED
+from novelwriter.core.project import NWProject
+
+
+@pytest.mark.core
+def testCoreWatcher_DetectChanges(qtbot, mockGUI, fncPath, mockRnd):
+    """Test detecting documents changed outside of novelWriter."""
+    project = NWProject()
+    mockRnd.reset()
+    buildTestProject(project, fncPath)
+
+    watcher = project.storage.watcher
+    contentPath = project.storage.contentPath
+    assert watcher.isActive is True
+
+    # The first check only records the state of the folder
+    assert watcher.checkContent() == []
+    assert watcher.checkContent() == []
+
+    # Writing through NWDocument is not reported
+    doc = project.storage.getDocument(C.hSceneDoc)
+    assert doc.writeDocument("### New Scene\n\nText\n") is True
+    assert watcher.checkContent() == []
+    assert doc.writeDocument("### New Scene\n\nMore text\n") is True
+
+    # Changing, adding and removing files is reported
+    received = []
+    SHARED.documentsChangedOnDisk.connect(received.append)
+    writeFile(contentPath / f"{C.hChapterDoc}.nwd", "## Changed Chapter\n\nStuff\n")
+    writeFile(contentPath / "0123456789abc.nwd", "# Unknown\n")
+    (contentPath / f"{C.hTitlePage}.nwd").unlink()
+    (contentPath / "notAHandle.nwd").touch()
+
+    changed = sorted([C.hChapterDoc, C.hTitlePage, "0123456789abc"])
+    assert watcher.checkContent() == changed
+    assert received == [changed]
+    assert watcher.checkContent() == []
+    SHARED.documentsChangedOnDisk.disconnect(received.append)
+
+    # The document notices the external change on the next write
+    writeFile(contentPath / f"{C.hSceneDoc}.nwd", "External edit\n")
+    assert doc.writeDocument("### New Scene\n\nEven more text\n") is False
+    assert doc.hashError is True
+
+    # Deleting through NWDocument is not reported
+    assert watcher.checkContent() == [C.hSceneDoc]
+    assert doc.deleteDocument() is True
+    assert watcher.checkContent() == []
+
+    # Closing the project stops the watcher
+    project.closeProject()
+    assert watcher.isActive is False
+    assert watcher.checkContent() == []
+
+# END Test testCoreWatcher_DetectChanges
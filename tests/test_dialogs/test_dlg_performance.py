@@ -0,0 +1,90 @@
+"""
+novelWriter – Performance Dialog Class Tester
+=============================================
+
+This file is a part of novelWriter
+Copyright 2018–2024, Veronica Berglyd Olsen
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+from __future__ import annotations
+
+import json
+import pytest
+
+from tools import C, buildTestProject
+
+from novelwriter import SHARED, TIMINGS
+from novelwriter.dialogs.performance import GuiPerformance
+
+
+@pytest.mark.gui
+def testDlgPerformance_Dialog(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
+    """Test the performance dialog."""
+    monkeypatch.setattr(TIMINGS, "_enabled", False)
+    monkeypatch.setattr(TIMINGS, "_reportFile", None)
+    monkeypatch.setattr(TIMINGS, "_data", {})
+
+    # Not enabled
+    nwGUI.showPerformanceDialog()
+    qtbot.waitUntil(
+        lambda: SHARED.findTopLevelWidget(GuiPerformance) is not None, timeout=1000
+    )
+    perfDlg = SHARED.findTopLevelWidget(GuiPerformance)
+    assert isinstance(perfDlg, GuiPerformance)
+    assert perfDlg.listBox.topLevelItemCount() == 0
+    assert "not recorded" in perfDlg.infoLabel.text()
+
+    # Record some timings
+    TIMINGS.enable()
+    TIMINGS.add("index.scan", 0.002)
+    TIMINGS.add("index.scan", 0.004)
+    TIMINGS.add("document.read", 0.001)
+    perfDlg.btnRefresh.click()
+    assert "this session" in perfDlg.infoLabel.text()
+    assert perfDlg.listBox.topLevelItemCount() == 2
+
+    item = perfDlg.listBox.topLevelItem(1)
+    assert item is not None
+    assert item.text(GuiPerformance.C_NAME) == "index.scan"
+    assert item.text(GuiPerformance.C_COUNT) == "2"
+    assert item.text(GuiPerformance.C_TOTAL) == "6.0"
+    assert item.text(GuiPerformance.C_MAX) == "4.000"
+
+    # Reset
+    perfDlg.btnReset.click()
+    assert perfDlg.listBox.topLevelItemCount() == 0
+    perfDlg.close()
+
+    # Record real operations, and write them on exit
+    reportFile = projPath.parent / "TIMINGS.json"
+    TIMINGS.enable(reportFile)
+
+    buildTestProject(nwGUI, projPath)
+    nwGUI.closeProject()
+    assert nwGUI.openProject(projPath)
+    assert nwGUI.openDocument(C.hSceneDoc)
+
+    nwGUI.showPerformanceDialog()
+    perfDlg = SHARED.findTopLevelWidget(GuiPerformance)
+    assert isinstance(perfDlg, GuiPerformance)
+    assert str(reportFile) in perfDlg.infoLabel.text()
+    perfDlg.close()
+
+    nwGUI.closeMain()
+    report = json.loads(reportFile.read_text(encoding="utf-8"))
+    assert "index.load" in report["operations"]
+    assert "document.read" in report["operations"]
+
+# END Test testDlgPerformance_Dialog
@@ -20,6 +20,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import time
 import pytest
 
 from mocked import causeException
@@ -29,7 +30,7 @@ from PyQt5.QtCore import QEvent, QPoint, Qt, QUrl
 from PyQt5.QtWidgets import QMenu, qApp, QAction
 
 from novelwriter import CONFIG, SHARED
-from novelwriter.enum import nwDocAction
+from novelwriter.enum import nwDocAction, nwItemLayout
 from novelwriter.core.tohtml import ToHtml
 from novelwriter.gui.docviewer import GuiDocViewer
 
@@ -49,8 +50,8 @@ def testGuiViewer_Main(qtbot, monkeypatch, nwGUI, prjLipsum):
     assert docViewer.loadText("b3643d0f92e32") is False
 
     # Middle-click the selected item
-    item = nwGUI.projView.projTree._getTreeItem("88243afbe5ed8")
-    rect = nwGUI.projView.projTree.visualItemRect(item)
+    index = nwGUI.projView.projTree._getTreeIndex("88243afbe5ed8")
+    rect = nwGUI.projView.projTree.visualRect(index)
     qtbot.mouseClick(nwGUI.projView.projTree.viewport(), Qt.MidButton, pos=rect.center())
     assert docViewer.docHandle == "88243afbe5ed8"
 
@@ -206,6 +207,7 @@ def testGuiViewer_Main(qtbot, monkeypatch, nwGUI, prjLipsum):
     assert len(docViewer.toPlainText()) == 635
 
     # Crash the HTML rendering
+    docViewer.docCache.clear()
     with monkeypatch.context() as mp:
         mp.setattr(ToHtml, "doConvert", causeException)
         assert docViewer.loadText("846352075de7d") is False
@@ -218,3 +220,131 @@ def testGuiViewer_Main(qtbot, monkeypatch, nwGUI, prjLipsum):
     # qtbot.stop()
 
 # END Test testGuiViewer_Main
+
+
+@pytest.mark.gui
+def testGuiViewer_Cache(qtbot, monkeypatch, nwGUI, prjLipsum):
+    """Test the document viewer preview cache and prefetching."""
+    assert nwGUI.openProject(prjLipsum)
+    docViewer: GuiDocViewer = nwGUI.docViewer
+    docCache = docViewer.docCache
+    tree = SHARED.project.tree
+    index = SHARED.project.index
+
+    sHandle = "88243afbe5ed8"
+    siblings = [
+        x.itemHandle for x in tree.iterChildren(tree[sHandle].itemParent)  # type: ignore
+        if x.isFileType()
+    ]
+    idx = siblings.index(sHandle)
+    assert 0 < idx < len(siblings) - 1
+
+    # Viewing a document caches it, and queues its neighbours
+    docViewer.clearNavHistory()
+    assert docViewer.loadText(sHandle) is True
+    origText = docViewer.toPlainText()
+    assert sHandle in docCache
+    assert docViewer._prefetch == [siblings[idx+1], siblings[idx-1]]
+    assert docViewer.prefetchTimer.isActive()
+
+    docViewer._processPrefetch()
+    docViewer._processPrefetch()
+    assert siblings[idx+1] in docCache
+    assert siblings[idx-1] in docCache
+    assert docViewer.prefetchTimer.isActive() is False
+
+    # Cached documents are not rendered again
+    with monkeypatch.context() as mp:
+        mp.setattr(ToHtml, "doConvert", causeException)
+        assert docViewer.loadText(siblings[idx+1]) is True
+        docViewer.navBackward()
+        assert docViewer.docHandle == sHandle
+        assert docViewer.toPlainText() == origText
+
+        # Failed prefetching is skipped
+        docViewer._prefetch = [siblings[0]]
+        docCache.clear()
+        docViewer._processPrefetch()
+        assert len(docCache) == 0
+
+    # Changed settings, text or tags invalidate the entry
+    converted = []
+    origConvert = ToHtml.doConvert
+
+    def doConvert(self):
+        converted.append(True)
+        origConvert(self)
+
+    monkeypatch.setattr(ToHtml, "doConvert", doConvert)
+
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 1
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 1
+
+    CONFIG.viewComments = not CONFIG.viewComments
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 2
+    CONFIG.viewComments = not CONFIG.viewComments
+
+    nwItem = SHARED.project.tree[sHandle]
+    layout = nwItem.itemLayout
+    nwItem.setLayout(nwItemLayout.NOTE)
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 3
+    nwItem.setLayout(layout)
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 4
+
+    doc = SHARED.project.storage.getDocument(sHandle)
+    text = doc.readDocument() or ""
+    doc.writeDocument(text + "\n\nMore text.\n")
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 5
+    assert docViewer.toPlainText().rstrip().endswith("More text.")
+
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 5
+    index.scanText("4c4f28287af27", "# Jane Smith\n\n@tag: Jane\n")
+    assert docViewer.loadText(sHandle) is True
+    assert len(converted) == 6
+
+    # The least recently used entries are dropped
+    for i in range(docCache.MAX_ENTRIES + 1):
+        docCache.put(f"{i:013x}", (), "")
+    assert len(docCache) == docCache.MAX_ENTRIES
+    assert "0000000000000" not in docCache
+    assert sHandle not in docCache
+
+    # Closing the project clears the cache
+    docViewer.clearNavHistory()
+    assert len(docCache) == 0
+
+    # qtbot.stop()
+
+# END Test testGuiViewer_Cache
+
+
+@pytest.mark.gui
+def testGuiViewer_TabsBenchmark(qtbot, nwGUI, prjLipsum):
+    """Benchmark viewing a document with 5000 tabs, which should be
+    rendered in linear time with all tabs preserved.
+    """
+    assert nwGUI.openProject(prjLipsum)
+    docViewer: GuiDocViewer = nwGUI.docViewer
+
+    sHandle = "88243afbe5ed8"
+    text = "### Tabs\n\n" + "\n\n".join("One\tTwo\tThree\tFour\tFive\tSix" for _ in range(1000))
+    assert text.count("\t") == 5000
+    SHARED.project.storage.getDocument(sHandle).writeDocument(text)
+
+    tStart = time.perf_counter()
+    assert docViewer.loadText(sHandle) is True
+    tLoad = time.perf_counter() - tStart
+
+    assert docViewer.toPlainText().count("\t") == 5000
+    assert tLoad < 5.0
+
+    # qtbot.stop()
+
+# END Test testGuiViewer_TabsBenchmark
@@ -21,6 +21,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import sys
+import json
 import pytest
 
 from shutil import copyfile
@@ -31,13 +32,15 @@ from PyQt5.QtGui import QPalette
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMenu, QInputDialog
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, MEMORY, SHARED
 from novelwriter.enum import nwItemType, nwView, nwWidget
+from novelwriter.core.project import NWProject
 from novelwriter.gui.outline import GuiOutlineView
 from novelwriter.gui.projtree import GuiProjectTree
 from novelwriter.gui.doceditor import GuiDocEditor
 from novelwriter.gui.noveltree import GuiNovelView
 from novelwriter.tools.welcome import GuiWelcome
+from novelwriter.tools.manuscript import GuiManuscript
 from novelwriter.dialogs.editlabel import GuiEditLabel
 
 KEY_DELAY = 1
@@ -75,7 +78,7 @@ def testGuiMain_Launch(qtbot, monkeypatch, nwGUI, projPath):
 
     # Project open fails
     with monkeypatch.context() as mp:
-        mp.setattr(SHARED, "openProject", lambda *a: False)
+        mp.setattr(SHARED, "openProject", lambda *a, **k: False)
         assert nwGUI.openProject(projPath) is False
 
     # Handle locked project
@@ -118,7 +121,7 @@ def testGuiMain_ProjectTreeItems(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     with monkeypatch.context() as mp:
         mp.setattr(GuiProjectTree, "hasFocus", lambda *a: True)
         assert nwGUI.docEditor.docHandle is None
-        nwGUI.projView.projTree._getTreeItem(sHandle).setSelected(True)
+        nwGUI.projView.projTree.setSelectedHandle(sHandle)
         nwGUI._keyPressReturn()
         assert nwGUI.docEditor.docHandle == sHandle
         assert nwGUI.closeDocument() is True
@@ -141,8 +144,8 @@ def testGuiMain_ProjectTreeItems(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     with monkeypatch.context() as mp:
         mp.setattr(GuiOutlineView, "treeHasFocus", lambda *a: True)
         assert nwGUI.docEditor.docHandle is None
-        selItem = nwGUI.outlineView.outlineTree.topLevelItem(2)
-        nwGUI.outlineView.outlineTree.setCurrentItem(selItem)
+        outlineTree = nwGUI.outlineView.outlineTree
+        outlineTree.setCurrentIndex(outlineTree.model().index(2, 0))
         nwGUI._keyPressReturn()
         assert nwGUI.docEditor.docHandle == sHandle
         assert nwGUI.closeDocument() is True
@@ -152,6 +155,36 @@ def testGuiMain_ProjectTreeItems(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
 # END Test testGuiMain_ProjectTreeItems
 
 
+@pytest.mark.gui
+def testGuiMain_OpenProjectLock(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
+    """Test that the editor is read only until the project open is
+    complete.
+    """
+    buildTestProject(nwGUI, projPath)
+
+    sHandle = "000000000000f"
+    assert nwGUI.openDocument(sHandle) is True
+    assert nwGUI.closeProject() is True
+
+    states = []
+    completeOpenProject = NWProject.completeOpenProject
+
+    def checkEditor(self):
+        docEditor = nwGUI.docEditor
+        states.append((docEditor.docHandle, docEditor.isReadOnly(), docEditor.insertText("X")))
+        return completeOpenProject(self)
+
+    monkeypatch.setattr(NWProject, "completeOpenProject", checkEditor)
+    assert nwGUI.openProject(projPath) is True
+    assert states == [(sHandle, True, False)]
+    assert nwGUI.docEditor.isReadOnly() is False
+    assert nwGUI.docEditor.docChanged is False
+
+    # qtbot.stop()
+
+# END Test testGuiMain_OpenProjectLock
+
+
 @pytest.mark.gui
 def testGuiMain_UpdateTheme(qtbot, nwGUI):
     """Test updating the theme in the GUI."""
@@ -188,7 +221,7 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
     assert nwGUI.closeProject()
 
     assert len(SHARED.project.tree) == 0
-    assert len(SHARED.project.tree._order) == 0
+    assert len(SHARED.project.tree) == 0
     assert len(SHARED.project.tree._roots) == 0
     assert SHARED.project.tree.trashRoot is None
     assert SHARED.project.data.name == ""
@@ -207,7 +240,7 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
 
     # Check that we loaded the data
     assert len(SHARED.project.tree) == 8
-    assert len(SHARED.project.tree._order) == 8
+    assert len(SHARED.project.tree) == 8
     assert len(SHARED.project.tree._roots) == 4
     assert SHARED.project.tree.trashRoot is None
     assert SHARED.project.data.name == "New Project"
@@ -215,14 +248,14 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
     assert SHARED.project.data.spellCheck is False
 
     # Check that tree items have been created
-    assert nwGUI.projView.projTree._getTreeItem(C.hNovelRoot) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hPlotRoot) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hCharRoot) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hWorldRoot) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hTitlePage) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hChapterDir) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hChapterDoc) is not None
-    assert nwGUI.projView.projTree._getTreeItem(C.hSceneDoc) is not None
+    assert nwGUI.projView.projTree._getTreeIndex(C.hNovelRoot).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hPlotRoot).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hCharRoot).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hWorldRoot).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hTitlePage).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hChapterDir).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hChapterDoc).isValid()
+    assert nwGUI.projView.projTree._getTreeIndex(C.hSceneDoc).isValid()
 
     nwGUI.mainMenu.aSpellCheck.setChecked(True)
     nwGUI.mainMenu._toggleSpellCheck()
@@ -236,7 +269,7 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
     # Add a Character File
     nwGUI.switchFocus(nwWidget.TREE)
     nwGUI.projView.projTree.clearSelection()
-    nwGUI.projView.projTree._getTreeItem(C.hCharRoot).setSelected(True)
+    nwGUI.projView.projTree.setSelectedHandle(C.hCharRoot)
     nwGUI.projView.projTree.newTreeItem(nwItemType.FILE, None, isNote=True)
     assert nwGUI.openSelectedItem()
 
@@ -263,7 +296,7 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
     # Add a Plot File
     nwGUI.switchFocus(nwWidget.TREE)
     nwGUI.projView.projTree.clearSelection()
-    nwGUI.projView.projTree._getTreeItem(C.hPlotRoot).setSelected(True)
+    nwGUI.projView.projTree.setSelectedHandle(C.hPlotRoot)
     nwGUI.projView.projTree.newTreeItem(nwItemType.FILE, None, isNote=True)
     assert nwGUI.openSelectedItem()
 
@@ -285,7 +318,7 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
     # Add a World File
     nwGUI.switchFocus(nwWidget.TREE)
     nwGUI.projView.projTree.clearSelection()
-    nwGUI.projView.projTree._getTreeItem(C.hWorldRoot).setSelected(True)
+    nwGUI.projView.projTree.setSelectedHandle(C.hWorldRoot)
     nwGUI.projView.projTree.newTreeItem(nwItemType.FILE, None, isNote=True)
     assert nwGUI.openSelectedItem()
 
@@ -316,9 +349,9 @@ def testGuiMain_Editing(qtbot, monkeypatch, nwGUI, projPath, tstPaths, mockRnd):
     # Select the 'New Scene' file
     nwGUI.switchFocus(nwWidget.TREE)
     nwGUI.projView.projTree.clearSelection()
-    nwGUI.projView.projTree._getTreeItem(C.hNovelRoot).setExpanded(True)
-    nwGUI.projView.projTree._getTreeItem(C.hChapterDir).setExpanded(True)
-    nwGUI.projView.projTree._getTreeItem(C.hSceneDoc).setSelected(True)
+    nwGUI.projView.projTree.setExpanded(nwGUI.projView.projTree._getTreeIndex(C.hNovelRoot), True)
+    nwGUI.projView.projTree.setExpanded(nwGUI.projView.projTree._getTreeIndex(C.hChapterDir), True)
+    nwGUI.projView.projTree.setSelectedHandle(C.hSceneDoc)
     assert nwGUI.openSelectedItem()
 
     # Type something into the document
@@ -626,3 +659,71 @@ def testGuiMain_Features(qtbot, nwGUI, projPath, mockRnd):
     # qtbot.stop()
 
 # END Test testGuiMain_Features
+
+
+@pytest.mark.gui
+def testGuiMain_ExternalChanges(qtbot, nwGUI, projPath, mockRnd):
+    """Test handling documents changed outside of novelWriter."""
+    buildTestProject(nwGUI, projPath)
+    project = SHARED.project
+    contentPath = project.storage.contentPath
+    watcher = project.storage.watcher
+    watcher.checkContent()
+
+    assert nwGUI.openDocument(C.hSceneDoc)
+
+    # Change the open document and one other document on disk
+    (contentPath / f"{C.hSceneDoc}.nwd").write_text("### Changed Scene\n\n@pov: Jane\n")
+    (contentPath / f"{C.hChapterDoc}.nwd").write_text("## Changed Chapter\n\nText\n")
+    assert watcher.checkContent() == [C.hChapterDoc, C.hSceneDoc]
+
+    # The editor is reloaded, and the index updated in the background
+    assert nwGUI.docEditor.getText() == "### Changed Scene\n\n@pov: Jane\n"
+    qtbot.waitUntil(lambda: not nwGUI.reindexTimer.isActive(), timeout=1000)
+    assert project.index.getItemHeader(C.hSceneDoc, "T0001").title == "Changed Scene"
+    assert project.index.getItemHeader(C.hChapterDoc, "T0001").title == "Changed Chapter"
+
+    # Unknown files are ignored
+    (contentPath / "0123456789abc.nwd").write_text("# Unknown\n")
+    assert watcher.checkContent() == ["0123456789abc"]
+    assert nwGUI.reindexTimer.isActive() is False
+
+    # qtbot.stop()
+
+# END Test testGuiMain_ExternalChanges
+
+
+@pytest.mark.gui
+def testGuiMain_MemoryReport(qtbot, nwGUI, projPath, mockRnd):
+    """Test writing the memory report."""
+    buildTestProject(nwGUI, projPath)
+    assert nwGUI.openDocument(C.hSceneDoc)
+    nwGUI.docEditor.setPlainText("x"*5000)
+
+    for oldReport in CONFIG.dataPath().glob("memory_*.json"):
+        oldReport.unlink()
+
+    nwGUI.dumpMemoryReport()
+    reports = list(CONFIG.dataPath().glob("memory_*.json"))
+    assert len(reports) == 1
+
+    report = json.loads(reports[0].read_text(encoding="utf-8"))
+    reports[0].unlink()
+    subsystems = report["subsystems"]
+    assert subsystems["project.tree"] > 0
+    assert subsystems["project.index"] > 0
+    assert subsystems["project.storage"] > 0
+    assert subsystems["editor.document"] >= 10000
+    assert subsystems["cache.icons"] > 0
+    assert "viewer.document" in subsystems
+    assert report["widgets"]["GuiMain"] >= 1
+
+    # The preview is only included while the manuscript tool is open
+    nwGUI.showBuildManuscriptDialog()
+    manus = SHARED.findTopLevelWidget(GuiManuscript)
+    assert isinstance(manus, GuiManuscript)
+    assert "build.preview" in MEMORY.report()["subsystems"]
+    manus.close()
+    assert "build.preview" not in MEMORY.report()["subsystems"]
+
+# END Test testGuiMain_MemoryReport
@@ -425,7 +425,7 @@ def testGuiMenu_Insert(qtbot, monkeypatch, nwGUI, fncPath, projPath, mockRnd):
     """Test the Insert menu."""
     buildTestProject(nwGUI, projPath)
 
-    assert nwGUI.projView.projTree._getTreeItem(C.hSceneDoc) is not None
+    assert nwGUI.projView.projTree._getTreeIndex(C.hSceneDoc).isValid()
     assert nwGUI.openDocument(C.hSceneDoc) is True
     nwGUI.docEditor.clear()
 
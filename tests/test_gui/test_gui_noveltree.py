@@ -45,7 +45,7 @@ def testGuiNovelTree_TreeItems(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
 
     nwGUI.switchFocus(nwWidget.TREE)
     nwGUI.projView.projTree.clearSelection()
-    nwGUI.projView.projTree._getTreeItem(C.hCharRoot).setSelected(True)
+    nwGUI.projView.projTree.setSelectedHandle(C.hCharRoot)
     nwGUI.projView.projTree.newTreeItem(nwItemType.FILE)
 
     contentPath = SHARED.project.storage.contentPath
@@ -234,3 +234,98 @@ def testGuiNovelTree_TreeItems(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     nwGUI.closeProject()
 
 # END Test testGuiNovelTree_TreeItems
+
+
+@pytest.mark.gui
+def testGuiNovelTree_Structure(qtbot, monkeypatch, nwGUI, prjLipsum):
+    """Test replacing the rows of a single item in the novel tree."""
+    assert nwGUI.openProject(prjLipsum)
+    nwGUI.rebuildIndex()
+
+    novelView = nwGUI.novelView
+    novelTree = novelView.novelTree
+    index = SHARED.project.index
+
+    sHandle = "88243afbe5ed8"
+    novelTree.refreshTree(overRide=True)
+    nRows = novelTree.topLevelItemCount()
+    keys = [
+        novelTree.topLevelItem(i).data(novelTree.C_DATA, novelTree.D_KEY)
+        for i in range(nRows)
+    ]
+    first = keys.index(f"{sHandle}:T0001")
+    items = [novelTree.topLevelItem(i) for i in range(nRows)]
+
+    # Select an item after the scene
+    items[first + 2].setSelected(True)
+    selKey = items[first + 2].data(novelTree.C_DATA, novelTree.D_KEY)
+
+    # Adding a heading only replaces the rows of the item
+    text = SHARED.project.storage.getDocument(sHandle).readDocument() or ""
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiNovelTree, "_populateTree", lambda *a: pytest.fail("Rebuilt"))
+        index.scanText(sHandle, text + "\n\n#### New Section\n\nText.\n")
+        novelView.updateNovelStructure(sHandle)
+
+    assert novelTree.topLevelItemCount() == nRows + 1
+    assert novelTree.topLevelItem(0) is items[0]
+    assert novelTree.topLevelItem(nRows) is items[-1]
+    newKeys = [
+        novelTree.topLevelItem(i).data(novelTree.C_DATA, novelTree.D_KEY)
+        for i in range(nRows + 1)
+    ]
+    assert [k for k in newKeys if not k.startswith(sHandle)] == [
+        k for k in keys if not k.startswith(sHandle)
+    ]
+    assert newKeys.index(f"{sHandle}:T0001") == first
+    assert novelTree.selectedItems()[0].data(novelTree.C_DATA, novelTree.D_KEY) == selKey
+
+    # The tree is not rebuilt on the next refresh
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiNovelTree, "_populateTree", lambda *a: pytest.fail("Rebuilt"))
+        novelView.refreshTree()
+
+    # Removing all headings removes the rows, and adding them back
+    # inserts them at the same position
+    index.scanText(sHandle, "Just text.\n")
+    novelView.updateNovelStructure(sHandle)
+    removed = [
+        novelTree.topLevelItem(i).data(novelTree.C_DATA, novelTree.D_KEY)
+        for i in range(novelTree.topLevelItemCount())
+    ]
+    assert not any(k.startswith(sHandle) for k in removed)
+
+    index.scanText(sHandle, text)
+    novelView.updateNovelStructure(sHandle)
+    assert [
+        novelTree.topLevelItem(i).data(novelTree.C_DATA, novelTree.D_KEY)
+        for i in range(novelTree.topLevelItemCount())
+    ] == keys
+
+    # An unknown heading from a meta update is inserted too
+    index.scanText(sHandle, text + "\n\n#### New Section\n\nText.\n")
+    novelView.updateNovelItemMeta(sHandle)
+    assert novelTree.topLevelItemCount() == nRows + 1
+
+    # A change to another document in the root forces a rebuild
+    oHandle = next(h for _, h, _, _ in index.novelStructure() if h != sHandle)
+    oText = SHARED.project.storage.getDocument(oHandle).readDocument() or ""
+    index.scanText(oHandle, oText, blockSignal=True)
+    rebuilt = []
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiNovelTree, "_populateTree", lambda *a: rebuilt.append(True))
+        index.scanText(sHandle, text)
+        novelView.updateNovelStructure(sHandle)
+    assert rebuilt == [True]
+
+    # A change to the project tree forces a rebuild
+    rebuilt = []
+    with monkeypatch.context() as mp:
+        mp.setattr(nwGUI.projView, "changedSince", lambda *a: True)
+        mp.setattr(GuiNovelTree, "_populateTree", lambda *a: rebuilt.append(True))
+        novelView.updateNovelStructure(sHandle)
+    assert rebuilt == [True]
+
+    # qtbot.stop()
+
+# END Test testGuiNovelTree_Structure
@@ -32,6 +32,7 @@ from PyQt5.QtWidgets import QFileDialog, QWidget, QAction
 
 from novelwriter import CONFIG, SHARED
 from novelwriter.enum import nwItemClass, nwOutline, nwView
+from novelwriter.gui.outlinemodel import GuiOutlineModel
 
 
 @pytest.mark.gui
@@ -81,7 +82,7 @@ def testGuiOutline_Main(qtbot, monkeypatch, nwGUI, projPath):
     colWidth = {h: outlineTree.DEF_WIDTH[h] for h in nwOutline}
     colHidden = {h: outlineTree.DEF_HIDDEN[h] for h in nwOutline}
 
-    assert outlineTree.topLevelItemCount() > 0
+    assert outlineTree.model().rowCount() > 0
 
     # Save header state not allowed
     outlineTree._lastBuild = 0
@@ -234,9 +235,9 @@ def testGuiOutline_Content(qtbot, monkeypatch, nwGUI, prjLipsum, fncPath, tstPat
 
     # First Item
     outlineTree.refreshTree()
-    selItem = outlineTree.topLevelItem(0)
+    selItem = outlineTree.model().index(0, 0)
 
-    outlineTree.setCurrentItem(selItem)
+    outlineTree.setCurrentIndex(selItem)
     assert outlineData.titleLabel.text() == "<b>Title</b>"
     assert outlineData.titleValue.text() == "Lorem Ipsum"
     assert outlineData.fileValue.text() == "Lorem Ipsum"
@@ -247,11 +248,11 @@ def testGuiOutline_Content(qtbot, monkeypatch, nwGUI, prjLipsum, fncPath, tstPat
     assert outlineData.pCValue.text() == "3"
 
     # Scene One
-    selItem = outlineTree.topLevelItem(4)
+    selItem = outlineTree.model().index(4, 0)
 
     outlineTree.clearSelection()
     assert outlineTree.getSelectedHandle() == (None, None)  # No selection
-    outlineTree.setCurrentItem(selItem)
+    outlineTree.setCurrentIndex(selItem)
     tHandle, sTitle = outlineTree.getSelectedHandle()
     assert tHandle == "88243afbe5ed8"
     assert sTitle == "T0001"
@@ -267,9 +268,9 @@ def testGuiOutline_Content(qtbot, monkeypatch, nwGUI, prjLipsum, fncPath, tstPat
     assert nwGUI.docViewer.docHandle == "4c4f28287af27"
 
     # Scene One, Section Two
-    selItem = outlineTree.topLevelItem(5)
+    selItem = outlineTree.model().index(5, 0)
 
-    outlineTree.setCurrentItem(selItem)
+    outlineTree.setCurrentIndex(selItem)
     tHandle, sTitle = outlineTree.getSelectedHandle()
     assert tHandle == "88243afbe5ed8"
     assert sTitle == "T0002"
@@ -279,7 +280,7 @@ def testGuiOutline_Content(qtbot, monkeypatch, nwGUI, prjLipsum, fncPath, tstPat
     assert outlineData.fileValue.text() == "Scene One"
     assert outlineData.itemValue.text() == "Finished"
 
-    outlineTree._treeDoubleClick(selItem, 0)
+    outlineTree._treeDoubleClick(selItem)
     assert nwGUI.docEditor.docHandle == "88243afbe5ed8"
 
     # Dump to CSV
@@ -298,3 +299,109 @@ def testGuiOutline_Content(qtbot, monkeypatch, nwGUI, prjLipsum, fncPath, tstPat
     # qtbot.stop()
 
 # END Test testGuiOutline_Content
+
+
+@pytest.mark.gui
+def testGuiOutline_Model(qtbot, monkeypatch, nwGUI, prjLipsum):
+    """Test the outline model updates, sorting and filtering."""
+    assert nwGUI.openProject(prjLipsum)
+
+    nwGUI.rebuildIndex()
+    nwGUI._changeView(nwView.OUTLINE)
+
+    outlineTree = nwGUI.outlineView.outlineTree
+    outlineModel = outlineTree.outlineModel
+    proxy = outlineTree.model()
+    index = SHARED.project.index
+
+    sHandle = "88243afbe5ed8"
+    lipHandle = "b3643d0f92e32"
+    outlineTree.refreshTree(rootHandle=lipHandle, overRide=True)
+    assert outlineModel.rootHandle == lipHandle
+    nRows = outlineModel.rowCount()
+    assert nRows > 0
+
+    def sceneRows():
+        return [
+            i for i in range(outlineModel.rowCount())
+            if outlineModel.index(i, 0).data(GuiOutlineModel.D_HANDLE) == sHandle
+        ]
+
+    changed = []
+    outlineModel.dataChanged.connect(lambda a, b: changed.append((a.row(), b.row())))
+
+    # Re-indexing a document with the same headings only updates its rows
+    rows = sceneRows()
+    wCol = outlineModel.column(nwOutline.WCOUNT)
+    text = SHARED.project.storage.getDocument(sHandle).readDocument() or ""
+    index.scanText(sHandle, text + "\n\nExtra words here.\n")
+    assert changed == [(rows[0], rows[-1])]
+    assert outlineModel.rowCount() == nRows
+    words = index.getItemHeader(sHandle, "T0002").wordCount  # type: ignore
+    assert outlineModel.index(rows[-1], wCol).data() == f"{words:n}"
+
+    # The tree is not rebuilt on the next refresh
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiOutlineModel, "reload", lambda *a: pytest.fail("Rebuilt"))
+        outlineTree.refreshTree(rootHandle=lipHandle)
+
+    # Adding a heading inserts a row
+    index.scanText(sHandle, text + "\n\n#### New Section\n\nText.\n")
+    assert outlineModel.rowCount() == nRows + 1
+    assert sceneRows() == rows + [rows[-1] + 1]
+    assert outlineModel.index(rows[-1] + 1, 0).data() == "New Section"
+
+    # Removing all headings removes the rows
+    index.scanText(sHandle, "Just text.\n")
+    assert outlineModel.rowCount() == nRows - len(rows)
+    assert sceneRows() == []
+
+    # Adding them back reloads the rows
+    index.scanText(sHandle, text)
+    assert outlineModel.rowCount() == nRows
+    assert sceneRows() == rows
+
+    # An update doesn't hide a change to another document that the
+    # outline wasn't told about
+    oHandle = next(h for _, h, _, _ in index.novelStructure(rootHandle=lipHandle) if h != sHandle)
+    oText = SHARED.project.storage.getDocument(oHandle).readDocument() or ""
+    index.scanText(oHandle, oText, blockSignal=True)
+    index.scanText(sHandle, text)
+    rebuilt = []
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiOutlineModel, "reload", lambda *a: rebuilt.append(True))
+        outlineTree.refreshTree(rootHandle=lipHandle)
+    assert rebuilt == [True]
+
+    # Rebuilding the index rebuilds the tree on the next refresh
+    nwGUI.rebuildIndex()
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiOutlineModel, "reload", lambda *a: pytest.fail("Rebuilt"))
+        with pytest.raises(pytest.fail.Exception):
+            outlineTree.refreshTree(rootHandle=lipHandle)
+
+    # Sorting cycles through ascending, descending and novel order
+    outlineTree.refreshTree(rootHandle=lipHandle, overRide=True)
+    novelOrder = [proxy.index(i, 0).data() for i in range(proxy.rowCount())]
+    header = outlineTree.header()
+    header.setSortIndicator(wCol, Qt.SortOrder.AscendingOrder)
+    counts = [proxy.index(i, wCol).data(GuiOutlineModel.D_SORT) for i in range(nRows)]
+    assert counts == sorted(counts)
+    header.setSortIndicator(wCol, Qt.SortOrder.DescendingOrder)
+    counts = [proxy.index(i, wCol).data(GuiOutlineModel.D_SORT) for i in range(nRows)]
+    assert counts == sorted(counts, reverse=True)
+    header.setSortIndicator(wCol, Qt.SortOrder.AscendingOrder)
+    assert header.sortIndicatorSection() == -1
+    assert [proxy.index(i, 0).data() for i in range(proxy.rowCount())] == novelOrder
+
+    # Filter rows
+    nwGUI.outlineView.outlineBar.filterValue.setText("scene one")
+    assert 0 < proxy.rowCount() < nRows
+    outlineTree.setCurrentIndex(proxy.index(0, 0))
+    assert outlineTree.getSelectedHandle()[0] == sHandle
+    nwGUI.outlineView.outlineBar.filterValue.setText("")
+    assert proxy.rowCount() == nRows
+
+    # qtbot.stop()
+
+# END Test testGuiOutline_Model
@@ -21,7 +21,9 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import pytest
+import random
 
+from time import time
 from pathlib import Path
 from novelwriter.core.project import NWProject
 
@@ -29,8 +31,8 @@ from tools import C, buildTestProject
 from mocked import causeOSError
 
 from PyQt5.QtGui import QDragEnterEvent, QDragMoveEvent, QDropEvent, QMouseEvent
-from PyQt5.QtCore import QEvent, QMimeData, QPoint, QTimer, Qt
-from PyQt5.QtWidgets import QMessageBox, QMenu, QTreeWidget, QTreeWidgetItem, QDialog
+from PyQt5.QtCore import QEvent, QItemSelectionModel, QMimeData, QModelIndex, QPoint, QTimer, Qt
+from PyQt5.QtWidgets import QAbstractItemView, QDialog, QMenu, QMessageBox, QTreeView
 
 from novelwriter import CONFIG, SHARED
 from novelwriter.enum import nwItemLayout, nwItemType, nwItemClass, nwWidget
@@ -41,6 +43,14 @@ from novelwriter.dialogs.docmerge import GuiDocMerge
 from novelwriter.dialogs.docsplit import GuiDocSplit
 from novelwriter.dialogs.editlabel import GuiEditLabel
 
+SELECT = QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows
+DESELECT = QItemSelectionModel.SelectionFlag.Deselect | QItemSelectionModel.SelectionFlag.Rows
+
+
+def selectedHandles(projTree: GuiProjectTree) -> list[str | None]:
+    """Return the handles of the selected rows in the project tree."""
+    return [projTree.projModel.handle(x) for x in projTree.selectionModel().selectedRows()]
+
 
 @pytest.mark.gui
 def testGuiProjTree_NewItems(qtbot, caplog, monkeypatch, nwGUI, projPath, mockRnd):
@@ -157,8 +167,8 @@ def testGuiProjTree_NewItems(qtbot, caplog, monkeypatch, nwGUI, projPath, mockRn
         mp.setattr(NWProject, "trashFolder", lambda *a: None)
         assert projTree._addTrashRoot() is None
 
-    assert isinstance(projTree._addTrashRoot(), QTreeWidgetItem)
-    trashHandle = project.trashFolder()
+    trashHandle = projTree._addTrashRoot()
+    assert trashHandle == project.trashFolder()
     projView.setSelectedHandle(trashHandle)
     assert projTree.newTreeItem(nwItemType.FILE) is False
     assert "Cannot add new files or folders to the Trash folder" in caplog.text
@@ -183,7 +193,7 @@ def testGuiProjTree_NewItems(qtbot, caplog, monkeypatch, nwGUI, projPath, mockRn
     assert projTree.revealNewTreeItem(nHandle) is False
 
     # Adding an invalid item directly to the tree should also fail
-    assert projTree._addTreeItem(None) is None
+    assert projTree._addTreeItem(None) is False
 
     # Clean up
     # qtbot.stop()
@@ -275,19 +285,19 @@ def testGuiProjTree_MoveItems(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     # ===========
 
     projView.setSelectedHandle(C.hNovelRoot)
-    assert SHARED.project.tree._order.index(C.hNovelRoot) == 0
+    assert SHARED.project.tree.handles().index(C.hNovelRoot) == 0
 
     # Move novel folder up
     assert projTree.moveTreeItem(-1) is False
-    assert SHARED.project.tree._order.index(C.hNovelRoot) == 0
+    assert SHARED.project.tree.handles().index(C.hNovelRoot) == 0
 
     # Move novel folder down
     assert projTree.moveTreeItem(1) is True
-    assert SHARED.project.tree._order.index(C.hNovelRoot) == 1
+    assert SHARED.project.tree.handles().index(C.hNovelRoot) == 1
 
     # Move novel folder up again
     assert projTree.moveTreeItem(-1) is True
-    assert SHARED.project.tree._order.index(C.hNovelRoot) == 0
+    assert SHARED.project.tree.handles().index(C.hNovelRoot) == 0
 
     # Clean up
     # qtbot.stop()
@@ -751,8 +761,8 @@ def testGuiProjTree_Duplicate(qtbot, monkeypatch, nwGUI: GuiMain, projPath, mock
     assert len(SHARED.project.tree) == 8
 
     projTree = nwGUI.projView.projTree
-    projTree._getTreeItem(C.hNovelRoot).setExpanded(True)  # type: ignore
-    projTree._getTreeItem(C.hChapterDir).setExpanded(True)  # type: ignore
+    projTree.setExpanded(projTree._getTreeIndex(C.hNovelRoot), True)
+    projTree.setExpanded(projTree._getTreeIndex(C.hChapterDir), True)
 
     # Nothing to do
     assert projTree._duplicateFromHandle(C.hInvalid) is False
@@ -777,7 +787,7 @@ def testGuiProjTree_Duplicate(qtbot, monkeypatch, nwGUI: GuiMain, projPath, mock
     assert len(SHARED.project.tree) == 21
 
     # Check tree order that all items are next to each other
-    assert SHARED.project.tree._order == [
+    assert SHARED.project.tree.handles() == [
         C.hNovelRoot, C.hTitlePage, "0000000000010", C.hChapterDir, C.hChapterDoc, C.hSceneDoc,
         "0000000000011", "0000000000012", "0000000000013", "0000000000014", "0000000000015",
         "0000000000016", "0000000000017", "0000000000018", "0000000000019", "000000000001a",
@@ -807,12 +817,12 @@ def testGuiProjTree_AutoScroll(qtbot, monkeypatch, nwGUI: GuiMain, projPath, moc
     projTree: GuiProjectTree = nwGUI.projView.projTree
 
     monkeypatch.setattr(GuiEditLabel, "getLabel", lambda parent, text: (text, True))
-    monkeypatch.setattr(QTreeWidget, "dragMoveEvent", lambda *a, **k: None)
+    monkeypatch.setattr(QTreeView, "dragMoveEvent", lambda *a, **k: None)
     monkeypatch.setattr(QTimer, "isActive", lambda *a: False)
     monkeypatch.setattr(QTimer, "start", lambda *a: None)
 
     projTree.setSelectedHandle(C.hChapterDir, True)
-    projTree._getTreeItem(C.hChapterDir).setExpanded(True)  # type: ignore
+    projTree.setExpanded(projTree._getTreeIndex(C.hChapterDir), True)
     for i in range(100):
         projTree.newTreeItem(nwItemType.FILE, None, 3, False)
 
@@ -872,25 +882,24 @@ def testGuiProjTree_DragAndDrop(qtbot, monkeypatch, caplog, nwGUI: GuiMain, proj
     buildTestProject(nwGUI, projPath)
     projTree: GuiProjectTree = nwGUI.projView.projTree
 
-    monkeypatch.setattr(QTreeWidget, "dropEvent", lambda *a, **k: None)
-
     projTree.setSelectedHandle(C.hSceneDoc, True)
-    projTree._getTreeItem(C.hChapterDir).setExpanded(True)  # type: ignore
+    projTree.setExpanded(projTree._getTreeIndex(C.hChapterDir), True)
 
-    nPos = projTree.visualItemRect(projTree._getTreeItem(C.hNovelRoot)).bottomLeft()
+    nPos = projTree.visualRect(projTree._getTreeIndex(C.hNovelRoot)).bottomLeft()
     action = Qt.DropAction.MoveAction
     mime = QMimeData()
     mouse = Qt.MouseButton.LeftButton
     modifier = Qt.KeyboardModifier.NoModifier
 
     projTree.saveTreeOrder()
-    treeOrder = SHARED.project.tree._order
+    treeOrder = SHARED.project.tree.handles()
 
     # Move an item, but no selection
+    projTree.clearSelection()
     event = QDropEvent(nPos, action, mime, mouse, modifier)
     projTree.dropEvent(event)
     projTree.saveTreeOrder()
-    assert SHARED.project.tree._order == treeOrder
+    assert SHARED.project.tree.handles() == treeOrder
 
     # Invalid location
     caplog.clear()
@@ -899,31 +908,33 @@ def testGuiProjTree_DragAndDrop(qtbot, monkeypatch, caplog, nwGUI: GuiMain, proj
     assert event.isAccepted() is False
     assert "Invalid drop location" in caplog.text
     projTree.saveTreeOrder()
-    assert SHARED.project.tree._order == treeOrder
+    assert SHARED.project.tree.handles() == treeOrder
 
     # Root item selected
     caplog.clear()
     event = QDropEvent(nPos, action, mime, mouse, modifier)
     projTree.clearSelection()
-    projTree._getTreeItem(C.hTitlePage).setSelected(True)  # type: ignore
-    projTree._getTreeItem(C.hNovelRoot).setSelected(True)  # type: ignore
+    projTree.selectionModel().blockSignals(True)
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hTitlePage), SELECT)
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hNovelRoot), SELECT)
+    projTree.selectionModel().blockSignals(False)
     projTree.dropEvent(event)
     assert event.isAccepted() is False
     projTree.saveTreeOrder()
-    assert SHARED.project.tree._order == treeOrder
+    assert SHARED.project.tree.handles() == treeOrder
 
     # Make sure illegal drag events are cancelled
     with monkeypatch.context() as mp:
-        mp.setattr(QTreeWidget, "dragEnterEvent", lambda *a: None)
+        mp.setattr(QTreeView, "dragEnterEvent", lambda *a: None)
         mime = QMimeData()
         mime.setText("foobar")
         event = QDragEnterEvent(nPos, action, mime, mouse, modifier)
         projTree.clearSelection()
-        projTree._getTreeItem(C.hNovelRoot).setSelected(True)  # type: ignore
-        projTree._getTreeItem(C.hTitlePage).setSelected(True)  # type: ignore
-        projTree._getTreeItem(C.hChapterDoc).setSelected(True)  # type: ignore
-        assert projTree.selectedItems() == [  # Novel Root selection is cancelled automatically
-            projTree._getTreeItem(C.hTitlePage), projTree._getTreeItem(C.hChapterDoc)
+        projTree.selectionModel().select(projTree._getTreeIndex(C.hNovelRoot), SELECT)
+        projTree.selectionModel().select(projTree._getTreeIndex(C.hTitlePage), SELECT)
+        projTree.selectionModel().select(projTree._getTreeIndex(C.hChapterDoc), SELECT)
+        assert selectedHandles(projTree) == [  # Novel Root selection is cancelled automatically
+            C.hTitlePage, C.hChapterDoc
         ]
         projTree.dragEnterEvent(event)
         assert mime.text() == ""
@@ -931,26 +942,75 @@ def testGuiProjTree_DragAndDrop(qtbot, monkeypatch, caplog, nwGUI: GuiMain, proj
 
     # Pop the alert
     with monkeypatch.context() as mp:
-        mp.setattr(QTreeWidget, "startDrag", lambda *a: None)
+        mp.setattr(QTreeView, "startDrag", lambda *a: None)
         projTree.startDrag(None)  # type: ignore
         assert projTree._popAlert is None
 
     # Valid drag events are processed
     with monkeypatch.context() as mp:
-        mp.setattr(QTreeWidget, "dragEnterEvent", lambda *a: None)
+        mp.setattr(QTreeView, "dragEnterEvent", lambda *a: None)
         mime = QMimeData()
         mime.setText("foobar")
         event = QDragEnterEvent(nPos, action, mime, mouse, modifier)
         projTree.clearSelection()
-        projTree._getTreeItem(C.hChapterDoc).setSelected(True)  # type: ignore
-        projTree._getTreeItem(C.hSceneDoc).setSelected(True)  # type: ignore
-        assert projTree.selectedItems() == [  # Novel Root selection is cancelled automatically
-            projTree._getTreeItem(C.hChapterDoc), projTree._getTreeItem(C.hSceneDoc)
-        ]
+        projTree.selectionModel().select(projTree._getTreeIndex(C.hChapterDoc), SELECT)
+        projTree.selectionModel().select(projTree._getTreeIndex(C.hSceneDoc), SELECT)
+        assert selectedHandles(projTree) == [C.hChapterDoc, C.hSceneDoc]
         projTree.dragEnterEvent(event)
         assert mime.text() == "foobar"
         assert projTree._popAlert is None
 
+    # Drop the scene on the chapter folder
+    tree = SHARED.project.tree
+    projTree.setSelectedHandle(C.hSceneDoc)
+    cPos = projTree.visualRect(projTree._getTreeIndex(C.hChapterDir)).center()
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiProjectTree, "dropIndicatorPosition",
+                   lambda *a: QAbstractItemView.DropIndicatorPosition.OnItem)
+        event = QDropEvent(cPos, action, mime, mouse, modifier)
+        projTree.dropEvent(event)
+        assert event.isAccepted() is True
+    assert tree[C.hSceneDoc].itemParent == C.hChapterDir  # type: ignore
+    assert projTree.projModel.rowHandles(C.hChapterDir) == [C.hChapterDoc, C.hSceneDoc]
+    assert [x.itemHandle for x in tree.iterChildren(C.hChapterDir)] == [C.hChapterDoc, C.hSceneDoc]
+
+    # Drop the scene above the chapter document
+    dPos = projTree.visualRect(projTree._getTreeIndex(C.hChapterDoc)).center()
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiProjectTree, "dropIndicatorPosition",
+                   lambda *a: QAbstractItemView.DropIndicatorPosition.AboveItem)
+        projTree.dropEvent(QDropEvent(dPos, action, mime, mouse, modifier))
+    assert projTree.projModel.rowHandles(C.hChapterDir) == [C.hSceneDoc, C.hChapterDoc]
+    assert [x.itemHandle for x in tree.iterChildren(C.hChapterDir)] == [C.hSceneDoc, C.hChapterDoc]
+
+    # Drop both below the title page
+    projTree.clearSelection()
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hChapterDoc), SELECT)
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hSceneDoc), SELECT)
+    tPos = projTree.visualRect(projTree._getTreeIndex(C.hTitlePage)).center()
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiProjectTree, "dropIndicatorPosition",
+                   lambda *a: QAbstractItemView.DropIndicatorPosition.BelowItem)
+        projTree.dropEvent(QDropEvent(tPos, action, mime, mouse, modifier))
+    novelOrder = [C.hTitlePage, C.hSceneDoc, C.hChapterDoc, C.hChapterDir]
+    assert [x.itemHandle for x in tree.iterChildren(C.hNovelRoot)] == novelOrder
+    assert projTree.projModel.rowHandles(C.hNovelRoot) == novelOrder
+    assert projTree.projModel.rowHandles(C.hChapterDir) == []
+
+    # Cannot drop a folder into itself
+    caplog.clear()
+    projTree.setSelectedHandle(C.hChapterDir)
+    projTree.setExpanded(projTree._getTreeIndex(C.hChapterDir), True)
+    with monkeypatch.context() as mp:
+        mp.setattr(GuiProjectTree, "dropIndicatorPosition",
+                   lambda *a: QAbstractItemView.DropIndicatorPosition.OnItem)
+        cPos = projTree.visualRect(projTree._getTreeIndex(C.hChapterDir)).center()
+        event = QDropEvent(cPos, action, mime, mouse, modifier)
+        projTree.dropEvent(event)
+        assert event.isAccepted() is False
+    assert "Cannot move an item into itself" in caplog.text
+    assert tree[C.hChapterDir].itemParent == C.hNovelRoot  # type: ignore
+
     # qtbot.stop()
 
 # END Test testGuiProjTree_DragAndDrop
@@ -1002,27 +1062,27 @@ def testGuiProjTree_Other(qtbot, monkeypatch, nwGUI: GuiMain, projPath, mockRnd)
 
     # Try to open a file with nothings selected
     projTree.clearSelection()
-    projTree._treeDoubleClick(QTreeWidgetItem(), 0)
+    projTree._treeDoubleClick(QModelIndex())
     assert nwGUI.docEditor.docHandle is None
 
     # When the item cannot be found
-    projTree._getTreeItem(C.hTitlePage).setSelected(True)  # type: ignore
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hTitlePage), SELECT)
     with monkeypatch.context() as mp:
         mp.setattr("novelwriter.core.tree.NWTree.__getitem__", lambda *a: None)
-        projTree._treeDoubleClick(QTreeWidgetItem(), 0)
+        projTree._treeDoubleClick(QModelIndex())
         assert nwGUI.docEditor.docHandle is None
 
     # Successfully open a file
-    projTree._treeDoubleClick(projTree._getTreeItem(C.hTitlePage), 0)
+    projTree._treeDoubleClick(projTree._getTreeIndex(C.hTitlePage))
     assert nwGUI.docEditor.docHandle == C.hTitlePage
-    projTree._getTreeItem(C.hTitlePage).setSelected(False)  # type: ignore
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hTitlePage), DESELECT)
 
     # A non-file item should be expanded instead
-    projTree._getTreeItem(C.hNovelRoot).setExpanded(False)  # type: ignore
-    projTree._getTreeItem(C.hNovelRoot).setSelected(True)  # type: ignore
-    projTree._treeDoubleClick(projTree._getTreeItem(C.hNovelRoot), 1)
+    projTree.setExpanded(projTree._getTreeIndex(C.hNovelRoot), False)
+    projTree.selectionModel().select(projTree._getTreeIndex(C.hNovelRoot), SELECT)
+    projTree._treeDoubleClick(projTree._getTreeIndex(C.hNovelRoot).siblingAtColumn(1))
     assert nwGUI.docEditor.docHandle == C.hTitlePage
-    assert projTree._getTreeItem(C.hNovelRoot).isExpanded() is True  # type: ignore
+    assert projTree.isExpanded(projTree._getTreeIndex(C.hNovelRoot)) is True
 
     # Navigate the Tree
     # =================
@@ -1081,7 +1141,7 @@ def testGuiProjTree_Other(qtbot, monkeypatch, nwGUI: GuiMain, projPath, mockRnd)
     # ===================
 
     eType = QEvent.Type.MouseButtonPress
-    pos = projTree.visualItemRect(projTree._getTreeItem(C.hChapterDoc)).center()
+    pos = projTree.visualRect(projTree._getTreeIndex(C.hChapterDoc)).center()
     button = Qt.MouseButton.MiddleButton
     modifier = Qt.KeyboardModifier.NoModifier
 
@@ -1096,7 +1156,7 @@ def testGuiProjTree_Other(qtbot, monkeypatch, nwGUI: GuiMain, projPath, mockRnd)
     event = QMouseEvent(eType, pos, button, button, modifier)
     projTree.setSelectedHandle(C.hChapterDoc)
     projTree.mousePressEvent(event)
-    assert projTree.selectedItems() == []
+    assert projTree.selectionModel().selectedRows() == []
 
     # Rename Item
     # ===========
@@ -1158,7 +1218,7 @@ def testGuiProjTree_ContextMenu(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     assert SHARED.project.tree[hSubNote].itemParent == hNovelNote  # type: ignore
 
     def itemPos(tHandle):
-        return projTree.visualItemRect(projTree._getTreeItem(tHandle)).center()
+        return projTree.visualRect(projTree._getTreeIndex(tHandle)).center()
 
     # Pop the menu
     with monkeypatch.context() as mp:
@@ -1175,8 +1235,8 @@ def testGuiProjTree_ContextMenu(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
         assert projTree._openContextMenu(itemPos(C.hNovelRoot)) is True
 
         # Open Multi-Select Menu
-        projTree._getTreeItem(hNovelNote).setSelected(True)
-        projTree._getTreeItem(hSubNote).setSelected(True)
+        projTree.selectionModel().select(projTree._getTreeIndex(hNovelNote), SELECT)
+        projTree.selectionModel().select(projTree._getTreeIndex(hSubNote), SELECT)
         assert projTree._openContextMenu(itemPos(hCharNote)) is True
 
         # Check the keyboard shortcut handler as well
@@ -1360,9 +1420,9 @@ def testGuiProjTree_ContextMenu(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     ctxMenu.buildMultiSelectMenu([hCharNote, hNovelNote, hSubNote])
 
     projTree.clearSelection()
-    projTree._getTreeItem(hCharNote).setSelected(True)
-    projTree._getTreeItem(hNovelNote).setSelected(True)
-    projTree._getTreeItem(hSubNote).setSelected(True)
+    projTree.selectionModel().select(projTree._getTreeIndex(hCharNote), SELECT)
+    projTree.selectionModel().select(projTree._getTreeIndex(hNovelNote), SELECT)
+    projTree.selectionModel().select(projTree._getTreeIndex(hSubNote), SELECT)
 
     # Item Active
     assert SHARED.project.tree[hCharNote].isActive is True  # type: ignore
@@ -1518,3 +1578,61 @@ def testGuiProjTree_Templates(qtbot, monkeypatch, nwGUI, projPath, mockRnd):
     # qtbot.stop()
 
 # END Test testGuiProjTree_Templates
+
+
+@pytest.mark.gui
+@pytest.mark.slow
+def testGuiProjTree_LargeProject(
+    record_property, qtbot, monkeypatch, nwGUI: GuiMain, projPath, mockRnd
+):
+    """Benchmark building the tree of a project with 20k items, which
+    must be populated lazily.
+    """
+    buildTestProject(nwGUI, projPath)
+    monkeypatch.setattr("random.getrandbits", random.Random(42).getrandbits)
+    projTree: GuiProjectTree = nwGUI.projView.projTree
+    projModel = projTree.projModel
+    project = SHARED.project
+
+    # Add 20k items in 200 collapsed folders
+    for i in range(200):
+        fHandle = project.newFolder(f"Folder {i}", C.hNovelRoot)
+        assert fHandle is not None
+        for j in range(99):
+            tHandle = project.newFile(f"File {i}.{j}", fHandle)
+            project.tree[tHandle].setWordCount(10)  # type: ignore
+    assert len(project.tree) > 20000
+    project.tree[C.hNovelRoot].setExpanded(True)  # type: ignore
+
+    tStart = time()
+    projTree.buildTree()
+    tBuild = time() - tStart
+    record_property("buildTime", tBuild)
+    assert tBuild < 0.5
+
+    # Only the roots and the children of the expanded novel root are
+    # fetched, but the word counts cover the whole tree
+    assert projModel.isFetched(C.hNovelRoot) is True
+    assert projModel.isFetched(fHandle) is False
+    assert projModel.rowCount(projTree._getTreeIndex(C.hNovelRoot)) == 202
+    assert projModel.hasChildren(projTree._getTreeIndex(fHandle)) is True
+    nIndex = projTree._getTreeIndex(C.hNovelRoot)
+    nWords = sum(nwItem.wordCount for nwItem in project.tree.iterSubtree(C.hNovelRoot))
+    assert nWords > 198000
+    assert projModel.data(nIndex, projModel.D_WORDS) == nWords
+
+    # Expanding a folder fetches its children
+    projTree.setExpanded(projTree._getTreeIndex(fHandle), True)
+    assert projModel.isFetched(fHandle) is True
+    assert len(projModel.rowHandles(fHandle)) == 99
+
+    # Looking up an item fetches its ancestors
+    tHandle = [x.itemHandle for x in project.tree.iterChildren(C.hNovelRoot)][10]
+    cHandle = [x.itemHandle for x in project.tree.iterChildren(tHandle)][50]
+    assert projTree.setSelectedHandle(cHandle) is True
+    assert projTree.getSelectedHandle() == cHandle
+    assert projModel.isFetched(tHandle) is True
+
+    # qtbot.stop()
+
+# END Test testGuiProjTree_LargeProject
@@ -20,6 +20,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 from __future__ import annotations
 
+import shutil
 import pytest
 
 from pathlib import Path
@@ -27,13 +28,15 @@ from pathlib import Path
 from mocked import causeOSError
 from tools import writeFile
 
-from PyQt5.QtGui import QColor, QIcon, QPalette, QPixmap
+from PyQt5.QtGui import QColor, QIcon, QPainter, QPalette, QPixmap
+from PyQt5.QtCore import QSize
 from PyQt5.QtWidgets import QApplication
 
-from novelwriter import CONFIG, SHARED
+from novelwriter import CONFIG, SHARED, __hexversion__
 from novelwriter.enum import nwItemClass, nwItemLayout, nwItemType
 from novelwriter.common import NWConfigParser
 from novelwriter.constants import nwLabels
+from novelwriter.gui.theme import GuiIcons
 
 
 @pytest.mark.gui
@@ -492,3 +495,106 @@ def testGuiTheme_LoadDecorations(qtbot, monkeypatch):
     # qtbot.stop()
 
 # END Test testGuiTheme_LoadDecorations
+
+
+@pytest.mark.gui
+def testGuiTheme_IconCache(qtbot, monkeypatch, caplog, tstPaths):
+    """Test the icon pixmap cache."""
+    cacheRoot = CONFIG.dataPath("cache") / "icons"
+    cachePath = cacheRoot / f"typicons_dark-{__hexversion__}"
+    shutil.rmtree(cacheRoot, ignore_errors=True)
+
+    # Caches of other themes and versions are removed on load
+    (cacheRoot / "typicons_light-0x020300f0").mkdir(parents=True)
+    (cacheRoot / "typicons_light-0x020300f0" / "stale-16x16.png").touch()
+    (cacheRoot / "stale-16x16.png").touch()
+    cachePath.mkdir()
+    (cachePath / "kept-16x16.png").touch()
+
+    iconCache = GuiIcons(SHARED.theme)
+    assert iconCache.loadTheme("typicons_dark") is True
+    assert list(cacheRoot.iterdir()) == [cachePath]
+    assert (cachePath / "kept-16x16.png").is_file()
+    digest = iconCache._fileDigest(iconCache._themeMap["add"])
+    assert isinstance(digest, str)
+
+    # Rasterise an icon, which saves it to the cache
+    qIcon = iconCache.getIcon("add")
+    assert qIcon.availableSizes() == []
+    qPix = qIcon.pixmap(20, 20)
+    assert qPix.width() == 20
+    assert qPix.height() == 20
+    assert (cachePath / f"{digest}-20x20.png").is_file()
+    assert qIcon.availableSizes() == [QSize(20, 20)]
+
+    # Other modes are generated from the normal pixmap
+    qPix = qIcon.pixmap(20, 20, QIcon.Mode.Disabled)
+    assert qPix.isNull() is False
+    assert qIcon.availableSizes(QIcon.Mode.Disabled) == [QSize(20, 20)]
+
+    # Copies of the icon keep the rendered pixmaps
+    qCopy = QIcon(qIcon)
+    qCopy.addPixmap(QPixmap(8, 8))
+    assert QSize(20, 20) in qCopy.availableSizes()
+
+    # Painting renders the size needed
+    qPix = QPixmap(32, 32)
+    painter = QPainter(qPix)
+    qIcon.paint(painter, 0, 0, 32, 32)
+    painter.end()
+    assert (cachePath / f"{digest}-32x32.png").is_file()
+
+    # A new cache loads the pixmaps without parsing the SVG
+    iconCache = GuiIcons(SHARED.theme)
+    assert iconCache.loadTheme("typicons_dark") is True
+    with monkeypatch.context() as mp:
+        mp.setattr("novelwriter.gui.theme.QSvgRenderer", causeOSError)
+        qPix = iconCache.getIcon("add").pixmap(20, 20)
+        assert qPix.isNull() is False
+        assert qPix.width() == 20
+
+    # Preload the theme icons at the base size
+    iPx = SHARED.theme.baseIconSize
+    iconCache.preloadIcons()
+    for iconKey in iconCache._themeMap:
+        assert QSize(iPx, iPx) in iconCache.getIcon(iconKey).availableSizes()
+
+    # Failing to save to the cache is not an error
+    caplog.clear()
+    with monkeypatch.context() as mp:
+        mp.setattr("pathlib.Path.mkdir", causeOSError)
+        qPix = iconCache.getIcon("add").pixmap(25, 25)
+        assert qPix.width() == 25
+    assert not (cachePath / f"{digest}-25x25.png").exists()
+    assert "ERROR" not in caplog.text
+
+    # Files that cannot be read are loaded without the cache
+    iconCache = GuiIcons(SHARED.theme)
+    assert iconCache.loadTheme("typicons_dark") is True
+    with monkeypatch.context() as mp:
+        mp.setattr("pathlib.Path.read_bytes", causeOSError)
+        qIcon = iconCache.getIcon("add")
+        assert qIcon.isNull() is False
+        assert qIcon.pixmap(20, 20).isNull() is False
+    assert "Could not read icon file" in caplog.text
+
+    # Decorations are also cached
+    decoFile = cachePath / f"{iconCache._fileDigest(iconCache._themeMap['deco_doc_h1'])}"
+    qPix = iconCache.loadDecoration("deco_doc_h1", h=30)
+    assert qPix.height() == 30
+    assert Path(f"{decoFile}-deco-0x30.png").is_file()
+    with monkeypatch.context() as mp:
+        mp.setattr("PyQt5.QtGui.QPixmap.scaledToHeight", causeOSError)
+        qPix = iconCache.loadDecoration("deco_doc_h1", h=30)
+        assert qPix.height() == 30
+
+    # Failing to prune the cache is not an error
+    (cacheRoot / "stale-16x16.png").touch()
+    with monkeypatch.context() as mp:
+        mp.setattr("pathlib.Path.unlink", causeOSError)
+        assert iconCache.loadTheme("typicons_dark") is True
+    assert (cacheRoot / "stale-16x16.png").is_file()
+
+    shutil.rmtree(cacheRoot)
+
+# END Test testGuiTheme_IconCache